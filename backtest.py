@@ -0,0 +1,297 @@
+"""
+🧪 Офлайн backtest / replay арбітражної стратегії XT vs DEX
+Проганяє записану історію спредів (spread_recorder) через ті самі фільтри входу,
+рейтинг і правила закриття (strategy_rules) з моделлю виконання ProfitCalculator.
+Кандидати одного вікна rank_window_sec ранжуються opportunity_score перед лімітом
+max_open_positions - як best_opportunities у живому боті.
+Працює швидше за реальний час; перебір параметрів - паралельно в пулі процесів.
+
+Приклад:
+    python backtest.py --start 2025-10-01 --end 2025-10-07
+    python backtest.py --sweep min_spread=1.5,2,2.5 --sweep convergence_spread_pct=0.3,0.5
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from typing import Dict, List, Optional
+
+from config import SPREAD_HISTORY_DIR, MONITOR_INTERVAL_SEC
+from profit_calculator import ProfitCalculator
+from spread_recorder import iter_segments, load_symbol_names
+from strategy_rules import (
+    StrategyParams, check_realistic_opportunity, is_spread_in_entry_range,
+    entry_side, opportunity_score, evaluate_exit
+)
+
+
+class BacktestEngine:
+    """Replay одного набору параметрів по записаних сегментах"""
+
+    def __init__(self, params: StrategyParams = None, base_dir: str = SPREAD_HISTORY_DIR,
+                 slippage_level: str = 'medium', monitor_interval_sec: float = MONITOR_INTERVAL_SEC,
+                 keep_trades: bool = True, rank_window_sec: float = 1.0):
+        self.params = params or StrategyParams()
+        self.base_dir = base_dir
+        self.slippage_level = slippage_level
+        self.monitor_interval_sec = monitor_interval_sec
+        self.keep_trades = keep_trades
+        self.rank_window_sec = rank_window_sec
+        self.calculator = ProfitCalculator()
+        self.symbol_names = load_symbol_names(base_dir)
+
+        self.open_positions: Dict[int, Dict] = {}
+        self.candidates: Dict[int, tuple] = {}  # symbol_id -> (score, рядок) поточного вікна ранжування
+        self.candidates_window = None
+        self.trades: List[Dict] = []
+        self.equity = 0.0
+        self.peak_equity = 0.0
+        self.max_drawdown = 0.0
+        self.rows_processed = 0
+        self.signals_seen = 0
+        self.rejected_fake = 0
+
+    def _open(self, symbol_id: int, ts: float, xt_price: float, dex_price: float, spread: float, liquidity: float,
+              score: float):
+        params = self.params
+        side = entry_side(xt_price, dex_price)
+        notional = params.order_amount * params.leverage
+        fill = self.calculator.simulate_futures_fill(xt_price, side, True, notional, self.slippage_level)
+        self.open_positions[symbol_id] = {
+            'symbol': self.symbol_names[symbol_id] if symbol_id < len(self.symbol_names) else str(symbol_id),
+            'side': side,
+            'avg_entry': fill['fill_price'],
+            'size_usdt': notional,
+            'leverage': params.leverage,
+            'entry_spread_pct': spread,
+            'entry_fee': fill['fee'],
+            'opened_at': ts,
+            'entry_time': ts,
+            'expires_at': ts + params.position_max_age_sec,
+            'score': score,
+            'last_check': ts
+        }
+
+    def _close(self, symbol_id: int, ts: float, xt_price: float, exit_code: str, reason: str):
+        position = self.open_positions.pop(symbol_id)
+        fill = self.calculator.simulate_futures_fill(xt_price, position['side'], False,
+                                                     position['size_usdt'], self.slippage_level)
+        entry_price = position['avg_entry']
+        exit_price = fill['fill_price']
+        if position['side'] == 'LONG':
+            gross = position['size_usdt'] * (exit_price - entry_price) / entry_price
+        else:
+            gross = position['size_usdt'] * (entry_price - exit_price) / entry_price
+        fees = position['entry_fee'] + fill['fee']
+        net = gross - fees
+        margin = position['size_usdt'] / position['leverage']
+
+        self.equity += net
+        self.peak_equity = max(self.peak_equity, self.equity)
+        self.max_drawdown = max(self.max_drawdown, self.peak_equity - self.equity)
+
+        trade = {
+            'symbol': position['symbol'],
+            'side': position['side'],
+            'opened_at': position['opened_at'],
+            'closed_at': ts,
+            'entry_price': entry_price,
+            'exit_price': exit_price,
+            'entry_spread_pct': position['entry_spread_pct'],
+            'score': position['score'],
+            'exit_reason': exit_code,
+            'reason': reason,
+            'pnl_usdt': net,
+            'fees_usdt': fees,
+            'roi_pct': net / margin * 100 if margin else 0.0
+        }
+        if self.keep_trades:
+            self.trades.append(trade)
+        else:
+            self.trades.append({'exit_reason': exit_code, 'pnl_usdt': net, 'roi_pct': trade['roi_pct']})
+
+    def _flush_candidates(self):
+        """Відкриває кандидатів вікна від найкращого рейтингу, поки є вільні слоти"""
+        ranked = sorted(self.candidates.items(), key=lambda item: item[1][0], reverse=True)
+        self.candidates = {}
+        for symbol_id, (score, row) in ranked:
+            if len(self.open_positions) >= self.params.max_open_positions:
+                break
+            if symbol_id not in self.open_positions:
+                self._open(symbol_id, *row, score)
+
+    def _on_row(self, ts: float, symbol_id: int, xt_price: float, dex_price: float, spread: float, liquidity: float):
+        window = int(ts // self.rank_window_sec)
+        if window != self.candidates_window:
+            self._flush_candidates()
+            self.candidates_window = window
+
+        position = self.open_positions.get(symbol_id)
+        if position is not None:
+            if xt_price <= 0:
+                return  # Пропуск ціни XT - не оцінюємо вихід (і не закриваємо за нульовою ціною)
+            # Моніторинг з тим же інтервалом що й monitor_open_positions
+            if ts - position['last_check'] < self.monitor_interval_sec:
+                return
+            position['last_check'] = ts
+            decision = evaluate_exit(position, ts, xt_price, spread, self.params)
+            if decision:
+                exit_code, reason, _ = decision
+                self._close(symbol_id, ts, xt_price, exit_code, reason)
+            return
+
+        if xt_price <= 0 or dex_price <= 0 or not is_spread_in_entry_range(spread, self.params):
+            return
+        self.signals_seen += 1
+
+        symbol = self.symbol_names[symbol_id] if symbol_id < len(self.symbol_names) else str(symbol_id)
+        # Об'єм 24h не записується - фільтр об'єму в replay не застосовується
+        is_realistic, _ = check_realistic_opportunity(symbol, spread, xt_price, dex_price,
+                                                      liquidity, float('inf'), self.params)
+        if not is_realistic:
+            self.rejected_fake += 1
+            return
+        score = opportunity_score(spread, liquidity, 0.0)
+        if score > self.candidates.get(symbol_id, (float('-inf'),))[0]:
+            self.candidates[symbol_id] = (score, (ts, xt_price, dex_price, spread, liquidity))
+
+    def run(self, start_day: str = None, end_day: str = None) -> Dict:
+        """Проганяє всі сегменти в межах дат і повертає підсумок"""
+        started = time.time()
+        first_ts = last_ts = None
+        last_prices: Dict[int, float] = {}
+
+        for day, columns in iter_segments(start_day, end_day, self.base_dir):
+            rows = zip(columns['ts'].tolist(), columns['symbol_id'].tolist(), columns['xt_price'].tolist(),
+                       columns['dex_price'].tolist(), columns['spread'].tolist(), columns['liquidity'].tolist())
+            for ts, symbol_id, xt_price, dex_price, spread, liquidity in rows:
+                if first_ts is None:
+                    first_ts = ts
+                last_ts = ts
+                if xt_price > 0:
+                    last_prices[symbol_id] = xt_price
+                self._on_row(ts, symbol_id, xt_price, dex_price, spread, liquidity)
+                self.rows_processed += 1
+
+        self._flush_candidates()
+        # Позиції відкриті на кінець даних закриваємо за останньою додатною ціною
+        for symbol_id in list(self.open_positions):
+            last_price = last_prices.get(symbol_id) or self.open_positions[symbol_id]['avg_entry']
+            self._close(symbol_id, last_ts, last_price, 'end_of_data', 'Кінець даних')
+
+        return self.summary(first_ts, last_ts, time.time() - started)
+
+    def summary(self, first_ts: Optional[float], last_ts: Optional[float], elapsed_sec: float) -> Dict:
+        pnls = [t['pnl_usdt'] for t in self.trades]
+        wins = [p for p in pnls if p > 0]
+        exits: Dict[str, int] = {}
+        for trade in self.trades:
+            exits[trade['exit_reason']] = exits.get(trade['exit_reason'], 0) + 1
+        replay_span = (last_ts - first_ts) if first_ts is not None and last_ts is not None else 0.0
+
+        return {
+            'params': self.params.to_dict(),
+            'slippage_level': self.slippage_level,
+            'rows': self.rows_processed,
+            'signals': self.signals_seen,
+            'rejected_fake': self.rejected_fake,
+            'trades': len(self.trades),
+            'win_rate_pct': len(wins) / len(pnls) * 100 if pnls else 0.0,
+            'total_pnl_usdt': sum(pnls),
+            'avg_pnl_usdt': sum(pnls) / len(pnls) if pnls else 0.0,
+            'avg_roi_pct': sum(t['roi_pct'] for t in self.trades) / len(self.trades) if self.trades else 0.0,
+            'max_drawdown_usdt': self.max_drawdown,
+            'exits': exits,
+            'replay_span_sec': replay_span,
+            'elapsed_sec': elapsed_sec,
+            'speedup': replay_span / elapsed_sec if elapsed_sec > 0 else 0.0
+        }
+
+
+def run_backtest(params: StrategyParams = None, start_day: str = None, end_day: str = None,
+                 base_dir: str = SPREAD_HISTORY_DIR, slippage_level: str = 'medium',
+                 include_trades: bool = False) -> Dict:
+    """Один прогін replay з підсумком (та угодами якщо include_trades)"""
+    engine = BacktestEngine(params, base_dir, slippage_level, keep_trades=include_trades)
+    result = engine.run(start_day, end_day)
+    if include_trades:
+        result['trade_log'] = engine.trades
+    return result
+
+
+def _run_sweep_point(args) -> Dict:
+    """Воркер пулу процесів (верхній рівень модуля для pickle)"""
+    overrides, start_day, end_day, base_dir, slippage_level = args
+    params = replace(StrategyParams(), **overrides)
+    result = run_backtest(params, start_day, end_day, base_dir, slippage_level)
+    result['overrides'] = overrides
+    return result
+
+
+def run_parameter_sweep(grid: Dict[str, List], start_day: str = None, end_day: str = None,
+                        base_dir: str = SPREAD_HISTORY_DIR, slippage_level: str = 'medium',
+                        max_workers: int = None) -> List[Dict]:
+    """
+    Перебір параметрів по сітці, паралельно у пулі процесів
+    grid: {'min_spread': [1.5, 2.0], 'convergence_spread_pct': [0.3, 0.5]}
+    """
+    keys = list(grid.keys())
+    points = [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+    tasks = [(point, start_day, end_day, base_dir, slippage_level) for point in points]
+    logging.info(f"🧪 Перебір {len(points)} наборів параметрів у {max_workers or os.cpu_count()} процесах")
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        results = list(pool.map(_run_sweep_point, tasks))
+
+    results.sort(key=lambda r: r['total_pnl_usdt'], reverse=True)
+    return results
+
+
+def _parse_sweep_args(values: List[str]) -> Dict[str, List]:
+    """['min_spread=1.5,2'] -> {'min_spread': [1.5, 2.0]}"""
+    defaults = StrategyParams().to_dict()
+    grid = {}
+    for item in values:
+        name, _, raw = item.partition('=')
+        if name not in defaults:
+            raise ValueError(f"Невідомий параметр стратегії: {name}")
+        kind = type(defaults[name])
+        if kind is bool:
+            grid[name] = [v.strip().lower() in ('1', 'true', 'yes') for v in raw.split(',')]
+        else:
+            grid[name] = [kind(float(v)) if kind is int else kind(v) for v in raw.split(',')]
+    return grid
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest / replay арбітражної стратегії")
+    parser.add_argument('--start', help="Перший день YYYY-MM-DD")
+    parser.add_argument('--end', help="Останній день YYYY-MM-DD")
+    parser.add_argument('--data-dir', default=SPREAD_HISTORY_DIR)
+    parser.add_argument('--slippage', default='medium', choices=['low', 'medium', 'high'])
+    parser.add_argument('--sweep', action='append', default=[], help="param=v1,v2 (можна кілька)")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--output', default='backtest_results.json')
+    args = parser.parse_args()
+
+    if args.sweep:
+        results = run_parameter_sweep(_parse_sweep_args(args.sweep), args.start, args.end,
+                                      args.data_dir, args.slippage, args.workers)
+    else:
+        results = [run_backtest(None, args.start, args.end, args.data_dir, args.slippage, include_trades=True)]
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+
+    best = results[0] if results else {}
+    print(f"🧪 Прогонів: {len(results)} | найкращий P&L: ${best.get('total_pnl_usdt', 0):.2f} "
+          f"({best.get('trades', 0)} угод, win {best.get('win_rate_pct', 0):.1f}%) -> {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,519 @@
+"""
+📏 Benchmark сканера: повний прохід start_workers / symbol_worker по N синтетичних символах
+XT - in-process симулятор (xt_simulator), DexScreener / CoinGecko / Telegram Bot API -
+локальні HTTP заглушки з налаштовуваною затримкою та часткою помилок.
+Звіт: символів/сек, p50/p99 латентність символу, запити по провайдерах, пік потоків і RSS.
+Результати дописуються в BENCHMARK_RESULTS_FILE для порівняння між комітами.
+--importtime: замість прогону - час холодного імпорту точок входу (python -X importtime)
+з найдорожчими пакетами, щоб важкі залежності не поверталися в шлях старту.
+
+Приклад:
+    python benchmark.py --symbols 1000
+    python benchmark.py --symbols 200 --dex-latency-ms 150 --dex-error-rate 0.05 --sweeps 2
+    python benchmark.py --importtime bot main telegram_admin
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import urlparse, parse_qs
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+PROVIDERS = ('dexscreener', 'coingecko', 'telegram')
+IMPORTTIME_MODULES = ('bot', 'main', 'telegram_admin')
+
+
+# ------------------------------------------------------
+# 🌐 ЛОКАЛЬНІ ЗАГЛУШКИ ПРОВАЙДЕРІВ
+# ------------------------------------------------------
+class SyntheticDexPrices:
+    """DEX ціни навколо mid симулятора XT: шум + рідкісні великі розбіжності (сигнали)"""
+
+    def __init__(self, market, noise_pct: float = 0.3, signal_rate: float = 0.02,
+                 signal_spread_pct: float = 3.0, missing_rate: float = 0.1, seed: int = 7):
+        self.market = market
+        self.noise_pct = noise_pct
+        self.signal_rate = signal_rate
+        self.signal_spread_pct = signal_spread_pct
+        self.missing_rate = missing_rate
+        self.seed = seed
+        self.rng = random.Random(seed)
+
+    def _symbol_rng(self, base: str) -> random.Random:
+        digest = hashlib.md5(f"{self.seed}:{base}".encode()).hexdigest()
+        return random.Random(int(digest[:8], 16))
+
+    def pair(self, base: str) -> Optional[Dict]:
+        """Пара DexScreener для базового символу (None - токена немає на DEX)"""
+        symbol = f"{base}/USDT:USDT"
+        if symbol not in self.market.markets:
+            return None
+        symbol_rng = self._symbol_rng(base)
+        if symbol_rng.random() < self.missing_rate:
+            return None
+
+        price = self.market.mid_price(symbol) * (1 + self.rng.gauss(0.0, self.noise_pct) / 100)
+        if self.rng.random() < self.signal_rate:
+            price *= 1 + self.rng.choice((-1, 1)) * self.signal_spread_pct / 100
+        liquidity = 10 ** symbol_rng.uniform(3.5, 7)
+        volume_24h = 10 ** symbol_rng.uniform(3.5, 7.5)
+        txns = int(volume_24h / 150)
+        address = "0x" + hashlib.sha1(base.encode()).hexdigest()
+        return {
+            'chainId': 'bsc',
+            'dexId': 'pancakeswap',
+            'pairAddress': "0x" + hashlib.sha1(f"pair:{base}".encode()).hexdigest(),
+            'baseToken': {'symbol': base, 'address': address, 'name': base},
+            'quoteToken': {'symbol': 'USDT'},
+            'priceUsd': f"{price:.12g}",
+            'liquidity': {'usd': liquidity},
+            'volume': {'h24': volume_24h, 'h1': volume_24h / 24},
+            'txns': {'h24': {'buys': txns // 2 + 1, 'sells': txns // 2}},
+            'marketCap': liquidity * 20
+        }
+
+
+class MockProviderServer:
+    """DexScreener, CoinGecko та Telegram Bot API на одному локальному порту (префікс шляху = провайдер)"""
+
+    def __init__(self, latency_ms: Dict[str, float], error_rate: Dict[str, float],
+                 host: str = '127.0.0.1', port: int = 0):
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.dex_prices: Optional[SyntheticDexPrices] = None
+        self.counts = {provider: 0 for provider in PROVIDERS}
+        self.errors = {provider: 0 for provider in PROVIDERS}
+        self.lock = threading.Lock()
+        self.rng = random.Random()
+        self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def env(self) -> Dict[str, str]:
+        """Змінні оточення для config.py"""
+        return {
+            'DEXSCREENER_API_URL': f"{self.base_url}/dexscreener/latest/dex",
+            'COINGECKO_API_URL': f"{self.base_url}/coingecko/api/v3",
+            'TELEGRAM_API_URL': f"{self.base_url}/telegram"
+        }
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="benchmark-mock", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                server._dispatch(self)
+
+            def do_POST(self):
+                server._dispatch(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def _dispatch(self, handler: BaseHTTPRequestHandler):
+        if handler.command == 'POST':
+            length = int(handler.headers.get('Content-Length') or 0)
+            if length:
+                handler.rfile.read(length)
+        url = urlparse(handler.path)
+        provider = url.path.strip('/').split('/')[0]
+        if provider not in self.counts:
+            self._reply(handler, 404, {'error': 'unknown provider'})
+            return
+
+        with self.lock:
+            self.counts[provider] += 1
+        delay = self.latency_ms.get(provider, 0.0)
+        if delay > 0:
+            time.sleep(delay * self.rng.uniform(0.5, 1.5) / 1000)
+        if self.rng.random() < self.error_rate.get(provider, 0.0):
+            with self.lock:
+                self.errors[provider] += 1
+            self._reply(handler, self.rng.choice((429, 500, 503)), {'error': 'simulated failure'})
+            return
+
+        query = parse_qs(url.query)
+        if provider == 'dexscreener':
+            base = (query.get('q') or [''])[0].upper()
+            pair = self.dex_prices.pair(base) if self.dex_prices else None
+            self._reply(handler, 200, {'schemaVersion': '1.0.0', 'pairs': [pair] if pair else []})
+        elif provider == 'coingecko':
+            ids = (query.get('ids') or [''])[0].split(',')
+            self._reply(handler, 200, {i: {'usd': 1.0, 'usd_market_cap': 1e9, 'usd_24h_vol': 1e7,
+                                           'usd_24h_change': 0.0} for i in ids if i})
+        else:
+            with self.lock:
+                message_id = self.counts['telegram']
+            self._reply(handler, 200, {'ok': True, 'result': {'message_id': message_id}})
+
+    @staticmethod
+    def _reply(handler: BaseHTTPRequestHandler, status: int, payload: Dict):
+        body = json.dumps(payload).encode()
+        handler.send_response(status)
+        handler.send_header('Content-Type', 'application/json')
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+
+# ------------------------------------------------------
+# 📊 ВИМІРЮВАННЯ
+# ------------------------------------------------------
+def _current_rss_mb() -> float:
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+    except (OSError, ValueError, AttributeError):
+        return 0.0
+
+
+class ResourceSampler:
+    """Фоновий збір піку потоків та RSS"""
+
+    def __init__(self, interval_sec: float = 0.1):
+        self.interval_sec = interval_sec
+        self.peak_threads = 0
+        self.peak_rss_mb = 0.0
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="benchmark-sampler", daemon=True)
+
+    def _loop(self):
+        while not self._stop_event.is_set():
+            self.peak_threads = max(self.peak_threads, threading.active_count())
+            self.peak_rss_mb = max(self.peak_rss_mb, _current_rss_mb())
+            self._stop_event.wait(self.interval_sec)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._thread.join(timeout=1)
+        try:
+            import resource
+            self.peak_rss_mb = max(self.peak_rss_mb, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)
+        except (ImportError, AttributeError):
+            pass
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Перцентиль методом найближчого рангу (значення вже відсортовані)"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def _git_revision() -> Dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR,
+                                capture_output=True, text=True, timeout=10).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=REPO_DIR,
+                                    capture_output=True, text=True, timeout=30).stdout.strip())
+        return {'commit': commit or None, 'dirty': dirty}
+    except Exception:
+        return {'commit': None, 'dirty': None}
+
+
+# ------------------------------------------------------
+# 🚀 ПРОГІН
+# ------------------------------------------------------
+def run_benchmark(args) -> Dict:
+    """Запускає бота проти заглушок у тимчасовій робочій папці та повертає звіт"""
+    server = MockProviderServer(
+        latency_ms={'dexscreener': args.dex_latency_ms, 'coingecko': args.dex_latency_ms,
+                    'telegram': args.telegram_latency_ms},
+        error_rate={'dexscreener': args.dex_error_rate, 'coingecko': args.dex_error_rate,
+                    'telegram': args.telegram_error_rate}
+    )
+    server.start()
+
+    # config.py читає оточення під час імпорту - налаштовуємо до import bot
+    os.environ.update(server.env())
+    os.environ.update({
+        'XT_SIMULATOR': 'true',
+        'XT_SIM_SYMBOLS': str(args.symbols),
+        'XT_SIM_LATENCY_MS': str(args.xt_latency_ms),
+        'XT_SIM_ERROR_RATE': str(args.xt_error_rate),
+        'XT_SIM_RATE_LIMIT_PER_SEC': str(args.xt_rate_limit),
+        'TELEGRAM_BOT_TOKEN': 'benchmark',
+        'TELEGRAM_CHAT_ID': '1'
+    })
+    os.environ.setdefault('ADMIN_PASSWORD', 'benchmark')
+
+    # Позиції, чорний список та історія спредів пишуться відносно cwd - не чіпаємо робочі файли
+    workdir = args.workdir or tempfile.mkdtemp(prefix='tkinterbit-bench-')
+    os.makedirs(workdir, exist_ok=True)
+    os.chdir(workdir)
+    if REPO_DIR not in sys.path:
+        sys.path.insert(0, REPO_DIR)
+
+    sampler = ResourceSampler()
+    sampler.start()
+
+    import_started = time.perf_counter()
+    import bot
+    import xt_simulator
+    import_sec = time.perf_counter() - import_started
+    logging.getLogger().setLevel(getattr(logging, args.log_level))
+
+    server.dex_prices = SyntheticDexPrices(xt_simulator.get_shared_market(), args.dex_noise_pct,
+                                           args.signal_rate, args.signal_spread_pct, args.dex_missing_rate)
+
+    latencies: List[float] = []
+    latencies_lock = threading.Lock()
+    done_event = threading.Event()
+    original_worker = bot.symbol_worker
+
+    processed: Dict[str, int] = {}
+
+    def timed_worker(symbol, observation=None):
+        started = time.perf_counter()
+        try:
+            original_worker(symbol, observation)
+        finally:
+            with latencies_lock:
+                latencies.append(time.perf_counter() - started)
+                processed[symbol] = processed.get(symbol, 0) + 1
+            # Набір сканування звужується (прунінг, негативний кеш DEX) - чекаємо sweeps проходів по ньому
+            if bot.markets and all(processed.get(s, 0) >= args.sweeps for s in bot.scan_universe()):
+                done_event.set()
+
+    # start_workers бере symbol_worker з глобалів модуля під час запуску потоку
+    bot.symbol_worker = timed_worker
+
+    started = time.perf_counter()
+    scanner = threading.Thread(target=bot.start_workers, name="benchmark-scanner", daemon=True)
+    scanner.start()
+    finished = done_event.wait(timeout=args.timeout)
+    elapsed = time.perf_counter() - started
+    try:
+        bot.stop_all_workers()
+    except Exception as e:
+        logging.warning(f"⚠️ Помилка зупинки воркерів: {e}")
+    sampler.stop()
+    server.stop()
+
+    xt_calls: Dict[str, int] = {}
+    rate_limited = 0
+    accounts = {id(a): a for a in (bot.xt_account_1, bot.xt_account_2, bot.xt) if hasattr(a, 'stats')}
+    for account in accounts.values():
+        stats = account.stats()
+        rate_limited += stats['rate_limited']
+        for method, count in stats['calls'].items():
+            xt_calls[method] = xt_calls.get(method, 0) + count
+
+    with latencies_lock:
+        samples = sorted(latencies)
+    requests_made = {'xt': sum(xt_calls.values()), **server.counts}
+
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        **_git_revision(),
+        'python': sys.version.split()[0],
+        'params': {k: v for k, v in vars(args).items() if k not in ('output', 'workdir', 'log_level')},
+        'completed': finished,
+        'symbols': len(bot.markets),
+        'symbols_processed': len(samples),
+        'elapsed_sec': round(elapsed, 3),
+        'import_sec': round(import_sec, 3),
+        'symbols_per_sec': round(len(samples) / elapsed, 3) if elapsed > 0 else 0.0,
+        'latency_ms': {
+            'p50': round(percentile(samples, 50) * 1000, 2),
+            'p90': round(percentile(samples, 90) * 1000, 2),
+            'p99': round(percentile(samples, 99) * 1000, 2),
+            'max': round(samples[-1] * 1000, 2) if samples else 0.0,
+            'mean': round(sum(samples) / len(samples) * 1000, 2) if samples else 0.0
+        },
+        'requests': requests_made,
+        'requests_per_symbol': {k: round(v / len(samples), 3) for k, v in requests_made.items()} if samples else {},
+        'xt_calls': xt_calls,
+        'xt_rate_limited': rate_limited,
+        'provider_errors': dict(server.errors),
+        'peak_threads': sampler.peak_threads,
+        'peak_rss_mb': round(sampler.peak_rss_mb, 1),
+        'workdir': workdir
+    }
+
+
+def save_result(result: Dict, path: str) -> Optional[Dict]:
+    """Дописує результат в історію; повертає попередній прогін з тими ж параметрами"""
+    history = []
+    try:
+        with open(path, 'r') as f:
+            history = json.load(f)
+    except (OSError, ValueError):
+        history = []
+    previous = next((r for r in reversed(history) if r.get('params') == result['params']), None)
+    history.append(result)
+    with open(path, 'w') as f:
+        json.dump(history, f, indent=2, ensure_ascii=False)
+    return previous
+
+
+# ------------------------------------------------------
+# ⚡ ЧАС ІМПОРТУ
+# ------------------------------------------------------
+def parse_importtime(stderr: str) -> List[Dict]:
+    """Рядки `-X importtime` ("import time: self [us] | cumulative | package") -> записи в мс"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # Заголовок таблиці
+        name = parts[2].rstrip()
+        rows.append({
+            'module': name.strip(),
+            'depth': (len(name) - len(name.lstrip()) - 1) // 2,
+            'self_ms': int(parts[0]) / 1000,
+            'cumulative_ms': int(parts[1]) / 1000
+        })
+    return rows
+
+
+def measure_import_time(module: str, env: Dict, workdir: str, top: int = 10) -> Dict:
+    """
+    Холодний імпорт модуля в окремому інтерпретаторі: загальний час і top пакетів за власним часом
+    (сума по всіх підмодулях пакета - видно, яка залежність тягне старт)
+    """
+    started = time.perf_counter()
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'], cwd=workdir,
+                               env=env, capture_output=True, text=True, timeout=300)
+    wall_ms = (time.perf_counter() - started) * 1000
+    rows = parse_importtime(completed.stderr)
+
+    packages: Dict[str, float] = {}
+    for row in rows:
+        package = row['module'].split('.')[0]
+        packages[package] = packages.get(package, 0.0) + row['self_ms']
+    root = next((row for row in reversed(rows) if row['depth'] == 0 and row['module'] == module), None)
+    errors = [line for line in completed.stderr.splitlines() if line and not line.startswith('import time:')]
+    return {
+        'ok': completed.returncode == 0,
+        'error': errors[-1] if completed.returncode != 0 and errors else None,
+        'import_ms': round(root['cumulative_ms'], 1) if root else None,
+        'wall_ms': round(wall_ms, 1),
+        'modules': len(rows),
+        'top_packages': [{'package': name, 'self_ms': round(ms, 1)}
+                         for name, ms in sorted(packages.items(), key=lambda item: -item[1])[:top]]
+    }
+
+
+def run_importtime(modules: List[str], top: int, workdir: Optional[str] = None) -> Dict:
+    """Звіт часу імпорту точок входу; оточення як у прогоні (симулятор XT, без мережевих ключів)"""
+    workdir = workdir or tempfile.mkdtemp(prefix='tkinterbit-import-')
+    os.makedirs(workdir, exist_ok=True)
+    os.environ.setdefault('XT_SIMULATOR', 'true')
+    os.environ.setdefault('ADMIN_PASSWORD', 'benchmark')
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, (REPO_DIR, env.get('PYTHONPATH'))))
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        **_git_revision(),
+        'python': sys.version.split()[0],
+        'params': {'importtime': list(modules)},
+        'imports': {module: measure_import_time(module, env, workdir, top) for module in modules}
+    }
+
+
+def _format_delta(current: float, previous: float) -> str:
+    if not previous:
+        return ""
+    return f" ({(current - previous) / previous * 100:+.1f}%)"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark пропускної здатності сканера")
+    parser.add_argument('--symbols', type=int, default=1000, help="Кількість синтетичних XT ринків")
+    parser.add_argument('--sweeps', type=int, default=1, help="Скільки повних проходів по ринках чекати")
+    parser.add_argument('--timeout', type=float, default=1800, help="Максимальна тривалість прогону (с)")
+    parser.add_argument('--xt-latency-ms', type=float, default=40.0)
+    parser.add_argument('--xt-error-rate', type=float, default=0.0)
+    parser.add_argument('--xt-rate-limit', type=float, default=0.0, help="Запитів/сек на акаунт (0 = без ліміту)")
+    parser.add_argument('--dex-latency-ms', type=float, default=80.0)
+    parser.add_argument('--dex-error-rate', type=float, default=0.0)
+    parser.add_argument('--dex-missing-rate', type=float, default=0.1, help="Частка символів без DEX пари")
+    parser.add_argument('--dex-noise-pct', type=float, default=0.3)
+    parser.add_argument('--signal-rate', type=float, default=0.02, help="Частка відповідей з великою розбіжністю")
+    parser.add_argument('--signal-spread-pct', type=float, default=3.0)
+    parser.add_argument('--telegram-latency-ms', type=float, default=60.0)
+    parser.add_argument('--telegram-error-rate', type=float, default=0.0)
+    parser.add_argument('--workdir', default=None, help="Робоча папка бота (за замовчуванням - тимчасова)")
+    parser.add_argument('--log-level', default='WARNING', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'])
+    parser.add_argument('--output', default=None, help="JSON історії (за замовчуванням BENCHMARK_RESULTS_FILE)")
+    parser.add_argument('--importtime', nargs='*', metavar='MODULE', default=None,
+                        help=f"Звіт -X importtime замість прогону (за замовчуванням: {' '.join(IMPORTTIME_MODULES)})")
+    parser.add_argument('--top', type=int, default=10, help="Скільки найдорожчих пакетів показати в --importtime")
+    args = parser.parse_args()
+    output = os.path.abspath(args.output) if args.output else None  # До chdir у робочу папку
+
+    if args.importtime is not None:
+        report_importtime(run_importtime(args.importtime or list(IMPORTTIME_MODULES), args.top, args.workdir), output)
+        return
+
+    result = run_benchmark(args)
+    # config імпортується лише після налаштування оточення в run_benchmark
+    from config import BENCHMARK_RESULTS_FILE
+    output = output or os.path.join(REPO_DIR, BENCHMARK_RESULTS_FILE)
+    previous = save_result(result, output)
+
+    latency = result['latency_ms']
+    print(f"📏 {result['symbols_processed']}/{result['symbols'] * args.sweeps} символів за {result['elapsed_sec']:.1f}с "
+          f"→ {result['symbols_per_sec']:.2f} симв/с"
+          f"{_format_delta(result['symbols_per_sec'], previous['symbols_per_sec']) if previous else ''}")
+    print(f"⏱️ Латентність символу: p50 {latency['p50']:.0f}мс | p99 {latency['p99']:.0f}мс"
+          f"{_format_delta(latency['p99'], previous['latency_ms']['p99']) if previous else ''} | max {latency['max']:.0f}мс")
+    print("🌐 Запити: " + ", ".join(f"{k}={v}" for k, v in result['requests'].items())
+          + f" | XT rate-limited: {result['xt_rate_limited']}")
+    print(f"🧵 Пік потоків: {result['peak_threads']} | 💾 Пік RSS: {result['peak_rss_mb']:.0f}MB -> {output}")
+    if not result['completed']:
+        print(f"⚠️ Прохід не завершився за {args.timeout:.0f}с - результат частковий")
+
+
+def report_importtime(result: Dict, output: Optional[str]):
+    from config import BENCHMARK_RESULTS_FILE
+    output = output or os.path.join(REPO_DIR, BENCHMARK_RESULTS_FILE)
+    previous = save_result(result, output)
+    for module, report in result['imports'].items():
+        if not report['ok']:
+            print(f"❌ import {module}: {report['error']}")
+            continue
+        before = (previous or {}).get('imports', {}).get(module, {}).get('import_ms')
+        print(f"⚡ import {module}: {report['import_ms']:.0f}мс{_format_delta(report['import_ms'], before)} "
+              f"({report['modules']} модулів)")
+        print("   " + ", ".join(f"{item['package']} {item['self_ms']:.0f}мс" for item in report['top_packages']))
+    print(f"-> {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -8,27 +8,43 @@ import logging
 import time
 import struct
 import base64
-from typing import Dict, Optional, List, Any
+from typing import Dict, Optional, List, Any, Tuple
 from concurrent.futures import ThreadPoolExecutor, TimeoutError
 import threading
 
-# Ethereum/BSC підключення
-try:
-    from web3 import Web3
-    WEB3_AVAILABLE = True
-except ImportError:
-    WEB3_AVAILABLE = False
-    logging.warning("⚠️ Web3.py не встановлено - Ethereum/BSC недоступні")
+import config
 
-# Solana підключення  
-try:
-    from solana.rpc.api import Client as SolanaClient
-    SOLANA_AVAILABLE = True
-except ImportError:
-    SOLANA_AVAILABLE = False
-    logging.warning("⚠️ Solana не встановлено - Solana недоступне")
+# ⚡ web3 / solana важкі (сотні модулів) - імпортуються при створенні першого клієнта,
+# а не при import модуля (dex_client імпортує його на старті бота, Telegram та веб-панелі)
+Web3 = None
+SolanaClient = None
+WEB3_AVAILABLE = False
+SOLANA_AVAILABLE = False
+_chain_libs_loaded = False
 
-import config
+
+def _load_chain_libs():
+    """Імпорт web3 (Ethereum/BSC) і solana один раз на процес"""
+    global Web3, SolanaClient, WEB3_AVAILABLE, SOLANA_AVAILABLE, _chain_libs_loaded
+    if _chain_libs_loaded:
+        return
+    _chain_libs_loaded = True
+
+    # Ethereum/BSC підключення
+    try:
+        from web3 import Web3
+        WEB3_AVAILABLE = True
+    except ImportError:
+        WEB3_AVAILABLE = False
+        logging.warning("⚠️ Web3.py не встановлено - Ethereum/BSC недоступні")
+
+    # Solana підключення
+    try:
+        from solana.rpc.api import Client as SolanaClient
+        SOLANA_AVAILABLE = True
+    except ImportError:
+        SOLANA_AVAILABLE = False
+        logging.warning("⚠️ Solana не встановлено - Solana недоступне")
 
 class BlockchainPoolsClient:
     """
@@ -43,6 +59,7 @@ class BlockchainPoolsClient:
         self.solana_rpc = "https://rpc.ankr.com/solana/9276689ff4f125c6132d230d9adfc6be222f8c7d8444fb251cb0c8ccff295d70"
         
         # 🌐 Ініціалізація клієнтів
+        _load_chain_libs()
         self.w3_eth = None
         self.w3_bsc = None  
         self.solana_client = None
@@ -198,6 +215,41 @@ class BlockchainPoolsClient:
                 'timestamp': time.time()
             }
     
+    def get_pool_reserves(self, symbol: str, network: str) -> Optional[Tuple[float, float]]:
+        """
+        🌊 Резерви V2 пулу (Ethereum/BSC) у одиницях токенів: (токен, котирувальний)
+        Нормалізація decimals та ж що в get_ethereum_price / get_bsc_price; кеш як у цін
+        """
+        w3 = {'ethereum': self.w3_eth, 'bsc': self.w3_bsc}.get(network)
+        if not WEB3_AVAILABLE or not w3:
+            return None
+        pool_info = self.pools[network].get(symbol.upper())
+        if not pool_info:
+            return None
+        
+        cache_key = f"{self._get_cache_key(symbol, network)}_reserves"
+        cached_reserves = self._get_from_cache(cache_key)
+        if cached_reserves:
+            return cached_reserves
+        
+        self.stats[f'{network}_requests'] += 1
+        try:
+            checksum_address = w3.to_checksum_address(pool_info['address'])
+            contract = w3.eth.contract(address=checksum_address, abi=self.uniswap_v2_abi)
+            reserve0, reserve1, _ = contract.functions.getReserves().call()
+            if network == 'ethereum':
+                reserves = (reserve0 / 1e18, reserve1 / 1e6)  # TOKEN(18) / USDT(6)
+            else:
+                reserves = (reserve0 / 1e18, reserve1 / 1e18)  # На BSC USDT теж 18 decimals
+            if reserves[0] > 0 and reserves[1] > 0:
+                self._save_to_cache(cache_key, reserves)
+                return reserves
+        except Exception as e:
+            logging.error(f"❌ {network} резерви для {symbol}: {e}")
+            self.stats['errors'] += 1
+        
+        return None
+    
     def get_ethereum_price(self, symbol: str) -> Optional[float]:
         """
         💎 ETHEREUM UNISWAP V2 ЦІНИ
@@ -483,14 +535,32 @@ class BlockchainPoolsClient:
             }
 
 
-# 🌟 ГЛОБАЛЬНИЙ ІНСТАНС
-blockchain_client = BlockchainPoolsClient()
+# 🌟 ГЛОБАЛЬНИЙ ІНСТАНС - створюється при першому запиті (RPC клієнти не будуються при import)
+_blockchain_client = None
+_blockchain_client_lock = threading.Lock()
+
+
+def get_blockchain_client() -> BlockchainPoolsClient:
+    """Спільний клієнт процесу (створюється один раз, потокобезпечно)"""
+    global _blockchain_client
+    if _blockchain_client is None:
+        with _blockchain_client_lock:
+            if _blockchain_client is None:
+                _blockchain_client = BlockchainPoolsClient()
+    return _blockchain_client
+
+
+def __getattr__(name):
+    """Сумісність: blockchain_pools_client.blockchain_client / from ... import blockchain_client"""
+    if name == 'blockchain_client':
+        return get_blockchain_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # 🔄 COMPATIBILITY FUNCTIONS
 def get_blockchain_token_price(symbol: str, network: Optional[str] = None) -> Optional[float]:
     """Швидка функція отримання ціни з блокчейн пулів"""
-    return blockchain_client.get_token_price(symbol, network)
+    return get_blockchain_client().get_token_price(symbol, network)
 
 def get_blockchain_token_data(symbol: str) -> Optional[Dict]:
     """Швидка функція отримання даних токена з блокчейн пулів"""
-    return blockchain_client.get_token_with_liquidity(symbol)
\ No newline at end of file
+    return get_blockchain_client().get_token_with_liquidity(symbol)
\ No newline at end of file
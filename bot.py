@@ -3,14 +3,30 @@ import threading
 import requests
 import json
 import os
-from collections import deque
 from config import *
-from utils import calculate_spread, send_telegram, plot_spread_live, save_config_to_file, load_config_from_file, generate_crypto_signal, test_telegram_configuration, get_proper_dexscreener_link, send_to_admins_and_group
-from telegram_admin import run_telegram_bot
+from utils import calculate_spread, send_telegram, save_config_to_file, load_config_from_file, generate_crypto_signal, test_telegram_configuration, send_to_admins_and_group
 # Gate.io integration removed - using only XT.com
 # # # import gate_client  # Видалено - використовуємо тільки XT  # Removed: XT.com only system removed
-from xt_client import create_xt, load_xt_futures_markets, get_xt_price, is_xt_futures_tradeable, get_xt_futures_balance, xt_open_market_position, xt_close_position_market, analyze_xt_order_book_liquidity, fetch_xt_ticker, fetch_xt_order_book, get_xt_open_positions
+from xt_client import create_xt, load_xt_futures_markets, get_xt_price, get_xt_futures_balance, xt_open_market_position, xt_close_position_market, xt_close_on_accounts, xt_close_all_positions, analyze_xt_order_book_liquidity, fetch_xt_ticker, fetch_xt_order_book, get_xt_open_positions
 import xt_client
+import market_cache
+from metrics import PipelineTimer, stage, timed_lock
+from opportunity_trace import OpportunityTrace
+from deadline import DeadlineExceeded, deadline_scope, shielded, cancel_all, scan_watchdog
+from log_pipeline import sampled
+from indicator_engine import indicator_engine
+from price_history import price_history
+from spread_recorder import spread_recorder
+from strategy_rules import check_realistic_opportunity, opportunity_score, is_blacklisted_token, evaluate_exit, DEFAULT_PARAMS
+from negative_cache import negative_cache
+from symbol_registry import symbol_registry
+from execution_engine import ensure_leverage, ensure_margin_mode, prewarm_templates, warm_session
+from user_stream import start_user_streams
+import order_book
+import dex_impact
+from scan_shards import ShardPool, observe_symbol
+from cluster import cluster
+from models import Position, Opportunity
 
 # Helper functions for XT.com compatibility (replacing Gate.io functions)
 def fetch_ticker(exchange, symbol):
@@ -20,39 +36,63 @@ def fetch_ticker(exchange, symbol):
 def fetch_order_book(exchange, symbol, depth=10):
     """Wrapper for XT order book"""
     return fetch_xt_order_book(exchange, symbol, depth)
-from dex_client import get_dex_price_simple, get_dex_token_info, get_advanced_token_analysis
+from dex_client import get_dex_price_simple, get_dex_token_info
 import logging
 from datetime import datetime
 import threading
 
 # XT.com - ДВА ПАРАЛЕЛЬНИХ АКАУНТИ
-xt_account_1 = create_xt(api_key=XT_API_KEY, api_secret=XT_API_SECRET, account_name="Account 1")  # Перший акаунт
+# ⚡ Клієнти створює init_xt_accounts() на старті процесу (start_workers, __main__, Telegram бот), а не
+# import bot - main.py, admin.py і telegram_admin імпортують модуль без побічних ефектів.
+# bot.xt_account_1 / bot.xt_account_2 / bot.xt з інших модулів створюють акаунти при першому зверненні
+_XT_ACCOUNT_NAMES = ('xt_account_1', 'xt_account_2', 'xt')
+_xt_accounts_lock = threading.Lock()
 
-# Другий акаунт тільки якщо налаштовано ключі
-if XT_ACCOUNT_2_API_KEY and XT_ACCOUNT_2_API_SECRET:
-    xt_account_2 = create_xt(api_key=XT_ACCOUNT_2_API_KEY, api_secret=XT_ACCOUNT_2_API_SECRET, account_name="Account 2")
-    logging.info("✅ Другий XT акаунт налаштовано")
-else:
-    xt_account_2 = xt_account_1  # Використовуємо перший акаунт якщо другий не налаштовано
-    logging.info("ℹ️ Другий XT акаунт не налаштовано, використовуємо тільки перший")
+def init_xt_accounts():
+    """
+    Створює XT акаунти один раз на процес (повторні виклики - без дії); торгові функції бота
+    (xt_accounts, open/close_position_market) викликають її самі - вони доступні з main.py/admin.py до start_workers
+    """
+    global xt_account_1, xt_account_2, xt
+    if 'xt_account_1' in globals():
+        return
+    with _xt_accounts_lock:
+        if 'xt_account_1' in globals():
+            return
+        account_1 = create_xt(api_key=XT_API_KEY, api_secret=XT_API_SECRET, account_name="Account 1")  # Перший акаунт
+
+        # Другий акаунт тільки якщо налаштовано ключі
+        if XT_ACCOUNT_2_API_KEY and XT_ACCOUNT_2_API_SECRET:
+            xt_account_2 = create_xt(api_key=XT_ACCOUNT_2_API_KEY, api_secret=XT_ACCOUNT_2_API_SECRET, account_name="Account 2")
+            logging.info("✅ Другий XT акаунт налаштовано")
+        else:
+            xt_account_2 = account_1  # Використовуємо перший акаунт якщо другий не налаштовано
+            logging.info("ℹ️ Другий XT акаунт не налаштовано, використовуємо тільки перший")
+
+        xt = account_1  # Для backwards compatibility з існуючим кодом
+        xt_account_1 = account_1  # Останнім - ознака завершеної ініціалізації
+
+def __getattr__(name):
+    if name in _XT_ACCOUNT_NAMES:
+        init_xt_accounts()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-xt = xt_account_1  # Для backwards compatibility з існуючим кодом
 markets = {}  # XT markets will be stored here
 xt_markets_available = True
-trade_symbols = {}  # runtime on/off per symbol
-active_positions = {}  # symbol -> position dict {side, avg_entry, size_usdt, adds_done, last_add_price, tp_price, last_add_time, opened_at, expires_at, xt_pair_url, account}
+trade_symbols = cluster.shared_map('trade_symbols')  # runtime on/off per symbol (спільні для вузлів кластера і процесу Telegram бота)
 active_positions_account_2 = {}  # Позиції другого акаунту
 
-spread_store = deque(maxlen=1000)
-_plot_thread = None
+_spread_flush_thread = None  # 🗄️ Потік скидання історії спредів (spread_recorder)
 bot_running = True
 monitor_stop_event = threading.Event()  # 🛡️ THREAD-SAFE MONITOR: Event замість boolean
 monitor_lifecycle_lock = threading.Lock()  # 🔒 ЗАХИСТ від дублікатів потоків
 worker_threads = []
+shard_pool = None  # 🧩 Процеси шардів сканування (SCAN_SHARDS > 1)
 monitor_thread = None  # 🎯 Референс на потік моніторингу
 
 # 🕒 КУЛДАУН система для кожної монети (2 хвилини як просив користувач)
-telegram_cooldown = {}  # symbol -> timestamp останнього сигналу
+telegram_cooldown = cluster.shared_map('telegram_cooldown')  # symbol -> timestamp останнього сигналу (спільний для вузлів)
 # TELEGRAM_COOLDOWN_SEC імпортується з config.py автоматично
 
 # 🔒 SIMPLE THREADING LOCKS (replaced external locks module)
@@ -67,8 +107,11 @@ trading_lock = threading.Lock()
 monitoring_lock = threading.Lock()
 processing_symbols_lock = threading.Lock()
 
+# 🌐 Позиції пише тільки лідер кластера (єдиний вузол з ордерами), інші вузли читають дзеркало
+active_positions = cluster.shared_map('positions', lock=active_positions_lock, leader_writes=True, model=Position)  # symbol -> models.Position {side, avg_entry, size_usdt, adds_done, last_add_price, tp_price, last_add_time, opened_at, expires_at, xt_pair_url, accounts}
+
 # 🎯 ГЛОБАЛЬНИЙ ПОШУКАЧ НАЙКРАЩИХ МОЖЛИВОСТЕЙ (замість багатьох сигналів)
-best_opportunities = {}  # {symbol: {spread, side, score, data}}
+best_opportunities = cluster.shared_map('opportunities', lock=opportunities_lock, local_fields=('trace',), model=Opportunity)  # {symbol: models.Opportunity}
 last_best_signal_time = 0
 BEST_SIGNAL_INTERVAL = 30  # Відправляємо ОДИН найкращий сигнал раз на 30 секунд
 
@@ -77,18 +120,18 @@ BEST_SIGNAL_INTERVAL = 30  # Відправляємо ОДИН найкращи
 # ------------------------------------------------------
 blacklist_lock = threading.Lock()
 blacklist_file = 'blacklist.json'
-blacklist_data = {
+blacklist_data = cluster.shared_map('blacklist', lock=blacklist_lock, leader_writes=True)
+blacklist_data.update({
     "banned_symbols": [],  # Список заблокованих символів
     "loss_counts": {}      # Лічильник збитків: {"BTC/USDT": 1}
-}
+})
 
 def load_blacklist():
     """Завантажує чорний список з файлу при старті"""
-    global blacklist_data
     try:
         if os.path.exists(blacklist_file):
             with open(blacklist_file, 'r') as f:
-                blacklist_data = json.load(f)
+                blacklist_data.update(json.load(f))
             logging.info(f"⚫ BLACKLIST: Завантажено {len(blacklist_data['banned_symbols'])} заблокованих монет")
         else:
             logging.info("⚫ BLACKLIST: Файл не знайдено, починаємо з чистого аркуша")
@@ -100,7 +143,7 @@ def save_blacklist():
     try:
         with blacklist_lock:
             with open(blacklist_file, 'w') as f:
-                json.dump(blacklist_data, f, indent=4)
+                json.dump(blacklist_data.copy(), f, indent=4)
     except Exception as e:
         logging.error(f"❌ Помилка збереження blacklist: {e}")
 
@@ -114,14 +157,16 @@ def check_and_update_blacklist(symbol, pnl_pct):
     if pnl_pct <= -STOP_LOSS_PCT:
         with blacklist_lock:
             # Отримуємо поточну кількість збитків
-            current_losses = blacklist_data["loss_counts"].get(symbol, 0) + 1
-            blacklist_data["loss_counts"][symbol] = current_losses
+            loss_counts = blacklist_data.setdefault("loss_counts", {})
+            current_losses = loss_counts.get(symbol, 0) + 1
+            loss_counts[symbol] = current_losses
             
             logging.warning(f"⚠️ [{symbol}] STOP LOSS #{current_losses}! (Поріг: 3)")
 
             if current_losses >= 3:
-                if symbol not in blacklist_data["banned_symbols"]:
-                    blacklist_data["banned_symbols"].append(symbol)
+                banned_symbols = blacklist_data.setdefault("banned_symbols", [])
+                if symbol not in banned_symbols:
+                    banned_symbols.append(symbol)
                     logging.warning(f"⛔ [{symbol}] ДОДАНО В ЧОРНИЙ СПИСОК (3 stop-loss)")
                     send_to_admins_and_group(f"⛔ **BLACKLIST ALERT**\nMoneta **{symbol}** отримала 3 стоп-лосси і заблокована для торгівлі.")
             
@@ -130,8 +175,9 @@ def check_and_update_blacklist(symbol, pnl_pct):
     # (Опціонально) Якщо отримали Тейк-Профіт, можна скидати лічильник невдач:
     elif pnl_pct >= TAKE_PROFIT_PCT:
         with blacklist_lock:
-            if symbol in blacklist_data["loss_counts"] and blacklist_data["loss_counts"][symbol] > 0:
-                blacklist_data["loss_counts"][symbol] = 0
+            loss_counts = blacklist_data.get("loss_counts", {})
+            if loss_counts.get(symbol, 0) > 0:
+                loss_counts[symbol] = 0
                 save_blacklist()
                 logging.info(f"♻️ [{symbol}] Лічильник збитків скинуто після успішного TP")
 # ------------------------------------------------------
@@ -141,7 +187,7 @@ def save_positions_to_file():
     """Зберігає active_positions в positions.json з захистом від race conditions"""
     try:
         with active_positions_lock:
-            positions_data = active_positions.copy()
+            positions_data = {symbol: position.to_dict() for symbol, position in active_positions.items()}
         
         # Додаємо мітку часу збереження для діагностики
         save_data = {
@@ -205,7 +251,7 @@ def load_positions_from_file():
                 logging.warning(f"⏰ {symbol}: Позиція прострочена ({(current_time - position['expires_at'])/60:.1f}хв), буде закрита")
                 # Не додаємо прострочену позицію, вона буде закрита в наступному циклі моніторингу
             else:
-                valid_positions[symbol] = position
+                valid_positions[symbol] = Position.from_dict(position, symbol)
         
         with active_positions_lock:
             active_positions.update(valid_positions)
@@ -294,41 +340,30 @@ def get_positions_by_account():
 def generate_xt_pair_url(symbol):
     """Генерує XT.com посилання для торгової пари"""
     try:
-        # Очищаємо символ: ETH/USDT:USDT → ETHUSDT
-        clean_symbol = symbol.replace('/USDT:USDT', '').replace('/USDT', '').upper()
-        pair = f"{clean_symbol}USDT"
-        # ✅ ПРАВИЛЬНИЙ ФОРМАТ XT.com futures trading
-        return f"https://www.xt.com/en/trade/futures_{pair}"
+        # ✅ ПРАВИЛЬНИЙ ФОРМАТ XT.com futures trading (готове посилання з реєстру символів)
+        return symbol_registry.get(symbol).xt_link
     except:
         return "https://www.xt.com/en/trade"
 
 def calculate_pnl_percentage(position, use_leverage=True):
     """
-    🧮 УНІФІКОВАНИЙ розрахунок PnL у відсотках з fallback логікою та XT ticker
+    🧮 УНІФІКОВАНИЙ розрахунок PnL у відсотках з fallback на XT ticker
     
     Args:
-        position: словник позиції з різними ключами для цін
+        position: models.Position або сирий dict позиції біржі (get_xt_open_positions) -
+                  аліаси ключів цін нормалізуються один раз у Position.from_dict
         use_leverage: чи застосовувати леверидж до P&L (за замовчуванням True)
     
     Returns:
         float: PnL у відсотках
     """
+    init_xt_accounts()  # Глобальний xt - до start_workers (main.py/admin) його ще немає
     try:
-        symbol = position.get('symbol', 'UNKNOWN')
-        
-        # 🔧 FALLBACK ЛОГІКА для entry price
-        entry_price = float(
-            position.get('entryPrice') or 
-            position.get('avg_entry') or 
-            position.get('entry_price') or 0
-        )
-        
-        # 🔧 FALLBACK ЛОГІКА для current price
-        current_price = float(
-            position.get('markPrice') or 
-            position.get('currentPrice') or 
-            position.get('current_price') or 0
-        )
+        if not isinstance(position, Position):
+            position = Position.from_dict(position)
+        symbol = position.symbol or 'UNKNOWN'
+        entry_price = position.avg_entry
+        current_price = position.mark_price or 0.0
         
         # 🚀 КРИТИЧНО: Якщо currentPrice відсутня, отримуємо з XT ticker
         if current_price <= 0 and symbol != 'UNKNOWN' and xt:
@@ -337,25 +372,19 @@ def calculate_pnl_percentage(position, use_leverage=True):
                 if xt_ticker and xt_ticker.get('last'):
                     current_price = float(xt_ticker['last'])
                     # Оновлюємо позицію для наступних викликів
-                    position['currentPrice'] = current_price
+                    position.mark_price = current_price
                     logging.info(f"🔄 [{symbol}] XT ticker ціна: ${current_price}")
             except Exception as ticker_error:
                 logging.warning(f"⚠️ [{symbol}] Помилка XT ticker: {ticker_error}")
         
-        # 🔧 Нормалізація сторони
-        side = str(position.get('side', 'LONG')).upper()
-        if side.lower() in ['buy', 'long']:
-            side = 'LONG'
-        elif side.lower() in ['sell', 'short']:
-            side = 'SHORT'
-        
         # 🧮 Валідація даних
         if entry_price <= 0 or current_price <= 0:
             if symbol != 'UNKNOWN':
                 logging.warning(f"🚨 [{symbol}] P&L неможливо: entry={entry_price}, current={current_price}")
             return 0.0
         
-        # 📊 Розрахунок базового P&L%
+        # 📊 Розрахунок базового P&L% (сторона нормалізована в Position: LONG/SHORT)
+        side = position.side
         if side == 'LONG':
             pnl_pct = ((current_price - entry_price) / entry_price) * 100
         else:  # SHORT
@@ -363,17 +392,57 @@ def calculate_pnl_percentage(position, use_leverage=True):
         
         # ⚡ Застосування левериджу якщо потрібно
         if use_leverage:
-            leverage = float(position.get('leverage', LEVERAGE))
-            pnl_pct = pnl_pct * leverage
+            pnl_pct = pnl_pct * float(position.leverage or LEVERAGE)
         
         logging.info(f"✅ [{symbol}] P&L: {side} {pnl_pct:.2f}% (entry=${entry_price}, current=${current_price}, lev={use_leverage})")
         return round(pnl_pct, 2)
         
     except Exception as e:
-        symbol = position.get('symbol', 'UNKNOWN') if isinstance(position, dict) else 'UNKNOWN'
+        symbol = getattr(position, 'symbol', None) or 'UNKNOWN'
         logging.error(f"❌ P&L помилка [{symbol}]: {e}")
         return 0.0
 
+class StaleOpportunity(Exception):
+    """🧭 Можливість застаріла і після переоцінки не підтвердилась"""
+
+def ensure_fresh_opportunity(symbol, trace, xt_price, dex_price, spread_pct):
+    """
+    🧭 Перевірка свіжості можливості перед сигналом/ордером.
+    Повертає (xt_price, dex_price, spread_pct) - ті самі або перечитані ціни, None якщо можливість відкинуто.
+    """
+    init_xt_accounts()
+    if not trace.is_stale():
+        return xt_price, dex_price, spread_pct
+
+    price_age = trace.price_age()
+    if OPPORTUNITY_STALE_ACTION != 'reprice':
+        logging.warning(f"[{symbol}] 🧭 Можливість застаріла ({price_age:.1f}с > {OPPORTUNITY_MAX_AGE_SEC}с) - відкидаємо")
+        trace.finish('dropped_stale', price_age_sec=round(price_age, 3))
+        return None
+
+    try:
+        fresh_xt_price = get_xt_price(xt, symbol)
+        fresh_dex_price = symbol_registry.get(symbol).to_contract_price(get_dex_price_simple(symbol))
+    except Exception as e:
+        logging.warning(f"[{symbol}] 🧭 Не вдалося перечитати ціни застарілої можливості: {e}")
+        fresh_xt_price = fresh_dex_price = None
+    if not fresh_xt_price or not fresh_dex_price:
+        trace.finish('dropped_stale', price_age_sec=round(price_age, 3))
+        return None
+    trace.repriced()
+
+    fresh_spread = calculate_spread(fresh_dex_price, fresh_xt_price)
+    # Спред вийшов з діапазону або змінив знак - напрям угоди вже невірний
+    if not (MIN_SPREAD <= abs(fresh_spread) <= MAX_SPREAD) or (fresh_spread > 0) != (spread_pct > 0):
+        logging.info(f"[{symbol}] 🧭 Після переоцінки спред {spread_pct:.2f}% -> {fresh_spread:.2f}% - відкидаємо")
+        trace.finish('dropped_repriced', price_age_sec=round(price_age, 3),
+                     spread_pct=round(spread_pct, 4), fresh_spread_pct=round(fresh_spread, 4))
+        return None
+
+    logging.info(f"[{symbol}] 🧭 Переоцінено через {price_age:.1f}с: спред {spread_pct:.2f}% -> {fresh_spread:.2f}%")
+    trace.details['edge_lost_pct'] = round(abs(spread_pct) - abs(fresh_spread), 4)
+    return fresh_xt_price, fresh_dex_price, fresh_spread
+
 def send_best_opportunity_signal():
     """
     🎯 ВИБІРКА НАЙКРАЩОЇ МОЖЛИВОСТІ: замість багатьох сигналів - ОДИН найкращий
@@ -384,24 +453,24 @@ def send_best_opportunity_signal():
         try:
             current_time = time.time()
             
-            # Перевіряємо чи настав час для нового сигналу
-            if current_time - last_best_signal_time >= BEST_SIGNAL_INTERVAL:
+            # Перевіряємо чи настав час для нового сигналу (в кластері найкращий сигнал шле тільки лідер)
+            if current_time - last_best_signal_time >= BEST_SIGNAL_INTERVAL and cluster.is_leader:
                 with opportunities_lock:
                     if best_opportunities:
-                        # Знаходимо найкращу можливість за рейтингом
-                        best_symbol = max(best_opportunities.keys(), 
-                                         key=lambda s: best_opportunities[s]['score'])
+                        # Знаходимо найкращу можливість за рейтингом (всі кандидати переоцінюються одним векторним викликом)
+                        best_symbol = dex_impact.rank_opportunities(best_opportunities, ORDER_AMOUNT * LEVERAGE)
                         best_data = best_opportunities[best_symbol]
                         
-                        # Очищуємо старі можливості (старші 60 секунд)
+                        evaluated_symbols = list(best_opportunities)
+                        
+                        # Очищуємо старі можливості (старші 60 секунд) - HDEL тільки їхніх ключів:
+                        # можливості, що інші вузли кластера публікують тим часом, лишаються
                         old_threshold = current_time - 60
-                        fresh_opportunities = {k: v for k, v in best_opportunities.items() 
-                                             if v['timestamp'] > old_threshold}
-                        best_opportunities.clear()
-                        best_opportunities.update(fresh_opportunities)
+                        best_opportunities.delete_many([k for k, v in best_opportunities.items()
+                                                        if v.timestamp <= old_threshold])
                         
                         # 🔒 КРИТИЧНО: Перевіряємо кулдаун для найкращої можливості!
-                        if best_data['timestamp'] > old_threshold:  # Перевіряємо свіжість
+                        if best_data.timestamp > old_threshold:  # Перевіряємо свіжість
                             
                             # 🕒 THREAD-SAFE КУЛДАУН: перевіряємо чи можна відправити сигнал для цього символу
                             signal_allowed = False
@@ -417,20 +486,28 @@ def send_best_opportunity_signal():
                                     logging.info(f"🏆 НАЙКРАЩИЙ СИГНАЛ ЗАБЛОКОВАНО: {best_symbol} ще {time_left}с кулдауну")
                             
                             if signal_allowed:  # ВІДПРАВЛЯЄМО ТІЛЬКИ ЯКЩО ДОЗВОЛЕНО
-                                side = best_data['side']
-                                spread = best_data['spread']
-                                xt_price = best_data['xt_price']
-                                dex_price = best_data['dex_price']
-                                token_info = best_data['token_info']
+                                side = best_data.side
+                                spread = best_data.spread
+                                xt_price = best_data.xt_price
+                                dex_price = best_data.dex_price
+                                trace = best_data.trace
                                 
                                 # 🛡️ ВЕРИФІКАЦІЯ СИГНАЛУ (як просить користувач - блокуємо без DEX адреси!)
                                 try:
+                                    # 🧭 Можливість могла пролежати в черзі до BEST_SIGNAL_INTERVAL - перевіряємо вік цін
+                                    if trace:
+                                        trace.hop('selected')
+                                        fresh_prices = ensure_fresh_opportunity(best_symbol, trace, xt_price, dex_price, spread)
+                                        if not fresh_prices:
+                                            raise StaleOpportunity(best_symbol)
+                                        xt_price, dex_price, spread = fresh_prices
+
                                     from signal_parser import ArbitrageSignal
                                     from signal_verification import verify_arbitrage_signal
                                     from telegram_formatter import format_arbitrage_signal_message
                                     
-                                    # Отримуємо clean_symbol для верифікації
-                                    clean_symbol = best_symbol.replace('/USDT:USDT', '').replace('1000', '')
+                                    # Отримуємо clean_symbol для верифікації (DEX назва без префікса 1000)
+                                    clean_symbol = symbol_registry.get(best_symbol).dex_base
                                     
                                     test_signal = ArbitrageSignal(
                                         asset=clean_symbol,
@@ -444,6 +521,8 @@ def send_best_opportunity_signal():
                                     
                                     # КРИТИЧНО: Повна верифікація з блокуванням сигналів без DEX адреси
                                     verification_result = verify_arbitrage_signal(test_signal)
+                                    if trace:
+                                        trace.hop('verified')
                                     
                                     if verification_result.valid:
                                         # ✅ СИГНАЛ ВАЛІДНИЙ - відправляємо ОБОМ АДМІНАМ + ГРУПІ
@@ -451,19 +530,24 @@ def send_best_opportunity_signal():
                                         signal_message = format_arbitrage_signal_message(test_signal, verification_result, for_group=False)
                                         send_to_admins_and_group(signal_message)
                                         
-                                        logging.info(f"✅ СИГНАЛ ВЕРИФІКОВАНО для {best_symbol}: {side} спред={spread:.2f}% (рейтинг={best_data['score']:.1f})")
+                                        logging.info(f"✅ СИГНАЛ ВЕРИФІКОВАНО для {best_symbol}: {side} спред={spread:.2f}% (рейтинг={best_data.score:.1f})")
                                     else:
                                         # ⚠️ ВІДПРАВЛЯЄМО FALLBACK СИГНАЛ ОБОМ АДМІНАМ + ГРУПІ (як просив користувач - ВСІ сигнали мають відправлятися!)
                                         logging.info(f"⚠️ ВІДПРАВЛЯЄМО FALLBACK СИГНАЛ для {best_symbol}: {'; '.join(verification_result.errors)}")
                                         signal_message = format_arbitrage_signal_message(test_signal, verification_result, for_group=False)
                                         send_to_admins_and_group(signal_message)
+                                    if trace:
+                                        trace.finish('best_signal', valid=verification_result.valid, spread_pct=round(spread, 4))
                                         
+                                except StaleOpportunity:
+                                    logging.info(f"🏆 НАЙКРАЩИЙ СИГНАЛ ВІДКИНУТО: {best_symbol} застарів")
                                 except Exception as signal_error:
                                     logging.error(f"❌ Помилка верифікації найкращого сигналу {best_symbol}: {signal_error}")
                                 last_best_signal_time = current_time
                             
-                            # Очищуємо всі можливості після перевірки (незалежно від відправки)
-                            best_opportunities.clear()
+                            # Очищуємо розглянуті можливості після перевірки (незалежно від відправки);
+                            # нові з інших вузлів, ще не синхронізовані сюди, не зачіпаємо
+                            best_opportunities.delete_many(evaluated_symbols)
                         
             time.sleep(5)  # Перевіряємо кожні 5 секунд
             
@@ -471,13 +555,11 @@ def send_best_opportunity_signal():
             logging.error(f"Помилка в send_best_opportunity_signal: {e}")
             time.sleep(10)
 
-# 🔥 PnL PATCH v2.0 ЗАВЕРШЕНО! 
-logging.info("🚀 PnL PATCH v2.0 завершено! Видалено дублікат функції та покращено fallback логіку")
-
 # 🎯 ФУНКЦІЇ ДЛЯ АВТОМАТИЧНОГО ЗАКРИТТЯ ПОЗИЦІЙ
 
 def compute_cross_exchange_spread(position, symbol):
     """📊 Розрахунок поточного спреду між біржами для перевірки конвергенції"""
+    init_xt_accounts()
     try:
         arb_pair = position.get('arb_pair', 'xt-dex')
         
@@ -490,7 +572,8 @@ def compute_cross_exchange_spread(position, symbol):
             xt_ticker = xt_client.fetch_xt_ticker(xt, symbol) if xt else None
             xt_price = float(xt_ticker['last']) if xt_ticker else None
             
-            dex_price = get_dex_price_simple(symbol, for_convergence=True)
+            dex_price = symbol_registry.get(symbol).to_contract_price(
+                get_dex_price_simple(symbol, for_convergence=True))
             
             if xt_price and dex_price:
                 spread_pct = calculate_spread(dex_price, xt_price)
@@ -508,6 +591,7 @@ def compute_cross_exchange_spread(position, symbol):
 
 def gate_close_position_market(symbol, side, size_usdt):
     """🔒 DEPRECATED: Перенаправлено на XT.com (Gate.io видалено)"""
+    init_xt_accounts()
     # 🔒 ПОДВІЙНИЙ ЗАХИСТ: DRY_RUN + ALLOW_LIVE_TRADING
     if DRY_RUN:
         logging.info("[GATE DRY-RUN] close market %s %s %sUSDT", symbol, side, size_usdt)
@@ -589,56 +673,146 @@ def gate_close_position_market(symbol, side, size_usdt):
         logging.error(f"❌ {symbol}: Помилка закриття позиції Gate.io: {e}")
         return False
 
+def xt_accounts():
+    """Налаштовані торгові акаунти {номер: клієнт} (без дубля якщо другий акаунт = перший)"""
+    init_xt_accounts()  # main.py /api/admin/close-all може закривати до start_workers
+    accounts = {}
+    for account_num, client in ((1, xt_account_1), (2, xt_account_2)):
+        if client is not None and all(client is not other for other in accounts.values()):
+            accounts[account_num] = client
+    return accounts
+
+def position_accounts(position):
+    """
+    Акаунти що тримають позицію за локальним сховищем (position['accounts'] - при відкритті та
+    синхронізації з біржею); для старих записів без поля - всі акаунти
+    """
+    accounts = xt_accounts()
+    held = [num for num in position.get('accounts') or [] if num in accounts]
+    return {num: accounts[num] for num in held} if held else accounts
+
 def close_position(symbol, position):
-    """🎯 Закриття позиції з правильним API в залежності від біржі"""
+    """🎯 Закриття позиції: reduce-only ордери одночасно на всіх акаунтах що її тримають"""
     try:
-        exchange = position.get('exchange', 'gate')
         side = position.get('side', 'LONG')
         size_usdt = position.get('size_usdt', 0)
+        accounts = position_accounts(position)
         
-        logging.warning(f"🔥 CLOSE_POSITION: symbol={symbol}, exchange={exchange}, side={side}, size_usdt={size_usdt}")
-        logging.warning(f"🔥 CLOSE_POSITION: xt_account_1={xt_account_1 is not None}, xt_account_2={xt_account_2 is not None}")
-        
-        # Тільки XT.com (Gate.io видалено) - ЗАКРИВАЄМО НА ОБОХ АКАУНТАХ
-        if xt_account_1 and xt_account_2:
-            logging.warning(f"🔥 CLOSE_POSITION: Викликаємо xt_close_position_market() для АКАУНТУ 1...")
-            result_1 = xt_close_position_market(xt_account_1, symbol, side, size_usdt)
-            logging.warning(f"🔥 CLOSE_POSITION: АКАУНТ 1 result={result_1}")
-            
-            logging.warning(f"🔥 CLOSE_POSITION: Викликаємо xt_close_position_market() для АКАУНТУ 2...")
-            result_2 = xt_close_position_market(xt_account_2, symbol, side, size_usdt)
-            logging.warning(f"🔥 CLOSE_POSITION: АКАУНТ 2 result={result_2}")
-            
-            result = result_1 or result_2
-            logging.warning(f"🔥 CLOSE_POSITION: Фінальний result={result} (result_1={result_1}, result_2={result_2})")
-            
-            if result_1:
-                logging.info(f"✅ АКАУНТ 1: Закрито {symbol} {side}")
-            else:
-                logging.error(f"❌ АКАУНТ 1: НЕ ВДАЛОСЯ закрити {symbol} {side}")
-            
-            if result_2:
-                logging.info(f"✅ АКАУНТ 2: Закрито {symbol} {side}")
-            else:
-                logging.error(f"❌ АКАУНТ 2: НЕ ВДАЛОСЯ закрити {symbol} {side}")
-            
-            return result
-        else:
+        if not accounts:
             logging.error(f"❌ {symbol}: Акаунти XT не доступні (xt_account_1={xt_account_1 is not None}, xt_account_2={xt_account_2 is not None})")
             return False
         
+        logging.warning(f"🔥 CLOSE_POSITION: symbol={symbol}, side={side}, size_usdt={size_usdt}, акаунти={list(accounts)}")
+        results = xt_close_on_accounts({f"АКАУНТ {num}": client for num, client in accounts.items()}, symbol, side, size_usdt)
+        
+        for name, result in results.items():
+            if result:
+                logging.info(f"✅ {name}: Закрито {symbol} {side}")
+            else:
+                logging.error(f"❌ {name}: НЕ ВДАЛОСЯ закрити {symbol} {side}")
+        
+        # Позиція закрита тільки якщо закриття пройшло на всіх акаунтах що її тримають
+        result = all(results.values())
+        logging.warning(f"🔥 CLOSE_POSITION: Фінальний result={result} ({results})")
+        return result
+        
     except Exception as e:
         logging.error(f"❌ {symbol}: Помилка закриття позиції: {e}")
         import traceback
         logging.error(f"❌ {symbol}: Traceback: {traceback.format_exc()}")
         return False
 
+def close_all_positions(reason="Аварійне закриття"):
+    """
+    🚨 Аварійне закриття ВСІХ позицій на всіх акаунтах паралельно (включно з позиціями яких немає
+    в локальному сховищі). Повертає {'closed': [...], 'failed': [...]}
+    """
+    accounts = xt_accounts()
+    account_names = {f"АКАУНТ {num}": num for num in accounts}
+    with active_positions_lock:
+        for position in active_positions.values():
+            position['status'] = 'closing'
+    
+    with timed_lock(order_placement_lock, 'order_placement'), stage('close_all_positions'), shielded():
+        results, unreachable = xt_close_all_positions({name: accounts[num] for name, num in account_names.items()})
+    
+    closed = sorted({f"{symbol} {side}" for (_, symbol, side), ok in results.items() if ok})
+    failed = sorted({f"{symbol} {side}" for (_, symbol, side), ok in results.items() if not ok})
+    failed_symbols = {symbol for (_, symbol, _), ok in results.items() if not ok}
+    unreachable_nums = {account_names[name] for name in unreachable}
+    with active_positions_lock:
+        for symbol in list(active_positions):
+            # Позиції акаунта, чиї позиції не отримано, могли лишитись на біржі - не видаляємо
+            held_unreachable = unreachable_nums & set(position_accounts(active_positions[symbol]))
+            if symbol in failed_symbols or held_unreachable:
+                active_positions[symbol]['status'] = 'open'
+                if held_unreachable and symbol not in failed_symbols:
+                    failed.append(f"{symbol} (акаунт {', '.join(map(str, sorted(held_unreachable)))} недоступний)")
+            else:
+                del active_positions[symbol]
+    failed.extend(f"{name}: позиції не отримано" for name in unreachable)
+    save_positions_to_file()
+    
+    logging.warning(f"🚨 CLOSE ALL ({reason}): закрито {len(closed)}, помилки {len(failed)}")
+    send_to_admins_and_group(
+        f"🚨 **АВАРІЙНЕ ЗАКРИТТЯ ВСІХ ПОЗИЦІЙ**\n"
+        f"📝 Причина: **{reason}**\n"
+        f"✅ Закрито: **{len(closed)}**\n"
+        f"❌ Помилки: **{len(failed)}**{(' (' + ', '.join(failed) + ')') if failed else ''}\n"
+        f"⏰ Час: **{time.strftime('%H:%M:%S %d.%m.%Y')}**")
+    return {'closed': closed, 'failed': failed}
+
+def format_exit_signal(exit_code, symbol, position, pnl_pct, spread_info):
+    """Telegram сповіщення для коду закриття evaluate_exit (TP/SL - без окремого сповіщення)"""
+    clean_symbol = symbol.replace('/USDT:USDT', '')
+    pnl_usdt = position['size_usdt'] * pnl_pct / 100
+    now_text = time.strftime('%H:%M:%S %d.%m.%Y')
+    
+    if exit_code == 'time_stop':
+        time_elapsed = (time.time() - position.get('opened_at', time.time())) / 3600
+        return f"⏰ **ЗАКРИТТЯ ЗА ТАЙМЕРОМ!**\n"\
+               f"📊 Символ: **{clean_symbol}** ({position['side']})\n"\
+               f"💰 Розмір: **${position['size_usdt']:.2f}**\n"\
+               f"⏱️ Час у позиції: **{time_elapsed:.1f}год** (максимум {POSITION_MAX_AGE_SEC / 3600:.1f}год)\n"\
+               f"💎 P&L: **{pnl_pct:+.1f}%** (${pnl_usdt:+.2f})\n"\
+               f"🚪 Автоматичне закриття для управління ризиком\n"\
+               f"⏰ Час: **{now_text}**"
+    
+    if exit_code == 'half_move':
+        initial_spread_pct = abs(position.get('entry_spread_pct', 0))
+        current_spread_pct = abs(spread_info.get('spread_pct') or 0)
+        return f"🎯 **50% РУХ ЦІН!**\n"\
+               f"📊 Символ: **{clean_symbol}** ({position['side']})\n"\
+               f"💰 Розмір: **${position['size_usdt']:.2f}**\n"\
+               f"📈 Початковий спред: **{initial_spread_pct:.2f}%**\n"\
+               f"📉 Поточний спред: **{current_spread_pct:.2f}%**\n"\
+               f"⚡ Рух: **-{initial_spread_pct - current_spread_pct:.2f}%** (50% досягнуто)\n"\
+               f"💎 P&L: **{pnl_pct:+.1f}%** (${pnl_usdt:+.2f})\n"\
+               f"✨ Ціни зійшлися на 50%! Фіксуємо прибуток\n"\
+               f"⏰ Час: **{now_text}**"
+    
+    if exit_code == 'convergence':
+        return f"🎯 **КОНВЕРГЕНЦІЯ ЦІН!**\n"\
+               f"📊 Символ: **{clean_symbol}** ({position['side']})\n"\
+               f"💰 Розмір: **${position['size_usdt']:.2f}**\n"\
+               f"📈 Ціни: Біржа **${spread_info.get('price1') or 0:.6f}** | Dex **${spread_info.get('price2') or 0:.6f}**\n"\
+               f"📉 Спред: **{abs(spread_info.get('spread_pct') or 0):.2f}%** ≤ {CONVERGENCE_SPREAD_PCT}% (конвергенція)\n"\
+               f"💎 P&L: **{pnl_pct:+.1f}%** (${pnl_usdt:+.2f})\n"\
+               f"✨ Ціни зійшлися! Фіксуємо прибуток\n"\
+               f"⏰ Час: **{now_text}**"
+    
+    return None
+
 def monitor_open_positions():
     """🎯 МОНІТОРИНГ ПОЗИЦІЙ: Автоматичне закриття при конвергенції цін, +5% прибутку, або 1-годинному таймері"""
     thread_id = threading.current_thread().ident
     logging.warning(f"🎯 MONITOR-{thread_id}: Захищений потік моніторингу позицій запущено!")
     
     while not monitor_stop_event.is_set():
+        # 🌐 Закриття позицій - тільки лідер кластера
+        if not cluster.is_leader:
+            monitor_stop_event.wait(timeout=MONITOR_INTERVAL_SEC)
+            continue
         try:
             positions_to_close = []
             current_time = time.time()
@@ -649,10 +823,12 @@ def monitor_open_positions():
             
             # Діагностика отримання позицій з обох XT акаунтів
             all_exchange_positions = []
-            for account_num, xt_account in [(1, xt_account_1), (2, xt_account_2)]:
+            held_by_accounts = {}  # symbol -> номери акаунтів з позицією (для close_position)
+            for account_num, xt_account in xt_accounts().items():
                 if xt_account:
                     try:
-                        raw_positions = xt_account.fetch_positions()
+                        # 📡 Книга приватного WebSocket потоку (REST тільки якщо потік не здоровий)
+                        raw_positions = xt_client.xt_fetch_positions(xt_account)
                         xt_positions = xt_client.get_xt_open_positions(xt_account)
                         logging.info(f"🔧 XT АКАУНТ {account_num}: raw_positions={len(raw_positions) if raw_positions else 0}, filtered={len(xt_positions)}")
                         
@@ -665,6 +841,8 @@ def monitor_open_positions():
                                 notional = pos.get('notional', 0)
                                 logging.info(f"   {i+1}. {symbol}: size={size}, contracts={contracts}, notional={notional}")
                             all_exchange_positions.extend(xt_positions)
+                            for pos in xt_positions:
+                                held_by_accounts.setdefault(pos['symbol'], set()).add(account_num)
                         else:
                             logging.info(f"📊 XT АКАУНТ {account_num}: Немає raw позицій або пустий список")
                             
@@ -691,7 +869,7 @@ def monitor_open_positions():
                                 # 🛡️ ЗАХИСТ: Якщо біржа повертає size=0, використовуємо ORDER_AMOUNT
                                 safe_size = abs(size) if abs(size) > 0 else ORDER_AMOUNT
                                 logging.info(f"🔧 {symbol}: біржа size={size} → safe_size={safe_size}")
-                                active_positions[symbol] = {
+                                active_positions[symbol] = Position.from_dict({
                                     'symbol': symbol,
                                     'side': side,
                                     'size_usdt': safe_size,
@@ -704,9 +882,13 @@ def monitor_open_positions():
                                     'opened_at': current_time,  # 🔧 ФІКС ТАЙМЕРА: додано opened_at
                                     'expires_at': current_time + POSITION_MAX_AGE_SEC,  # 🔧 ФІКС ТАЙМЕРА: додано expires_at
                                     'synced_from_exchange': True  # Позначка що це з біржі
-                                }
+                                })
                                 logging.info(f"➕ СИНХРОНІЗОВАНО: {symbol} {side} ${size:.2f} від XT.com")
                         
+                        for symbol, account_nums in held_by_accounts.items():
+                            if symbol in active_positions:
+                                active_positions[symbol]['accounts'] = sorted(account_nums)
+                        
                         # Оновлюємо current_positions після синхронізації
                         current_positions = active_positions.copy()
                         
@@ -721,40 +903,7 @@ def monitor_open_positions():
                 if position.get('status') == 'closing':
                     continue
                 
-                # ⏰ 1. ПЕРЕВІРКА 1-ГОДИННОГО ТАЙМЕРА (НАЙВИЩА ПРІОРИТЕТНІСТЬ)
-                if ENABLE_TIME_STOP:
-                    expires_at = position.get('expires_at', 0)
-                    opened_at = position.get('opened_at', 0)
-                    logging.info(f"🔧 ТАЙМЕР DEBUG [{symbol}]: current_time={current_time}, opened_at={opened_at}, expires_at={expires_at}, delta={(current_time - opened_at)/60:.1f}хв")
-                    if expires_at > 0 and current_time >= expires_at:
-                        time_elapsed = (current_time - position.get('opened_at', current_time)) / 3600
-                        reason = f"Time Stop 1h (час: {time_elapsed:.1f}год)"
-                        
-                        # 🚀 ВИКОРИСТОВУЄМО НОВУ УНІФІКОВАНУ P&L ФУНКЦІЮ
-                        pnl_pct = calculate_pnl_percentage(position, use_leverage=True)
-                        logging.info(f"⏰ [{symbol}] ТАЙМЕР P&L: {pnl_pct:.2f}%")
-                        
-                        # 🎯 КРАСИВЕ СПОВІЩЕННЯ ПРО ЗАКРИТТЯ ЗА ТАЙМЕРОМ
-                        timer_signal = f"⏰ **ЗАКРИТТЯ ЗА ТАЙМЕРОМ 1 ГОДИНА!**\n"\
-                                     f"📊 Символ: **{symbol.replace('/USDT:USDT', '')}** ({position['side']})\n"\
-                                     f"💰 Розмір: **${position['size_usdt']:.2f}**\n"\
-                                     f"⏱️ Час у позиції: **{time_elapsed:.1f}год** (максимум 1.0год)\n"\
-                                     f"💎 P&L: **{pnl_pct:+.1f}%** (${(position['size_usdt'] * pnl_pct / 100):+.2f})\n"\
-                                     f"🚪 Автоматичне закриття для управління ризиком\n"\
-                                     f"⏰ Час: **{time.strftime('%H:%M:%S %d.%m.%Y')}**"
-                        send_to_admins_and_group(timer_signal)
-                        
-                        positions_to_close.append((symbol, position, reason, pnl_pct))
-                        continue  # Переходимо до наступної позиції
-                    
-                # Перевіряємо мінімальний час утримання позиції
-                entry_time = position.get('entry_time', time.time())
-                if time.time() - entry_time < MIN_HOLD_SEC:
-                    continue
-                    
                 exchange = position.get('exchange', 'gate')
-                side = position.get('side', 'LONG').upper()  # 🔒 КРИТИЧНО: нормалізуємо до uppercase
-                entry_price = position.get('avg_entry', 0)
                 
                 # Отримуємо поточну ціну з правильної біржі
                 current_price = None
@@ -764,99 +913,31 @@ def monitor_open_positions():
                 elif exchange == "xt" and xt:
                     ticker = xt_client.fetch_xt_ticker(xt, symbol)
                     current_price = float(ticker['last']) if ticker else None
-                    
-                if not current_price or not entry_price:
-                    continue
-                    
-                # 1. ПЕРЕВІРКА TAKE PROFIT +20% (З ЛЕВЕРИДЖЕМ!)
-                pnl_pct = calculate_pnl_percentage(position, use_leverage=True)
-                if pnl_pct >= TAKE_PROFIT_PCT:
-                    reason = f"TP +{pnl_pct:.1f}%"
-                    positions_to_close.append((symbol, position, reason, pnl_pct))
-                    continue
                 
-                # # 1.1 ПЕРЕВІРКА СТОП-ЛОСС З ЛЕВЕРИДЖЕМ (ВИПРАВЛЕНО!)
-                # leverage = float(position.get('leverage', LEVERAGE))
-                # effective_sl_clean = STOP_LOSS_PCT / leverage  # Ефективний поріг для чистого PnL
-                # if pnl_pct <= -effective_sl_clean:
-                #     leveraged_pnl = pnl_pct * leverage  # Для логів
-                #     logging.info(f"🚨 SLCHK [{symbol}] pnl_clean={pnl_pct:.2f}% | lev={leverage:.0f}x | SL_clean={effective_sl_clean:.2f}% | leveraged_pnl={leveraged_pnl:.1f}% → CLOSE")
-                #     reason = f"SL {pnl_pct:.1f}% ≤ -{effective_sl_clean:.2f}% (leveraged: {leveraged_pnl:.1f}%)"
-                #     positions_to_close.append((symbol, position, reason, pnl_pct))
-                #     continue
-                
-                # 1.1 ПЕРЕВІРКА СТОП-ЛОСС (Виправлено на пряме порівняння)
-                # Якщо PnL (ROE) менше або дорівнює -3.0% (ваше налаштування)
-                if pnl_pct <= -STOP_LOSS_PCT:
-                    logging.info(f"🚨 SLCHK [{symbol}] PnL={pnl_pct:.2f}% ≤ -{STOP_LOSS_PCT:.2f}% → CLOSE")
-                    reason = f"SL {pnl_pct:.1f}%"
-                    positions_to_close.append((symbol, position, reason, pnl_pct))
+                if current_price:
+                    price_history.record(symbol, current_price)
+                
+                # 🎯 Правила закриття - strategy_rules.evaluate_exit (ті самі що в backtest.py);
+                # спред DEX запитується лише якщо таймер/TP/SL не спрацювали
+                spread_info = {}
+                
+                def current_spread():
+                    spread_pct, price1, price2 = compute_cross_exchange_spread(position, symbol)
+                    if spread_pct is None:
+                        logging.warning(f"🎯 MONITOR [{symbol}]: Не вдалося отримати спред для конвергенції")
+                    spread_info.update(spread_pct=spread_pct, price1=price1, price2=price2)
+                    return spread_pct
+                
+                decision = evaluate_exit(position, time.time(), current_price, current_spread, DEFAULT_PARAMS)
+                if not decision:
                     continue
-                    
-                # 1.2 ПЕРЕВІРКА 50% РУХУ ВІД ПОЧАТКОВОГО СПРЕДУ (Nazir: додано)
-                if HALF_MOVE_CLOSE and position.get('entry_spread_pct'):
-                    initial_spread_pct = abs(position.get('entry_spread_pct', 0))
-                    # Розраховуємо поточний спред
-                    spread_result = compute_cross_exchange_spread(position, symbol)
-                    if spread_result[0] is not None:
-                        current_spread_pct, price1, price2 = spread_result
-                        current_spread_pct = abs(current_spread_pct)
-                        
-                        # Якщо спред зменшився на 50% від початкового
-                        half_target = initial_spread_pct * HALF_MOVE_PCT  # 50% від початкового спреду
-                        spread_reduction = initial_spread_pct - current_spread_pct
-                        
-                        if spread_reduction >= half_target:
-                            reason = f"50% рух: {initial_spread_pct:.2f}%→{current_spread_pct:.2f}% (-{spread_reduction:.2f}%)"
-                            
-                            # Повідомлення про 50% рух
-                            half_move_signal = f"🎯 **50% РУХ ЦІН!**\n"\
-                                             f"📊 Символ: **{symbol.replace('/USDT:USDT', '')}** ({position['side']})\n"\
-                                             f"💰 Розмір: **${position['size_usdt']:.2f}**\n"\
-                                             f"📈 Початковий спред: **{initial_spread_pct:.2f}%**\n"\
-                                             f"📉 Поточний спред: **{current_spread_pct:.2f}%**\n"\
-                                             f"⚡ Рух: **-{spread_reduction:.2f}%** (50% досягнуто)\n"\
-                                             f"💎 P&L: **{pnl_pct:+.1f}%** (${(position['size_usdt'] * pnl_pct / 100):+.2f})\n"\
-                                             f"✨ Ціни зійшлися на 50%! Фіксуємо прибуток\n"\
-                                             f"⏰ Час: **{time.strftime('%H:%M:%S %d.%m.%Y')}**"
-                            send_to_admins_and_group(half_move_signal)
-                            
-                            positions_to_close.append((symbol, position, reason, pnl_pct))
-                            continue
-                    
-                # 2. ПЕРЕВІРКА КОНВЕРГЕНЦІЇ ЦІН (DEX конвергенція - повернуто)
-                logging.info(f"🎯 MONITOR [{symbol}]: Перевірка DEX конвергенції... CLOSE_ON_CONVERGENCE={CLOSE_ON_CONVERGENCE}")
-                if CLOSE_ON_CONVERGENCE:
-                    try:
-                        spread_result = compute_cross_exchange_spread(position, symbol)
-                        logging.info(f"🎯 MONITOR [{symbol}]: Результат спреду: {spread_result}")
-                        
-                        if spread_result[0] is not None:
-                            current_spread_pct, price1, price2 = spread_result
-                            logging.info(f"🎯 MONITOR [{symbol}]: Поточний спред: {current_spread_pct:.3f}%, поріг: {CONVERGENCE_SPREAD_PCT}%")
-                            
-                            if abs(current_spread_pct) <= CONVERGENCE_SPREAD_PCT:
-                                reason = f"DEX конвергенція {current_spread_pct:.2f}% ≤ {CONVERGENCE_SPREAD_PCT}%"
-                                
-                                # 🎯 КРАСИВЕ СПОВІЩЕННЯ ПРО КОНВЕРГЕНЦІЮ ЦІН
-                                convergence_signal = f"🎯 **КОНВЕРГЕНЦІЯ ЦІН!**\n"\
-                                                    f"📊 Символ: **{symbol.replace('/USDT:USDT', '')}** ({position['side']})\n"\
-                                                    f"💰 Розмір: **${position['size_usdt']:.2f}**\n"\
-                                                    f"📈 Ціни: Біржа **${price1:.6f}** | Dex **${price2:.6f}**\n"\
-                                                    f"📉 Спред: **{abs(current_spread_pct):.2f}%** ≤ {CONVERGENCE_SPREAD_PCT}% (конвергенція)\n"\
-                                                    f"💎 P&L: **{pnl_pct:+.1f}%** (${(position['size_usdt'] * pnl_pct / 100):+.2f})\n"\
-                                                    f"✨ Ціни зійшлися! Фіксуємо прибуток\n"\
-                                                    f"⏰ Час: **{time.strftime('%H:%M:%S %d.%m.%Y')}**"
-                                send_to_admins_and_group(convergence_signal)
-                                
-                                positions_to_close.append((symbol, position, reason, pnl_pct))
-                                continue
-                        else:
-                            logging.warning(f"🎯 MONITOR [{symbol}]: Не вдалося отримати спред для конвергенції")
-                    
-                    except Exception as e:
-                        logging.error(f"🎯 MONITOR [{symbol}]: Помилка при перевірці конвергенції: {e}")
-                        # Продовжуємо без конвергенції якщо є помилка з DEX
+                
+                exit_code, reason, pnl_pct = decision
+                logging.info(f"🚪 [{symbol}] {exit_code}: {reason} | ціна {current_price} | P&L {pnl_pct:+.2f}%")
+                exit_signal = format_exit_signal(exit_code, symbol, position, pnl_pct, spread_info)
+                if exit_signal:
+                    send_to_admins_and_group(exit_signal)
+                positions_to_close.append((symbol, position, reason, pnl_pct))
             
             # Закриваємо позиції які відповідають критеріям
             for symbol, position, reason, pnl_pct in positions_to_close:
@@ -873,7 +954,7 @@ def monitor_open_positions():
                 
                 # 🔒 CRITICAL ORDER PLACEMENT LOCK для закриття (Task 6: уникнення конфліктних closes)
                 logging.warning(f"🔥 {symbol}: Викликаємо close_position()...")
-                with order_placement_lock:
+                with timed_lock(order_placement_lock, 'order_placement'), stage('close_position'), shielded():
                     result = close_position(symbol, position)
                 
                 logging.warning(f"🔥 {symbol}: close_position() повернув result={result}")
@@ -926,8 +1007,24 @@ def monitor_open_positions():
 
 # 🚀 НОВІ ФІШКИ: Розумні індикатори для кращої торгівлі
 def calculate_volatility_indicator(symbol, exchange="xt"):
-    """📊 Індикатор волатільності - аналізує коливання цін за останні 24 години"""
+    """📊 Індикатор волатільності - коливання цін з історії сканера (fallback: 24h high/low тікера)"""
+    init_xt_accounts()
     try:
+        # 📈 Реальна історія цін - без додаткового запиту тікера
+        recent = price_history.get_range_volatility(symbol, PRICE_HISTORY_VOLATILITY_WINDOW_MIN)
+        if recent and recent['coverage_pct'] >= PRICE_HISTORY_MIN_COVERAGE_PCT:
+            volatility_pct = recent['volatility_pct']
+            risk_level, quality_score = _classify_volatility(volatility_pct, PRICE_HISTORY_VOLATILITY_WINDOW_MIN)
+            return {
+                "status": "success",
+                "volatility": round(volatility_pct, 2),
+                "risk_level": risk_level,
+                "quality_score": quality_score,
+                "high": recent['high'],  # За вікно історії, не 24h
+                "low": recent['low'],
+                "source": f"history_{PRICE_HISTORY_VOLATILITY_WINDOW_MIN}m"
+            }
+        
         if exchange == "xt" and xt:
             ticker_data = xt_client.fetch_xt_ticker(xt, symbol)
         else:
@@ -943,19 +1040,7 @@ def calculate_volatility_indicator(symbol, exchange="xt"):
         # Розраховуємо волатільність як % від поточної ціни
         volatility_pct = ((high_24h - low_24h) / current_price) * 100
         
-        # Класифікуємо волатільність
-        if volatility_pct < 2:
-            risk_level = "LOW"
-            quality_score = 8  # Низька волатільність = хороша стабільність
-        elif volatility_pct < 5:
-            risk_level = "MEDIUM"  
-            quality_score = 6
-        elif volatility_pct < 10:
-            risk_level = "HIGH"
-            quality_score = 4
-        else:
-            risk_level = "EXTREME"
-            quality_score = 1  # Висока волатільність = ризиковано
+        risk_level, quality_score = _classify_volatility(volatility_pct)
             
         return {
             "status": "success",
@@ -963,14 +1048,32 @@ def calculate_volatility_indicator(symbol, exchange="xt"):
             "risk_level": risk_level,
             "quality_score": quality_score,
             "high_24h": high_24h,
-            "low_24h": low_24h
+            "low_24h": low_24h,
+            "source": "ticker_24h"
         }
         
     except Exception as e:
         return {"status": "error", "error": str(e), "volatility": 0}
 
+def _classify_volatility(volatility_pct, window_min=24 * 60):
+    """
+    Класифікуємо волатільність -> (risk_level, quality_score)
+    Пороги 2/5/10% - для 24h діапазону; для коротшого вікна масштабуються як sqrt(часу)
+    (діапазон ціни росте приблизно з коренем тривалості) - 60хв ≈ 0.41/1.02/2.04%
+    """
+    scale = (window_min / (24 * 60)) ** 0.5
+    if volatility_pct < 2 * scale:
+        return "LOW", 8  # Низька волатільність = хороша стабільність
+    elif volatility_pct < 5 * scale:
+        return "MEDIUM", 6
+    elif volatility_pct < 10 * scale:
+        return "HIGH", 4
+    else:
+        return "EXTREME", 1  # Висока волатільність = ризиковано
+
 def analyze_volume_quality(symbol, dex_info, exchange="xt"):
     """📈 Аналіз якості об'ємів торгівлі"""
+    init_xt_accounts()
     try:
         if exchange == "xt" and xt:
             ticker_data = xt_client.fetch_xt_ticker(xt, symbol)
@@ -1082,10 +1185,12 @@ def stop_all_workers():
     
     # 🛡️ THREAD-SAFE STOP: зупиняємо моніторинг через Event
     monitor_stop_event.set()
+    # ⏳ Скасовуємо воркерів що чекають мережу/ретраї (ордери в критичній секції доробляються)
+    cancel_all('(зупинка)')
     
-    # Зупиняємо воркерів
+    # Зупиняємо воркерів (слот може бути None поки start_workers ще не запустив потік)
     for thread in worker_threads:
-        if thread.is_alive():
+        if thread is not None and thread.is_alive():
             thread.join(timeout=2)
     worker_threads.clear()
     
@@ -1099,6 +1204,8 @@ def stop_all_workers():
             logging.info("✅ Потік моніторингу успішно завершено")
             monitor_thread = None  # 🧹 CLEANUP: Обнуляємо референс
     
+    spread_recorder.flush()  # 🗄️ Лічильник рядків сегменту спредів на диск
+    
     logging.warning("🔴 STOP COMPLETED: Всі воркери зупинено")
 
 def restart_workers():
@@ -1123,6 +1230,7 @@ def restart_workers():
 def sync_positions_from_exchange():
     """Синхронізуємо позиції з біржею при старті"""
     global active_positions
+    init_xt_accounts()
     try:
         # 🔧 ВИКОРИСТОВУЄМО XT БІРЖУ для синхронізації позицій
         try:
@@ -1221,7 +1329,7 @@ def sync_positions_from_exchange():
                     if 'xt_pair_url' not in position:
                         position['xt_pair_url'] = generate_xt_pair_url(symbol)
                     
-                    active_positions[symbol] = position  # один запис на символ
+                    active_positions[symbol] = Position.from_dict(position, symbol)  # один запис на символ
                     synced_count += 1
                 
         logging.info(f"🔄 Синхронізовано {synced_count} позицій з біржі")
@@ -1237,6 +1345,44 @@ def sync_positions_from_exchange():
         logging.error(f"Помилка синхронізації позицій: {type(e).__name__}: {e}")
         return 0
 
+# ✂️ Символи що ніколи не дадуть сигнал (стейблкоїни/заблоковані) - поза гарячим набором сканування
+pruned_symbols = set()
+
+def prune_scan_universe(symbols):
+    """Прибирає з набору сканування символи з BLACKLISTED_TOKENS; повертає кількість прибраних"""
+    pruned = [s for s in symbols if is_blacklisted_token(s)]
+    pruned_symbols.update(pruned)
+    return len(pruned)
+
+def scan_universe():
+    """
+    Гарячий набір сканування: ринки без статично прибраних символів та без символів
+    у паузі негативного кешу DEX (повертаються автоматично коли настає час перевірки);
+    символи з відкритою позицією лишаються в скані навіть у паузі негативного кешу
+    """
+    suppressed = set(negative_cache.suppressed_symbols())
+    # 🌐 Кластер: тільки орендовані діапазони символів; лідер додатково сканує свої позиції (усереднення)
+    hold_positions = cluster.is_leader
+    return [s for s in list(markets.keys())
+            if s not in pruned_symbols
+            and (s in active_positions or symbol_registry.get(s).dex_base not in suppressed)
+            and (cluster.owns(s) or (hold_positions and s in active_positions))]
+
+def _on_markets_refreshed(new_markets):
+    """🔄 Фонове оновлення ринків: додаємо нові лістинги та прибираємо делістинги"""
+    added = [s for s in new_markets.keys() if s not in markets]
+    removed = [s for s in list(markets.keys()) if s not in new_markets]
+    for s in added:
+        markets[s] = new_markets[s]
+        trade_symbols.setdefault(s, True)
+    for s in removed:
+        markets.pop(s, None)
+    if added:
+        symbol_registry.build({s: new_markets[s] for s in added})
+    prune_scan_universe(added)
+    if added or removed:
+        logging.info(f"🔄 Ринки XT оновлено: +{len(added)} нових, -{len(removed)} делістингів")
+
 def init_markets():
     global markets, trade_symbols, xt, xt_markets_available
     # ❌ GATE.IO ВІДКЛЮЧЕНО за запитом користувача - тільки XT біржа!
@@ -1245,7 +1391,7 @@ def init_markets():
     
     # 🚀 ТІЛЬКИ XT БІРЖА - ініціалізуємо XT як основну біржу
     try:
-        if XT_API_KEY and XT_API_SECRET:
+        if (XT_API_KEY and XT_API_SECRET) or XT_SIMULATOR:
             xt = create_xt()
             xt_markets = load_xt_futures_markets(xt)
             xt_markets_available = True
@@ -1254,10 +1400,29 @@ def init_markets():
             # Використовуємо XT ринки як основні
             markets = xt_markets
             # включаємо за замовчуванням усі XT ринки
-            for s in markets.keys():
-                trade_symbols[s] = True
+            # (перемикачі вимкнені на інших вузлах кластера зберігаються)
+            trade_symbols.update({s: True for s in markets.keys() if s not in trade_symbols})
                 
             logging.info(f"✅ Знайдено {len(markets)} торгових пар на XT біржі")
+            symbol_registry.build(markets)  # 🗂️ ID, бази, множники 1000x та посилання - один раз
+
+            # ⚡ Шаблони ордерів і теплі TLS сесії торгових акаунтів - перший ордер без холодного старту
+            prewarm_templates(xt, markets.keys())
+            for account_client in xt_accounts().values():
+                warm_session(account_client)
+            
+            # 📡 Ордери/позиції/баланс через приватний WebSocket замість опитування fetch_positions
+            start_user_streams({f"Account {num}": client for num, client in xt_accounts().items()})
+
+            # ✂️ Прунінг універсу: стейблкоїни/заблоковані та символи без DEX пари не скануються
+            pruned_count = prune_scan_universe(markets.keys())
+            suppressed_count = len(negative_cache.suppressed_symbols())
+            logging.info(f"✂️ Поза скануванням: {pruned_count} у чорному списку токенів, "
+                         f"{suppressed_count} без DEX пари (негативний кеш)")
+            
+            # 💾 Ринки могли прийти з кешу - оновлюємо їх у фоні, сканер стартує одразу
+            market_cache.add_update_callback(_on_markets_refreshed)
+            market_cache.start_background_refresh(xt_client.xt_markets_loaded_at)
         else:
             logging.error("❌ XT API ключі відсутні - система НЕ МОЖЕ ПРАЦЮВАТИ!")
             xt_markets_available = False
@@ -1280,32 +1445,20 @@ def init_markets():
 def can_execute_on_orderbook(symbol, order_amount_usdt, depth_levels=ORDER_BOOK_DEPTH, max_slippage_pct=1.0, exchange="xt"):
     """
     Перевіряє бічні обсяги в стакані — строга перевірка ліквідності
+    Знімок стакану спільний для всіх перевірок тіку (order_book.get_book)
     """
+    init_xt_accounts()
     try:
-        if exchange == "xt" and xt:
-            ob = xt_client.fetch_xt_order_book(xt, symbol, depth_levels)
-            ticker = xt_client.fetch_xt_ticker(xt, symbol)
-        else:
-            ob = fetch_order_book(xt, symbol, depth_levels)
-            ticker = fetch_xt_ticker(xt, symbol)
-        last = ticker['last']
+        book = order_book.get_book(xt, symbol, depth_levels)
         
-        if last is None or not ob or 'asks' not in ob or 'bids' not in ob:
+        if book is None or book.mid is None:
             logging.info(f"[{symbol}] ⚠️ ІНФО: Немає даних order book але продовжуємо торгувати")
             return True
             
-        # Перевіряємо asks і bids окремо
-        asks_liquidity = 0.0
-        bids_liquidity = 0.0
+        # Ліквідність в asks (для LONG позицій) і bids (для SHORT позицій), USD з урахуванням contractSize
+        asks_liquidity = book.asks.liquidity_usd(depth_levels)
+        bids_liquidity = book.bids.liquidity_usd(depth_levels)
         
-        # Рахуємо ліквідність в asks (для LONG позицій)
-        for price, vol in ob['asks'][:depth_levels]:
-            asks_liquidity += float(price) * float(vol)
-            
-        # Рахуємо ліквідність в bids (для SHORT позицій)  
-        for price, vol in ob['bids'][:depth_levels]:
-            bids_liquidity += float(price) * float(vol)
-            
         # БЕЗПЕЧНА ПЕРЕВІРКА: потрібно мінімум в 5 разів більше ліквідності ніж сума ордеру (критично для futures!)
         min_required_liquidity = order_amount_usdt * 5
         
@@ -1315,6 +1468,13 @@ def can_execute_on_orderbook(symbol, order_amount_usdt, depth_levels=ORDER_BOOK_
         # ЗАВЖДИ ЛОГУЄМО ІНФОРМАЦІЮ ПРО ЛІКВІДНІСТЬ
         logging.info(f"[{symbol}] 💧 ЛІКВІДНІСТЬ: asks=${asks_liquidity:.2f} bids=${bids_liquidity:.2f} потрібно>${min_required_liquidity:.2f}")
         
+        # Очікуване прослизання ринкового ордера (VWAP по рівнях) - інформаційно
+        long_fill = book.asks.fill(order_amount_usdt)
+        short_fill = book.bids.fill(order_amount_usdt)
+        slippage_note = "" if max(long_fill['slippage_pct'], short_fill['slippage_pct']) <= max_slippage_pct else " ⚠️"
+        logging.info(f"[{symbol}] 📐 ПРОСЛИЗАННЯ ${order_amount_usdt:.2f}: LONG {long_fill['slippage_pct']:.3f}% "
+                     f"SHORT {short_fill['slippage_pct']:.3f}%{slippage_note}")
+        
         if not (asks_ok and bids_ok):
             logging.warning(f"[{symbol}] ❌ БЛОКОВАНИЙ ВХІД: Недостатня ліквідність asks=${asks_liquidity:.2f} bids=${bids_liquidity:.2f} < ${min_required_liquidity:.2f}")
             # БЛОКУЄМО торгівлю при недостатній ліквідності як просив користувач
@@ -1328,7 +1488,6 @@ def can_execute_on_orderbook(symbol, order_amount_usdt, depth_levels=ORDER_BOOK_
         return False
 
 
-
 def generate_close_signal(symbol, side, close_price, tp_price, open_price):
     """
     Генерує професійне повідомлення про закриття позиції
@@ -1366,14 +1525,17 @@ def generate_close_signal(symbol, side, close_price, tp_price, open_price):
 """
     return close_signal
 
-def open_market_position(symbol, side, usd_amount, leverage, gate_price_ref=None, dex_price_ref=None, spread_ref=None, account_num=1):
+def open_market_position(symbol, side, usd_amount, leverage, gate_price_ref=None, dex_price_ref=None, spread_ref=None, account_num=1,
+                         price_age_sec=None):
     """
     Proxy function to XT.com - replaced Gate.io with XT.com
     Підтримує обидва акаунти через параметр account_num
     """
     # Вибираємо акаунт для торгівлі
+    init_xt_accounts()
     xt_client = xt_account_1 if account_num == 1 else xt_account_2
-    return xt_open_market_position(xt_client, symbol, side, usd_amount, leverage, gate_price_ref, dex_price_ref, spread_ref)
+    return xt_open_market_position(xt_client, symbol, side, usd_amount, leverage, gate_price_ref, dex_price_ref, spread_ref,
+                                   price_age_sec)
 
 def close_position_market(symbol, side, usd_amount, account_num=1):
     """
@@ -1381,21 +1543,26 @@ def close_position_market(symbol, side, usd_amount, account_num=1):
     Підтримує обидва акаунти через параметр account_num
     """
     # Вибираємо акаунт для закриття
+    init_xt_accounts()
     xt_client = xt_account_1 if account_num == 1 else xt_account_2
     return xt_close_position_market(xt_client, symbol, side, usd_amount)
 
-def symbol_worker(symbol):
+def symbol_worker(symbol, observation=None):
     """
     Робота по одному символу з усередненням позицій: fetch ticker, dex price via dexscreener, calc spread, check liquidity, open/average/close
     (ОДИН ПРОХІД ЗАМІСТЬ ЦИКЛУ)
+    observation - готові етапи 1-2 від процесу шарда (scan_shards.observe_symbol)
     """
     # 🔥 ДОДАНО: Перевірка Чорного Списку
     with blacklist_lock:
-        if symbol in blacklist_data["banned_symbols"]:
+        if symbol in blacklist_data.get("banned_symbols", ()):
             logging.debug(f"[{symbol}] ⛔ Пропускаємо (в чорному списку)")
             return
 
-    logging.info(f"Worker starting for {symbol}") # ⬅️ ЗМІНЕНО: логування старту
+    logging.debug("Worker starting for %s", symbol)  # ⬅️ ЗМІНЕНО: логування старту (DEBUG - 700 рядків на цикл)
+    symbol_info = symbol_registry.get(symbol)  # 🗂️ База, множник контракту, посилання - O(1)
+    timer = PipelineTimer()  # ⏱️ Час кожного етапу конвеєра (metrics)
+    trace = None  # 🧭 Трейс можливості (створюється тільки для спреду в робочому діапазоні)
     # ⛔️ ВИДАЛЕНО: while bot_running:
     try:
         if not trade_symbols.get(symbol, False):
@@ -1403,55 +1570,23 @@ def symbol_worker(symbol):
             logging.debug(f"[{symbol}] Торгівля вимкнена, воркер завершує роботу.")
             return  # ⬅️ ЗМІНЕНО: з continue на return
 
-        # 1) ТІЛЬКИ XT БІРЖА - отримуємо ціну з XT (як просив користувач)
-        xt_price = None
+        # 1-2) Ціна XT і метрики DEX (у шардованому скані приходять готовими з процесу шарда)
         if not (xt_markets_available and xt):
             logging.debug(f"[{symbol}] ❌ XT біржа недоступна")
             return  # ⬅️ ЗМІНЕНО: з continue на return
-            
-        try:
-            xt_price = get_xt_price(xt, symbol)
-            if not xt_price or not is_xt_futures_tradeable(symbol):
-                logging.debug(f"[{symbol}] ❌ Неможливо торгувати на XT futures")
-                return  # ⬅️ ЗМІНЕНО: з continue на return
-            logging.debug(f"[{symbol}] ✅ XT ціна: ${xt_price:.6f}")
-        except Exception as e:
-            logging.debug(f"[{symbol}] ⚠️ XT ціна недоступна: {e}")
-            return  # ⬅️ ЗМІНЕНО: з continue на return
-
-        # 2) ТІЛЬКИ ТОДІ DexScreener - отримуємо РОЗШИРЕНІ МЕТРИКИ
-        try:
-            # 🔬 РОЗШИРЕНИЙ АНАЛІЗ: ліквідність, FDV, market cap, транзакції, покупці/продавці
-            advanced_metrics = get_advanced_token_analysis(symbol)
-            if not advanced_metrics:
-                logging.debug(f"[{symbol}] ❌ Немає якісної пари на DexScreener")
-                return  # ⬅️ ЗМІНЕНО: з continue на return
-                
-            # Отримуємо базові дані (backward compatibility)
-            token_info = {
-                'price_usd': advanced_metrics.get('price_usd', 0),
-                'liquidity': advanced_metrics.get('liquidity', 0),
-                'volume_24h': advanced_metrics.get('volume_24h', 0),
-                'dex_link': advanced_metrics.get('exact_pair_url') or get_proper_dexscreener_link(symbol)
-            }
-            
-            # Коротка інформація про токен (зменшено логування)
-            logging.info(f"📊 {symbol}: ${advanced_metrics.get('price_usd', 0):.6f} | Vol ${advanced_metrics.get('volume_1h', 0):,.0f}")
-                
-            if not token_info:
-                logging.debug(f"[{symbol}] ❌ Немає якісної пари на DexScreener")
-                return  # ⬅️ ЗМІНЕНО: з continue на return
-            
-            dex_price = token_info['price_usd']
-            
-            # ЖОРСТКІ ПЕРЕВІРКИ (як у топових арбітражних ботів)
-            if not dex_price or dex_price < 0.000001:  # мінімальна ціна $0.000001
-                raise Exception(f"Invalid DexScreener price: {dex_price}")
-                
-        except Exception as e:
-            # БЛОКУЄМО токени з поганими DexScreener цінами - як у друга з Bybit
-            logging.warning(f"[{symbol}] ❌ Пропускаємо через погану DexScreener ціну: {e}")
-            return  # ⬅️ ЗМІНЕНО: з continue на return
+        if observation is None:
+            observation = observe_symbol(xt, symbol, timer)
+        if not observation:
+            return
+        xt_price = observation.xt_price
+        # 🧭 Момент спостереження ціни - від нього рахується вік можливості
+        price_observed_at = time.perf_counter() - max(0.0, time.time() - observation.observed_at)
+        indicator_engine.update(symbol, xt_price)  # ⚡ O(1) оновлення індикаторів з кожного скану
+        if observation.dex_price is None:
+            return
+        advanced_metrics = observation.advanced_metrics
+        token_info = observation.token_info
+        dex_price = observation.dex_price
 
         # 3) ТІЛЬКИ XT vs DexScreener АРБІТРАЖ (Gate.io ВІДКЛЮЧЕНО)
         if not xt_price:
@@ -1467,22 +1602,27 @@ def symbol_worker(symbol):
         ref_price = xt_price  # ВИПРАВЛЕНО: XT ціна для XT біржі
         
         spread_pct = best_spread
-        spread_store.append(spread_pct)
+        if MIN_SPREAD <= abs(spread_pct) <= MAX_SPREAD:
+            trace = OpportunityTrace(symbol, price_observed_at)
+        spread_recorder.record(symbol, xt_price, dex_price, spread_pct, token_info.get('liquidity'))
+        price_history.record(symbol, xt_price, dex_price, spread_pct, token_info.get('volume_24h'))
         
         # Покращене логування тільки з XT та DexScreener
-        clean_symbol = symbol.replace('/USDT:USDT', '')
-        log_info = f"XT: ${xt_price:.6f} | Dex: ${dex_price:.6f} | Спред: {best_spread:.2f}% {best_direction} | Торгуємо на: XT"
-        logging.info(f"[{clean_symbol}] {log_info}")
+        clean_symbol = symbol_info.base
+        logging.info("[%s] XT: $%.6f | Dex: $%.6f | Спред: %.2f%% %s | Торгуємо на: XT",
+                     clean_symbol, xt_price, dex_price, best_spread, best_direction, extra=sampled(symbol))
         
         # 🚀 НОВІ ФІШКИ: Розумна аналітика ПІСЛЯ встановлення trading_exchange
         volatility = calculate_volatility_indicator(symbol, trading_exchange)
         volume_analysis = analyze_volume_quality(symbol, token_info, trading_exchange)
         smart_timing = smart_entry_timing(symbol, abs(spread_pct), volatility, volume_analysis)
+        timer.mark('analytics')
         
         # Логування нових фішок
         # Аналіз якості токена (логування зменшено)
         if volatility.get('status') == 'success' and smart_timing.get('status') == 'success':
-            logging.info(f"[{clean_symbol}] 📊 Волатільність: {volatility['volatility']}% | Тайминг: {smart_timing['grade']}")
+            logging.info("[%s] 📊 Волатільність: %s%% | Тайминг: %s", clean_symbol, volatility['volatility'],
+                         smart_timing['grade'], extra=sampled(symbol))
         
         # ✅ ПОВНА АВТОМАТИЗАЦІЯ - БЕЗ БЛОКИРОВОК!
         enhanced_entry_check = True
@@ -1500,7 +1640,7 @@ def symbol_worker(symbol):
         
         # 🔒 THREAD-SAFE БАЛАНС (Task 6: захист від одночасних перевірок балансу)
         try:
-            with balance_check_lock:  # ЗАХИСТ: тільки один worker перевіряє баланс одночасно
+            with timed_lock(balance_check_lock, 'balance_check'):  # ЗАХИСТ: тільки один worker перевіряє баланс одночасно
                 # Видалено DEBUG логування для чистоти
                 
                 # ✅ ТІЛЬКИ XT.COM БІРЖА - ОБИДВА АКАУНТИ
@@ -1513,9 +1653,10 @@ def symbol_worker(symbol):
                     available_balance_2 = float(balance_2.get('free', 0.0))
                     # Загальний доступний баланс
                     available_balance = available_balance_1 + available_balance_2
-                    logging.info(f"💰 XT.com АКАУНТ 1: ${balance_1['total']:.2f} USDT (доступно ${available_balance_1:.2f})")
-                    logging.info(f"💰 XT.com АКАУНТ 2: ${balance_2['total']:.2f} USDT (доступно ${available_balance_2:.2f})")
-                    logging.info(f"💰 ЗАГАЛОМ: ${balance_1['total'] + balance_2['total']:.2f} USDT (доступно ${available_balance:.2f})")
+                    # Баланс однаковий для всіх символів циклу - проріджуємо глобально, не per-symbol
+                    logging.info("💰 XT.com АКАУНТ 1: $%.2f USDT (доступно $%.2f)", balance_1['total'], available_balance_1, extra=sampled())
+                    logging.info("💰 XT.com АКАУНТ 2: $%.2f USDT (доступно $%.2f)", balance_2['total'], available_balance_2, extra=sampled())
+                    logging.info("💰 ЗАГАЛОМ: $%.2f USDT (доступно $%.2f)", balance_1['total'] + balance_2['total'], available_balance, extra=sampled())
                 else:
                     # Якщо trading_exchange не XT - пропускаємо
                     logging.warning(f"[{symbol}] ⚠️ Підтримуємо тільки XT біржу, пропускаємо: {trading_exchange}")
@@ -1530,78 +1671,16 @@ def symbol_worker(symbol):
                     total_positions = len(active_positions)
                     has_position = symbol in active_positions
                 positions_check = total_positions < MAX_OPEN_POSITIONS
+            timer.mark('balance_check')
             
-            
-            # 🔥 ПОКРАЩЕНІ ФІЛЬТРИ РЕАЛЬНОСТІ - відсіюємо фейкові арбітражі!
-            is_realistic = True
-            
-            # 1. РОЗУМНИЙ спред фільтр: різні ліміти для різних монет
-            clean_symbol = symbol.replace('/USDT:USDT', '')
-            
-            # Основні монети (ETH, BTC тощо) - більш жорсткі ліміти
-            major_tokens = ['ETH', 'BTC', 'BNB', 'ADA', 'SOL', 'MATIC', 'AVAX', 'DOT', 'LINK']
-            max_spread_limit = 50.0  # ПОЛІПШЕНО: максимум 50% для блокування фейків
-            
-            # ЖОРСТКА перевірка фейкових спредів  
-            if abs(spread_pct) > max_spread_limit:
-                logging.warning(f"[{symbol}] ❌ ФЕЙК: Нереальний спред {spread_pct:.2f}% > {max_spread_limit}%")
-                is_realistic = False
-            
-            # БЛОКУВАННЯ НЕГАТИВНИХ СПРЕДІВ (очевидні фейки)
-            if spread_pct < -25.0:  # Негативні спреди більше -25% завжди фейкові  
-                logging.warning(f"[{symbol}] ❌ ФЕЙК: Негативний спред {spread_pct:.2f}% заблоковано")
-                is_realistic = False
-            
-            # 2. РОЗСЛАБЛЕНА перевірка співвідношення цін для більше можливостей
-            price_ratio = max(xt_price, dex_price) / min(xt_price, dex_price)
-            max_price_ratio = 2.5  # РОЗСЛАБЛЕНО: 2.5x для всіх монет для більше сигналів
-            
-            if price_ratio > max_price_ratio:
-                logging.warning(f"[{symbol}] ❌ ФЕЙК: Ціни відрізняються в {price_ratio:.2f} разів (макс. {max_price_ratio:.1f}x)")
-                is_realistic = False
-            
-            # 3. АБСОЛЮТНА перевірка цін для топ-монет (як ETH $3701 vs $4601)  
-            if clean_symbol in major_tokens:
-                # Перевіряємо що цінди в розумних межах для топ-монет
-                expected_ranges = {
-                    'ETH': (2000, 6000),    # ETH очікується $2000-6000
-                    'BTC': (30000, 100000), # BTC очікується $30k-100k  
-                    'BNB': (200, 1000),     # BNB очікується $200-1000
-                    'SOL': (50, 500),       # SOL очікується $50-500
-                    'ADA': (0.2, 3.0),      # ADA очікується $0.2-3.0
-                }
-                
-                if clean_symbol in expected_ranges:
-                    min_price, max_price = expected_ranges[clean_symbol]
-                    if not (min_price <= xt_price <= max_price) or not (min_price <= dex_price <= max_price):
-                        logging.warning(f"[{symbol}] ❌ ФЕЙК: Ціна поза межами для {clean_symbol}: XT=${xt_price:.2f}, Dex=${dex_price:.2f} (очікується ${min_price}-${max_price})")
-                        is_realistic = False
-            
-            # 4. ЖОРСТКІ ФІЛЬТРИ: Мінімальна ліквідність та обсяг для торгівлі (як просив користувач)
-            min_liquidity = token_info.get('liquidity', 0)
-            min_volume_24h = token_info.get('volume_24h', 0)
-            
-            if min_liquidity < MIN_POOLED_LIQUIDITY_USD:  # ФІЛЬТР з config.py
-                logging.warning(f"[{symbol}] ❌ ФЕЙК: Мала ліквідність ${min_liquidity:,.0f} < ${MIN_POOLED_LIQUIDITY_USD:,}")
-                is_realistic = False
-                
-            if min_volume_24h < MIN_24H_VOLUME_USD:  # ФІЛЬТР з config.py
-                logging.warning(f"[{symbol}] ❌ ФЕЙК: Малий обсяг ${min_volume_24h:,.0f} < ${MIN_24H_VOLUME_USD:,}")
-                is_realistic = False
-            
-            # 5. Перевіряємо що це не стейблкоїн або заблоковані токени
-            blacklisted_tokens = ['USDT', 'USDC', 'BUSD', 'DAI', 'TUSD', 'FDUSD', 'TON']
-            if any(token in clean_symbol for token in blacklisted_tokens):
-                logging.info(f"[{symbol}] ❌ ЗАБЛОКОВАНО: Токен {clean_symbol} в чорному списку")
-                is_realistic = False
-            
-            # 6. ДОДАТКОВО: Перевірка кратності цін (виявляє деякі фейки)
-            if xt_price > 0 and dex_price > 0:
-                # Якщо одна ціна є точним кратним іншої (x10, x100), це може бути помилка
-                ratio_check = xt_price / dex_price
-                if abs(ratio_check - round(ratio_check)) < 0.01 and round(ratio_check) >= 10:
-                    logging.warning(f"[{symbol}] ❌ ФЕЙК: Підозрюване кратне співвідношення цін {ratio_check:.1f}x")
-                    is_realistic = False
+            # 🔥 ПОКРАЩЕНІ ФІЛЬТРИ РЕАЛЬНОСТІ - відсіюємо фейкові арбітражі! (strategy_rules - ті самі що й у backtest)
+            clean_symbol = symbol_info.base
+            is_realistic, reject_reasons = check_realistic_opportunity(
+                symbol, spread_pct, xt_price, dex_price,
+                token_info.get('liquidity', 0), token_info.get('volume_24h', 0)
+            )
+            for reason in reject_reasons:
+                logging.warning(f"[{symbol}] ❌ {reason}")
             
             # АВТОСИГНАЛИ: Окремі сигнали для кожної пари бірж >= MIN_SPREAD
             
@@ -1609,7 +1688,8 @@ def symbol_worker(symbol):
             if volatility.get('status') == 'success':
                 # Компактний звіт якості (зменшено логування)
                 if volatility.get('status') == 'success' and volume_analysis.get('status') == 'success':
-                    logging.info(f"[{symbol}] 📊 Vol: {volatility['volatility']}% | Об'єм: ${volume_analysis['total_volume']:,.0f} | Тайминг: {smart_timing.get('grade', 'N/A')}")
+                    logging.info("[%s] 📊 Vol: %s%% | Об'єм: $%.0f | Тайминг: %s", symbol, volatility['volatility'],
+                                 volume_analysis['total_volume'], smart_timing.get('grade', 'N/A'), extra=sampled(symbol))
             
             # Підвищуємо вимоги до входу на основі нових фішок
             enhanced_entry_check = True
@@ -1629,13 +1709,15 @@ def symbol_worker(symbol):
             if volume_analysis.get('quality_score', 0) <= 1:
                 logging.warning(f"[{symbol}] 📈 БЛОКОВАНО: Занадто низький об'єм ${volume_analysis.get('total_volume', 0):,.0f}")
                 enhanced_entry_check = False
+            timer.mark('filters')
             
             # 🛡️ ПЕРЕВІРЯЄМО ІСНУЮЧІ ПОЗИЦІЇ ПЕРЕД ВІДПРАВКОЮ СИГНАЛІВ
             with active_positions_lock:
                 already_has_position = symbol in active_positions
 
             # 🎯 НОВА ЛОГІКА: ЗБИРАЄМО МОЖЛИВОСТІ БЕЗ БАЛАНСОВИХ ОБМЕЖЕНЬ ДЛЯ НАЙКРАЩИХ СИГНАЛІВ
-            logging.info(f"🔍 ПЕРЕВІРКА СИГНАЛУ {symbol}: realistic={is_realistic}, entry_check={enhanced_entry_check}, has_position={already_has_position}")
+            logging.info("🔍 ПЕРЕВІРКА СИГНАЛУ %s: realistic=%s, entry_check=%s, has_position=%s",
+                         symbol, is_realistic, enhanced_entry_check, already_has_position, extra=sampled(symbol))
             if is_realistic and enhanced_entry_check and not already_has_position:
                 # 1. XT vs DexScreener (ТІЛЬКИ XT БІРЖА)
                 xt_dex_spread_pct = calculate_spread(dex_price, xt_price)
@@ -1658,22 +1740,35 @@ def symbol_worker(symbol):
                     # Розраховуємо рейтинг можливості для пошуку найкращого
                     liquidity = advanced_metrics.get('liquidity', 0)
                     volume_24h = advanced_metrics.get('volume_24h', 0) 
-                    score = abs(xt_dex_spread_pct) * 100 + (liquidity / 1000) + (volume_24h / 10000)
+                    # 🌊 Рейтинг по ціні виконання DEX ноги (price impact пулу на notional позиції), не по споту
+                    dex_depth, dex_fee = dex_impact.pool_depth(symbol_info.dex_base, token_info['price_usd'], liquidity,
+                                                               advanced_metrics.get('chain'), advanced_metrics.get('dex'))
+                    dex_fill = dex_impact.executable_spread(xt_price, dex_price, dex_depth, ORDER_AMOUNT * LEVERAGE, dex_fee)
+                    score = opportunity_score(dex_fill['executable_spread'], liquidity, volume_24h)
                     
                     # ✅ ДОДАЄМО В СИСТЕМУ НАЙКРАЩИХ МОЖЛИВОСТЕЙ (БЕЗ БАЛАНСОВИХ ОБМЕЖЕНЬ)
+                    trace.hop('queued')
                     with opportunities_lock:
-                        best_opportunities[symbol] = {
-                            'spread': xt_dex_spread_pct,
-                            'side': side,
-                            'score': score,
-                            'timestamp': current_time,
-                            'xt_price': xt_price,
-                            'dex_price': dex_price,
-                            'token_info': token_info,
-                            'advanced_metrics': advanced_metrics
-                        }
+                        best_opportunities[symbol] = Opportunity(
+                            symbol=symbol,
+                            side=side,
+                            spread=xt_dex_spread_pct,
+                            score=score,
+                            timestamp=current_time,
+                            xt_price=xt_price,
+                            dex_price=dex_price,
+                            liquidity=liquidity,
+                            volume_24h=volume_24h,
+                            dex_depth=dex_depth,
+                            dex_fee=dex_fee,
+                            executable_spread=dex_fill['executable_spread'],
+                            dex_impact_pct=dex_fill['impact_pct'],
+                            node=cluster.node_id,  # 🌐 Вузол кластера що знайшов можливість
+                            trace=trace.fork()  # 🧭 Окрема гілка трейсу для send_best_opportunity_signal
+                        )
                     
-                    logging.info(f"[{symbol}] 🏆 ДОДАНО ДО НАЙКРАЩИХ: {side} спред={xt_dex_spread_pct:.2f}% (рейтинг={score:.1f})")
+                    logging.info(f"[{symbol}] 🏆 ДОДАНО ДО НАЙКРАЩИХ: {side} спред={xt_dex_spread_pct:.2f}% "
+                                 f"(виконуваний {dex_fill['executable_spread']:.2f}%, DEX impact {dex_fill['impact_pct']:.2f}%, рейтинг={score:.1f})")
                     
                     # 🚨 НОВА ЛОГІКА: НЕГАЙНЕ ВІДПРАВЛЕННЯ СИГНАЛУ НЕЗАЛЕЖНО ВІД БАЛАНСУ!
                     # Відправляємо сигнал одразу після знаходження можливості (тільки з кулдауном)
@@ -1704,7 +1799,9 @@ def symbol_worker(symbol):
                                 )
                                 
                                 # КРИТИЧНО: Повна верифікація з блокуванням сигналів без DEX адреси
-                                verification_result = verify_arbitrage_signal(test_signal)
+                                with stage('verification'):
+                                    verification_result = verify_arbitrage_signal(test_signal)
+                                trace.hop('verified')
                                 
                                 if verification_result.valid:
                                     # ✅ СИГНАЛ ВАЛІДНИЙ - відправляємо з повною інформацією
@@ -1726,9 +1823,11 @@ def symbol_worker(symbol):
                     if signal_sent and signal_message:
                         try:
                             # 🎯 ТОРГОВІ СИГНАЛИ ОБОМ АДМІНАМ + ГРУПІ
-                            success2 = send_to_admins_and_group(signal_message)
+                            with stage('notification'):
+                                success2 = send_to_admins_and_group(signal_message)
                             
                             if success2:
+                                trace.hop('notified')
                                 # ТІЛЬКИ ПІСЛЯ УСПІШНОЇ ВІДПРАВКИ встановлюємо кулдаун
                                 with telegram_cooldown_lock:
                                     telegram_cooldown[symbol] = current_time
@@ -1785,7 +1884,8 @@ def symbol_worker(symbol):
                 logging.warning(f"[{symbol}] ❌ БЛОКОВАНИЙ ФЕЙК: спред={spread_pct:.2f}%")
             
             # РЕАЛЬНА ТОРГІВЛЯ З УСЕРЕДНЕННЯМ
-            if spread_check and balance_check and not DRY_RUN and is_realistic:
+            # 🌐 Ордери розміщує тільки лідер кластера (можливість інших вузлів він перевіряє сам)
+            if spread_check and balance_check and not DRY_RUN and is_realistic and cluster.is_leader:
                 side = "LONG" if spread_pct > 0 else "SHORT"
                 
                 # Логіка базового входу або усереднення
@@ -1812,23 +1912,12 @@ def symbol_worker(symbol):
                         # ПРИМУСОВЕ встановлення левериджу ПЕРЕД кожною угодою
                         if trading_exchange == "xt":
                             # 🔥 ДОДАНО: Встановлення ІЗОЛЬОВАНОЇ МАРЖІ
-                            try:
-                                # Спробуємо встановити isolated маржу. 
-                                # Це може викликати помилку, якщо позиція вже відкрита або режим вже встановлено, тому try/except
-                                xt.set_margin_mode('isolated', symbol)
-                                logging.info(f"[{symbol}] 🛡️ XT: Режим маржі переключено на ISOLATED")
-                            except Exception as e:
-                                # Ігноруємо помилку, якщо режим вже стоїть правильний, або просто логуємо як warning
-                                logging.warning(f"[{symbol}] ⚠️ Не вдалося явно встановити ISOLATED (можливо вже активно або є відкриті ордери): {e}")
-
-                            try:
-                                # Правильний виклик з positionSide
-                                position_side = "LONG" if side == "LONG" else "SHORT"
-                                xt.set_leverage(LEVERAGE, symbol, {"positionSide": position_side})
-                                logging.info(f"[{symbol}] ⚙️ XT: ПРИМУСОВО встановлено леверидж {LEVERAGE}x ({position_side})")
-                            except Exception as e:
-                                logging.error(f"[{symbol}] ❌ Помилка встановлення левериджу XT: {e}")
-                                pass
+                            # ⚡ Маржа/плече кешуються по акаунту (execution_engine): REST виклик тільки при першій угоді
+                            # або зміні значення; xt_open_market_position так само перевіряє плече для кожного акаунту
+                            position_side = "LONG" if side == "LONG" else "SHORT"
+                            for account_client in xt_accounts().values():
+                                ensure_margin_mode(account_client, symbol, 'isolated')
+                                ensure_leverage(account_client, symbol, LEVERAGE, position_side)
 
                     
                     # if ok_liq:
@@ -1844,17 +1933,26 @@ def symbol_worker(symbol):
                     #             # Не блокуємо торгівлю, продовжуємо
                     #             pass
                                 
-                            # 🔒 ORDER PLACEMENT LOCK (Task 6: запобігаємо подвійним ордерам)
-                            with order_placement_lock:
-                                # 🎯 ПАРАЛЕЛЬНА ТОРГІВЛЯ НА ДВОХ АКАУНТАХ
-                                order_account_1 = xt_open_market_position(xt_account_1, symbol, side, ORDER_AMOUNT, LEVERAGE, ref_price, dex_price, spread_pct)
-                                order_account_2 = xt_open_market_position(xt_account_2, symbol, side, ORDER_AMOUNT, LEVERAGE, ref_price, dex_price, spread_pct)
-                                # Вважаємо успішним якщо хоча б один акаунт відкрив позицію
-                                order = order_account_1 or order_account_2
-                                if order_account_1:
-                                    logging.info(f"[{symbol}] ✅ АКАУНТ 1: Відкрито {side} позицію з левериджем {LEVERAGE}x")
-                                if order_account_2:
-                                    logging.info(f"[{symbol}] ✅ АКАУНТ 2: Відкрито {side} позицію з левериджем {LEVERAGE}x")
+                            # 🧭 Застаріла можливість: перечитуємо ціни або відкидаємо до розміщення ордера
+                            fresh_prices = ensure_fresh_opportunity(symbol, trace, ref_price, dex_price, spread_pct)
+                            if fresh_prices:
+                                ref_price, dex_price, spread_pct = fresh_prices
+                                trace.hop('order_submit')
+                                # 🔒 ORDER PLACEMENT LOCK (Task 6: запобігаємо подвійним ордерам)
+                                with timed_lock(order_placement_lock, 'order_placement'), stage('order_placement'), shielded():
+                                    # 🎯 ПАРАЛЕЛЬНА ТОРГІВЛЯ НА ДВОХ АКАУНТАХ
+                                    price_age_sec = trace.price_age()  # Свіжа ціна тригера - без повторного fetch_ticker
+                                    order_account_1 = xt_open_market_position(xt_account_1, symbol, side, ORDER_AMOUNT, LEVERAGE, ref_price, dex_price, spread_pct, price_age_sec)
+                                    order_account_2 = xt_open_market_position(xt_account_2, symbol, side, ORDER_AMOUNT, LEVERAGE, ref_price, dex_price, spread_pct, price_age_sec)
+                                    # Вважаємо успішним якщо хоча б один акаунт відкрив позицію
+                                    order = order_account_1 or order_account_2
+                                    if order_account_1:
+                                        logging.info(f"[{symbol}] ✅ АКАУНТ 1: Відкрито {side} позицію з левериджем {LEVERAGE}x")
+                                    if order_account_2:
+                                        logging.info(f"[{symbol}] ✅ АКАУНТ 2: Відкрито {side} позицію з левериджем {LEVERAGE}x")
+                                trace.finish('ordered' if order else 'order_failed', side=side, spread_pct=round(spread_pct, 4))
+                            else:
+                                order = None
                         else:
                             order = None
                         if order:
@@ -1884,7 +1982,13 @@ def symbol_worker(symbol):
                                 "arb_pair": f"{trading_exchange}-dex",  # тип арбітражу (gate-dex або xt-dex)
                                 "entry_spread_pct": spread_pct,  # початковий спред
                                 "entry_ref_price": dex_price,  # референтна ціна DEX на час входу
-                                "status": "open"  # статус позиції (open/closing/closed)
+                                "status": "open",  # статус позиції (open/closing/closed)
+                                # 🧭 Трейс можливості: скільки часу пройшло від спостереження спреду до ордера
+                                "trace_id": trace.trace_id,
+                                "detection_to_order_ms": trace.hop_offsets_ms().get('ordered'),
+                                # 🚪 Акаунти з позицією - закриття йде тільки на них
+                                "accounts": sorted(num for num, client in xt_accounts().items()
+                                                   if (order_account_1 if client is xt_account_1 else order_account_2))
                             }
                             # 🔒 ЗАХИСТ: Тільки для НОВИХ позицій встановлюємо таймери
                             current_time = time.time()
@@ -1900,26 +2004,28 @@ def symbol_worker(symbol):
                             position['xt_pair_url'] = generate_xt_pair_url(symbol)
                             
                             with active_positions_lock:
-                                active_positions[symbol] = position
+                                active_positions[symbol] = Position.from_dict(position, symbol)
                             
                             # Зберігаємо оновлені позиції
                             save_positions_to_file()
                             
                             # 📱 ВІДПРАВЛЯЄМО ПРОФЕСІЙНЕ ПОВІДОМЛЕННЯ ПРО ВІДКРИТТЯ ПОЗИЦІЇ
-                            try:
-                                from telegram_formatter import format_position_opened_message
-                                opened_message = format_position_opened_message(
-                                    symbol=symbol,
-                                    side=side,
-                                    entry_price=ref_price,
-                                    size_usd=ORDER_AMOUNT,
-                                    leverage=LEVERAGE,
-                                    spread_percent=spread_pct
-                                )
-                                send_to_admins_and_group(opened_message)
-                                logging.info(f"📱 Відправлено Telegram про відкриття {symbol}")
-                            except Exception as e:
-                                logging.error(f"❌ Помилка відправки Telegram: {e}")
+                            # (shielded: ордер уже на біржі - дедлайн скану не обриває сповіщення)
+                            with shielded():
+                                try:
+                                    from telegram_formatter import format_position_opened_message
+                                    opened_message = format_position_opened_message(
+                                        symbol=symbol,
+                                        side=side,
+                                        entry_price=ref_price,
+                                        size_usd=ORDER_AMOUNT,
+                                        leverage=LEVERAGE,
+                                        spread_percent=spread_pct
+                                    )
+                                    send_to_admins_and_group(opened_message)
+                                    logging.info(f"📱 Відправлено Telegram про відкриття {symbol}")
+                                except Exception as e:
+                                    logging.error(f"❌ Помилка відправки Telegram: {e}")
                             
                             logging.info("Opened %s on %s avg_entry=%.6f tp=%.6f", side, symbol, ref_price, tp_price)
                 
@@ -2006,20 +2112,20 @@ def symbol_worker(symbol):
                                     # ПРИМУСОВЕ встановлення левериджу ПЕРЕД усередненням
                                     if trading_exchange == "xt":
                                         # 🔥 ДОДАНО: Встановлення ІЗОЛЬОВАНОЇ МАРЖІ для усереднення
-                                        try:
-                                            xt.set_margin_mode('isolated', symbol)
-                                        except Exception as e:
-                                            pass
-
-                                        try:
-                                            xt.set_leverage(LEVERAGE, symbol)
-                                            logging.info(f"[{symbol}] ⚙️ XT: ПРИМУСОВО встановлено леверидж {LEVERAGE}x для усереднення")
-                                        except Exception as e:                                
-                                            logging.error(f"[{symbol}] ❌ Помилка левериджу XT при усередненні: {e}")
-                                            pass
-                                        # 🔒 ORDER PLACEMENT LOCK для усереднення (Task 6: запобігаємо конфліктним ордерам)
-                                        with order_placement_lock:
-                                            order = xt_open_market_position(xt, symbol, position['side'], add_size, LEVERAGE, ref_price, dex_price, spread_pct)
+                                        ensure_margin_mode(xt, symbol, 'isolated')
+                                        ensure_leverage(xt, symbol, LEVERAGE)
+                                        # 🧭 Застаріла можливість: перечитуємо ціни або відкидаємо
+                                        fresh_prices = ensure_fresh_opportunity(symbol, trace, ref_price, dex_price, spread_pct)
+                                        if fresh_prices:
+                                            ref_price, dex_price, spread_pct = fresh_prices
+                                            trace.hop('order_submit')
+                                            # 🔒 ORDER PLACEMENT LOCK для усереднення (Task 6: запобігаємо конфліктним ордерам)
+                                            with timed_lock(order_placement_lock, 'order_placement'), stage('order_placement'), shielded():
+                                                order = xt_open_market_position(xt, symbol, position['side'], add_size, LEVERAGE, ref_price, dex_price, spread_pct,
+                                                                                trace.price_age())
+                                            trace.finish('averaged' if order else 'order_failed', side=position['side'], spread_pct=round(spread_pct, 4))
+                                        else:
+                                            order = None
                                         current_price = ref_price  # Завжди XT ціна
                                     else:
                                         order = None
@@ -2155,7 +2261,8 @@ def symbol_worker(symbol):
                         logging.warning(f"⚠️ Не вдалося перевірити позиції - пробуємо закрити")
                     
                     # Пробуємо закрити позицію на біржі
-                    close_success = close_position_market(symbol, position['side'], position['size_usdt'])
+                    with shielded():
+                        close_success = close_position_market(symbol, position['side'], position['size_usdt'])
                     
                     if close_success:
                         # 🔒 ТІЛЬКИ якщо закриття успішне - видаляємо з системи
@@ -2202,8 +2309,9 @@ def symbol_worker(symbol):
                                      f"⏰ Час: {datetime.now().strftime('%H:%M:%S')}\n"\
                                      f"✅ Статус: **УСПІШНО ЗАКРИТО** | #ArbitrageBot"
                         
-                        # 📊 ПОЗИЦІЇ ОБОМ АДМІНАМ + ГРУПІ
-                        send_to_admins_and_group(close_signal)
+                        # 📊 ПОЗИЦІЇ ОБОМ АДМІНАМ + ГРУПІ (shielded: позицію вже закрито на біржі)
+                        with shielded():
+                            send_to_admins_and_group(close_signal)
                         logging.info(f"✅ АВТОЗАКРИТО {position['side']} {symbol}: спред={abs(spread_pct):.2f}%, розмір=${position['size_usdt']:.2f}")
                         return  # ⬅️ ЗМІНЕНО: з continue на return
                     else:
@@ -2256,6 +2364,10 @@ def symbol_worker(symbol):
             # 🚨 ПОМИЛКИ ВОРКЕРА ОБОМ АДМІНАМ + ГРУПІ
             send_to_admins_and_group(error_msg)
         logging.error("Symbol worker error %s %s", symbol, e)
+    finally:
+        if trace is not None and trace.outcome is None and trace.has_hop('notified'):
+            trace.finish('signal_only')
+        timer.finish()
 
     # ⛔️ ВИДАЛЕНО: time.sleep(SCAN_INTERVAL)
     logging.info(f"Worker finished for {symbol}") # ⬅️ ЗМІНЕНО: логування завершення
@@ -3083,6 +3195,10 @@ def send_balance_monitoring_thread():
     def monitor_balance():
         while True:
             try:
+                # 🌐 Звіт балансу шле лише лідер кластера (акаунти спільні для всіх вузлів)
+                if not cluster.is_leader:
+                    time.sleep(300)
+                    continue
                 # Отримуємо баланс futures рахунку
                 balance_data = get_xt_futures_balance(xt)
                 if balance_data and isinstance(balance_data, dict) and balance_data.get('USDT'):
@@ -3278,9 +3394,115 @@ def start_monitor():
 #             if bot_running:
 #                 monitor_stop_event.wait(timeout=30) # ⬅️ ЗМІНЕНО: Пауза на випадок помилки
 
+def _scan_symbol(sym, observation=None):
+    """Воркер батчу: symbol_worker з дедлайном SCAN_SYMBOL_DEADLINE_SEC (зависла мережа не тримає потік вічно)"""
+    try:
+        with deadline_scope(SCAN_SYMBOL_DEADLINE_SEC, sym):
+            symbol_worker(sym, observation)
+    except DeadlineExceeded as e:
+        logging.warning(f"⏳ [{sym}] Сканування перервано: {e}")
+
+
+def _on_shard_observation(symbol, observation, miss):
+    """
+    🧩 Спостереження від шарда: повний symbol_worker (сигнали, ордери, усереднення, закриття) тільки
+    для спреду в робочому діапазоні або відкритої позиції, інакше лише індикатори та історія спредів.
+    Повертає True якщо запущено symbol_worker
+    """
+    dex_base = symbol_registry.get(symbol).dex_base
+    if miss:
+        negative_cache.merge(dex_base, miss)
+    elif observation and observation.dex_price:
+        negative_cache.record_hit(dex_base)
+    if not observation:
+        return False
+
+    xt_price, dex_price = observation.xt_price, observation.dex_price
+    spread_pct = calculate_spread(dex_price, xt_price) if dex_price else None
+    with active_positions_lock:
+        has_position = symbol in active_positions
+    if has_position or (spread_pct is not None and MIN_SPREAD <= abs(spread_pct) <= MAX_SPREAD):
+        t = threading.Thread(target=_scan_symbol, args=(symbol, observation), name=f"scan-{symbol}", daemon=True)
+        t.start()
+        worker_threads.append(t)
+        return True
+
+    indicator_engine.update(symbol, xt_price)
+    if spread_pct is not None:
+        token_info = observation.token_info
+        spread_recorder.record(symbol, xt_price, dex_price, spread_pct, token_info.get('liquidity'))
+        price_history.record(symbol, xt_price, dex_price, spread_pct, token_info.get('volume_24h'))
+    return False
+
+
+def follow_cluster_opportunities():
+    """
+    🌐 Лідер кластера: можливості, знайдені іншими вузлами (поза орендованими діапазонами лідера),
+    перевіряються повним symbol_worker тут - ордери розміщує тільки лідер
+    """
+    followed = {}  # symbol -> timestamp можливості що вже перевірялась
+    while bot_running:
+        monitor_stop_event.wait(timeout=STATE_SYNC_INTERVAL_SEC)
+        if not cluster.is_leader:
+            continue
+        try:
+            fresh_after = time.time() - 60
+            with opportunities_lock:
+                remote = [(symbol, opportunity.timestamp) for symbol, opportunity in best_opportunities.items()
+                          if opportunity.node not in (None, cluster.node_id) and opportunity.timestamp > fresh_after]
+            for symbol, found_at in remote:
+                if followed.get(symbol) == found_at or cluster.owns(symbol):
+                    continue
+                followed[symbol] = found_at
+                logging.info(f"[{symbol}] 🌐 Можливість з іншого вузла - перевірка лідером")
+                threading.Thread(target=_scan_symbol, args=(symbol,), name=f"follow-{symbol}", daemon=True).start()
+            for symbol in [symbol for symbol, found_at in followed.items() if found_at <= fresh_after]:
+                del followed[symbol]
+        except Exception as e:
+            logging.error(f"❌ Помилка перевірки можливостей кластера: {e}")
+
+
+def run_sharded_scan():
+    """🧩 Головний цикл у режимі SCAN_SHARDS: процеси шардів сканують, цей процес торгує"""
+    global shard_pool, worker_threads
+    shard_pool = ShardPool(SCAN_SHARDS)
+    shard_pool.start(markets)
+    try:
+        while bot_running:
+            try:
+                symbols = scan_universe()
+                logging.info(f"🔄 РОЗПОЧИНАЄМО НОВИЙ ЦИКЛ СКАНУВАННЯ: {len(symbols)} символів на {SCAN_SHARDS} шардів "
+                             f"(з {len(markets)}, поза скануванням {len(markets) - len(symbols)})")
+                worker_threads = []
+                stats = shard_pool.scan(symbols, _on_shard_observation, monitor_stop_event)
+
+                # Кандидати (symbol_worker) мають той самий дедлайн що й у батчевому режимі
+                workers_deadline = time.monotonic() + SCAN_SYMBOL_DEADLINE_SEC + SCAN_WATCHDOG_GRACE_SEC
+                for t in list(worker_threads):
+                    if not bot_running:
+                        break
+                    t.join(timeout=max(0.0, workers_deadline - time.monotonic()))
+                if not bot_running:
+                    break
+
+                logging.info(f"✅✅✅ ЦИКЛ ШАРДІВ ЗАВЕРШЕНО за {stats['seconds']:.1f}с: {stats['observations']} спостережень, "
+                             f"{stats['candidates']} у symbol_worker")
+                negative_cache.save(force=True)
+                monitor_stop_event.wait(timeout=30)
+            except Exception as e:
+                logging.error(f"❌ КРИТИЧНА ПОМИЛКА в циклі шардованого скану: {e}")
+                if bot_running:
+                    monitor_stop_event.wait(timeout=30)
+    finally:
+        shard_pool.stop()
+
+
 def start_workers():
-    global _plot_thread, worker_threads # ⬅️ ЗМІНЕНО: переконуємося, що worker_threads глобальний
+    global _spread_flush_thread, worker_threads # ⬅️ ЗМІНЕНО: переконуємося, що worker_threads глобальний
     logging.info("🚨 DEBUG: start_workers() ВИКЛИКАЄТЬСЯ!")
+    init_xt_accounts()
+    # 🌐 Роль вузла до init_markets/сканування: main.py та restart_workers стартують без bot __main__ (ідемпотентно)
+    cluster.start()
     
     # 🎯 КРИТИЧНО: Запускаємо моніторинг ПЕРШИМ (до всіх інших ініціалізацій)
     try:
@@ -3314,19 +3536,34 @@ def start_workers():
     best_signal_thread.start()
     logging.info("🏆 СТАРТ: Система ОДНОГО найкращого сигналу запущена!")
     
-    # старт plot треда
-    _plot_thread = threading.Thread(target=plot_spread_live, args=(spread_store,), daemon=True)
-    _plot_thread.start()
+    # 🗄️ Історія спредів у колонкових mmap сегментах (замість deque + plot треда)
+    _spread_flush_thread = spread_recorder.start_flusher()
+
+    # ⏳ Watchdog воркерів що пережили дедлайн сканування
+    scan_watchdog.start()
+
+    # 🌐 Кластер: лідер перевіряє можливості вузлів-сканерів і торгує ними
+    if cluster.shared:
+        threading.Thread(target=follow_cluster_opportunities, name="ClusterFollow", daemon=True).start()
+
+    # 🧩 Сканування в процесах шардів (ядра CPU), торгівля - в цьому процесі
+    if SCAN_SHARDS > 1:
+        if XT_SIMULATOR:
+            logging.warning("🧩 SCAN_SHARDS ігнорується з XT_SIMULATOR: симульований ринок живе лише в процесі бота")
+        else:
+            run_sharded_scan()
+            return
 
     # 🚀 ВИПРАВЛЕНО: Батч-обробка ВСІХ 733 пар по 50 паралельно
     # ⬅️ ЗМІНЕНО: Додано головний цикл while bot_running:
     while bot_running:
         try:
-            symbols = list(markets.keys())
+            symbols = scan_universe()  # ✂️ Без прибраних символів і тих що в паузі негативного кешу DEX
             batch_size = MAX_CONCURRENT_SYMBOLS
             total_symbols = len(symbols)
             
-            logging.info(f"🔄 РОЗПОЧИНАЄМО НОВИЙ ЦИКЛ СКАНУВАННЯ: {total_symbols} символів, батчами по {batch_size}")
+            logging.info(f"🔄 РОЗПОЧИНАЄМО НОВИЙ ЦИКЛ СКАНУВАННЯ: {total_symbols} символів "
+                         f"(з {len(markets)}, поза скануванням {len(markets) - total_symbols}), батчами по {batch_size}")
             
             # 🧹 Очищаємо глобальний список воркерів перед новим циклом
             worker_threads = [] 
@@ -3341,13 +3578,16 @@ def start_workers():
                 batch_symbols = symbols[batch_start:batch_end]
                 
                 logging.info(f"📦 Батч {batch_start//batch_size + 1}: запускаємо {len(batch_symbols)} символів (від {batch_start} до {batch_end-1})")
+
+                # 🧟 Забагато воркерів-сиріт (зависли в мережі) - не нарощуємо кількість потоків
+                scan_watchdog.wait_for_capacity(SCAN_MAX_ORPHANED_WORKERS, monitor_stop_event)
                 
                 current_batch_threads = [] # ⬅️ ДОДАНО: Локальний список для очікування
                 
                 # Запускаємо всі символи з поточного батчу
                 for sym in batch_symbols:
                     if not bot_running: break # ⬅️ ДОДАНО: Перевірка зупинки під час запуску
-                    t = threading.Thread(target=symbol_worker, args=(sym,), daemon=True)
+                    t = threading.Thread(target=_scan_symbol, args=(sym,), name=f"scan-{sym}", daemon=True)
                     t.start()
                     worker_threads.append(t) # ⬅️ ДОДАНО: Для функції stop_all_workers
                     current_batch_threads.append(t) # ⬅️ ДОДАНО: Для .join()
@@ -3355,10 +3595,16 @@ def start_workers():
                 
                 # ⏳ ЧЕКАЄМО ЗАВЕРШЕННЯ ПОТОЧНОГО БАТЧУ 
                 logging.info(f"⏳ Очікуємо завершення {len(current_batch_threads)} воркерів з батчу...")
+                # Спільний дедлайн батчу (а не 60с на кожен потік): воркери самі перериваються
+                # через SCAN_SYMBOL_DEADLINE_SEC, решту після grace підбирає scan_watchdog
+                batch_deadline = time.monotonic() + SCAN_SYMBOL_DEADLINE_SEC + SCAN_WATCHDOG_GRACE_SEC
                 for t in current_batch_threads:
                     if not bot_running: break # ⬅️ ДОДАНО: Можна перервати очікування
                     
-                    t.join(timeout=60.0) # ⬅️ НОВИЙ КОД: Чекаємо максимум 60 секунд
+                    t.join(timeout=max(0.0, batch_deadline - time.monotonic()))
+                stragglers = sum(1 for t in current_batch_threads if t.is_alive())
+                if stragglers:
+                    logging.warning(f"🧟 Батч {batch_start//batch_size + 1}: {stragglers} воркерів не завершились до дедлайну")
                 
                 if not bot_running: break # ⬅️ ДОДАНО: Вихід з циклу батчів
                 
@@ -3374,6 +3620,7 @@ def start_workers():
                 break # Вихід з головного циклу while
 
             logging.info(f"✅✅✅ УСІ БАТЧІ ЗАВЕРШЕНО. Повний цикл сканування завершено.")
+            negative_cache.save(force=True)
             logging.info(f"🔄 Пауза 30 секунд перед початком нового циклу сканування...")
             
             # ⬅️ ДОДАНО: Пауза 30 секунд перед новим повним скануванням
@@ -3453,6 +3700,10 @@ def start_workers():
 
 if __name__ == "__main__":
     test_telegram_configuration()  # Тестуємо Telegram перед стартом
+    init_xt_accounts()  # До старту процесу Telegram бота - він успадковує клієнтів
+
+    # 🌐 Роль вузла (лідер/сканер) і орендовані діапазони - до завантаження позицій і сканування
+    cluster.start()
     
     # 💾 ЗАВАНТАЖУЄМО ЗБЕРЕЖЕНІ ПОЗИЦІЇ при старті
     logging.info("💾 Завантаження збережених позицій...")
@@ -3463,6 +3714,7 @@ if __name__ == "__main__":
     # 🤖 Запуск Telegram адмін-бота в окремому процесі
     try:
         from multiprocessing import Process
+        from telegram_admin import run_telegram_bot  # python-telegram-bot - лише для процесу бота
         telegram_process = Process(target=run_telegram_bot)
         telegram_process.start()
         logging.info("🤖 Запуск Telegram бота в окремому процесі...")
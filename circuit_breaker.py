@@ -0,0 +1,191 @@
+"""
+🔌 Circuit breakers для DEX провайдерів (DexScreener, CoinGecko, прямі блокчейн пули, Discovery)
+Стан closed -> open (частка помилок/повільних викликів у вікні) -> half-open (поодинокі проби) -> closed.
+Відкритий провайдер пропускається одразу, без ретраїв з паузами; порядок fallback у
+resolve_best_pair будується за станом, часткою помилок та виміряною латентністю.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from config import (CIRCUIT_WINDOW_SEC, CIRCUIT_MIN_CALLS, CIRCUIT_ERROR_RATE, CIRCUIT_SLOW_CALL_SEC,
+                    CIRCUIT_OPEN_SEC, CIRCUIT_MAX_OPEN_SEC, CIRCUIT_PROBE_INTERVAL_SEC, CIRCUIT_PRIORITY_BIAS_SEC)
+from metrics import metrics
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}  # Значення gauge та ранг при сортуванні
+
+TRANSITIONS = metrics.counter(
+    'arb_circuit_transitions_total', 'Переходи стану circuit breaker провайдера', ('provider', 'state'))
+REJECTED = metrics.counter(
+    'arb_circuit_rejected_total', 'Виклики пропущені через відкритий breaker', ('provider',))
+
+LATENCY_EWMA_ALPHA = 0.2
+
+
+class CircuitBreaker:
+    """Breaker одного провайдера; outcome кожного HTTP виклику (спроби) записується через record()"""
+
+    def __init__(self, name: str, priority: int = 0):
+        self.name = name
+        self.priority = priority  # Базовий порядок (0 - найвищий пріоритет)
+        self.lock = threading.Lock()
+        self.state = CLOSED
+        self.calls: deque = deque()  # (monotonic, ok) у межах CIRCUIT_WINDOW_SEC
+        self.latency_ewma: Optional[float] = None
+        self.opened_at = 0.0
+        self.open_sec = CIRCUIT_OPEN_SEC
+        self.probe_started_at = 0.0  # Half-open проба в польоті (0 - слот вільний)
+        self.probe_thread = None  # Потік, що отримав слот проби
+        self.last_error = ''
+        self.total_calls = 0
+        self.total_failures = 0
+
+    def _trim(self, now: float):
+        while self.calls and now - self.calls[0][0] > CIRCUIT_WINDOW_SEC:
+            self.calls.popleft()
+
+    def _transition(self, state: str):
+        if state == self.state:
+            return
+        previous, self.state = self.state, state
+        TRANSITIONS.inc(self.name, state)
+        if state == OPEN:
+            logging.warning(f"🔌 {self.name}: breaker {previous} -> OPEN на {self.open_sec:.0f}с ({self.last_error})")
+        else:
+            logging.info(f"🔌 {self.name}: breaker {previous} -> {state}")
+
+    def allow(self) -> bool:
+        """Чи можна звертатись до провайдера зараз (open після паузи переходить у half-open)"""
+        now = time.monotonic()
+        with self.lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                if now - self.opened_at < self.open_sec:
+                    REJECTED.inc(self.name)
+                    return False
+                self._transition(HALF_OPEN)
+            # Half-open: одна проба за раз, решта воркерів пропускає провайдера
+            if self.probe_started_at:
+                if now - self.probe_started_at >= CIRCUIT_PROBE_INTERVAL_SEC:
+                    # Проба не записала результат і не звільнила слот - вважаємо її невдалою
+                    self.probe_started_at = 0.0
+                    self.last_error = 'проба без результату'
+                    self.opened_at = now
+                    self._transition(OPEN)
+                REJECTED.inc(self.name)
+                return False
+            self.probe_started_at = now
+            self.probe_thread = threading.get_ident()
+            return True
+
+    def release(self):
+        """Звільняє слот half-open проби, якщо виклик завершився без record() (напр. символ не підтримується)"""
+        with self.lock:
+            if self.probe_thread == threading.get_ident():
+                self.probe_started_at = 0.0
+                self.probe_thread = None
+
+    def is_open(self) -> bool:
+        """Для ретраїв всередині провайдера: breaker відкрився поки ми чекали"""
+        return self.state == OPEN
+
+    def record(self, ok: bool, latency: float = None, error: str = ''):
+        """Результат одного виклику; повільний виклик рахується як помилка"""
+        now = time.monotonic()
+        if ok and latency is not None and latency > CIRCUIT_SLOW_CALL_SEC:
+            ok, error = False, f"повільно {latency:.1f}с"
+        with self.lock:
+            self.total_calls += 1
+            if latency is not None:
+                self.latency_ewma = latency if self.latency_ewma is None else \
+                    self.latency_ewma + LATENCY_EWMA_ALPHA * (latency - self.latency_ewma)
+            self.calls.append((now, ok))
+            self._trim(now)
+            if not ok:
+                self.total_failures += 1
+                self.last_error = error
+
+            if self.state == HALF_OPEN:
+                self.probe_started_at = 0.0
+                if ok:
+                    self.open_sec = CIRCUIT_OPEN_SEC
+                    self.calls.clear()
+                    self._transition(CLOSED)
+                else:
+                    # Проба не вдалась - довша пауза
+                    self.open_sec = min(self.open_sec * 2, CIRCUIT_MAX_OPEN_SEC)
+                    self.opened_at = now
+                    self._transition(OPEN)
+            elif self.state == CLOSED and not ok:
+                failures = sum(1 for _, call_ok in self.calls if not call_ok)
+                if len(self.calls) >= CIRCUIT_MIN_CALLS and failures / len(self.calls) >= CIRCUIT_ERROR_RATE:
+                    self.opened_at = now
+                    self._transition(OPEN)
+
+    def error_rate(self) -> float:
+        with self.lock:
+            self._trim(time.monotonic())
+            if not self.calls:
+                return 0.0
+            return sum(1 for _, ok in self.calls if not ok) / len(self.calls)
+
+    def score(self) -> float:
+        """Менше - краще: латентність з штрафом за помилки плюс зсув базового пріоритету"""
+        latency = self.latency_ewma or 0.0
+        return latency * (1 + 4 * self.error_rate()) + self.priority * CIRCUIT_PRIORITY_BIAS_SEC
+
+    def snapshot(self) -> Dict:
+        error_rate = self.error_rate()
+        with self.lock:
+            retry_in = max(0.0, self.open_sec - (time.monotonic() - self.opened_at)) if self.state == OPEN else 0.0
+            return {
+                'state': self.state,
+                'error_rate_percent': round(error_rate * 100, 1),
+                'window_calls': len(self.calls),
+                'latency_ewma_ms': round(self.latency_ewma * 1000, 1) if self.latency_ewma is not None else None,
+                'retry_in_sec': round(retry_in, 1),
+                'total_calls': self.total_calls,
+                'total_failures': self.total_failures,
+                'last_error': self.last_error
+            }
+
+
+class ProviderBreakers:
+    """Breakers усіх провайдерів resolve_best_pair"""
+
+    def __init__(self, names: List[str]):
+        self.breakers: Dict[str, CircuitBreaker] = {
+            name: CircuitBreaker(name, priority) for priority, name in enumerate(names)}
+
+    def get(self, name: str) -> CircuitBreaker:
+        return self.breakers[name]
+
+    def ordered(self, names: List[str] = None) -> List[str]:
+        """Порядок fallback: closed -> half-open -> open, всередині - за score()"""
+        names = names or list(self.breakers)
+        return sorted(names, key=lambda name: (STATE_VALUES[self.breakers[name].state], self.breakers[name].score()))
+
+    def snapshot(self) -> Dict[str, Dict]:
+        return {name: breaker.snapshot() for name, breaker in self.breakers.items()}
+
+
+# Базовий пріоритет (як був захардкоджений у resolve_best_pair)
+provider_breakers = ProviderBreakers(['dexscreener', 'coingecko', 'blockchain_direct', 'discovery'])
+
+metrics.gauge('arb_circuit_state', 'Стан breaker провайдера (0 closed, 1 half-open, 2 open)',
+              lambda: {(name,): STATE_VALUES[b.state] for name, b in provider_breakers.breakers.items()},
+              ('provider',))
+metrics.gauge('arb_circuit_error_rate', 'Частка помилок провайдера у вікні breaker',
+              lambda: {(name,): b.error_rate() for name, b in provider_breakers.breakers.items()},
+              ('provider',))
+metrics.gauge('arb_circuit_latency_seconds', 'EWMA латентності провайдера',
+              lambda: {(name,): b.latency_ewma for name, b in provider_breakers.breakers.items()
+                       if b.latency_ewma is not None},
+              ('provider',))
@@ -0,0 +1,175 @@
+"""
+🌐 Кластер сканерів: кілька вузлів (окремі IP - окремі rate-limit бірж і DexScreener) ділять
+універс символів і один спільний стан (state_store).
+- Лідер (lease 'leader') - єдиний вузол, що розміщує ордери, закриває позиції і пише позиції
+  та чорний список; решта вузлів лише сканує і публікує можливості.
+- Універс ділиться на CLUSTER_SCAN_RANGES діапазонів (crc32 символу, як шарди scan_shards);
+  кожен вузол орендує ~рівну частку діапазонів, оренда вузла що впав спливає через TTL.
+- Дзеркала SharedMap синхронізуються кожні STATE_SYNC_INTERVAL_SEC: власник публікує, інші читають.
+З MemoryStateStore (один вузол) вузол одразу лідер і сканує весь універс, фонового потоку немає.
+"""
+
+import logging
+import math
+import os
+import socket
+import threading
+import time
+import zlib
+from typing import List, Set
+
+from config import (
+    CLUSTER_NODE_ID, CLUSTER_LEASE_TTL_SEC, CLUSTER_HEARTBEAT_SEC, CLUSTER_SCAN_RANGES, STATE_SYNC_INTERVAL_SEC
+)
+from metrics import metrics
+from state_store import SharedMap, StateStore, create_store
+
+LEADER_CHANGES = metrics.counter('arb_cluster_leader_changes_total', 'Зміни лідерства цього вузла', ('role',))
+
+
+class ClusterNode:
+    """Вузол кластера: heartbeat, вибір лідера, оренда діапазонів символів, синхронізація SharedMap"""
+
+    def __init__(self, store: StateStore, node_id: str = CLUSTER_NODE_ID, ranges: int = CLUSTER_SCAN_RANGES,
+                 lease_ttl_sec: float = CLUSTER_LEASE_TTL_SEC):
+        self.store = store
+        self.node_id = node_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.ranges = ranges
+        self.lease_ttl_sec = lease_ttl_sec
+        self.shared = store.shared
+        self.leader_until = math.inf if not self.shared else 0.0  # monotonic: до цього моменту lease лідера наш
+        self.held_ranges: Set[int] = set(range(ranges)) if not self.shared else set()
+        self.live_nodes: List[str] = [self.node_id]
+        self.maps: List[SharedMap] = []
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.last_synced_at = 0.0
+
+    @property
+    def is_leader(self) -> bool:
+        """Lease лідера гарантовано наш (стор недоступний довше TTL - вузол перестає торгувати)"""
+        return time.monotonic() < self.leader_until
+
+    def shared_map(self, namespace: str, lock=None, leader_writes: bool = False, local_fields=(),
+                   model=None) -> SharedMap:
+        """SharedMap цього стору; leader_writes - namespace пише тільки лідер (позиції, чорний список)"""
+        shared_map = SharedMap(self.store, namespace, lock=lock,
+                               owner=(lambda: self.is_leader) if leader_writes else None,
+                               local_fields=local_fields, model=model)
+        self.maps.append(shared_map)
+        return shared_map
+
+    def owns(self, symbol: str) -> bool:
+        """Символ у діапазоні, орендованому цим вузлом"""
+        if not self.shared:
+            return True
+        return zlib.crc32(symbol.encode()) % self.ranges in self.held_ranges
+
+    def start(self):
+        """Перший тік синхронно (роль і діапазони відомі до старту сканування), далі - фоновий потік"""
+        if not self.shared or self.thread is not None:
+            return
+        for shared_map in self.maps:
+            self._refresh(shared_map)
+        try:
+            self.tick()
+        except Exception as e:
+            logging.error(f"🌐 Стор кластера недоступний, вузол стартує без ролі: {e}")
+        self.thread = threading.Thread(target=self._run, name="ClusterNode", daemon=True)
+        self.thread.start()
+        logging.info(f"🌐 Вузол {self.node_id}: {'лідер' if self.is_leader else 'сканер'}, "
+                     f"діапазонів {len(self.held_ranges)}/{self.ranges}, вузлів {len(self.live_nodes)}")
+
+    def stop(self):
+        """Звільняє lease-и одразу (без очікування TTL) - інші вузли підхоплюють діапазони на наступному тіку"""
+        self.stop_event.set()
+        if not self.shared:
+            return
+        try:
+            for index in list(self.held_ranges):
+                self.store.release_lease(f"range:{index}", self.node_id)
+            self.store.release_lease('leader', self.node_id)
+            self.store.hdel('nodes', self.node_id)
+        except Exception as e:
+            logging.warning(f"🌐 Не вдалося звільнити lease-и вузла {self.node_id}: {e}")
+        self.held_ranges = set()
+        self.leader_until = 0.0
+
+    def _run(self):
+        next_tick = time.monotonic() + CLUSTER_HEARTBEAT_SEC
+        while not self.stop_event.wait(timeout=STATE_SYNC_INTERVAL_SEC):
+            if time.monotonic() >= next_tick:
+                next_tick = time.monotonic() + CLUSTER_HEARTBEAT_SEC
+                try:
+                    self.tick()
+                except Exception as e:
+                    logging.warning(f"🌐 Тік кластера не виконано: {e}")
+            self.sync()
+
+    def tick(self):
+        """Heartbeat, lease лідера, перерозподіл діапазонів під кількість живих вузлів"""
+        now = time.time()
+        self.store.hset('nodes', self.node_id, now)
+        nodes = self.store.hgetall('nodes')
+        stale = [node for node, seen_at in nodes.items() if now - float(seen_at) > self.lease_ttl_sec]
+        if stale:
+            self.store.hdel('nodes', *stale)
+        self.live_nodes = sorted(node for node in nodes if node not in stale)
+
+        was_leader = self.is_leader
+        requested_at = time.monotonic()
+        if self.store.acquire_lease('leader', self.node_id, self.lease_ttl_sec):
+            self.leader_until = requested_at + self.lease_ttl_sec
+        else:
+            self.leader_until = 0.0
+        if self.is_leader != was_leader:
+            role = 'leader' if self.is_leader else 'scanner'
+            LEADER_CHANGES.inc(role)
+            logging.warning(f"🌐 Вузол {self.node_id}: {'ЛІДЕР (ордери і позиції)' if self.is_leader else 'більше не лідер'}")
+            if not self.is_leader:
+                # Дзеркала власника тепер читаються зі стору
+                for shared_map in self.maps:
+                    self._refresh(shared_map)
+
+        self._rebalance_ranges()
+
+    def _rebalance_ranges(self):
+        target = math.ceil(self.ranges / max(len(self.live_nodes), 1))
+        held = {index for index in sorted(self.held_ranges)
+                if self.store.acquire_lease(f"range:{index}", self.node_id, self.lease_ttl_sec)}
+        for index in sorted(held, reverse=True)[:max(len(held) - target, 0)]:
+            self.store.release_lease(f"range:{index}", self.node_id)
+            held.discard(index)
+        # Старт зі зсуву за node_id - вузли не змагаються за ті самі вільні діапазони
+        offset = zlib.crc32(self.node_id.encode()) % self.ranges
+        for step in range(self.ranges):
+            if len(held) >= target:
+                break
+            index = (offset + step) % self.ranges
+            if index not in held and self.store.acquire_lease(f"range:{index}", self.node_id, self.lease_ttl_sec):
+                held.add(index)
+        if held != self.held_ranges:
+            logging.info(f"🌐 Вузол {self.node_id}: діапазонів {len(held)}/{self.ranges} (ціль {target}, вузлів {len(self.live_nodes)})")
+        self.held_ranges = held
+
+    def _refresh(self, shared_map: SharedMap):
+        try:
+            shared_map.refresh()
+        except Exception as e:
+            logging.warning(f"🌐 Стор '{shared_map.namespace}' не прочитано: {e}")
+
+    def sync(self):
+        """Власник namespace публікує дзеркало (з вкладеними змінами), решта - читає стан стору"""
+        for shared_map in self.maps:
+            if shared_map.owner is not None and shared_map.owner():
+                shared_map.publish()
+            else:
+                self._refresh(shared_map)
+        self.last_synced_at = time.time()
+
+
+cluster = ClusterNode(create_store())
+
+metrics.gauge('arb_cluster_leader', 'Цей вузол - лідер кластера (розміщує ордери)', lambda: int(cluster.is_leader))
+metrics.gauge('arb_cluster_ranges_held', 'Діапазони символів, орендовані цим вузлом', lambda: len(cluster.held_ranges))
+metrics.gauge('arb_cluster_nodes', 'Живі вузли кластера', lambda: len(cluster.live_nodes))
@@ -128,4 +128,146 @@ ALLOWED_DEX_PROVIDERS = [
     "li_fi",            # Кросс-ланцюгові мости
     "alium",            # Мульти-ланцюгова BSC+ETH+Polygon
     "jumper"            # 25 ланцюгів включно всі наші мережі
-]  # 20 DEX провайдерів для максимального покриття всіх мереж
\ No newline at end of file
+]  # 20 DEX провайдерів для максимального покриття всіх мереж
+# 💾 КЕШ МЕТАДАНИХ РИНКІВ XT (швидкий старт без load_markets)
+MARKET_CACHE_FILE = "xt_markets_cache.json"  # Файл кешу (contractSize, precision, limits, leverage)
+MARKET_CACHE_VERSION = "1.0"  # Версія формату кешу - інша версія ігнорується
+MARKET_CACHE_MAX_AGE_SEC = 6 * 3600  # Старший кеш використовується, але оновлюється одразу у фоні
+MARKET_CACHE_REFRESH_SEC = 3600  # Планове фонове оновлення ринків раз на годину
+MARKET_CACHE_MISS_REFRESH_SEC = 120  # Мінімальний інтервал позапланового оновлення при невідомому символі
+
+# 📈 ІСТОРІЯ ЦІН (кільцевий буфер на символ, без додаткових запитів)
+PRICE_HISTORY_RESOLUTION_SEC = 15  # Роздільність свічки (дорівнює SCAN_INTERVAL)
+PRICE_HISTORY_MAX_POINTS = 480  # 480 × 15с = 2 години історії на символ
+PRICE_HISTORY_VOLATILITY_WINDOW_MIN = 60  # Вікно волатільності для calculate_volatility_indicator
+PRICE_HISTORY_MIN_COVERAGE_PCT = 50.0  # Мінімальне покриття вікна точками для використання історії
+
+# 🗄️ ІСТОРІЯ СПРЕДІВ (колонкові mmap сегменти для пост-аналізу)
+SPREAD_HISTORY_DIR = "spread_history"  # Папка з денними сегментами
+SPREAD_SEGMENT_INITIAL_ROWS = 262144  # Початкова ємність сегменту (росте ×2 при заповненні)
+SPREAD_RECORDER_FLUSH_SEC = 5  # Як часто скидати mmap та лічильник рядків на диск
+
+# 🧪 СИМУЛЯТОР XT (paper-trading без реальної біржі, навантажувальні тести)
+XT_SIMULATOR = os.getenv("XT_SIMULATOR", "false").lower() == "true"  # create_xt повертає симулятор замість ccxt.xt
+XT_SIM_SYMBOLS = int(os.getenv("XT_SIM_SYMBOLS", "1000"))  # Кількість синтетичних futures ринків
+XT_SIM_PRICE_SCRIPT = os.getenv("XT_SIM_PRICE_SCRIPT", "")  # JSON {symbol: [[сек, ціна], ...]} - сценарні траєкторії цін
+XT_SIM_SEED = 42  # Seed генератора (відтворювані ціни та ринки)
+XT_SIM_BALANCE_USDT = 1000.0  # Стартовий баланс кожного симульованого акаунту
+XT_SIM_LATENCY_MS = float(os.getenv("XT_SIM_LATENCY_MS", "40"))  # Затримка кожного виклику API
+XT_SIM_LATENCY_JITTER_MS = 20.0  # Випадкова добавка до затримки (0..jitter)
+XT_SIM_RATE_LIMIT_PER_SEC = float(os.getenv("XT_SIM_RATE_LIMIT_PER_SEC", "50"))  # Ліміт запитів на акаунт (0 = без обмеження)
+XT_SIM_RATE_LIMIT_MODE = "raise"  # "raise" - RateLimitExceeded як біржа, "throttle" - чекати токен
+XT_SIM_ERROR_RATE = float(os.getenv("XT_SIM_ERROR_RATE", "0"))  # Частка викликів що падають з NetworkError
+XT_SIM_VOLATILITY_PCT = 0.05  # σ випадкового блукання за секунду (%)
+XT_SIM_SPREAD_BPS = 4.0  # Спред bid/ask стакану (базисні пункти)
+XT_SIM_BOOK_LEVELS = 50  # Рівнів стакану з кожного боку
+XT_SIM_LEVEL_STEP_BPS = 5.0  # Крок ціни між рівнями (базисні пункти)
+XT_SIM_LEVEL_NOTIONAL_USD = 1500.0  # Обсяг першого рівня ($), далі росте на 20% на рівень
+XT_SIM_TAKER_FEE = 0.0006  # Комісія тейкера
+
+# 🌐 АДРЕСИ ЗОВНІШНІХ API (перевизначаються для локальних заглушок benchmark.py)
+DEXSCREENER_API_URL = os.getenv("DEXSCREENER_API_URL", "https://api.dexscreener.com/latest/dex")
+COINGECKO_API_URL = os.getenv("COINGECKO_API_URL", "https://api.coingecko.com/api/v3")
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org")
+
+# 📏 BENCHMARK СКАНЕРА (benchmark.py)
+BENCHMARK_RESULTS_FILE = "benchmark_results.json"  # Історія прогонів для порівняння між комітами
+
+# 🧭 ТРАСУВАННЯ МОЖЛИВОСТЕЙ (opportunity_trace.py)
+OPPORTUNITY_MAX_AGE_SEC = 10.0  # Максимальний вік цін можливості перед сигналом/ордером (0 = без перевірки)
+OPPORTUNITY_STALE_ACTION = "reprice"  # "reprice" - перечитати XT/DEX ціни і перевірити спред, "drop" - відкинути
+OPPORTUNITY_JOURNAL_FILE = "opportunity_traces.jsonl"  # Журнал завершених трейсів (JSON lines)
+OPPORTUNITY_JOURNAL_ENABLED = True  # Писати журнал трейсів
+
+# 📝 ЛОГУВАННЯ (log_pipeline.py)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")  # Початковий рівень (змінюється з Telegram меню налаштувань)
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")  # "json" - один JSON об'єкт на рядок, "text" - класичний формат
+LOG_SAMPLE_INTERVAL_SEC = 60  # Повторюваний per-symbol рядок логується не частіше разу на інтервал (0 = без проріджування)
+LOG_QUEUE_SIZE = 10000  # Ємність черги записів; при переповненні записи відкидаються, а не блокують воркери
+
+# 🔬 ПРОФАЙЛЕР НА ВИМОГУ (profiler.py, /profile у Telegram, /api/admin/profile)
+PROFILER_DIR = "profiles"  # Куди зберігати .collapsed (flamegraph), .json (top-N) та дампи стеків
+PROFILER_INTERVAL_MS = 10  # Інтервал семплювання стеків усіх потоків
+PROFILER_DEFAULT_SECONDS = 30  # Тривалість прогону за замовчуванням
+PROFILER_MAX_SECONDS = 300  # Максимальна тривалість одного прогону
+PROFILER_TOP_N = 15  # Кількість гарячих функцій у підсумку
+
+# ⏳ ДЕДЛАЙНИ СКАНУВАННЯ (deadline.py)
+SCAN_SYMBOL_DEADLINE_SEC = 45  # Максимальний час одного проходу symbol_worker (всі мережеві виклики вкладаються в нього)
+SCAN_WATCHDOG_INTERVAL_SEC = 10  # Як часто watchdog шукає воркери що пережили дедлайн
+SCAN_WATCHDOG_GRACE_SEC = 15  # Після дедлайну + grace воркер вважається сиротою і скасовується
+SCAN_MAX_ORPHANED_WORKERS = 20  # Не запускати новий батч поки сиріт стільки або більше
+
+# 🔌 CIRCUIT BREAKERS DEX ПРОВАЙДЕРІВ (circuit_breaker.py)
+CIRCUIT_WINDOW_SEC = 120  # Вікно для частки помилок провайдера
+CIRCUIT_MIN_CALLS = 5  # Мінімум викликів у вікні перед тим як breaker може відкритись
+CIRCUIT_ERROR_RATE = 0.5  # Частка помилок (включно з повільними викликами) що відкриває breaker
+CIRCUIT_SLOW_CALL_SEC = 8.0  # Виклик довший за це рахується як помилка
+CIRCUIT_OPEN_SEC = 30  # Скільки провайдер пропускається після відкриття (подвоюється при невдалій пробі)
+CIRCUIT_MAX_OPEN_SEC = 300  # Стеля для подвоєння
+CIRCUIT_PROBE_INTERVAL_SEC = 5  # Half-open: не частіше однієї проби за інтервал
+CIRCUIT_PRIORITY_BIAS_SEC = 0.5  # Штраф за позицію в базовому пріоритеті (щоб здоровий DexScreener лишався першим)
+
+# 🚫 НЕГАТИВНИЙ КЕШ DEX ТА ПРУНІНГ УНІВЕРСУ (negative_cache.py)
+DEX_NEGATIVE_CACHE_FILE = "dex_negative_cache.json"  # Символи без DEX пари та час наступної перевірки
+DEX_NEGATIVE_BASE_SEC = 600  # Пауза після першої невдачі; подвоюється з кожною наступною
+DEX_NEGATIVE_MAX_SEC = 24 * 3600  # Максимальна пауза між повторними перевірками
+DEX_NEGATIVE_SAVE_INTERVAL_SEC = 30  # Не записувати файл частіше (плюс запис в кінці циклу сканування)
+
+# 🗂️ РЕЄСТР СИМВОЛІВ (symbol_registry.py)
+# База XT (без префікса 1000) -> тикер на DEX для перейменованих токенів/контрактів
+DEX_SYMBOL_ALIASES = {
+    'LUNA2': 'LUNA',
+    'BEAMX': 'BEAM',
+    'RAYSOL': 'RAY',
+    'LUNANEW': 'LUNA'
+}
+
+# ⚡ ШЛЯХ ВИКОНАННЯ ОРДЕРІВ (execution_engine.py)
+EXEC_TEMPLATE_TTL_SEC = 3600  # Шаблон ордера (contractSize, мінімум, точність, max leverage) перебудовується не частіше
+EXEC_LEVERAGE_TTL_SEC = 3600  # Після цього set_leverage викликається повторно навіть якщо значення не змінилось
+EXEC_PRICE_MAX_AGE_SEC = 2.0  # Ціна тригерного тіку використовується для розміру ордера якщо не старша (інакше fetch_ticker)
+EXEC_KEEPALIVE_SEC = 30  # Період keep-alive запиту приватної сесії XT (0 = вимкнено)
+EXEC_CLOSE_WORKERS = 8  # Паралельні закриття (акаунти одного символу / всі позиції при аварійному закритті)
+EXEC_CLOSE_CONFIRM_TIMEOUT_SEC = 15.0  # Скільки чекати підтвердження виконання close ордера у фоні
+EXEC_CLOSE_CONFIRM_POLL_SEC = 0.5  # Інтервал fetch_order при підтвердженні
+
+# 📡 ПРИВАТНИЙ WEBSOCKET ПОТІК XT (user_stream.py)
+USER_STREAM_ENABLED = os.getenv("USER_STREAM_ENABLED", "true").lower() == "true"  # Ордери/позиції/баланс через WebSocket
+USER_STREAM_URL = os.getenv("USER_STREAM_URL", "wss://fstream.xt.com/ws/user")
+USER_STREAM_PING_SEC = 20  # Текстовий ping (біржа відповідає pong)
+USER_STREAM_STALE_SEC = 60  # Без повідомлень довше - книга вважається неактуальною, читаємо REST
+USER_STREAM_RECONNECT_MAX_SEC = 60  # Максимальна пауза між перепідключеннями (backoff 1с -> x2)
+USER_STREAM_LISTEN_KEY_TTL_SEC = 6 * 3600  # Перепідключення з новим listenKey (біржа тримає ключ 8 год)
+USER_STREAM_RECONCILE_SEC = 300  # REST звірка книги позицій (перевірка безпеки)
+USER_STREAM_STUB_PORT = int(os.getenv("USER_STREAM_STUB_PORT", "0"))  # Stub для симулятора (0 - вільний порт)
+
+# 📖 АНАЛІТИКА СТАКАНУ (order_book.py)
+ORDER_BOOK_TTL_SEC = 1.0  # Знімок стакану спільний для всіх перевірок глибини символу протягом тіку
+ORDER_BOOK_FETCH_DEPTH = ORDER_BOOK_DEPTH  # Мінімальна глибина запиту (покриває всі перевірки тіку одним fetch)
+
+# 🌊 ЦІНА ВИКОНАННЯ DEX НОГИ (dex_impact.py)
+DEX_DEFAULT_FEE_PCT = 0.3  # Комісія пулу якщо dexId невідомий (Uniswap V2)
+DEX_MAX_PRICE_IMPACT_PCT = 1.0  # Глибина DEX для верифікації = обсяг з impact (з комісією) не більше цього
+DEX_ONCHAIN_RESERVES = os.getenv("DEX_ONCHAIN_RESERVES", "true").lower() == "true"  # getReserves для відомих V2 пулів
+
+# 🧮 КОНСОЛІДОВАНА DEX КОТИРОВКА (dex_quote.py)
+DEX_PAIR_SET_TTL_SEC = 300  # Набір пулів DexScreener спільний для скану і конвергенції (як кеш найкращої пари)
+DEX_QUOTE_OUTLIER_PCT = 5.0  # Пул далі цього від зваженої медіани - викид, не входить у ціну
+
+# 🧩 ШАРДОВАНИЙ СКАН (scan_shards.py)
+SCAN_SHARDS = int(os.getenv("SCAN_SHARDS", "0"))  # Процеси сканування (0/1 - все в процесі бота); координатор - процес бота
+SCAN_SHARD_PARTITION = os.getenv("SCAN_SHARD_PARTITION", "hash")  # 'hash' (стабільний шард символу) або 'balanced' (за часом скану)
+SCAN_SHARD_THREADS = max(1, MAX_CONCURRENT_SYMBOLS // max(SCAN_SHARDS, 1))  # Потоки шарда: разом як один процес
+SCAN_SHARD_START_TIMEOUT_SEC = 60  # Скільки чекати готовності процесу шарда (імпорти + клієнти)
+
+# 🌐 КЛАСТЕР СКАНЕРІВ І СПІЛЬНИЙ СТАН (state_store.py, cluster.py)
+STATE_BACKEND = os.getenv("STATE_BACKEND", "memory")  # 'memory' - один вузол; 'redis' - стан спільний для вузлів кластера
+STATE_REDIS_URL = os.getenv("STATE_REDIS_URL", "redis://127.0.0.1:6379/0")  # redis://[:пароль@]хост:порт/db
+STATE_KEY_PREFIX = os.getenv("STATE_KEY_PREFIX", "arb")  # Префікс ключів (кілька ботів в одному Redis)
+STATE_REDIS_TIMEOUT_SEC = 2.0  # Таймаут з'єднання/відповіді Redis
+STATE_SYNC_INTERVAL_SEC = 2.0  # Лідер публікує позиції/чорний список, інші вузли перечитують стан
+CLUSTER_NODE_ID = os.getenv("CLUSTER_NODE_ID", "")  # Ідентифікатор вузла (порожній - hostname-pid)
+CLUSTER_HEARTBEAT_SEC = 5  # Heartbeat вузла, продовження lease-ів і перерозподіл діапазонів
+CLUSTER_LEASE_TTL_SEC = 15  # Lease лідера/діапазону вузла що впав звільняється через стільки секунд
+CLUSTER_SCAN_RANGES = 64  # Діапазони символів (crc32), які орендують вузли-сканери
@@ -0,0 +1,224 @@
+"""
+⏳ Дедлайни сканування та кооперативне скасування
+Кожен воркер символу працює в deadline_scope(); мережеві виклики dex_client / xt_client /
+signal_verification / utils беруть таймаут з залишку часу (request_timeout), не роблять
+ретраїв і пауз за межею дедлайну (deadline_sleep) і перевіряють скасування (check_deadline).
+ScanWatchdog знаходить воркери що пережили дедлайн, скасовує їх і обмежує кількість "сиріт".
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from config import SCAN_WATCHDOG_INTERVAL_SEC, SCAN_WATCHDOG_GRACE_SEC
+from metrics import metrics
+
+DEADLINES_EXCEEDED = metrics.counter(
+    'arb_deadline_exceeded_total', 'Операції перервані дедлайном сканування', ('where',))
+
+MIN_REQUEST_TIMEOUT_SEC = 0.5  # Менший таймаут HTTP не має сенсу - краще одразу DeadlineExceeded
+
+
+class DeadlineExceeded(BaseException):
+    """
+    Дедлайн сканування минув або воркер скасовано.
+    BaseException (як asyncio.CancelledError) - щоб широкі `except Exception` у клієнтах
+    не ковтали скасування і не запускали ще один ретрай.
+    """
+
+
+class Deadline:
+    """Абсолютний дедлайн (monotonic) з прапорцем скасування"""
+
+    __slots__ = ('label', 'started_at', 'expires_at', 'cancelled', 'thread_ident', 'thread_name',
+                 'shielded', 'reported')
+
+    def __init__(self, seconds: float, label: str = ''):
+        self.label = label
+        self.started_at = time.monotonic()
+        self.expires_at = self.started_at + seconds
+        self.cancelled = threading.Event()
+        self.thread_ident = threading.get_ident()
+        self.thread_name = threading.current_thread().name
+        self.shielded = 0  # >0 - критична секція (ордери), скасування відкладається
+        self.reported = False
+
+    def remaining(self) -> float:
+        return self.expires_at - time.monotonic()
+
+    def expired(self) -> bool:
+        return self.cancelled.is_set() or self.remaining() <= 0
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def check(self, where: str = 'check'):
+        if self.shielded or not self.expired():
+            return
+        DEADLINES_EXCEEDED.inc(where)
+        reason = 'скасовано' if self.cancelled.is_set() else 'дедлайн'
+        raise DeadlineExceeded(f"{self.label}: {reason} ({where})")
+
+
+_local = threading.local()
+_active: Dict[int, Deadline] = {}  # thread ident -> дедлайн воркера
+_active_lock = threading.Lock()
+
+
+def current_deadline() -> Optional[Deadline]:
+    return getattr(_local, 'deadline', None)
+
+
+@contextmanager
+def deadline_scope(seconds: float, label: str = ''):
+    """with deadline_scope(45, symbol): symbol_worker(symbol)"""
+    previous = current_deadline()
+    deadline = Deadline(seconds, label)
+    if previous is not None and previous.expires_at < deadline.expires_at:
+        deadline.expires_at = previous.expires_at  # Вкладений дедлайн не довший за зовнішній
+    _local.deadline = deadline
+    with _active_lock:
+        _active[deadline.thread_ident] = deadline
+    try:
+        yield deadline
+    finally:
+        _local.deadline = previous
+        with _active_lock:
+            if previous is not None:
+                _active[deadline.thread_ident] = previous
+            else:
+                _active.pop(deadline.thread_ident, None)
+
+
+@contextmanager
+def shielded():
+    """Критична секція (розміщення/закриття ордерів): не переривається посередині"""
+    deadline = current_deadline()
+    if deadline is None:
+        yield
+        return
+    deadline.shielded += 1
+    try:
+        yield
+    finally:
+        deadline.shielded -= 1
+
+
+def check_deadline(where: str = 'check'):
+    """Кооперативна точка скасування (нічого не робить поза deadline_scope)"""
+    deadline = current_deadline()
+    if deadline is not None:
+        deadline.check(where)
+
+
+def request_timeout(default: float, where: str = 'request') -> float:
+    """Таймаут HTTP/API виклику: min(default, залишок дедлайну)"""
+    deadline = current_deadline()
+    if deadline is None or deadline.shielded:
+        return default
+    deadline.check(where)
+    return max(MIN_REQUEST_TIMEOUT_SEC, min(default, deadline.remaining()))
+
+
+def deadline_sleep(seconds: float, where: str = 'sleep'):
+    """time.sleep для ретраїв/rate limit: не спимо за межу дедлайну, прокидаємось при скасуванні"""
+    deadline = current_deadline()
+    if deadline is None or deadline.shielded:
+        time.sleep(seconds)
+        return
+    deadline.check(where)
+    if seconds >= deadline.remaining():
+        # Після паузи часу на запит уже не буде - ретрай безглуздий
+        DEADLINES_EXCEEDED.inc(where)
+        raise DeadlineExceeded(f"{deadline.label}: пауза {seconds:.1f}с довша за залишок {deadline.remaining():.1f}с ({where})")
+    if deadline.cancelled.wait(seconds):
+        deadline.check(where)
+
+
+def cancel_all(reason: str = '') -> int:
+    """Скасувати всі активні дедлайни (зупинка бота)"""
+    with _active_lock:
+        deadlines = list(_active.values())
+    for deadline in deadlines:
+        deadline.cancel()
+    if deadlines:
+        logging.warning(f"⏳ Скасовано {len(deadlines)} воркерів {reason}".rstrip())
+    return len(deadlines)
+
+
+def orphaned(grace_sec: float = SCAN_WATCHDOG_GRACE_SEC) -> List[Deadline]:
+    """Воркери що працюють довше дедлайну + grace"""
+    now = time.monotonic()
+    with _active_lock:
+        return [d for d in _active.values() if now - d.expires_at > grace_sec]
+
+
+class ScanWatchdog:
+    """Фоновий потік: звітує про воркери що пережили дедлайн і скасовує їх"""
+
+    def __init__(self, interval_sec: float = SCAN_WATCHDOG_INTERVAL_SEC, grace_sec: float = SCAN_WATCHDOG_GRACE_SEC):
+        self.interval_sec = interval_sec
+        self.grace_sec = grace_sec
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        self.orphaned_total = 0
+
+    def start(self):
+        if self.thread and self.thread.is_alive():
+            return self.thread
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, name='scan-watchdog', daemon=True)
+        self.thread.start()
+        return self.thread
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _run(self):
+        while not self.stop_event.wait(self.interval_sec):
+            try:
+                self.sweep()
+            except Exception as e:
+                logging.error(f"❌ Помилка watchdog сканування: {e}")
+
+    def sweep(self) -> int:
+        stale = orphaned(self.grace_sec)
+        frames = sys._current_frames() if stale else {}
+        for deadline in stale:
+            deadline.cancel()
+            if deadline.reported:
+                continue
+            deadline.reported = True
+            self.orphaned_total += 1
+            frame = frames.get(deadline.thread_ident)
+            where = f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno} {frame.f_code.co_name}" if frame else '?'
+            overdue = time.monotonic() - deadline.expires_at
+            logging.warning(f"🧟 ВОРКЕР-СИРОТА {deadline.label} ({deadline.thread_name}): "
+                            f"+{overdue:.0f}с після дедлайну, зараз у {where}"
+                            f"{' (критична секція)' if deadline.shielded else ''}")
+        return len(stale)
+
+    def wait_for_capacity(self, max_orphaned: int, stop_event: threading.Event = None, timeout: float = 60.0) -> int:
+        """Перед новим батчем: чекаємо поки сиріт стане менше max_orphaned (або timeout)"""
+        waited_until = time.monotonic() + timeout
+        count = len(orphaned(self.grace_sec))
+        while count >= max_orphaned and time.monotonic() < waited_until:
+            logging.warning(f"🧟 {count} воркерів-сиріт >= {max_orphaned} - призупиняємо запуск нового батчу")
+            if stop_event is not None and stop_event.wait(min(5.0, self.interval_sec)):
+                break
+            if stop_event is None:
+                time.sleep(min(5.0, self.interval_sec))
+            self.sweep()
+            count = len(orphaned(self.grace_sec))
+        return count
+
+
+scan_watchdog = ScanWatchdog()
+
+metrics.gauge('arb_orphaned_workers', 'Воркери що працюють довше дедлайну сканування',
+              lambda: len(orphaned()))
+metrics.gauge('arb_active_scan_deadlines', 'Воркери з активним дедлайном', lambda: len(_active))
@@ -10,15 +10,21 @@ import time
 import os
 from typing import Dict, Optional, List
 
+from metrics import provider_call
+from deadline import deadline_sleep, request_timeout
+from circuit_breaker import provider_breakers
+from negative_cache import negative_cache
+from symbol_registry import symbol_registry
+from dex_quote import parse_pair, consolidate_quote
+
 # 🚀 НОВИЙ ІМПОРТ: Прямий блокчейн клієнт замість платного DexScreener
+# (web3/solana і RPC клієнти - при першому запиті провайдера blockchain_direct, не при старті)
 try:
-    from blockchain_pools_client import blockchain_client, get_blockchain_token_data
+    from blockchain_pools_client import get_blockchain_client
     BLOCKCHAIN_AVAILABLE = True
-    logging.info("✅ Прямий блокчейн клієнт імпортовано (Ethereum/BSC/Solana)")
 except ImportError as e:
     BLOCKCHAIN_AVAILABLE = False
-    blockchain_client = None
-    get_blockchain_token_data = None
+    get_blockchain_client = None
     logging.warning(f"⚠️ Блокчейн клієнт недоступний: {e}")
 
 class DexCheckClient:
@@ -26,13 +32,21 @@ class DexCheckClient:
     🚀 DUAL-PROVIDER СИСТЕМА: DexCheck Pro + DexScreener Backup
     Потужна система арбітражу з максимальною ефективністю!
     """
+
+    # 🔌 Провайдери цін resolve_best_pair: breaker -> (метод, назва для логів)
+    PRICE_PROVIDERS = {
+        'dexscreener': ('_try_dexscreener_symbol_search', 'DexScreener'),
+        'coingecko': ('_try_coingecko', 'CoinGecko'),
+        'blockchain_direct': ('_try_blockchain_direct', 'BLOCKCHAIN')
+    }
     
     def __init__(self):
         # ОСНОВНИЙ: CoinGecko API (безкоштовний, надійний)
-        self.coingecko_base_url = "https://api.coingecko.com/api/v3"
+        from config import COINGECKO_API_URL, DEXSCREENER_API_URL
+        self.coingecko_base_url = COINGECKO_API_URL
         
         # BACKUP: DexScreener (резервний)
-        self.dexscreener_base_url = "https://api.dexscreener.com/latest/dex"
+        self.dexscreener_base_url = DEXSCREENER_API_URL
         
         # 🔧 ПОЛІПШЕНА HTTP конфігурація (більший pool для concurrency)
         from requests.adapters import HTTPAdapter
@@ -44,6 +58,8 @@ class DexCheckClient:
         # Монтуємо адаптери з більшими connection pools
         self.coingecko_session.mount('https://', adapter)
         self.dexscreener_session.mount('https://', adapter)
+        self.coingecko_session.mount('http://', adapter)  # Локальні заглушки (benchmark.py)
+        self.dexscreener_session.mount('http://', adapter)
         
         # Headers для CoinGecko API
         self.coingecko_session.headers.update({
@@ -62,9 +78,11 @@ class DexCheckClient:
             'coingecko_success': 0, 'coingecko_failed': 0, 'coingecko_429': 0
         }
         self.last_request_time = {'coingecko': 0, 'dexscreener': 0}
+        self.rate_limit_share = 1  # 🧩 Кількість процесів шардів сканування: інтервали rate-limit множаться на неї
         
         # 💾 Кеш токенів та in-flight запити
         self.token_cache = {}
+        self.pair_sets = {}  # 📦 symbol -> усі пули останньої відповіді DexScreener (dex_quote)
         self.inflight_requests = {}  # Запобігаємо дублюванню запитів
         
         # 🗺️ КРИТИЧНО: Ініціалізація token addresses mapping
@@ -177,8 +195,8 @@ class DexCheckClient:
         Найбільш надійні та актуальні ціни з DexScreener!
         """
         try:
-            clean_symbol = symbol.split('/')[0].split(':')[0].upper()
-            # clean_symbol = symbol.replace('/USDT:USDT', '').replace('/USDT', '').upper()
+            # 🗂️ DEX назва з реєстру: без префікса 1000 та з урахуванням перейменувань
+            clean_symbol = symbol_registry.dex_base(symbol)
             
             # 1. Перевіряємо кеш (окремий для конвергенції)
             cache_key = f"{clean_symbol}_best_pair{'_convergence' if for_convergence else ''}"
@@ -188,57 +206,65 @@ class DexCheckClient:
                 if time.time() - cached_data.get('cached_at', 0) < 300:
                     logging.debug(f"💾 {clean_symbol}: Використовуємо кеш")
                     return cached_data
+
+            # 🚫 Недавно не знайдено в жодному провайдері - не проходимо ланцюжок (і Discovery) знову.
+            # Конвергенція відкритих позицій перевіряється завжди
+            if not for_convergence and negative_cache.should_skip(clean_symbol):
+                logging.debug(f"🚫 {clean_symbol}: В негативному кеші DEX, пропускаємо")
+                return None
             
-            # 2. 🎯 ПРІОРИТЕТ 1: DexScreener Symbol Search (найбільш актуальні ціни!)
-            logging.info(f"🔄 {clean_symbol}: Пробуємо DexScreener (пріоритетний провайдер)")
-            dexscreener_data = self._try_dexscreener_symbol_search(clean_symbol, for_convergence)
-            if dexscreener_data and dexscreener_data.get('price_usd', 0) > 0:
-                # Валідація ціни - має бути реалістичною
-                price = dexscreener_data.get('price_usd', 0)
-                if self._validate_price(clean_symbol, price):
-                    logging.info(f"✅ {clean_symbol}: DexScreener SUCCESS! price=${price:.6f}")
-                    dexscreener_data['cached_at'] = time.time()
-                    dexscreener_data['provider'] = 'dexscreener'
-                    self.token_cache[cache_key] = dexscreener_data
-                    return dexscreener_data
-                else:
-                    logging.warning(f"❌ {clean_symbol}: DexScreener ціна нереалістична ${price:.6f}, пробуємо інші провайдери")
-            
-            # 3. FALLBACK 1: CoinGecko API (надійний провайдер)
-            logging.info(f"🪙 {clean_symbol}: Пробуємо CoinGecko fallback...")
-            coingecko_data = self._try_coingecko(clean_symbol)
-            if coingecko_data and coingecko_data.get('price_usd', 0) > 0:
-                price = coingecko_data.get('price_usd', 0)
-                if self._validate_price(clean_symbol, price):
-                    self.provider_stats['coingecko_success'] += 1
-                    coingecko_data['cached_at'] = time.time()
-                    coingecko_data['provider'] = 'coingecko'
-                    self.token_cache[cache_key] = coingecko_data
-                    logging.info(f"🪙 {clean_symbol}: CoinGecko SUCCESS! price=${price:.6f}")
-                    return coingecko_data
-                else:
-                    logging.warning(f"❌ {clean_symbol}: CoinGecko ціна нереалістична ${price:.6f}")
-            
-            # 4. FALLBACK 2: Прямі блокчейн пули (останній варіант)
-            if BLOCKCHAIN_AVAILABLE and blockchain_client:
-                logging.info(f"🔥 {clean_symbol}: Пробуємо прямі блокчейн пули (останній fallback)")
-                blockchain_data = self._try_blockchain_direct(clean_symbol, for_convergence)
-                if blockchain_data and blockchain_data.get('price_usd', 0) > 0:
-                    price = blockchain_data.get('price_usd', 0)
+            # 2. Провайдери в порядку здоров'я (circuit breakers): базовий пріоритет
+            # DexScreener -> CoinGecko -> Blockchain, деградовані опускаються вниз, відкриті пропускаються
+            # Провайдери пропущені breaker або з помилкою (виняток, 5xx, 429, таймаут) під час цього
+            # виклику - "не знайдено" тоді не остаточне і в негативний кеш не пишеться
+            skipped_providers = []
+            for provider in provider_breakers.ordered(list(self.PRICE_PROVIDERS)):
+                if provider == 'blockchain_direct' and not BLOCKCHAIN_AVAILABLE:
+                    continue
+                breaker = provider_breakers.get(provider)
+                if not breaker.allow():
+                    logging.debug(f"🔌 {clean_symbol}: {provider} пропущено (breaker {breaker.state})")
+                    skipped_providers.append(provider)
+                    continue
+
+                method_name, label = self.PRICE_PROVIDERS[provider]
+                logging.info(f"🔄 {clean_symbol}: Пробуємо {label}")
+                failures_before = breaker.total_failures
+                try:
+                    provider_data = getattr(self, method_name)(clean_symbol, for_convergence)
+                finally:
+                    breaker.release()  # Провайдер міг повернутись без HTTP виклику (record)
+                if breaker.total_failures > failures_before and not provider_data:
+                    skipped_providers.append(provider)
+                if provider_data and provider_data.get('price_usd', 0) > 0:
+                    # Валідація ціни - має бути реалістичною
+                    price = provider_data.get('price_usd', 0)
                     if self._validate_price(clean_symbol, price):
-                        logging.info(f"🚀 {clean_symbol}: BLOCKCHAIN SUCCESS! price=${price:.6f}")
-                        blockchain_data['cached_at'] = time.time()
-                        blockchain_data['provider'] = 'blockchain_direct'
-                        self.token_cache[cache_key] = blockchain_data
-                        return blockchain_data
+                        if provider == 'coingecko':
+                            self.provider_stats['coingecko_success'] += 1
+                        logging.info(f"✅ {clean_symbol}: {label} SUCCESS! price=${price:.6f}")
+                        provider_data['cached_at'] = time.time()
+                        provider_data['provider'] = provider
+                        self.token_cache[cache_key] = provider_data
+                        negative_cache.record_hit(clean_symbol)
+                        return provider_data
                     else:
-                        logging.warning(f"❌ {clean_symbol}: Блокчейн ціна нереалістична ${price:.6f}")
+                        logging.warning(f"❌ {clean_symbol}: {label} ціна нереалістична ${price:.6f}, пробуємо інші провайдери")
             
             # 🚀 АВТОМАТИЧНЕ РОЗШИРЕННЯ: спробуємо знайти нову адресу
-            if self.discovery_client and not for_convergence:
+            discovery_breaker = provider_breakers.get('discovery')
+            if self.discovery_client and not for_convergence and discovery_breaker.allow():
                 logging.info(f"🔍 {clean_symbol}: Пошук нової контрактної адреси через Discovery API...")
                 try:
-                    new_addresses = self.discovery_client.expand_token_database([clean_symbol])
+                    started = time.perf_counter()
+                    try:
+                        new_addresses = self.discovery_client.expand_token_database([clean_symbol])
+                    except Exception as e:
+                        discovery_breaker.record(False, time.perf_counter() - started, type(e).__name__)
+                        raise
+                    finally:
+                        discovery_breaker.release()
+                    discovery_breaker.record(True, time.perf_counter() - started)
                     if new_addresses.get(clean_symbol):
                         # Перезавантажуємо token addresses після додання нових
                         self.token_addresses = self._init_comprehensive_token_mapping()
@@ -247,11 +273,14 @@ class DexCheckClient:
                         # Спробуємо ще раз з новою адресою
                         return self.resolve_best_pair(symbol, for_convergence)
                 except Exception as e:
+                    skipped_providers.append('discovery')
                     logging.warning(f"🔍 Discovery помилка для {clean_symbol}: {e}")
             
             # Жоден провайдер не спрацював
             self.provider_stats['coingecko_failed'] += 1
             logging.warning(f"❌ {clean_symbol}: Не знайдено в жодному провайдері")
+            if not for_convergence and not skipped_providers:
+                negative_cache.record_miss(clean_symbol, 'не знайдено в жодному провайдері')
             return None
             
         except Exception as e:
@@ -264,11 +293,18 @@ class DexCheckClient:
         Використовує прямі RPC запити до Ethereum, BSC, Solana пулів
         """
         try:
-            if not BLOCKCHAIN_AVAILABLE or not blockchain_client:
+            if not BLOCKCHAIN_AVAILABLE:
                 return None
             
             # Отримуємо дані через прямий блокчейн клієнт
-            blockchain_data = blockchain_client.get_token_with_liquidity(symbol)
+            breaker = provider_breakers.get('blockchain_direct')
+            started = time.perf_counter()
+            try:
+                blockchain_data = get_blockchain_client().get_token_with_liquidity(symbol)
+            except Exception as e:
+                breaker.record(False, time.perf_counter() - started, type(e).__name__)
+                raise
+            breaker.record(True, time.perf_counter() - started)
             
             if not blockchain_data:
                 return None
@@ -352,7 +388,7 @@ class DexCheckClient:
         
         return True
     
-    def _try_coingecko(self, symbol: str) -> Optional[Dict]:
+    def _try_coingecko(self, symbol: str, for_convergence: bool = False) -> Optional[Dict]:
         symbol_to_coingecko = {
             'BTC': 'bitcoin',
             'ETH': 'ethereum', 
@@ -463,6 +499,9 @@ class DexCheckClient:
         base_delay = 1.5
         
         for attempt in range(max_retries):
+            if attempt and provider_breakers.get('coingecko').is_open():
+                logging.debug(f"🔌 {symbol}: CoinGecko breaker відкрився - припиняємо ретраї")
+                return None
             try:
                 # Rate limiting для CoinGecko (збільшено до 2 секунд для стабільності)
                 self._apply_rate_limit('coingecko', min_interval=2.0)
@@ -482,7 +521,7 @@ class DexCheckClient:
                 if attempt == 0:
                     logging.debug(f"🪙 Пробуємо CoinGecko: {symbol} (id={coingecko_id})")
                 
-                response = self.coingecko_session.get(url, params=params, timeout=20)
+                response = self._provider_get('coingecko', 'simple_price', self.coingecko_session, url, 20, params=params)
                 
                 if response.status_code == 200:
                     data = response.json()
@@ -492,7 +531,7 @@ class DexCheckClient:
                         if attempt < max_retries - 1:
                             delay = base_delay * (2 ** attempt)
                             logging.debug(f"🪙 CoinGecko empty response для {symbol}, retry {attempt+1}/{max_retries} через {delay}s")
-                            time.sleep(delay)
+                            deadline_sleep(delay, 'dex_retry')
                             continue
                         logging.warning(f"🪙 CoinGecko empty response для {symbol} після {max_retries} спроб")
                         return None
@@ -506,7 +545,7 @@ class DexCheckClient:
                         else:
                             if attempt < max_retries - 1:
                                 delay = base_delay * (2 ** attempt)
-                                time.sleep(delay)
+                                deadline_sleep(delay, 'dex_retry')
                                 continue
                             logging.warning(f"🚨 CoinGecko parsing failed для {symbol}")
                             
@@ -516,7 +555,7 @@ class DexCheckClient:
                     delay = base_delay * (2 ** attempt) * 2  # Подвійна затримка при rate limit
                     logging.warning(f"🚨 CoinGecko rate limit для {symbol}, чекаємо {delay}s")
                     if attempt < max_retries - 1:
-                        time.sleep(delay)
+                        deadline_sleep(delay, 'dex_retry')
                         continue
                     return None
                 else:
@@ -524,7 +563,7 @@ class DexCheckClient:
                     if attempt < max_retries - 1:
                         delay = base_delay * (2 ** attempt)
                         logging.debug(f"🚨 CoinGecko {response.status_code} для {symbol}, retry {attempt+1}/{max_retries}")
-                        time.sleep(delay)
+                        deadline_sleep(delay, 'dex_retry')
                         continue
                     logging.warning(f"🚨 CoinGecko {response.status_code} для {symbol}: {response.text[:200]}")
             
@@ -532,37 +571,45 @@ class DexCheckClient:
                 if attempt < max_retries - 1:
                     delay = base_delay * (2 ** attempt)
                     logging.debug(f"🚨 CoinGecko exception для {symbol}: {e}, retry {attempt+1}/{max_retries}")
-                    time.sleep(delay)
+                    deadline_sleep(delay, 'dex_retry')
                     continue
                 logging.warning(f"🚨 CoinGecko exception для {symbol} після {max_retries} спроб: {e}")
         
         return None
     
     
-    def _try_dexscreener_symbol_search(self, symbol: str, for_convergence: bool = False) -> Optional[Dict]:
+    def _dexscreener_pair_set(self, symbol: str) -> Optional[List[Dict]]:
         """
-        🔄 ПРІОРИТЕТНИЙ ПРОВАЙДЕР: пошук по символу через DexScreener search API
-        З exponential backoff та retry логікою для стабільності
+        📦 Усі пули токена з однієї відповіді DexScreener search (дозволені мережі та DEX).
+        Кешується на DEX_PAIR_SET_TTL_SEC: скан і конвергенція читають один набір
         """
+        from config import ALLOWED_CHAINS, ALLOWED_DEX_PROVIDERS, DEX_PAIR_SET_TTL_SEC
+        cached = self.pair_sets.get(symbol)
+        if cached and time.time() - cached['cached_at'] < DEX_PAIR_SET_TTL_SEC:
+            return cached['pools']
+
         # 🔧 ВИПРАВЛЕНО: Retry логіка з exponential backoff
         max_retries = 3
         base_delay = 1.0
         
         for attempt in range(max_retries):
+            if attempt and provider_breakers.get('dexscreener').is_open():
+                logging.debug(f"🔌 {symbol}: DexScreener breaker відкрився - припиняємо ретраї")
+                return None
             try:
                 # ⏱️ Rate limiting для DexScreener (збільшено до 1.5 секунди)
                 self._apply_rate_limit('dexscreener', 5.0)
                 
                 # Symbol-based search через DexScreener search API
-                search_url = f"https://api.dexscreener.com/latest/dex/search/?q={symbol}"
+                search_url = f"{self.dexscreener_base_url}/search/?q={symbol}"
                 
-                response = self.dexscreener_session.get(search_url, timeout=20)
+                response = self._provider_get('dexscreener', 'search', self.dexscreener_session, search_url, 20)
                 
                 if response.status_code != 200:
                     if attempt < max_retries - 1:
                         delay = base_delay * (2 ** attempt)
                         logging.debug(f"🔄 {symbol}: DexScreener {response.status_code}, retry {attempt+1}/{max_retries} через {delay}s")
-                        time.sleep(delay)
+                        deadline_sleep(delay, 'dex_retry')
                         continue
                     logging.debug(f"🔄 {symbol}: DexScreener search endpoint {response.status_code}")
                     return None
@@ -572,100 +619,72 @@ class DexCheckClient:
                     if attempt < max_retries - 1:
                         delay = base_delay * (2 ** attempt)
                         logging.debug(f"🔄 {symbol}: DexScreener no pairs, retry {attempt+1}/{max_retries}")
-                        time.sleep(delay)
+                        deadline_sleep(delay, 'dex_retry')
                         continue
                     logging.debug(f"🔄 {symbol}: DexScreener search no pairs")
                     return None
                 
                 # Фільтруємо по всім дозволеним мережам з config.ALLOWED_CHAINS
-                from config import ALLOWED_CHAINS
-                allowed_chains = ALLOWED_CHAINS
-                filtered_pairs = [p for p in data['pairs'] if p.get('chainId') in allowed_chains]
+                filtered_pairs = [p for p in data['pairs'] if p.get('chainId') in ALLOWED_CHAINS]
                 
                 if not filtered_pairs:
                     if attempt < max_retries - 1:
                         delay = base_delay * (2 ** attempt)
                         logging.debug(f"🔄 {symbol}: No allowed chain pairs, retry {attempt+1}/{max_retries}")
-                        time.sleep(delay)
+                        deadline_sleep(delay, 'dex_retry')
                         continue
                     logging.debug(f"🔄 {symbol}: No BSC/ETH pairs found in search")
                     return None
                 
-                # Сортуємо за ліквідністю
-                pairs = sorted(filtered_pairs[:15], 
-                              key=lambda p: float(p.get('liquidity', {}).get('usd', 0)), 
-                              reverse=True)
-                
-                for pair in pairs:
-                    liquidity = float(pair.get('liquidity', {}).get('usd', 0))
-                    price = float(pair.get('priceUsd', 0))
-                    volume_24h = float(pair.get('volume', {}).get('h24', 0))
-                    base_symbol = pair.get('baseToken', {}).get('symbol', '').upper()
-                    
-                    # Перевіряємо що це правильний токен
-                    if base_symbol != symbol.upper():
-                        continue
-                        
-                    # 🔗 ОТРИМУЄМО ТОЧНУ DEX ПАРУ з DexScreener
-                    pair_address = pair.get('pairAddress', '')
-                    chain_name = pair.get('chainId', 'ethereum')
-                    dex_name = pair.get('dexId', 'unknown')
-                    
-                    # 🎯 ФІЛЬТРАЦІЯ DEX ПРОВАЙДЕРІВ: тільки найкращі провайдери
-                    from config import ALLOWED_DEX_PROVIDERS
-                    if dex_name.lower() not in [provider.lower() for provider in ALLOWED_DEX_PROVIDERS]:
-                        logging.debug(f"🚫 {symbol}: Пропускаємо {dex_name} (не в списку дозволених провайдерів)")
-                        continue  # Пропускаємо цей провайдер
-                    
-                    # 🎯 АДАПТИВНІ ФІЛЬТРИ: м'якші для конвергенції, жорсткі для сигналів
-                    min_liquidity = 1000 if for_convergence else 2000
-                    min_volume = 100 if for_convergence else 5000  
-                    if (price > 0.000001 and liquidity >= min_liquidity and volume_24h >= min_volume):
-                        
-                        exact_pair_url = f"https://dexscreener.com/{chain_name}/{pair_address}" if pair_address else None
-                        
-                        pair_data = {
-                            'price_usd': price,
-                            'liquidity_usd': liquidity,
-                            'volume_24h': volume_24h,
-                            'chain': chain_name,
-                            'transactions_24h': pair.get('txns', {}).get('h24', {}).get('buys', 0) + pair.get('txns', {}).get('h24', {}).get('sells', 0),
-                            'buy_percentage': (pair.get('txns', {}).get('h24', {}).get('buys', 0) / max(1, pair.get('txns', {}).get('h24', {}).get('buys', 0) + pair.get('txns', {}).get('h24', {}).get('sells', 0))) * 100,
-                            'dex_id': dex_name,
-                            'base_symbol': symbol,
-                            'quote_symbol': 'USDT',
-                            'token_address': pair.get('baseToken', {}).get('address', ''),
-                            'market_cap': float(pair.get('marketCap', 0)),
-                            'pair_address': pair_address,
-                            'dex_name': dex_name,
-                            'exact_pair_url': exact_pair_url,
-                            'chain_name': chain_name
-                        }
-                        
-                        logging.info(f"🔄 {symbol}: DexScreener SUCCESS P=${price:.6f} L=${liquidity:,.0f} V=${volume_24h:,.0f}")
-                        return pair_data
-                
-                # Якщо не знайдено якісних пар, retry
-                if attempt < max_retries - 1:
-                    delay = base_delay * (2 ** attempt)
-                    logging.debug(f"🔄 {symbol}: No quality pairs, retry {attempt+1}/{max_retries}")
-                    time.sleep(delay)
-                    continue
-                    
-                logging.debug(f"🔄 {symbol}: DexScreener - no quality pairs found після {max_retries} спроб")
-                return None
+                # Перевіряємо що це правильний токен і 🎯 дозволений DEX провайдер
+                allowed_dex = [provider.lower() for provider in ALLOWED_DEX_PROVIDERS]
+                pools = [parse_pair(pair) for pair in filtered_pairs
+                         if pair.get('baseToken', {}).get('symbol', '').upper() == symbol.upper()
+                         and pair.get('dexId', 'unknown').lower() in allowed_dex]
+                self.pair_sets[symbol] = {'pools': pools, 'cached_at': time.time()}
+                return pools
                 
             except Exception as e:
                 if attempt < max_retries - 1:
                     delay = base_delay * (2 ** attempt)
                     logging.debug(f"DexScreener exception для {symbol}: {e}, retry {attempt+1}/{max_retries}")
-                    time.sleep(delay)
+                    deadline_sleep(delay, 'dex_retry')
                     continue
                 logging.debug(f"DexScreener exception для {symbol} після {max_retries} спроб: {e}")
                 return None
         
         return None
     
+    def _try_dexscreener_symbol_search(self, symbol: str, for_convergence: bool = False) -> Optional[Dict]:
+        """
+        🔄 ПРІОРИТЕТНИЙ ПРОВАЙДЕР: пошук по символу через DexScreener search API
+        Консолідована котировка всіх якісних пулів (dex_quote): ціна зважена за ліквідністю,
+        посилання та ліквідність - найглибшого пулу
+        """
+        pools = self._dexscreener_pair_set(symbol)
+        if not pools:
+            return None
+        
+        # 🎯 АДАПТИВНІ ФІЛЬТРИ: м'якші для конвергенції, жорсткі для сигналів
+        min_liquidity = 1000 if for_convergence else 2000
+        min_volume = 100 if for_convergence else 5000
+        quote = consolidate_quote(pools, min_liquidity, min_volume)
+        if not quote:
+            logging.debug(f"🔄 {symbol}: DexScreener - no quality pairs found ({len(pools)} пулів)")
+            return None
+        
+        pair_data = {
+            **quote.primary,
+            'price_usd': quote.price_usd,
+            'base_symbol': symbol,
+            'quote_symbol': 'USDT',
+            'dex_quote': quote
+        }
+        logging.info(f"🔄 {symbol}: DexScreener SUCCESS P=${quote.price_usd:.6f} ({quote.pools} пулів, "
+                     f"розкид {quote.dispersion_pct:.2f}%, викидів {quote.rejected_outliers}) "
+                     f"L=${pair_data['liquidity_usd']:,.0f} V=${pair_data['volume_24h']:,.0f}")
+        return pair_data
+    
     def _parse_dexcheck_response(self, data: Dict, symbol: str, token_info: Dict) -> Optional[Dict]:
         """
         🔧 ПАРСЕР DexCheck Pro API відповідей (address-based)
@@ -855,6 +874,23 @@ class DexCheckClient:
             logging.warning(f"🚨 TRACEBACK: {traceback.format_exc()}")
             return None
     
+    def _provider_get(self, provider: str, operation: str, session, url: str, timeout: float, **kwargs):
+        """HTTP GET з метриками провайдера та записом результату в його circuit breaker"""
+        breaker = provider_breakers.get(provider)
+        started = time.perf_counter()
+        try:
+            with provider_call(provider, operation) as call:
+                response = session.get(url, timeout=request_timeout(timeout, provider), **kwargs)
+                if response.status_code != 200:
+                    call.outcome = f"http_{response.status_code}"
+        except Exception as e:
+            breaker.record(False, time.perf_counter() - started, type(e).__name__)
+            raise
+        # 404/400 - проблема запиту, а не провайдера; 429 та 5xx - деградація
+        healthy = response.status_code < 500 and response.status_code != 429
+        breaker.record(healthy, time.perf_counter() - started, f"HTTP {response.status_code}")
+        return response
+
     def _apply_rate_limit(self, provider: str, min_interval: float):
         """
         ⏱️ Rate limiting з exponential backoff
@@ -863,10 +899,11 @@ class DexCheckClient:
         current_time = time.time()
         last_time = self.last_request_time.get(provider, 0)
         
+        min_interval *= self.rate_limit_share
         time_since_last = current_time - last_time
         if time_since_last < min_interval:
             sleep_time = min_interval - time_since_last
-            time.sleep(sleep_time)
+            deadline_sleep(sleep_time, f"{provider}_rate_limit")  # ⏳ Не чекаємо черги за межею дедлайну
         
         self.last_request_time[provider] = int(time.time())
     
@@ -929,8 +966,8 @@ class DexCheckClient:
         Повертає: ціну, FDV, market cap, транзакції, покупців/продавців, об'єми
         """
         try:
-            clean_symbol = symbol.replace('/USDT:USDT', '').replace('/USDT', '').upper()
-            pair_data = self.resolve_best_pair(clean_symbol)
+            clean_symbol = symbol_registry.dex_base(symbol)
+            pair_data = self.resolve_best_pair(symbol)
             
             if not pair_data:
                 return None
@@ -1039,7 +1076,7 @@ class DexCheckClient:
         """
         try:
             # Очищаємо символ
-            clean_symbol = symbol.replace('/USDT:USDT', '').replace('/USDT', '').upper()
+            clean_symbol = symbol_registry.dex_base(symbol)
             
             # 1. Отримуємо дані через resolve_best_pair
             pair_data = self.resolve_best_pair(symbol, for_convergence)
@@ -1354,6 +1391,35 @@ class DexCheckClient:
             logging.error(f"Помилка форматування сигналу: {e}")
             return f"Arbitrage: {opportunity.get('symbol', 'Unknown')} - {opportunity.get('spread_pct', 0):.2f}%"
 
+    def get_stats(self) -> Dict:
+        """📊 Статистика провайдерів та стан їх circuit breakers"""
+        return {
+            **self.provider_stats,
+            'cache_size': len(self.token_cache),
+            'pair_sets': len(self.pair_sets),
+            'provider_order': provider_breakers.ordered(list(self.PRICE_PROVIDERS)),
+            'negative_cache': negative_cache.stats(),
+            'breakers': provider_breakers.snapshot()
+        }
+
+    def health_check(self) -> Dict:
+        """🏥 Здоров'я за станом breakers (без мережевих запитів)"""
+        stats = self.get_stats()
+        states = [stats['breakers'][name]['state'] for name in self.PRICE_PROVIDERS
+                  if name != 'blockchain_direct' or BLOCKCHAIN_AVAILABLE]
+        if all(state == 'open' for state in states):
+            status = 'down'
+        elif all(state == 'closed' for state in states):
+            status = 'healthy'
+        else:
+            status = 'degraded'
+        return {
+            'status': status,
+            'open_providers': [name for name, b in stats['breakers'].items() if b['state'] == 'open'],
+            'blockchain_available': BLOCKCHAIN_AVAILABLE,
+            'stats': stats
+        }
+
 # Створюємо глобальний екземпляр
 dex_client = DexCheckClient()
 
@@ -0,0 +1,156 @@
+"""
+🌊 Ціна виконання DEX ноги за моделлю constant product (x*y=k, Uniswap V2 / PancakeSwap / Raydium)
+Спотова priceUsd DexScreener не враховує, наскільки пул зсунеться під наш обсяг. Тут ефективна ціна
+і price impact рахуються з резервів пулу: on-chain getReserves (BlockchainPoolsClient, якщо пул відомий)
+або половина liquidity.usd DexScreener (у V2 пулі обидві сторони рівні за вартістю). V3 пули
+рахуються як V2 на всій ліквідності - оцінка консервативна (концентрована ліквідність глибша біля ціни).
+Всі розрахунки векторні (NumPy): кандидати скану оцінюються одним викликом.
+"""
+
+import logging
+from typing import Dict, Optional, Tuple
+
+from config import DEX_DEFAULT_FEE_PCT, DEX_MAX_PRICE_IMPACT_PCT, DEX_ONCHAIN_RESERVES
+from models import Opportunity
+
+# Комісія пулу (частка) за dexId DexScreener; V3 мають кілька тірів - береться найпоширеніший 0.3%
+DEX_FEE_TIERS = {
+    'uniswap': 0.003,
+    'sushiswap': 0.003,
+    'pancakeswap': 0.0025,
+    'biswap': 0.001,
+    'apeswap': 0.002,
+    'quickswap': 0.003,
+    'raydium': 0.0025,
+    'orca': 0.003,
+    'meteora': 0.0025,
+    'aerodrome': 0.003,
+    'traderjoe': 0.003,
+    'camelot': 0.003,
+}
+
+# Мережі з V2 пулами BlockchainPoolsClient (getReserves) і комісія цих пулів
+ONCHAIN_V2_FEES = {'ethereum': 0.003, 'bsc': 0.0025}
+
+# Нога DEX протилежна позиції на XT: LONG XT (XT дешевше) - продаж на DEX, SHORT XT - купівля
+DEX_LEG_SIDES = {'LONG': 'sell', 'BUY': 'sell', 'SHORT': 'buy', 'SELL': 'buy'}
+
+
+def fee_for(dex_id: Optional[str]) -> float:
+    """Комісія пулу за dexId (невідомий DEX - DEX_DEFAULT_FEE_PCT)"""
+    dex_id = (dex_id or '').lower()
+    for name, fee in DEX_FEE_TIERS.items():
+        if dex_id.startswith(name):
+            return fee
+    return DEX_DEFAULT_FEE_PCT / 100
+
+
+def pool_depth(symbol: str, price_usd: float, liquidity_usd: float, chain: str = None,
+               dex_id: str = None) -> Tuple[float, float]:
+    """
+    (USD вартість котирувальної сторони пулу, комісія): on-chain резерви якщо пул відомий
+    BlockchainPoolsClient, інакше liquidity.usd / 2
+    """
+    chain = (chain or '').lower()
+    if DEX_ONCHAIN_RESERVES and chain in ONCHAIN_V2_FEES and price_usd > 0:
+        try:
+            from blockchain_pools_client import get_blockchain_client
+            reserves = get_blockchain_client().get_pool_reserves(symbol, chain)
+            if reserves:
+                base_reserve, _ = reserves
+                return base_reserve * price_usd, ONCHAIN_V2_FEES[chain]
+        except Exception as e:
+            logging.debug(f"[{symbol}] ⚠️ On-chain резерви недоступні: {e}")
+    return max(float(liquidity_usd or 0), 0.0) / 2, fee_for(dex_id)
+
+
+def execution_prices(spot_prices, quote_depths, usd_amounts, sides, fees) -> Dict:
+    """
+    Ефективна ціна swap на usd_amounts для масиву пулів:
+    купівля: exec/spot = (1 + x(1-f)/R) / (1-f); продаж: exec/spot = (1-f) / (1 + x(1-f)/R),
+    де R - USD вартість котирувальної сторони, x - notional. Повертає масиви
+    {'exec_price', 'impact_pct' (зсув від споту з комісією, >= 0), 'fee_pct'}; без резервів - NaN
+    """
+    import numpy as np
+    spot = np.asarray(spot_prices, dtype=np.float64)
+    depth = np.asarray(quote_depths, dtype=np.float64)
+    amount = np.broadcast_to(np.asarray(usd_amounts, dtype=np.float64), spot.shape)
+    fee = np.broadcast_to(np.asarray(fees, dtype=np.float64), spot.shape)
+    is_buy = np.broadcast_to(np.asarray(sides) == 'buy', spot.shape)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        shift = np.where(depth > 0, amount * (1 - fee) / depth, np.nan)
+        ratio = np.where(is_buy, (1 + shift) / (1 - fee), (1 - fee) / (1 + shift))
+    return {
+        'exec_price': spot * ratio,
+        'impact_pct': np.abs(ratio - 1) * 100,
+        'fee_pct': fee * 100
+    }
+
+
+def executable_spreads(xt_prices, dex_prices, quote_depths, usd_amounts, fees, spread_fee_pct: float = 0.06) -> Dict:
+    """
+    Спред XT vs DEX по ціні виконання DEX ноги (та сама формула що utils.calculate_spread).
+    Сторона DEX ноги - з напрямку спреду; impact завжди зменшує |спред|.
+    Пули без резервів (NaN) зберігають спотовий спред.
+    """
+    import numpy as np
+    xt = np.asarray(xt_prices, dtype=np.float64)
+    dex = np.asarray(dex_prices, dtype=np.float64)
+    sides = np.where(xt < dex, 'sell', 'buy')
+    fills = execution_prices(dex, quote_depths, usd_amounts, sides, fees)
+    dex_exec = np.where(np.isfinite(fills['exec_price']), fills['exec_price'], dex)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        spot_spread = (dex - xt) / dex * 100.0 - spread_fee_pct
+        exec_spread = (dex_exec - xt) / dex_exec * 100.0 - spread_fee_pct
+    return {
+        'spot_spread': spot_spread,
+        'executable_spread': exec_spread,
+        'dex_exec_price': dex_exec,
+        'impact_pct': np.nan_to_num(fills['impact_pct']),
+        'dex_side': sides
+    }
+
+
+def executable_spread(xt_price: float, dex_price: float, quote_depth: float, usd_amount: float,
+                      fee: float) -> Dict:
+    """executable_spreads() для одного символу - звичайні float/str"""
+    result = executable_spreads([xt_price], [dex_price], [quote_depth], usd_amount, [fee])
+    return {key: value[0].item() for key, value in result.items()}
+
+
+def max_size_for_impact(quote_depth: float, fee: float, impact_pct: float = DEX_MAX_PRICE_IMPACT_PCT) -> float:
+    """
+    Найбільший notional (USD), який виконується в обидва боки з impact (разом з комісією)
+    не більше impact_pct - обернена формула execution_prices
+    """
+    if quote_depth <= 0:
+        return 0.0
+    p = impact_pct / 100
+    buy_size = quote_depth * ((1 + p) * (1 - fee) - 1) / (1 - fee)
+    sell_size = quote_depth * ((1 - fee) / (1 - p) - 1) / (1 - fee) if p < 1 else buy_size
+    return max(min(buy_size, sell_size), 0.0)
+
+
+def rank_opportunities(opportunities: Dict[str, Opportunity], usd_amount: float) -> Optional[str]:
+    """
+    Пакетна переоцінка кандидатів best_opportunities (models.Opportunity) одним векторним викликом:
+    записує executable_spread / dex_impact_pct / score у кожен запис і повертає найкращий символ
+    """
+    if not opportunities:
+        return None
+    import numpy as np
+    from strategy_rules import opportunity_score
+    symbols = list(opportunities)
+    rows = [opportunities[symbol] for symbol in symbols]
+    result = executable_spreads(
+        [row.xt_price for row in rows], [row.dex_price for row in rows],
+        [row.dex_depth for row in rows], usd_amount,
+        [row.dex_fee or DEX_DEFAULT_FEE_PCT / 100 for row in rows])
+    scores = opportunity_score(result['executable_spread'],
+                               np.array([row.liquidity for row in rows], dtype=np.float64),
+                               np.array([row.volume_24h for row in rows], dtype=np.float64))
+    for i, row in enumerate(rows):
+        row.executable_spread = float(result['executable_spread'][i])
+        row.dex_impact_pct = float(result['impact_pct'][i])
+        row.score = float(scores[i])
+    return symbols[int(np.argmax(scores))]
@@ -0,0 +1,80 @@
+"""
+🧮 Консолідована DEX котировка токена з усіх пар однієї відповіді DexScreener search
+Замість першої пари, що пройшла фільтри, - зважена за ліквідністю ціна всіх якісних пулів,
+найкращі пули для продажу (bid) і купівлі (ask), розкид цін між пулами та відсів викидів.
+Чисті функції без мережевих запитів; набір пар кешує DexCheckClient (скан і конвергенція
+читають один набір без повторних HTTP запитів).
+"""
+
+from typing import Dict, List, Optional
+
+from config import DEX_QUOTE_OUTLIER_PCT
+from models import DexQuote
+
+
+def parse_pair(pair: Dict) -> Dict:
+    """Пара DexScreener -> плоский запис пулу (формат pair_data resolve_best_pair)"""
+    txns_24h = pair.get('txns', {}).get('h24', {})
+    buys, sells = txns_24h.get('buys', 0), txns_24h.get('sells', 0)
+    chain_name = pair.get('chainId', 'ethereum')
+    pair_address = pair.get('pairAddress', '')
+    dex_name = pair.get('dexId', 'unknown')
+    return {
+        'price_usd': float(pair.get('priceUsd') or 0),
+        'liquidity_usd': float((pair.get('liquidity') or {}).get('usd') or 0),
+        'volume_24h': float((pair.get('volume') or {}).get('h24') or 0),
+        'chain': chain_name,
+        'transactions_24h': buys + sells,
+        'buy_percentage': buys / max(1, buys + sells) * 100,
+        'dex_id': dex_name,
+        'token_address': pair.get('baseToken', {}).get('address', ''),
+        'market_cap': float(pair.get('marketCap') or 0),
+        'pair_address': pair_address,
+        'dex_name': dex_name,
+        'exact_pair_url': f"https://dexscreener.com/{chain_name}/{pair_address}" if pair_address else None,
+        'chain_name': chain_name
+    }
+
+
+def _weighted_median(prices: List[float], weights: List[float]) -> float:
+    ordered = sorted(zip(prices, weights))
+    half = sum(weights) / 2
+    cumulative = 0.0
+    for price, weight in ordered:
+        cumulative += weight
+        if cumulative >= half:
+            return price
+    return ordered[-1][0]
+
+
+def consolidate_quote(pools: List[Dict], min_liquidity: float, min_volume: float,
+                      outlier_pct: float = DEX_QUOTE_OUTLIER_PCT) -> Optional[DexQuote]:
+    """
+    Котировка з пулів, що пройшли фільтри ліквідності/обсягу:
+    викиди - пули далі outlier_pct від зваженої медіани; ціна - середнє зважене за ліквідністю;
+    dispersion_pct - зважене стандартне відхилення у % від ціни; best_bid - найдорожчий пул
+    (продаж токена), best_ask - найдешевший (купівля); primary - найглибший пул
+    """
+    quality = [pool for pool in pools
+               if pool['price_usd'] > 0.000001 and pool['liquidity_usd'] >= min_liquidity
+               and pool['volume_24h'] >= min_volume]
+    if not quality:
+        return None
+
+    weights = [pool['liquidity_usd'] for pool in quality]
+    median = _weighted_median([pool['price_usd'] for pool in quality], weights)
+    kept = [pool for pool in quality if abs(pool['price_usd'] / median - 1) * 100 <= outlier_pct]
+
+    total_liquidity = sum(pool['liquidity_usd'] for pool in kept)
+    price = sum(pool['price_usd'] * pool['liquidity_usd'] for pool in kept) / total_liquidity
+    variance = sum(pool['liquidity_usd'] * (pool['price_usd'] - price) ** 2 for pool in kept) / total_liquidity
+    return DexQuote(
+        price_usd=price,
+        pools=len(kept),
+        rejected_outliers=len(quality) - len(kept),
+        total_liquidity_usd=total_liquidity,
+        dispersion_pct=variance ** 0.5 / price * 100,
+        primary=max(kept, key=lambda pool: pool['liquidity_usd']),
+        best_bid=max(kept, key=lambda pool: pool['price_usd']),
+        best_ask=min(kept, key=lambda pool: pool['price_usd'])
+    )
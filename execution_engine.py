@@ -0,0 +1,289 @@
+"""
+⚡ Низьколатентний шлях виконання ордерів XT
+Шаблони ордерів (contractSize, мінімум, точність, max leverage) рахуються один раз на символ,
+set_leverage / set_margin_mode викликаються тільки коли значення на біржі ще не таке,
+ціна тригерного тіку використовується повторно якщо свіжа, приватні сесії тримаються "теплими",
+а Telegram сповіщення відправляються після повернення з xt_open_market_position.
+"""
+
+import logging
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+
+from config import (EXEC_TEMPLATE_TTL_SEC, EXEC_LEVERAGE_TTL_SEC, EXEC_PRICE_MAX_AGE_SEC, EXEC_KEEPALIVE_SEC,
+                    EXEC_CLOSE_WORKERS, EXEC_CLOSE_CONFIRM_TIMEOUT_SEC, EXEC_CLOSE_CONFIRM_POLL_SEC)
+from metrics import metrics
+from user_stream import stream_for
+
+SUBMIT_ACK_SECONDS = metrics.histogram(
+    'arb_order_submit_ack_seconds', 'Від відправки create_order до відповіді біржі', ('account',))
+PREPARE_SECONDS = metrics.histogram(
+    'arb_order_prepare_seconds', 'Підготовка ордера до відправки (шаблон, плече, ціна, точність)', ('account',))
+EXEC_CACHE = metrics.counter(
+    'arb_exec_cache_total', 'Кеш шляху виконання: hit/miss для шаблонів, плеча та ціни тіку', ('kind', 'result'))
+CLOSE_CONFIRM_SECONDS = metrics.histogram(
+    'arb_close_confirm_seconds', 'Від відправки close ордера до підтвердження виконання', ('account',))
+CLOSE_CONFIRM = metrics.counter(
+    'arb_close_confirm_total', 'Результат фонового підтвердження close ордерів', ('result',))
+
+
+class OrderTemplate:
+    """Незмінні для символу параметри розрахунку розміру ордера"""
+
+    __slots__ = ('symbol', 'market_id', 'contract_size', 'min_amount', 'amount_precision', 'max_leverage', 'built_at')
+
+    def __init__(self, symbol: str, market: Dict):
+        limits = market.get('limits') or {}
+        self.symbol = symbol
+        self.market_id = market.get('id', 'N/A')
+        self.contract_size = float(market.get('contractSize') or 1.0)
+        self.min_amount = float((limits.get('amount') or {}).get('min') or 0.001)
+        self.amount_precision = (market.get('precision') or {}).get('amount', 6)
+        self.max_leverage = (limits.get('leverage') or {}).get('max')
+        self.built_at = time.monotonic()
+
+    def clamp_leverage(self, leverage: int) -> int:
+        return min(leverage, self.max_leverage) if self.max_leverage else leverage
+
+    def contracts_for(self, notional: float, price: float) -> float:
+        """contracts = notional / (contract_size * price)"""
+        return notional / (self.contract_size * price)
+
+
+_templates: Dict[str, OrderTemplate] = {}
+_templates_lock = threading.Lock()
+# Стан на біржі для кожного клієнта XT: (symbol, positionSide) -> (leverage, коли встановлено)
+_leverage_state = weakref.WeakKeyDictionary()
+_margin_state = weakref.WeakKeyDictionary()  # клієнт -> {symbol: mode}
+_state_lock = threading.Lock()
+
+
+def get_template(xt, symbol: str) -> OrderTemplate:
+    """Шаблон з кешу; xt.market() тільки при першому ордері або після EXEC_TEMPLATE_TTL_SEC"""
+    template = _templates.get(symbol)
+    if template is not None and time.monotonic() - template.built_at < EXEC_TEMPLATE_TTL_SEC:
+        EXEC_CACHE.inc('template', 'hit')
+        return template
+    EXEC_CACHE.inc('template', 'miss')
+    template = OrderTemplate(symbol, xt.market(symbol))
+    with _templates_lock:
+        _templates[symbol] = template
+    return template
+
+
+def prewarm_templates(xt, symbols) -> int:
+    """Будує шаблони для всіх символів заздалегідь (локально з завантажених ринків, без запитів)"""
+    built = 0
+    for symbol in symbols:
+        try:
+            get_template(xt, symbol)
+            built += 1
+        except Exception as e:
+            logging.debug(f"[XT {symbol}] Шаблон ордера не побудовано: {e}")
+    logging.info(f"⚡ Шаблони ордерів: {built} символів")
+    return built
+
+
+def invalidate_templates(symbols=None):
+    """Після оновлення ринків (contractSize/limits могли змінитись)"""
+    with _templates_lock:
+        if symbols is None:
+            _templates.clear()
+        else:
+            for symbol in symbols:
+                _templates.pop(symbol, None)
+
+
+def ensure_leverage(xt, symbol: str, leverage: int, position_side: str = None) -> bool:
+    """
+    set_leverage тільки якщо на біржі (за нашими даними) інше значення або запис старший за TTL.
+    Помилка не блокує ордер (як і раніше), але логується і не кешується - наступний ордер спробує знову
+    """
+    key = (symbol, position_side)
+    with _state_lock:
+        state = _leverage_state.setdefault(xt, {})
+        cached = state.get(key)
+    if cached and cached[0] == leverage and time.monotonic() - cached[1] < EXEC_LEVERAGE_TTL_SEC:
+        EXEC_CACHE.inc('leverage', 'hit')
+        return True
+    EXEC_CACHE.inc('leverage', 'miss')
+    try:
+        if position_side:
+            xt.set_leverage(leverage, symbol, {"positionSide": position_side})
+        else:
+            xt.set_leverage(leverage, symbol)
+    except Exception as e:
+        logging.warning(f"[XT {symbol}] ⚠️ Помилка встановлення левериджу {leverage}x: {e}")
+        return False
+    with _state_lock:
+        state[key] = (leverage, time.monotonic())
+    return True
+
+
+def ensure_margin_mode(xt, symbol: str, mode: str = 'isolated') -> bool:
+    """set_margin_mode один раз на символ і клієнт"""
+    with _state_lock:
+        state = _margin_state.setdefault(xt, {})
+        if state.get(symbol) == mode:
+            EXEC_CACHE.inc('margin_mode', 'hit')
+            return True
+    EXEC_CACHE.inc('margin_mode', 'miss')
+    try:
+        xt.set_margin_mode(mode, symbol)
+    except Exception as e:
+        logging.debug(f"[XT {symbol}] set_margin_mode({mode}): {e}")
+        return False
+    with _state_lock:
+        state[symbol] = mode
+    return True
+
+
+def reuse_trigger_price(price_ref: Optional[float], price_age_sec: Optional[float]) -> Optional[float]:
+    """Ціна тригерного тіку якщо вона не старша EXEC_PRICE_MAX_AGE_SEC, інакше None (потрібен fetch_ticker)"""
+    if price_ref and price_age_sec is not None and 0 <= price_age_sec <= EXEC_PRICE_MAX_AGE_SEC:
+        EXEC_CACHE.inc('price', 'hit')
+        return float(price_ref)
+    EXEC_CACHE.inc('price', 'miss')
+    return None
+
+
+def account_label(xt) -> str:
+    return getattr(xt, 'account_name', None) or getattr(xt, 'arb_account_name', None) or 'xt'
+
+
+def submit_order(xt, submit, *args) -> Tuple[Dict, float]:
+    """Виконує submit(*args) і повертає (order, секунди submit->ack); латентність також в order['submit_ack_ms']"""
+    started = time.perf_counter()
+    order = submit(*args)
+    ack_sec = time.perf_counter() - started
+    SUBMIT_ACK_SECONDS.observe(ack_sec, account_label(xt))
+    if isinstance(order, dict):
+        order['submit_ack_ms'] = round(ack_sec * 1000, 2)
+    return order, ack_sec
+
+
+# 📱 Сповіщення після повернення: один потік, порядок повідомлень зберігається
+_notify_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='order-notify')
+
+
+def notify_async(fn, *args, **kwargs):
+    """Відправка сповіщення поза критичною секцією ордера"""
+    def run():
+        try:
+            fn(*args, **kwargs)
+        except Exception as e:
+            logging.error(f"❌ Помилка асинхронного сповіщення: {e}")
+    return _notify_executor.submit(run)
+
+
+# 🚪 Закриття: ордери на різні акаунти/символи відправляються паралельно, підтвердження - у фоні
+_close_executor = ThreadPoolExecutor(max_workers=EXEC_CLOSE_WORKERS, thread_name_prefix='order-close')
+_confirm_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='order-confirm')
+
+
+def run_concurrently(calls: Dict) -> Dict:
+    """
+    {label: (fn, *args)} -> {label: результат}; всі виклики стартують одночасно на close executor.
+    Виняток виклику стає його результатом (False) і не зупиняє решту
+    """
+    futures = {label: _close_executor.submit(call[0], *call[1:]) for label, call in calls.items()}
+    results = {}
+    for label, future in futures.items():
+        try:
+            results[label] = future.result()
+        except Exception as e:
+            logging.error(f"❌ Паралельне закриття {label}: {e}")
+            results[label] = False
+    return results
+
+
+def confirm_fill_async(xt, order: Dict, symbol: str, on_done: Callable[[Optional[Dict]], None]):
+    """
+    Фоново чекає виконання ордера (подія приватного потоку або fetch_order до status closed / filled > 0)
+    і викликає on_done(order) з середньою ціною; on_done(None) якщо підтвердження не прийшло
+    за EXEC_CLOSE_CONFIRM_TIMEOUT_SEC
+    """
+    submitted_at = time.perf_counter()
+    account = account_label(xt)
+
+    def run():
+        confirmed = order if _is_filled(order) else None
+        final_state = confirmed is not None
+        stream = stream_for(xt)
+        poll_sec = EXEC_CLOSE_CONFIRM_TIMEOUT_SEC
+        if not final_state and stream is not None and order.get('id'):
+            # 📡 Подія виконання з приватного потоку; fetch_order - одна спроба якщо подія не прийшла
+            streamed = stream.book.wait_order(order['id'], EXEC_CLOSE_CONFIRM_TIMEOUT_SEC)
+            confirmed = streamed if _is_filled(streamed) else None
+            final_state = streamed is not None
+            poll_sec = EXEC_CLOSE_CONFIRM_POLL_SEC
+        deadline = time.monotonic() + poll_sec
+        while not final_state and order.get('id') and time.monotonic() < deadline:
+            time.sleep(EXEC_CLOSE_CONFIRM_POLL_SEC)
+            try:
+                fetched = xt.fetch_order(order['id'], symbol)
+            except Exception as e:
+                logging.debug(f"[XT {symbol}] fetch_order {order['id']}: {e}")
+                continue
+            if _is_filled(fetched):
+                confirmed = fetched
+                break
+            if fetched.get('status') in ('canceled', 'rejected', 'expired'):
+                break
+        if confirmed is not None:
+            CLOSE_CONFIRM_SECONDS.observe(time.perf_counter() - submitted_at, account)
+            CLOSE_CONFIRM.inc('filled')
+        else:
+            CLOSE_CONFIRM.inc('unconfirmed')
+            logging.warning(f"[XT {symbol}] ⚠️ {account}: виконання close ордера {order.get('id')} не підтверджено")
+        try:
+            on_done(confirmed)
+        except Exception as e:
+            logging.error(f"❌ [XT {symbol}] Помилка обробки підтвердження закриття: {e}")
+    return _confirm_executor.submit(run)
+
+
+def _is_filled(order: Optional[Dict]) -> bool:
+    return bool(order) and (order.get('status') == 'closed' or float(order.get('filled') or 0) > 0) \
+        and order.get('status') not in ('canceled', 'rejected')
+
+
+# 🔥 Keep-alive приватних сесій: TLS з'єднання в пулі не закриваються між рідкими ордерами
+_warm_clients = weakref.WeakSet()
+_keepalive_thread = None
+_keepalive_stop = threading.Event()
+
+
+def _ping(xt):
+    """Легкий приватний futures запит - тримає з'єднання з тим самим хостом що й create_order"""
+    xt.fetch_balance({'type': 'swap'})
+
+
+def warm_session(xt) -> bool:
+    """Відкриває з'єднання заздалегідь і реєструє клієнта для періодичного keep-alive"""
+    global _keepalive_thread
+    if xt is None:
+        return False
+    _warm_clients.add(xt)
+    try:
+        _ping(xt)
+        ok = True
+    except Exception as e:
+        logging.warning(f"⚠️ Прогрів сесії XT {account_label(xt)}: {e}")
+        ok = False
+    if EXEC_KEEPALIVE_SEC > 0 and (_keepalive_thread is None or not _keepalive_thread.is_alive()):
+        _keepalive_thread = threading.Thread(target=_keepalive_loop, name='xt-keepalive', daemon=True)
+        _keepalive_thread.start()
+    return ok
+
+
+def _keepalive_loop():
+    while not _keepalive_stop.wait(EXEC_KEEPALIVE_SEC):
+        for xt in list(_warm_clients):
+            try:
+                _ping(xt)
+            except Exception as e:
+                logging.debug(f"XT keep-alive {account_label(xt)}: {e}")
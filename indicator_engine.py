@@ -0,0 +1,387 @@
+"""
+⚡ Інкрементальний движок технічних індикаторів
+Зберігає ковзний стан по кожному символу (Wilder RSI, EMA/MACD, Bollinger, ATR, VWAP)
+і оновлює його за O(1) на кожен новий тік замість перерахунку всієї історії.
+"""
+
+import math
+import threading
+import time
+import logging
+from collections import deque
+from typing import Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def ema_series(data, period: int = None, alpha: float = None, seed: float = None) -> np.ndarray:
+    """
+    Векторизований EMA (рекурсивна формула ema[i] = a*x[i] + (1-a)*ema[i-1]).
+    Рахується блоками у замкненій формі через cumsum, щоб уникнути Python-циклу
+    та переповнення множника (1-a)^-i на довгих рядах.
+    """
+    values = np.asarray(data, dtype=np.float64)
+    if values.size == 0:
+        return values.copy()
+    if alpha is None:
+        alpha = 2.0 / (period + 1)
+    decay = 1.0 - alpha
+    if decay <= 0.0:
+        return values.copy()
+
+    result = np.empty_like(values)
+    if seed is None:
+        result[0] = values[0]
+        prev = values[0]
+        start = 1
+    else:
+        prev = float(seed)
+        start = 0
+
+    # Довжина блоку при якій decay^-block ще далеко від переповнення float64
+    block = max(1, min(4096, int(600.0 / -math.log(decay))))
+    pos = start
+    while pos < values.size:
+        chunk = values[pos:pos + block]
+        powers = decay ** np.arange(1, chunk.size + 1)
+        weighted = np.cumsum(chunk / powers)
+        result[pos:pos + chunk.size] = powers * (prev + alpha * weighted)
+        prev = result[pos + chunk.size - 1]
+        pos += chunk.size
+    return result
+
+
+class SymbolIndicatorState:
+    """Ковзний стан індикаторів одного символу"""
+
+    def __init__(self, rsi_period: int = 14, macd_fast: int = 12, macd_slow: int = 26,
+                 macd_signal: int = 9, bb_period: int = 20, bb_std: float = 2.0,
+                 atr_period: int = 14, vwap_window: int = 100):
+        self.rsi_period = rsi_period
+        self.macd_fast = macd_fast
+        self.macd_slow = macd_slow
+        self.macd_signal = macd_signal
+        self.bb_period = bb_period
+        self.bb_std = bb_std
+        self.atr_period = atr_period
+        self.vwap_window = vwap_window
+        self.reset()
+
+    def reset(self):
+        """Скидає стан до початкового"""
+        self.count = 0
+        self.last_price = None
+        self.updated_at = 0.0
+
+        # Wilder RSI
+        self._rsi_seed_gain = 0.0
+        self._rsi_seed_loss = 0.0
+        self._rsi_deltas = 0
+        self.avg_gain = None
+        self.avg_loss = None
+
+        # EMA / MACD
+        self.ema_fast = None
+        self.ema_slow = None
+        self.macd_signal_value = None
+
+        # Bollinger: ковзне середнє/дисперсія (Welford для вікна)
+        self._bb_window = deque()
+        self._bb_mean = 0.0
+        self._bb_m2 = 0.0
+
+        # ATR (Wilder)
+        self._atr_seed_sum = 0.0
+        self._atr_count = 0
+        self.atr = None
+
+        # VWAP по ковзному вікну
+        self._vwap_window = deque()
+        self._vwap_pv = 0.0
+        self._vwap_volume = 0.0
+
+    # ------------------------------------------------------------------
+    # O(1) оновлення
+    # ------------------------------------------------------------------
+    def update(self, price: float, high: float = None, low: float = None, volume: float = 0.0):
+        """Додає новий тік (close/high/low/volume) за O(1)"""
+        price = float(price)
+        high = float(high) if high is not None else price
+        low = float(low) if low is not None else price
+        prev_close = self.last_price
+
+        self._update_rsi(price, prev_close)
+        self._update_macd(price)
+        self._update_bollinger(price)
+        self._update_atr(high, low, prev_close)
+        self._update_vwap(price, float(volume or 0.0))
+
+        self.last_price = price
+        self.count += 1
+        self.updated_at = time.time()
+
+    def _update_rsi(self, price: float, prev_close: Optional[float]):
+        if prev_close is None:
+            return
+        delta = price - prev_close
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+
+        if self.avg_gain is None:
+            self._rsi_seed_gain += gain
+            self._rsi_seed_loss += loss
+            self._rsi_deltas += 1
+            if self._rsi_deltas >= self.rsi_period:
+                self.avg_gain = self._rsi_seed_gain / self.rsi_period
+                self.avg_loss = self._rsi_seed_loss / self.rsi_period
+        else:
+            n = self.rsi_period
+            self.avg_gain = (self.avg_gain * (n - 1) + gain) / n
+            self.avg_loss = (self.avg_loss * (n - 1) + loss) / n
+
+    def _update_macd(self, price: float):
+        if self.ema_fast is None:
+            self.ema_fast = price
+            self.ema_slow = price
+        else:
+            alpha_fast = 2.0 / (self.macd_fast + 1)
+            alpha_slow = 2.0 / (self.macd_slow + 1)
+            self.ema_fast += alpha_fast * (price - self.ema_fast)
+            self.ema_slow += alpha_slow * (price - self.ema_slow)
+
+        macd_line = self.ema_fast - self.ema_slow
+        if self.macd_signal_value is None:
+            self.macd_signal_value = macd_line
+        else:
+            alpha_signal = 2.0 / (self.macd_signal + 1)
+            self.macd_signal_value += alpha_signal * (macd_line - self.macd_signal_value)
+
+    def _update_bollinger(self, price: float):
+        window = self._bb_window
+        if len(window) < self.bb_period:
+            window.append(price)
+            n = len(window)
+            delta = price - self._bb_mean
+            self._bb_mean += delta / n
+            self._bb_m2 += delta * (price - self._bb_mean)
+            return
+
+        # Зсув вікна: додаємо нову ціну, прибираємо найстарішу
+        old = window.popleft()
+        window.append(price)
+        old_mean = self._bb_mean
+        self._bb_mean += (price - old) / self.bb_period
+        self._bb_m2 += (price - old) * (price - self._bb_mean + old - old_mean)
+        if self._bb_m2 < 0:
+            self._bb_m2 = 0.0
+
+    def _update_atr(self, high: float, low: float, prev_close: Optional[float]):
+        if prev_close is None:
+            true_range = high - low
+        else:
+            true_range = max(high - low, abs(high - prev_close), abs(low - prev_close))
+
+        if self.atr is None:
+            self._atr_seed_sum += true_range
+            self._atr_count += 1
+            if self._atr_count >= self.atr_period:
+                self.atr = self._atr_seed_sum / self.atr_period
+        else:
+            n = self.atr_period
+            self.atr = (self.atr * (n - 1) + true_range) / n
+
+    def _update_vwap(self, price: float, volume: float):
+        self._vwap_window.append((price, volume))
+        self._vwap_pv += price * volume
+        self._vwap_volume += volume
+        if len(self._vwap_window) > self.vwap_window:
+            old_price, old_volume = self._vwap_window.popleft()
+            self._vwap_pv -= old_price * old_volume
+            self._vwap_volume -= old_volume
+
+    # ------------------------------------------------------------------
+    # Пакетна ініціалізація з історії (NumPy)
+    # ------------------------------------------------------------------
+    def init_from_history(self, prices: List[float], highs: List[float] = None,
+                          lows: List[float] = None, volumes: List[float] = None):
+        """Векторизовано ініціалізує стан з історичного ряду"""
+        self.reset()
+        closes = np.asarray(prices, dtype=np.float64)
+        if closes.size == 0:
+            return
+        highs_arr = np.asarray(highs, dtype=np.float64) if highs is not None and len(highs) == closes.size else closes
+        lows_arr = np.asarray(lows, dtype=np.float64) if lows is not None and len(lows) == closes.size else closes
+        volumes_arr = np.asarray(volumes, dtype=np.float64) if volumes is not None and len(volumes) == closes.size else np.zeros_like(closes)
+
+        # Wilder RSI
+        deltas = np.diff(closes)
+        if deltas.size >= self.rsi_period:
+            gains = np.where(deltas > 0, deltas, 0.0)
+            losses = np.where(deltas < 0, -deltas, 0.0)
+            seed_gain = gains[:self.rsi_period].mean()
+            seed_loss = losses[:self.rsi_period].mean()
+            rest_gain = gains[self.rsi_period:]
+            rest_loss = losses[self.rsi_period:]
+            alpha = 1.0 / self.rsi_period
+            self.avg_gain = float(ema_series(rest_gain, alpha=alpha, seed=seed_gain)[-1]) if rest_gain.size else float(seed_gain)
+            self.avg_loss = float(ema_series(rest_loss, alpha=alpha, seed=seed_loss)[-1]) if rest_loss.size else float(seed_loss)
+        else:
+            self._rsi_seed_gain = float(np.clip(deltas, 0, None).sum())
+            self._rsi_seed_loss = float(np.clip(-deltas, 0, None).sum())
+            self._rsi_deltas = int(deltas.size)
+
+        # EMA / MACD
+        ema_fast = ema_series(closes, self.macd_fast)
+        ema_slow = ema_series(closes, self.macd_slow)
+        macd_line = ema_fast - ema_slow
+        self.ema_fast = float(ema_fast[-1])
+        self.ema_slow = float(ema_slow[-1])
+        self.macd_signal_value = float(ema_series(macd_line, self.macd_signal)[-1])
+
+        # Bollinger
+        tail = closes[-self.bb_period:]
+        self._bb_window = deque(tail.tolist())
+        self._bb_mean = float(tail.mean())
+        self._bb_m2 = float(((tail - self._bb_mean) ** 2).sum())
+
+        # ATR (Wilder)
+        prev_closes = np.concatenate(([np.nan], closes[:-1]))
+        true_ranges = np.nanmax(np.vstack([
+            highs_arr - lows_arr,
+            np.abs(highs_arr - prev_closes),
+            np.abs(lows_arr - prev_closes)
+        ]), axis=0)
+        if true_ranges.size >= self.atr_period:
+            seed_atr = true_ranges[:self.atr_period].mean()
+            rest = true_ranges[self.atr_period:]
+            self.atr = float(ema_series(rest, alpha=1.0 / self.atr_period, seed=seed_atr)[-1]) if rest.size else float(seed_atr)
+        else:
+            self._atr_seed_sum = float(true_ranges.sum())
+            self._atr_count = int(true_ranges.size)
+
+        # VWAP
+        vwap_prices = closes[-self.vwap_window:]
+        vwap_volumes = volumes_arr[-self.vwap_window:]
+        self._vwap_window = deque(zip(vwap_prices.tolist(), vwap_volumes.tolist()))
+        self._vwap_pv = float((vwap_prices * vwap_volumes).sum())
+        self._vwap_volume = float(vwap_volumes.sum())
+
+        self.last_price = float(closes[-1])
+        self.count = int(closes.size)
+        self.updated_at = time.time()
+
+    # ------------------------------------------------------------------
+    # Читання без перерахунку
+    # ------------------------------------------------------------------
+    def rsi(self) -> float:
+        if self.avg_gain is None:
+            return 50.0
+        if self.avg_loss == 0:
+            return 100.0
+        rs = self.avg_gain / self.avg_loss
+        return float(100 - (100 / (1 + rs)))
+
+    def macd(self) -> Dict[str, float]:
+        if self.count < self.macd_slow:
+            return {'macd': 0.0, 'signal': 0.0, 'histogram': 0.0}
+        macd_line = self.ema_fast - self.ema_slow
+        return {
+            'macd': float(macd_line),
+            'signal': float(self.macd_signal_value),
+            'histogram': float(macd_line - self.macd_signal_value)
+        }
+
+    def bollinger(self) -> Dict[str, float]:
+        current_price = self.last_price if self.last_price is not None else 0.0
+        if len(self._bb_window) < self.bb_period:
+            return {'upper': current_price * 1.02, 'middle': current_price, 'lower': current_price * 0.98}
+        std = math.sqrt(self._bb_m2 / self.bb_period)  # population std як np.std
+        return {
+            'upper': float(self._bb_mean + self.bb_std * std),
+            'middle': float(self._bb_mean),
+            'lower': float(self._bb_mean - self.bb_std * std)
+        }
+
+    def atr_value(self) -> float:
+        if self.atr is not None:
+            return float(self.atr)
+        if self._atr_count:
+            return float(self._atr_seed_sum / self._atr_count)
+        return (self.last_price or 0.0) * 0.02
+
+    def vwap(self) -> float:
+        if self._vwap_volume > 0:
+            return float(self._vwap_pv / self._vwap_volume)
+        return float(self.last_price or 0.0)
+
+    def snapshot(self) -> Dict:
+        """Поточні значення всіх індикаторів (формат як у TechnicalIndicators)"""
+        return {
+            'current_price': self.last_price,
+            'rsi': self.rsi(),
+            'macd': self.macd(),
+            'bollinger': self.bollinger(),
+            'atr': self.atr_value(),
+            'vwap': self.vwap(),
+            'ema_fast': self.ema_fast,
+            'ema_slow': self.ema_slow,
+            'samples': self.count,
+            'updated_at': self.updated_at
+        }
+
+
+class IndicatorEngine:
+    """Реєстр станів індикаторів по символах (потокобезпечний)"""
+
+    def __init__(self, **state_params):
+        self.state_params = state_params
+        self.states: Dict[str, SymbolIndicatorState] = {}
+        self.lock = threading.Lock()
+
+    def _get_state(self, symbol: str) -> SymbolIndicatorState:
+        state = self.states.get(symbol)
+        if state is None:
+            state = SymbolIndicatorState(**self.state_params)
+            self.states[symbol] = state
+        return state
+
+    def update(self, symbol: str, price: float, high: float = None, low: float = None, volume: float = 0.0):
+        """O(1) оновлення стану символу новим тіком"""
+        try:
+            if not price or price <= 0:
+                return
+            with self.lock:
+                self._get_state(symbol).update(price, high, low, volume)
+        except Exception as e:
+            logger.error(f"Помилка оновлення індикаторів {symbol}: {e}")
+
+    def init_symbol(self, symbol: str, prices: List[float], highs: List[float] = None,
+                    lows: List[float] = None, volumes: List[float] = None):
+        """Пакетна ініціалізація символу з історії"""
+        try:
+            with self.lock:
+                self._get_state(symbol).init_from_history(prices, highs, lows, volumes)
+        except Exception as e:
+            logger.error(f"Помилка ініціалізації індикаторів {symbol}: {e}")
+
+    def get(self, symbol: str) -> Optional[Dict]:
+        """Поточні індикатори символу без перерахунку (None якщо даних немає)"""
+        with self.lock:
+            state = self.states.get(symbol)
+            if state is None or state.count == 0:
+                return None
+            return state.snapshot()
+
+    def samples(self, symbol: str) -> int:
+        state = self.states.get(symbol)
+        return state.count if state else 0
+
+    def remove(self, symbol: str):
+        with self.lock:
+            self.states.pop(symbol, None)
+
+
+# Глобальний движок (живиться цінами зі сканера)
+indicator_engine = IndicatorEngine()
@@ -0,0 +1,172 @@
+"""
+📝 Неблокуюче логування: QueueHandler -> фоновий QueueListener -> JSON/текст у stdout
+Воркери лише кладуть LogRecord у чергу (без форматування та без локу хендлера),
+форматування повідомлення (%-аргументи) і запис виконує один потік слухача.
+Повторювані per-symbol рядки проріджуються (sampled), рівень змінюється на льоту з Telegram.
+"""
+
+import atexit
+import json
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional, Tuple
+
+from config import LOG_LEVEL, LOG_FORMAT, LOG_SAMPLE_INTERVAL_SEC, LOG_QUEUE_SIZE
+from metrics import metrics
+
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+LOG_LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR')
+
+# Шумні бібліотеки (у т.ч. URL з токенами Telegram) - тільки WARNING+
+QUIET_LOGGERS = ('urllib3', 'httpx', 'telegram', 'telegram.ext', 'httpcore', 'requests')
+
+
+def sampled(symbol: str = None) -> Dict:
+    """
+    extra для повторюваних рядків: не частіше LOG_SAMPLE_INTERVAL_SEC на (рядок коду, символ)
+    logging.info("[%s] XT: $%.6f", symbol, price, extra=sampled(symbol))
+    """
+    return {'sample_key': symbol or '*', 'symbol': symbol}
+
+
+class JsonFormatter(logging.Formatter):
+    """Один JSON об'єкт на рядок"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'msg': record.getMessage()
+        }
+        symbol = getattr(record, 'symbol', None)
+        if symbol:
+            payload['symbol'] = symbol
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            payload['suppressed'] = suppressed
+        if record.exc_info:
+            payload['exc'] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Пропускає повторюваний рядок раз на інтервал; кількість пропущених додається до наступного"""
+
+    def __init__(self, interval_sec: float = LOG_SAMPLE_INTERVAL_SEC):
+        super().__init__()
+        self.interval_sec = interval_sec
+        self.lock = threading.Lock()
+        self.state: Dict[Tuple, Tuple[float, int]] = {}  # (файл, рядок, ключ) -> (час, пропущено)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = getattr(record, 'sample_key', None)
+        if key is None or record.levelno >= logging.WARNING or self.interval_sec <= 0:
+            return True
+        # На DEBUG показуємо все - рівень перемикається саме для діагностики
+        if logging.getLogger().level <= logging.DEBUG:
+            return True
+
+        state_key = (record.pathname, record.lineno, key)
+        now = time.monotonic()
+        with self.lock:
+            last, suppressed = self.state.get(state_key, (0.0, 0))
+            if now - last < self.interval_sec:
+                self.state[state_key] = (last, suppressed + 1)
+                return False
+            self.state[state_key] = (now, 0)
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class LazyQueueHandler(QueueHandler):
+    """
+    QueueHandler без форматування в потоці що логує (стандартний prepare() викликає format()).
+    Аргументи повідомлення - прості значення, тому безпечно форматувати їх у слухачі.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # Черга переповнена (stdout не встигає) - не блокуємо торгові потоки
+            self.dropped += 1
+
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[LazyQueueHandler] = None
+_setup_lock = threading.Lock()
+
+
+def setup_logging(level: str = None, log_format: str = None) -> logging.Logger:
+    """Налаштовує root logger (ідемпотентно; повторний виклик лише змінює рівень)"""
+    global _listener, _queue_handler
+    root = logging.getLogger()
+    with _setup_lock:
+        if _listener is None:
+            output = logging.StreamHandler()
+            if (log_format or LOG_FORMAT).lower() == 'json':
+                output.setFormatter(JsonFormatter())
+            else:
+                output.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+            log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+            _queue_handler = LazyQueueHandler(log_queue)
+            _queue_handler.addFilter(SamplingFilter())
+
+            for handler in list(root.handlers):
+                root.removeHandler(handler)
+            root.addHandler(_queue_handler)
+
+            _listener = QueueListener(log_queue, output, respect_handler_level=False)
+            _listener.start()
+            atexit.register(_listener.stop)
+
+            for name in QUIET_LOGGERS:
+                logging.getLogger(name).setLevel(logging.WARNING)
+
+    set_log_level(level or _saved_log_level() or LOG_LEVEL)
+    return root
+
+
+def _saved_log_level() -> Optional[str]:
+    """Рівень збережений з Telegram меню (runtime_config.json)"""
+    try:
+        with open('runtime_config.json', 'r', encoding='utf-8') as f:
+            return json.load(f).get('LOG_LEVEL')
+    except Exception:
+        return None
+
+
+def set_log_level(level: str) -> str:
+    """Змінює рівень root logger на льоту; повертає встановлений рівень"""
+    level = str(level).upper()
+    if level not in LOG_LEVELS:
+        raise ValueError(f"Невідомий рівень логування: {level}")
+    logging.getLogger().setLevel(getattr(logging, level))
+    return level
+
+
+def get_log_level() -> str:
+    return logging.getLevelName(logging.getLogger().level)
+
+
+def dropped_records() -> int:
+    """Скільки записів відкинуто через переповнену чергу"""
+    return _queue_handler.dropped if _queue_handler else 0
+
+
+metrics.gauge('arb_log_records_dropped', 'Записи логу відкинуті через переповнену чергу', dropped_records)
@@ -10,19 +10,17 @@ import csv
 import io
 import os
 from datetime import datetime, timedelta
-from flask import Flask, jsonify, request, render_template, send_file
+from flask import Flask, Response, jsonify, request, render_template, send_file
 
 # Import existing modules
 import admin
 import bot
 import config
 from utils import test_telegram_configuration
+from log_pipeline import setup_logging
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+# Configure logging (неблокуюча черга, див. log_pipeline.py)
+setup_logging()
 
 # Flask app setup with production configuration
 # Налаштовуємо Flask для serve React build з frontend/build
@@ -126,6 +124,16 @@ def health():
         'deployment_ready': True
     }), 200
 
+def _user_streams():
+    """📡 Стан приватних WebSocket потоків акаунтів"""
+    import user_stream
+    return user_stream.snapshot()
+
+def _dex_provider_breakers():
+    """🔌 Стан circuit breakers DEX провайдерів"""
+    from circuit_breaker import provider_breakers
+    return provider_breakers.snapshot()
+
 @app.route('/status')
 def status():
     """Detailed status endpoint"""
@@ -137,6 +145,8 @@ def status():
         'status': 'running',
         'uptime': f"Started at {bot_status['start_time']}",
         'components': bot_status,
+        'dex_providers': _dex_provider_breakers(),
+        'user_streams': _user_streams(),
         'features': {
             'trading_bot': 'XT.com arbitrage bot with DexCheck integration',
             'telegram_bot': 'Telegram admin interface for bot control',
@@ -146,6 +156,57 @@ def status():
         'timestamp': datetime.now().isoformat()
     })
 
+@app.route('/metrics')
+def prometheus_metrics():
+    """⏱️ Метрики конвеєра у форматі Prometheus (етапи, провайдери, локи)"""
+    from metrics import metrics
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+def _admin_authorized() -> bool:
+    """🔐 Адмін endpoints: заголовок X-Admin-Password (порівняння за сталий час)"""
+    import hmac
+    password = request.headers.get('X-Admin-Password', '')
+    return bool(config.ADMIN_PASSWORD) and hmac.compare_digest(password, config.ADMIN_PASSWORD)
+
+@app.route('/api/admin/profile', methods=['POST'])
+def api_admin_profile():
+    """🔬 Семплюючий профайлер на ?seconds=N; ?format=collapsed повертає flamegraph текст"""
+    if not _admin_authorized():
+        return jsonify({"success": False, "detail": "Unauthorized"}), 401
+    import profiler
+    try:
+        seconds = float(request.args.get('seconds', config.PROFILER_DEFAULT_SECONDS))
+        result = profiler.run_profile(seconds)
+        if result is None:
+            return jsonify({"success": False, "detail": "Профайлер вже працює"}), 409
+        if request.args.get('format') == 'collapsed':
+            return send_file(os.path.abspath(result['collapsed_file']), mimetype='text/plain')
+        return jsonify({"success": True, **result})
+    except Exception as e:
+        logging.error(f"Profiler API error: {e}")
+        return jsonify({"success": False, "detail": str(e)}), 500
+
+@app.route('/api/admin/stacks')
+def api_admin_stacks():
+    """🧵 Дамп стеків усіх потоків (text/plain)"""
+    if not _admin_authorized():
+        return jsonify({"success": False, "detail": "Unauthorized"}), 401
+    import profiler
+    text, _ = profiler.dump_thread_stacks()
+    return Response(text, mimetype='text/plain; charset=utf-8')
+
+@app.route('/api/admin/close-all', methods=['POST'])
+def api_admin_close_all():
+    """🚨 Аварійне закриття всіх позицій на всіх акаунтах (паралельно)"""
+    if not _admin_authorized():
+        return jsonify({"success": False, "detail": "Unauthorized"}), 401
+    try:
+        result = bot.close_all_positions(request.args.get('reason', 'Аварійне закриття (API)'))
+        return jsonify({"success": not result['failed'], **result})
+    except Exception as e:
+        logging.error(f"Close-all API error: {e}")
+        return jsonify({"success": False, "detail": str(e)}), 500
+
 @app.route('/ping')
 def ping():
     """Ultra-fast ping endpoint for load balancer health checks"""
@@ -0,0 +1,161 @@
+"""
+💾 Кеш метаданих futures ринків XT.com
+Зберігає на диску компактні метадані (contractSize, precision, limits, leverage)
+щоб бот стартував без двох повних load_markets і оновлював їх у фоні.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from config import (
+    MARKET_CACHE_FILE, MARKET_CACHE_VERSION, MARKET_CACHE_MAX_AGE_SEC,
+    MARKET_CACHE_REFRESH_SEC, MARKET_CACHE_MISS_REFRESH_SEC
+)
+
+# Поля ринку CCXT які потрібні для торгівлі (market(), amount_to_precision, set_leverage)
+MARKET_FIELDS = (
+    'id', 'symbol', 'base', 'quote', 'settle', 'baseId', 'quoteId', 'settleId',
+    'type', 'spot', 'margin', 'swap', 'future', 'option', 'contract',
+    'linear', 'inverse', 'active', 'contractSize', 'expiry', 'expiryDatetime',
+    'taker', 'maker', 'precision', 'limits'
+)
+
+_cache_lock = threading.Lock()
+_refresh_event = threading.Event()
+_refresh_thread = None
+_refresh_stop_event = threading.Event()
+_last_refresh_time = 0.0
+_last_miss_request_time = 0.0
+_update_callbacks: List[Callable[[Dict], None]] = []
+
+
+def compact_market(meta: Dict) -> Dict:
+    """Залишає тільки потрібні поля ринку (без сирого 'info')"""
+    return {key: meta.get(key) for key in MARKET_FIELDS if key in meta}
+
+
+def load_cached_markets() -> Optional[Dict]:
+    """📂 Читає кеш ринків з диску. Повертає {'markets', 'saved_at'} або None"""
+    try:
+        if not os.path.exists(MARKET_CACHE_FILE):
+            logging.info(f"📁 {MARKET_CACHE_FILE} не знайдено, потрібне завантаження з біржі")
+            return None
+
+        with _cache_lock:
+            with open(MARKET_CACHE_FILE, 'r') as f:
+                cache_data = json.load(f)
+
+        if cache_data.get('version') != MARKET_CACHE_VERSION:
+            logging.warning(f"⚠️ Кеш ринків версії {cache_data.get('version')} != {MARKET_CACHE_VERSION}, ігноруємо")
+            return None
+
+        markets = cache_data.get('markets') or {}
+        if not markets:
+            return None
+
+        return {'markets': markets, 'saved_at': float(cache_data.get('saved_at', 0))}
+    except Exception as e:
+        logging.error(f"❌ Помилка читання кешу ринків: {e}")
+        return None
+
+
+def save_markets_cache(markets: Dict) -> bool:
+    """💾 Атомарно зберігає компактні метадані ринків на диск"""
+    try:
+        save_data = {
+            'markets': {symbol: compact_market(meta) for symbol, meta in markets.items()},
+            'saved_at': time.time(),
+            'version': MARKET_CACHE_VERSION
+        }
+        tmp_file = f"{MARKET_CACHE_FILE}.tmp"
+        with _cache_lock:
+            with open(tmp_file, 'w') as f:
+                json.dump(save_data, f, separators=(',', ':'))
+            os.replace(tmp_file, MARKET_CACHE_FILE)
+
+        logging.info(f"💾 Збережено {len(markets)} ринків в {MARKET_CACHE_FILE}")
+        return True
+    except Exception as e:
+        logging.error(f"❌ Помилка збереження кешу ринків: {e}")
+        return False
+
+
+def is_cache_stale(saved_at: float) -> bool:
+    """Чи кеш старший за MARKET_CACHE_MAX_AGE_SEC"""
+    return (time.time() - saved_at) > MARKET_CACHE_MAX_AGE_SEC
+
+
+def add_update_callback(callback: Callable[[Dict], None]):
+    """Реєструє функцію яка отримує нові ринки після кожного фонового оновлення"""
+    if callback not in _update_callbacks:
+        _update_callbacks.append(callback)
+
+
+def request_refresh(symbol: str = None):
+    """🔄 Позапланове оновлення (наприклад символ відсутній у кеші) з захистом від спаму"""
+    global _last_miss_request_time
+    now = time.time()
+    if now - _last_miss_request_time < MARKET_CACHE_MISS_REFRESH_SEC:
+        return
+    _last_miss_request_time = now
+    if symbol:
+        logging.info(f"🔄 {symbol} відсутній у кеші ринків - плануємо оновлення")
+    _refresh_event.set()
+
+
+def _refresh_once():
+    """Завантажує ринки з біржі, оновлює кеш і повідомляє підписників"""
+    global _last_refresh_time
+    from xt_client import create_xt, load_xt_futures_markets
+
+    refresh_client = create_xt(account_name="Market Refresh")
+    futures_markets = load_xt_futures_markets(refresh_client, use_cache=False)
+    _last_refresh_time = time.time()
+
+    for callback in list(_update_callbacks):
+        try:
+            callback(futures_markets)
+        except Exception as e:
+            logging.error(f"❌ Помилка callback оновлення ринків: {e}")
+
+
+def _refresh_loop():
+    """Фоновий цикл: планове оновлення кожні MARKET_CACHE_REFRESH_SEC або по запиту"""
+    while not _refresh_stop_event.is_set():
+        wait_sec = max(0.0, MARKET_CACHE_REFRESH_SEC - (time.time() - _last_refresh_time))
+        _refresh_event.wait(timeout=wait_sec)
+        _refresh_event.clear()
+        if _refresh_stop_event.is_set():
+            break
+        try:
+            _refresh_once()
+        except Exception as e:
+            logging.error(f"❌ Фонове оновлення ринків XT не вдалося: {e}")
+            _refresh_stop_event.wait(30)
+
+
+def start_background_refresh(saved_at: float = 0.0):
+    """🚀 Запускає фоновий потік оновлення ринків (один на процес)"""
+    global _refresh_thread, _last_refresh_time
+    if _refresh_thread and _refresh_thread.is_alive():
+        return _refresh_thread
+
+    _last_refresh_time = saved_at
+    if is_cache_stale(saved_at):
+        _refresh_event.set()  # Кеш застарів або відсутній - оновлюємо одразу
+
+    _refresh_stop_event.clear()
+    _refresh_thread = threading.Thread(target=_refresh_loop, name="market-cache-refresh", daemon=True)
+    _refresh_thread.start()
+    logging.info(f"🔄 Фонове оновлення ринків XT запущено (кожні {MARKET_CACHE_REFRESH_SEC}с)")
+    return _refresh_thread
+
+
+def stop_background_refresh():
+    """Зупиняє фоновий потік оновлення"""
+    _refresh_stop_event.set()
+    _refresh_event.set()
@@ -0,0 +1,322 @@
+"""
+⏱️ Метрики торгового конвеєра: гістограми латентності та лічильники
+Етапи symbol_worker, виклики провайдерів (XT, DexScreener, CoinGecko, Telegram), очікування локів.
+Експорт у форматі Prometheus (GET /metrics у main.py) та компактний підсумок для /status у Telegram.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Межі бакетів (секунди): від швидких локальних операцій до повільних HTTP з ретраями
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+LOCK_WAIT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple, extra: str = '') -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return f"{value:.10g}"
+
+
+class Histogram:
+    """Гістограма з фіксованими бакетами (кумулятивні лічильники як у Prometheus)"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets) + (float('inf'),)
+        self.lock = threading.Lock()
+        self.series: Dict[Tuple, List] = {}  # labels -> [лічильники бакетів, сума, кількість]
+
+    def observe(self, value: float, *labels):
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = [[0] * len(self.buckets), 0.0, 0]
+                self.series[labels] = series
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def count(self, *labels) -> int:
+        with self.lock:
+            series = self.series.get(labels)
+            return series[2] if series else 0
+
+    def quantile(self, q: float, *labels) -> Optional[float]:
+        """Оцінка квантиля лінійною інтерполяцією в бакеті (як histogram_quantile)"""
+        with self.lock:
+            series = self.series.get(labels)
+            if not series or not series[2]:
+                return None
+            counts, total = list(series[0]), series[2]
+        target = q * total
+        cumulative = 0
+        lower = 0.0
+        for bound, count in zip(self.buckets, counts):
+            if cumulative + count >= target and count:
+                if bound == float('inf'):
+                    return lower
+                return lower + (bound - lower) * (target - cumulative) / count
+            cumulative += count
+            lower = bound if bound != float('inf') else lower
+        return lower
+
+    def label_sets(self) -> List[Tuple]:
+        with self.lock:
+            return list(self.series)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            snapshot = [(labels, list(s[0]), s[1], s[2]) for labels, s in sorted(self.series.items())]
+        for labels, counts, total_sum, total_count in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                label_str = _format_labels(self.labelnames, labels, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{label_str} {cumulative}")
+            label_str = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_str} {_format_value(total_sum)}")
+            lines.append(f"{self.name}_count{label_str} {total_count}")
+        return lines
+
+
+class Counter:
+    """Монотонний лічильник з мітками"""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+        self.values: Dict[Tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1.0):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def get(self, *labels) -> float:
+        with self.lock:
+            return self.values.get(labels, 0.0)
+
+    def items(self) -> List[Tuple[Tuple, float]]:
+        with self.lock:
+            return list(self.values.items())
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Gauge:
+    """Значення яке читається функцією в момент експорту (з мітками fn повертає {мітки: значення})"""
+
+    kind = 'gauge'
+
+    def __init__(self, name: str, help: str, fn: Callable, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.fn = fn
+        self.labelnames = tuple(labelnames)
+
+    def render(self) -> List[str]:
+        try:
+            if self.labelnames:
+                values = sorted((tuple(labels), float(value)) for labels, value in self.fn().items())
+            else:
+                values = [((), float(self.fn()))]
+        except Exception:
+            return []
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        for labels, value in values:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    """Реєстр метрик процесу"""
+
+    def __init__(self):
+        self.metrics: Dict[str, object] = {}
+        self.lock = threading.Lock()
+        self.started_at = time.time()
+
+    def _register(self, metric):
+        with self.lock:
+            return self.metrics.setdefault(metric.name, metric)
+
+    def histogram(self, name: str, help: str, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def counter(self, name: str, help: str, labelnames=()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, fn: Callable, labelnames=()) -> Gauge:
+        return self._register(Gauge(name, help, fn, labelnames))
+
+    def render(self) -> str:
+        """Prometheus text exposition format 0.0.4"""
+        with self.lock:
+            registered = list(self.metrics.values())
+        lines = []
+        for metric in registered:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+# Глобальний реєстр
+metrics = MetricsRegistry()
+
+STAGE_SECONDS = metrics.histogram(
+    'arb_pipeline_stage_seconds', 'Тривалість етапів symbol_worker', ('stage',))
+SYMBOLS_SCANNED = metrics.counter(
+    'arb_symbols_scanned_total', 'Оброблені символи (останній пройдений етап)', ('last_stage',))
+PROVIDER_SECONDS = metrics.histogram(
+    'arb_provider_request_seconds', 'Тривалість викликів зовнішніх провайдерів', ('provider', 'operation'))
+PROVIDER_REQUESTS = metrics.counter(
+    'arb_provider_requests_total', 'Виклики провайдерів за результатом', ('provider', 'operation', 'outcome'))
+LOCK_WAIT_SECONDS = metrics.histogram(
+    'arb_lock_wait_seconds', 'Очікування захоплення локу', ('lock',), LOCK_WAIT_BUCKETS)
+metrics.gauge('arb_process_uptime_seconds', 'Час роботи процесу', lambda: time.time() - metrics.started_at)
+metrics.gauge('arb_threads', 'Кількість активних потоків', threading.active_count)
+
+# Порядок етапів у /status
+PIPELINE_STAGES = ('xt_price', 'dex_resolve', 'analytics', 'balance_check', 'filters',
+                   'verification', 'notification', 'order_placement', 'symbol_total')
+
+
+@contextmanager
+def stage(name: str):
+    """Вимірює блок як етап конвеєра"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - started, name)
+
+
+class _ProviderCall:
+    """Результат виклику провайдера: outcome можна уточнити всередині блоку (http_429 тощо)"""
+
+    __slots__ = ('outcome',)
+
+    def __init__(self):
+        self.outcome = 'ok'
+
+
+@contextmanager
+def provider_call(provider: str, operation: str):
+    """Вимірює виклик провайдера; виняток рахується як outcome=error"""
+    call = _ProviderCall()
+    started = time.perf_counter()
+    try:
+        yield call
+    except Exception:
+        call.outcome = 'error'
+        raise
+    finally:
+        PROVIDER_SECONDS.observe(time.perf_counter() - started, provider, operation)
+        PROVIDER_REQUESTS.inc(provider, operation, call.outcome)
+
+
+@contextmanager
+def timed_lock(lock, name: str):
+    """with timed_lock(balance_check_lock, 'balance_check'): - як with lock, плюс час очікування"""
+    started = time.perf_counter()
+    lock.acquire()
+    LOCK_WAIT_SECONDS.observe(time.perf_counter() - started, name)
+    try:
+        yield
+    finally:
+        lock.release()
+
+
+class PipelineTimer:
+    """Послідовні позначки етапів: mark(stage) записує час від попередньої позначки"""
+
+    __slots__ = ('started', 'last', 'last_stage')
+
+    def __init__(self):
+        self.started = self.last = time.perf_counter()
+        self.last_stage = 'start'
+
+    def mark(self, stage_name: str):
+        now = time.perf_counter()
+        STAGE_SECONDS.observe(now - self.last, stage_name)
+        self.last = now
+        self.last_stage = stage_name
+
+    def finish(self):
+        STAGE_SECONDS.observe(time.perf_counter() - self.started, 'symbol_total')
+        SYMBOLS_SCANNED.inc(self.last_stage)
+
+
+def _ms(value: Optional[float]) -> str:
+    if value is None:
+        return '-'
+    return f"{value * 1000:.0f}" if value >= 0.001 else f"{value * 1000:.2f}"
+
+
+def format_status_summary() -> str:
+    """Компактний підсумок для /status (p50/p99 в мс)"""
+    lines = []
+    for name in PIPELINE_STAGES:
+        count = STAGE_SECONDS.count(name)
+        if count:
+            if not lines:
+                lines.append("⏱️ *Латентність етапів* (p50/p99 мс, n):")
+            lines.append(f"• `{name}`: {_ms(STAGE_SECONDS.quantile(0.5, name))}/{_ms(STAGE_SECONDS.quantile(0.99, name))} ({count})")
+
+    provider_lines = []
+    for provider, operation in sorted(PROVIDER_SECONDS.label_sets()):
+        count = PROVIDER_SECONDS.count(provider, operation)
+        failed = sum(v for labels, v in PROVIDER_REQUESTS.items()
+                     if labels[:2] == (provider, operation) and labels[2] != 'ok')
+        provider_lines.append(
+            f"• `{provider}.{operation}`: {_ms(PROVIDER_SECONDS.quantile(0.5, provider, operation))}/"
+            f"{_ms(PROVIDER_SECONDS.quantile(0.99, provider, operation))} ({count}, помилок {failed / count * 100:.0f}%)")
+    if provider_lines:
+        lines.append("🌐 *Провайдери:*")
+        lines.extend(provider_lines)
+
+    lock_lines = [f"• `{labels[0]}`: p99 {_ms(LOCK_WAIT_SECONDS.quantile(0.99, *labels))}мс"
+                  for labels in sorted(LOCK_WAIT_SECONDS.label_sets())]
+    if lock_lines:
+        lines.append("🔒 *Очікування локів:*")
+        lines.extend(lock_lines)
+
+    # Вік можливостей на кожному кроці (реєструється в opportunity_trace)
+    age_histogram = metrics.metrics.get('arb_opportunity_age_seconds')
+    if age_histogram is not None and age_histogram.label_sets():
+        lines.append("🧭 *Вік можливостей* (p50/p99 мс від спостереження):")
+        for labels in sorted(age_histogram.label_sets()):
+            lines.append(f"• `{labels[0]}`: {_ms(age_histogram.quantile(0.5, *labels))}/"
+                         f"{_ms(age_histogram.quantile(0.99, *labels))} ({age_histogram.count(*labels)})")
+
+    if not lines:
+        return "⏱️ Метрики ще не зібрано"
+    return '\n'.join(lines)
@@ -0,0 +1,187 @@
+"""
+🧱 Моделі стану бота з __slots__: позиція, можливість, спостереження ринку, DEX котировка
+Аліаси ключів біржі та старих форматів (entryPrice/entry_price, markPrice/currentPrice/current_price)
+нормалізуються один раз - при створенні моделі (from_dict) на межі з біржею, файлом або стором;
+монітор і сканер читають атрибути без ланцюжків .get() or .get().
+Серіалізація: pack() - список значень у порядку полів (спільний стор, без імен ключів у кожному записі),
+to_dict() - тільки заповнені поля (positions.json).
+"""
+
+from dataclasses import dataclass, fields, replace
+from typing import Any, Dict, List, Optional
+
+# Ключі позицій біржі / старих версій -> поле Position
+POSITION_ALIASES = {
+    'entryPrice': 'avg_entry',
+    'entry_price': 'avg_entry',
+    'markPrice': 'mark_price',
+    'currentPrice': 'mark_price',
+    'current_price': 'mark_price',
+}
+
+_SIDES = {'BUY': 'LONG', 'SELL': 'SHORT'}
+
+
+def _packer(cls, skip=()):
+    names = tuple(f.name for f in fields(cls) if f.name not in skip)
+    cls._PACKED = names
+    return cls
+
+
+@dataclass(slots=True)
+class Position:
+    """
+    Агрегована позиція символу (active_positions). Доступ і як до атрибутів, і як до dict
+    (position['side'], .get(), 'opened_at' in position) - None означає "ключа немає"
+    """
+    symbol: str = ''
+    side: str = 'LONG'
+    avg_entry: float = 0.0
+    size_usdt: float = 0.0
+    adds_done: int = 0
+    last_add_price: Optional[float] = None
+    tp_price: Optional[float] = None
+    last_add_time: float = 0.0
+    opened_at: Optional[float] = None
+    expires_at: Optional[float] = None
+    entry_time: Optional[float] = None
+    mark_price: Optional[float] = None
+    leverage: Optional[float] = None
+    exchange: str = 'xt'
+    arb_pair: Optional[str] = None
+    entry_spread_pct: Optional[float] = None
+    entry_ref_price: Optional[float] = None
+    status: str = 'open'
+    xt_pair_url: Optional[str] = None
+    accounts: Optional[List[int]] = None
+    trace_id: Optional[str] = None
+    detection_to_order_ms: Optional[float] = None
+    synced_from_exchange: bool = False
+    extra: Optional[Dict] = None  # Ключі поза моделлю - зберігаються як є
+
+    @classmethod
+    def from_dict(cls, data: Dict, symbol: str = None) -> 'Position':
+        """Єдина нормалізація: аліаси цін, сторона BUY/SELL -> LONG/SHORT, числа з рядків біржі"""
+        position = cls(symbol=symbol or data.get('symbol') or '')
+        for key, value in data.items():
+            if value is not None and key != 'symbol':
+                position[key] = value
+        side = str(position.side).upper()
+        position.side = _SIDES.get(side, side)
+        position.avg_entry = float(position.avg_entry or 0)
+        position.size_usdt = float(position.size_usdt or 0)
+        if position.mark_price is not None:
+            position.mark_price = float(position.mark_price)
+        return position
+
+    def _name(self, key: str) -> str:
+        return POSITION_ALIASES.get(key, key)
+
+    def __getitem__(self, key: str):
+        name = self._name(key)
+        if name in self.__dataclass_fields__:
+            value = getattr(self, name)
+        else:
+            value = (self.extra or {}).get(name)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value):
+        name = self._name(key)
+        if name in self.__dataclass_fields__ and name != 'extra':
+            setattr(self, name, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[name] = value
+
+    def __contains__(self, key: str) -> bool:
+        try:
+            self[key]
+            return True
+        except KeyError:
+            return False
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def update(self, values: Dict):
+        for key, value in values.items():
+            self[key] = value
+
+    def copy(self) -> 'Position':
+        return replace(self, accounts=list(self.accounts) if self.accounts is not None else None,
+                       extra=dict(self.extra) if self.extra is not None else None)
+
+    def to_dict(self) -> Dict:
+        data = {name: getattr(self, name) for name in self._PACKED if getattr(self, name) is not None}
+        data.update(self.extra or {})
+        return data
+
+    def pack(self) -> List:
+        return [getattr(self, name) for name in self._PACKED] + [self.extra]
+
+    @classmethod
+    def unpack(cls, row: List) -> 'Position':
+        return cls(*row)
+
+
+_packer(Position, skip=('extra',))
+
+
+@dataclass(slots=True)
+class Opportunity:
+    """Кандидат best_opportunities: тільки поля рейтингу і сигналу (без повних token_info/advanced_metrics)"""
+    symbol: str
+    side: str
+    spread: float
+    score: float
+    timestamp: float
+    xt_price: float
+    dex_price: float
+    liquidity: float = 0.0
+    volume_24h: float = 0.0
+    dex_depth: float = 0.0
+    dex_fee: float = 0.0
+    executable_spread: float = 0.0
+    dex_impact_pct: float = 0.0
+    node: Optional[str] = None  # 🌐 Вузол кластера що знайшов можливість
+    trace: Any = None  # 🧭 OpportunityTrace - лише в процесі, не серіалізується
+
+    def pack(self) -> List:
+        return [getattr(self, name) for name in self._PACKED]
+
+    @classmethod
+    def unpack(cls, row: List) -> 'Opportunity':
+        return cls(*row)
+
+
+_packer(Opportunity, skip=('trace',))
+
+
+@dataclass(slots=True)
+class MarketQuote:
+    """Етапи 1-2 symbol_worker (scan_shards.observe_symbol): ціна XT і DEX метрики; dex_price None - пари немає"""
+    symbol: str
+    xt_price: float
+    observed_at: float  # wall-clock - однаковий у процесах шардів і координатора
+    dex_price: Optional[float] = None
+    token_info: Optional[Dict] = None
+    advanced_metrics: Optional[Dict] = None
+
+
+@dataclass(slots=True)
+class DexQuote:
+    """Консолідована котировка пулів DexScreener (dex_quote.consolidate_quote)"""
+    price_usd: float
+    pools: int
+    rejected_outliers: int
+    total_liquidity_usd: float
+    dispersion_pct: float
+    primary: Dict  # Найглибший пул
+    best_bid: Dict  # Найдорожчий пул (продаж токена)
+    best_ask: Dict  # Найдешевший пул (купівля токена)
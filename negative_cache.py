@@ -0,0 +1,123 @@
+"""
+🚫 Негативний кеш DEX: символи XT без DEX пари (CEX-only великі монети, індекси, перейменовані тикери)
+Після невдалого resolve_best_pair символ не перевіряється до next_check_at; інтервал подвоюється
+з кожною повторною невдачею (DEX_NEGATIVE_BASE_SEC -> DEX_NEGATIVE_MAX_SEC). Стан зберігається
+на диск, тож після перезапуску бот не проходить увесь ланцюжок провайдерів знову.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List
+
+from config import DEX_NEGATIVE_CACHE_FILE, DEX_NEGATIVE_BASE_SEC, DEX_NEGATIVE_MAX_SEC, DEX_NEGATIVE_SAVE_INTERVAL_SEC
+from metrics import metrics
+
+NEGATIVE_SKIPS = metrics.counter(
+    'arb_dex_negative_skips_total', 'resolve_best_pair пропущено через негативний кеш')
+
+
+class NegativeCache:
+    """symbol -> {'failures', 'first_failed_at', 'last_checked_at', 'next_check_at', 'reason'} (wall-clock)"""
+
+    def __init__(self, path: str = DEX_NEGATIVE_CACHE_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries: Dict[str, Dict] = {}
+        self.dirty = False
+        self.last_saved_at = 0.0
+        self.persist = True  # False у процесах шардів сканування - файл пише тільки координатор
+        self.load()
+
+    def load(self):
+        try:
+            if not os.path.exists(self.path):
+                return
+            with open(self.path, 'r') as f:
+                self.entries = json.load(f).get('symbols', {})
+            logging.info(f"🚫 Негативний кеш DEX: {len(self.entries)} символів з {self.path}")
+        except Exception as e:
+            logging.error(f"❌ Помилка читання негативного кешу DEX: {e}")
+            self.entries = {}
+
+    def save(self, force: bool = False):
+        """Атомарний запис; без force - не частіше DEX_NEGATIVE_SAVE_INTERVAL_SEC"""
+        if not self.persist:
+            return
+        with self.lock:
+            if not self.dirty or (not force and time.time() - self.last_saved_at < DEX_NEGATIVE_SAVE_INTERVAL_SEC):
+                return
+            snapshot = {'symbols': dict(self.entries), 'saved_at': time.time()}
+            self.dirty = False
+            self.last_saved_at = time.time()
+        try:
+            tmp_file = f"{self.path}.tmp"
+            with open(tmp_file, 'w') as f:
+                json.dump(snapshot, f, separators=(',', ':'))
+            os.replace(tmp_file, self.path)
+        except Exception as e:
+            logging.error(f"❌ Помилка збереження негативного кешу DEX: {e}")
+
+    def is_suppressed(self, symbol: str, now: float = None) -> bool:
+        """Символ ще в паузі після невдалого пошуку DEX пари"""
+        entry = self.entries.get(symbol)
+        return entry is not None and (now or time.time()) < entry['next_check_at']
+
+    def should_skip(self, symbol: str) -> bool:
+        """Для resolve_best_pair: пропустити ланцюжок провайдерів (рахується в метриці)"""
+        if self.is_suppressed(symbol):
+            NEGATIVE_SKIPS.inc()
+            return True
+        return False
+
+    def record_miss(self, symbol: str, reason: str = ''):
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(symbol) or {'failures': 0, 'first_failed_at': now}
+            entry['failures'] += 1
+            interval = min(DEX_NEGATIVE_BASE_SEC * 2 ** (entry['failures'] - 1), DEX_NEGATIVE_MAX_SEC)
+            entry['last_checked_at'] = now
+            entry['next_check_at'] = now + interval
+            entry['reason'] = reason
+            self.entries[symbol] = entry
+            self.dirty = True
+        logging.info(f"🚫 {symbol}: немає DEX пари ({entry['failures']}-й раз), повторна перевірка через {interval / 60:.0f} хв")
+        self.save()
+
+    def record_hit(self, symbol: str):
+        """Символ знову знайдено на DEX - повертаємо в нормальний режим"""
+        if symbol not in self.entries:
+            return
+        with self.lock:
+            entry = self.entries.pop(symbol, None)
+            self.dirty = True
+        if entry:
+            logging.info(f"✅ {symbol}: DEX пару знайдено після {entry['failures']} невдалих перевірок")
+        self.save()
+
+    def merge(self, symbol: str, entry: Dict):
+        """Запис з процесу шарда сканування (новіша перевірка перемагає)"""
+        with self.lock:
+            current = self.entries.get(symbol)
+            if current is not None and current.get('last_checked_at', 0) >= entry.get('last_checked_at', 0):
+                return
+            self.entries[symbol] = dict(entry)
+            self.dirty = True
+        self.save()
+
+    def suppressed_symbols(self) -> List[str]:
+        now = time.time()
+        with self.lock:
+            return [symbol for symbol, entry in self.entries.items() if now < entry['next_check_at']]
+
+    def stats(self) -> Dict:
+        suppressed = self.suppressed_symbols()
+        return {'tracked': len(self.entries), 'suppressed': len(suppressed), 'skips': int(NEGATIVE_SKIPS.get())}
+
+
+negative_cache = NegativeCache()
+
+metrics.gauge('arb_dex_negative_suppressed', 'Символи в паузі негативного кешу DEX',
+              lambda: len(negative_cache.suppressed_symbols()))
@@ -0,0 +1,135 @@
+"""
+🧭 Трасування арбітражних можливостей: trace ID та монотонні позначки кожного кроку
+Спред спостерігається в symbol_worker, далі best_opportunities -> send_best_opportunity_signal ->
+verify_arbitrage_signal -> розміщення ордера. Кожен крок фіксується з time.perf_counter(),
+затримки кроків йдуть у metrics, завершені трейси - у JSON-lines журнал.
+"""
+
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from config import OPPORTUNITY_MAX_AGE_SEC, OPPORTUNITY_JOURNAL_FILE, OPPORTUNITY_JOURNAL_ENABLED
+from metrics import metrics
+
+HOP_SECONDS = metrics.histogram(
+    'arb_opportunity_hop_seconds', 'Затримка між сусідніми кроками трейсу можливості', ('hop',))
+AGE_SECONDS = metrics.histogram(
+    'arb_opportunity_age_seconds', 'Вік можливості (від спостереження спреду) на кожному кроці', ('hop',))
+OPPORTUNITIES_TOTAL = metrics.counter(
+    'arb_opportunities_total', 'Завершені трейси можливостей за результатом', ('outcome',))
+
+_journal_lock = threading.Lock()
+_recent: deque = deque(maxlen=200)  # Останні завершені трейси (для /status та API)
+
+
+class OpportunityTrace:
+    """
+    Трейс однієї можливості. Перша позначка 'observed' - момент отримання XT ціни,
+    тобто вік рахується від реального спостереження спреду, а не від його обробки.
+    """
+
+    __slots__ = ('trace_id', 'symbol', 'hops', 'priced_mono', 'observed_at', 'outcome', 'details')
+
+    def __init__(self, symbol: str, observed_mono: float = None, trace_id: str = None):
+        self.trace_id = trace_id or uuid.uuid4().hex[:12]
+        self.symbol = symbol
+        started = observed_mono if observed_mono is not None else time.perf_counter()
+        self.hops: List[Tuple[str, float]] = [('observed', started)]
+        self.priced_mono = started  # Момент останнього отримання цін (оновлюється repriced)
+        self.observed_at = time.time() - (time.perf_counter() - started)  # Wall-clock для журналу
+        self.outcome: Optional[str] = None
+        self.details: Dict = {}
+
+    def hop(self, name: str) -> float:
+        """Фіксує крок і повертає вік можливості (сек)"""
+        now = time.perf_counter()
+        HOP_SECONDS.observe(now - self.hops[-1][1], name)
+        age = now - self.hops[0][1]
+        AGE_SECONDS.observe(age, name)
+        self.hops.append((name, now))
+        return age
+
+    def repriced(self) -> float:
+        """Ціни перечитано: вік для перевірки свіжості рахується заново"""
+        age = self.hop('repriced')
+        self.priced_mono = self.hops[-1][1]
+        return age
+
+    def has_hop(self, name: str) -> bool:
+        return any(hop == name for hop, _ in self.hops)
+
+    def fork(self) -> 'OpportunityTrace':
+        """Копія з тим самим trace_id для паралельної гілки (send_best_opportunity_signal)"""
+        copy = OpportunityTrace(self.symbol, self.hops[0][1], self.trace_id)
+        copy.hops = list(self.hops)
+        copy.priced_mono = self.priced_mono
+        return copy
+
+    def age(self) -> float:
+        """Секунди від спостереження спреду (втрачений час конвеєра)"""
+        return time.perf_counter() - self.hops[0][1]
+
+    def price_age(self) -> float:
+        """Секунди від останнього отримання цін"""
+        return time.perf_counter() - self.priced_mono
+
+    def is_stale(self, max_age_sec: float = OPPORTUNITY_MAX_AGE_SEC) -> bool:
+        return max_age_sec > 0 and self.price_age() > max_age_sec
+
+    def hop_offsets_ms(self) -> Dict[str, float]:
+        """{крок: мс від спостереження} (повторний крок отримує суфікс #2)"""
+        started = self.hops[0][1]
+        offsets = {}
+        for name, mono in self.hops:
+            key = name
+            n = 2
+            while key in offsets:
+                key = f"{name}#{n}"
+                n += 1
+            offsets[key] = round((mono - started) * 1000, 2)
+        return offsets
+
+    def finish(self, outcome: str, **details):
+        """Завершує трейс (ordered / notified / dropped_stale / rejected ...) і пише в журнал"""
+        if self.outcome is not None:
+            return
+        self.outcome = outcome
+        self.details.update(details)
+        age = self.hop(outcome)
+        OPPORTUNITIES_TOTAL.inc(outcome)
+        record = self.to_dict()
+        _recent.append(record)
+        logging.info(f"🧭 [{self.symbol}] trace={self.trace_id} {outcome} через {age * 1000:.0f}мс")
+        if OPPORTUNITY_JOURNAL_ENABLED:
+            _append_journal(record)
+
+    def to_dict(self) -> Dict:
+        return {
+            'trace_id': self.trace_id,
+            'symbol': self.symbol,
+            'observed_at': self.observed_at,
+            'outcome': self.outcome,
+            'age_ms': round(self.age() * 1000, 2),
+            'hops_ms': self.hop_offsets_ms(),
+            **self.details
+        }
+
+
+def _append_journal(record: Dict):
+    try:
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with _journal_lock:
+            with open(OPPORTUNITY_JOURNAL_FILE, 'a') as f:
+                f.write(line + '\n')
+    except Exception as e:
+        logging.error(f"❌ Помилка запису журналу трейсів: {e}")
+
+
+def recent_traces(limit: int = 20) -> List[Dict]:
+    """Останні завершені трейси (новіші першими)"""
+    return list(_recent)[-limit:][::-1]
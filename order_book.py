@@ -0,0 +1,225 @@
+"""
+📖 Аналітика стакану XT: один запит стакану на символ за тік, NumPy масиви, векторні розрахунки
+Стакан перетворюється в масиви цін/розмірів один раз; кумулятивна глибина в USD, VWAP ціна
+виконання і прослизання для довільних сум ордерів, концентрація топ-N рівнів та розриви між
+рівнями рахуються без Python циклів. can_execute_on_orderbook, analyze_xt_order_book_liquidity,
+collect_market_depth_data (і signal_verification через неї) беруть результат з одного знімка.
+Розміри рівнів XT futures - в контрактах, тож USD = ціна * контракти * contractSize.
+"""
+
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+from config import ORDER_BOOK_TTL_SEC, ORDER_BOOK_FETCH_DEPTH
+from deadline import check_deadline
+from metrics import metrics, provider_call
+import execution_engine
+
+BOOK_REQUESTS = metrics.counter(
+    'arb_order_book_requests_total', 'Запити аналітики стакану: fetch з біржі або знімок тіку з кешу', ('result',))
+
+# Сторона стакану, яку "з'їдає" ринковий ордер
+TAKER_SIDES = {'LONG': 'asks', 'BUY': 'asks', 'SHORT': 'bids', 'SELL': 'bids'}
+
+
+class BookSide:
+    """Одна сторона стакану: масиви від найкращого рівня, кумулятивні суми"""
+
+    __slots__ = ('name', 'prices', 'sizes', 'notional', 'cum_notional', 'cum_base')
+
+    def __init__(self, name: str, levels: Sequence, contract_size: float):
+        import numpy as np
+        if isinstance(levels, np.ndarray):
+            rows = levels
+        else:
+            rows = np.array([level[:2] for level in levels], dtype=np.float64).reshape(-1, 2)
+        self.name = name
+        self.prices = rows[:, 0]
+        self.sizes = rows[:, 1]  # Контракти
+        base = self.sizes * contract_size
+        self.notional = self.prices * base
+        self.cum_notional = np.cumsum(self.notional)
+        self.cum_base = np.cumsum(base)
+
+    def __len__(self):
+        return len(self.prices)
+
+    @property
+    def best(self) -> Optional[float]:
+        return float(self.prices[0]) if len(self.prices) else None
+
+    def liquidity_usd(self, levels: int = None) -> float:
+        """Сумарна ліквідність перших levels рівнів (усіх якщо None)"""
+        count = len(self.prices) if levels is None else min(levels, len(self.prices))
+        return float(self.cum_notional[count - 1]) if count > 0 else 0.0
+
+    def fills(self, usd_amounts) -> Dict:
+        """
+        VWAP виконання для масиву сум (USD notional) одним проходом:
+        {'vwap', 'slippage_pct', 'worst_price', 'levels_used', 'filled_usd', 'complete'} - масиви тієї ж форми
+        """
+        import numpy as np
+        amounts = np.asarray(usd_amounts, dtype=np.float64)
+        n = len(self.prices)
+        if n == 0:
+            nan = np.full(amounts.shape, np.nan)
+            return {'vwap': nan, 'slippage_pct': nan, 'worst_price': nan, 'levels_used': np.zeros(amounts.shape, dtype=int),
+                    'filled_usd': np.zeros(amounts.shape), 'complete': np.zeros(amounts.shape, dtype=bool)}
+        complete = amounts <= self.cum_notional[-1]
+        filled_usd = np.minimum(amounts, self.cum_notional[-1])
+        # Рівень на якому сума вичерпується; частина цього рівня добирається за його ціною
+        idx = np.minimum(np.searchsorted(self.cum_notional, filled_usd, side='left'), n - 1)
+        prev_notional = np.where(idx > 0, self.cum_notional[idx - 1], 0.0)
+        prev_base = np.where(idx > 0, self.cum_base[idx - 1], 0.0)
+        base = prev_base + (filled_usd - prev_notional) / self.prices[idx]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            vwap = np.where(base > 0, filled_usd / base, self.prices[0])
+        direction = 1.0 if self.name == 'asks' else -1.0  # Купівля дорожчає вгору, продаж - вниз
+        return {
+            'vwap': vwap,
+            'slippage_pct': (vwap - self.prices[0]) / self.prices[0] * 100 * direction,
+            'worst_price': self.prices[idx],
+            'levels_used': idx + 1,
+            'filled_usd': filled_usd,
+            'complete': complete
+        }
+
+    def fill(self, usd_amount: float) -> Dict:
+        """fills() для однієї суми - звичайні float/int/bool"""
+        result = self.fills([usd_amount])
+        return {key: value[0].item() for key, value in result.items()}
+
+    def concentration_pct(self, top_n: int = 3) -> float:
+        total = self.liquidity_usd()
+        return self.liquidity_usd(top_n) / total * 100 if total > 0 else 0.0
+
+    def level_gaps_pct(self):
+        """Відстань між сусідніми рівнями у % від ціни попереднього рівня (завжди >= 0)"""
+        import numpy as np
+        return np.abs(np.diff(self.prices)) / self.prices[:-1] * 100
+
+    def depth_analysis(self, top_n: int = 3) -> Dict:
+        """Розподіл ліквідності по рівнях (формат collect_market_depth_data)"""
+        if len(self.prices) < 3:
+            return {"quality": "poor", "reason": "Недостатньо рівнів"}
+        concentration_pct = self.concentration_pct(top_n)
+        if concentration_pct > 80:
+            quality = "concentrated"  # Ліквідність сконцентрована в топ-3
+        elif concentration_pct > 60:
+            quality = "balanced"      # Збалансований розподіл
+        else:
+            quality = "distributed"   # Рівномірно розподілена
+        return {
+            "quality": quality,
+            "levels_count": len(self.prices),
+            "top3_concentration_pct": concentration_pct,
+            "avg_volume_per_level": float(self.sizes.mean()),
+            "total_liquidity": self.liquidity_usd()
+        }
+
+    def rows(self, count: int = None):
+        """Масив [[ціна, контракти], ...] перших count рівнів"""
+        import numpy as np
+        return np.column_stack((self.prices[:count], self.sizes[:count]))
+
+    def levels(self) -> List[Dict]:
+        return [{'price': price, 'volume': volume, 'total_usd': total_usd}
+                for price, volume, total_usd in zip(self.prices.tolist(), self.sizes.tolist(), self.notional.tolist())]
+
+
+class OrderBookSnapshot:
+    """Знімок стакану символу; всі перевірки глибини тіку читають його"""
+
+    __slots__ = ('symbol', 'depth', 'contract_size', 'fetched_at', 'bids', 'asks')
+
+    def __init__(self, symbol: str, book: Dict, contract_size: float = 1.0, depth: int = None):
+        bids, asks = book.get('bids'), book.get('asks')
+        bids = [] if bids is None else bids
+        asks = [] if asks is None else asks
+        self.symbol = symbol
+        self.depth = depth or max(len(bids), len(asks))
+        self.contract_size = contract_size
+        self.fetched_at = time.monotonic()
+        self.bids = BookSide('bids', bids[:self.depth], contract_size)
+        self.asks = BookSide('asks', asks[:self.depth], contract_size)
+
+    def head(self, depth: int) -> 'OrderBookSnapshot':
+        """Перші depth рівнів того ж знімка (без нового запиту)"""
+        if depth >= self.depth:
+            return self
+        snapshot = OrderBookSnapshot(self.symbol, {'bids': self.bids.rows(depth), 'asks': self.asks.rows(depth)},
+                                     self.contract_size, depth)
+        snapshot.fetched_at = self.fetched_at
+        return snapshot
+
+    def age(self) -> float:
+        return time.monotonic() - self.fetched_at
+
+    def side(self, order_side: str) -> BookSide:
+        """Сторона яку виконує ринковий ордер LONG/BUY (asks) або SHORT/SELL (bids)"""
+        return getattr(self, TAKER_SIDES[order_side.upper()])
+
+    @property
+    def mid(self) -> Optional[float]:
+        if not len(self.bids) or not len(self.asks):
+            return None
+        return (self.bids.best + self.asks.best) / 2
+
+    def bid_ask_spread_pct(self) -> Optional[float]:
+        if not len(self.bids) or not len(self.asks):
+            return None
+        return (self.asks.best - self.bids.best) / self.bids.best * 100
+
+    def level_spread_analysis(self) -> Dict:
+        """Спред bid/ask та розриви між рівнями (формат collect_market_depth_data)"""
+        analysis = {}
+        spread = self.bid_ask_spread_pct()
+        if spread is not None:
+            analysis['bid_ask_spread_pct'] = spread
+        for book_side in (self.bids, self.asks):
+            if len(book_side) >= 3:
+                gaps = book_side.level_gaps_pct()
+                analysis[f'avg_{book_side.name[:-1]}_level_spread_pct'] = float(gaps.mean())
+                analysis[f'max_{book_side.name[:-1]}_level_spread_pct'] = float(gaps.max())
+        return analysis
+
+
+_snapshots: Dict[str, OrderBookSnapshot] = {}
+_snapshots_lock = threading.Lock()
+
+
+def get_book(xt, symbol: str, depth: int = ORDER_BOOK_FETCH_DEPTH,
+             max_age_sec: float = ORDER_BOOK_TTL_SEC) -> Optional[OrderBookSnapshot]:
+    """
+    Знімок стакану не старший max_age_sec з глибиною >= depth; інакше один fetch_order_book
+    (глибина не менша ORDER_BOOK_FETCH_DEPTH - щоб наступні перевірки тіку теж взяли кеш)
+    """
+    snapshot = _snapshots.get(symbol)
+    if snapshot is not None and snapshot.age() <= max_age_sec and snapshot.depth >= depth:
+        BOOK_REQUESTS.inc('cached')
+        return snapshot
+    BOOK_REQUESTS.inc('fetched')
+    fetch_depth = max(depth, ORDER_BOOK_FETCH_DEPTH)
+    check_deadline('xt_fetch_order_book')
+    with provider_call('xt', 'fetch_order_book'):
+        book = xt.fetch_order_book(symbol, fetch_depth)
+    if not book or 'bids' not in book or 'asks' not in book:
+        return None
+    try:
+        contract_size = execution_engine.get_template(xt, symbol).contract_size
+    except Exception:
+        contract_size = 1.0
+    snapshot = OrderBookSnapshot(symbol, book, contract_size, fetch_depth)
+    with _snapshots_lock:
+        _snapshots[symbol] = snapshot
+    return snapshot
+
+
+def invalidate(symbol: str = None):
+    """Після власного ордера стакан змінився - наступна перевірка бере свіжий"""
+    with _snapshots_lock:
+        if symbol is None:
+            _snapshots.clear()
+        else:
+            _snapshots.pop(symbol, None)
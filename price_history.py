@@ -0,0 +1,222 @@
+"""
+📈 Історія цін по символах (кільцевий буфер фіксованої роздільності)
+Зберігає XT OHLC, DEX ціну, спред та об'єм у колонках array('d') з обмеженою пам'яттю.
+Живиться зі сканера та моніторингу позицій - мульти-таймфрейм аналіз без мережевих запитів.
+"""
+
+import math
+import threading
+import time
+import logging
+from array import array
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from config import (
+    PRICE_HISTORY_RESOLUTION_SEC, PRICE_HISTORY_MAX_POINTS, PRICE_HISTORY_MIN_COVERAGE_PCT
+)
+
+NAN = float('nan')
+COLUMNS = ('ts', 'open', 'high', 'low', 'close', 'dex_price', 'spread', 'volume')
+
+
+@dataclass
+class DynamicsAnalysis:
+    """Результат аналізу динаміки ціни за таймфрейм"""
+    symbol: str
+    timeframe_minutes: int
+    price_change_pct: float = 0.0
+    volatility_pct: float = 0.0
+    trend_direction: str = "neutral"
+    momentum_score: float = 0.0
+    support_resistance: Dict = field(default_factory=dict)
+    quality_score: float = 0.0
+    price_levels: List[float] = field(default_factory=list)
+
+
+class SymbolSeries:
+    """Кільцевий буфер однієї монети: колонки array('d') фіксованої довжини"""
+
+    def __init__(self, capacity: int, resolution_sec: int):
+        self.capacity = capacity
+        self.resolution_sec = resolution_sec
+        self.columns = {name: array('d', [NAN]) * capacity for name in COLUMNS}
+        self.head = 0  # Індекс наступного запису
+        self.size = 0
+
+    def _last_index(self) -> int:
+        return (self.head - 1) % self.capacity
+
+    def record(self, ts: float, xt_price: float = None, dex_price: float = None,
+               spread: float = None, volume: float = None):
+        """Додає тік: у межах бакету оновлює high/low/close, інакше відкриває новий"""
+        bucket_ts = ts - (ts % self.resolution_sec)
+        cols = self.columns
+
+        if self.size and cols['ts'][self._last_index()] == bucket_ts:
+            i = self._last_index()
+            if xt_price:
+                if math.isnan(cols['open'][i]):
+                    cols['open'][i] = cols['high'][i] = cols['low'][i] = xt_price
+                cols['high'][i] = max(cols['high'][i], xt_price)
+                cols['low'][i] = min(cols['low'][i], xt_price)
+                cols['close'][i] = xt_price
+        else:
+            i = self.head
+            cols['ts'][i] = bucket_ts
+            price = xt_price if xt_price else NAN
+            cols['open'][i] = cols['high'][i] = cols['low'][i] = cols['close'][i] = price
+            cols['dex_price'][i] = cols['spread'][i] = cols['volume'][i] = NAN
+            self.head = (self.head + 1) % self.capacity
+            self.size = min(self.size + 1, self.capacity)
+
+        if dex_price:
+            cols['dex_price'][i] = dex_price
+        if spread is not None:
+            cols['spread'][i] = spread
+        if volume is not None:
+            cols['volume'][i] = volume
+
+    def window(self, seconds: float, now: float = None) -> Dict[str, List[float]]:
+        """Колонки за останні seconds секунд у хронологічному порядку"""
+        now = now if now is not None else time.time()
+        since = now - seconds
+        result = {name: [] for name in COLUMNS}
+        start = (self.head - self.size) % self.capacity
+        for k in range(self.size):
+            i = (start + k) % self.capacity
+            if self.columns['ts'][i] < since:
+                continue
+            for name in COLUMNS:
+                result[name].append(self.columns[name][i])
+        return result
+
+
+class PriceHistoryStore:
+    """Сховище історії цін для всіх символів (потокобезпечне)"""
+
+    def __init__(self, resolution_sec: int = PRICE_HISTORY_RESOLUTION_SEC,
+                 max_points: int = PRICE_HISTORY_MAX_POINTS):
+        self.resolution_sec = resolution_sec
+        self.max_points = max_points
+        self.series: Dict[str, SymbolSeries] = {}
+        self.lock = threading.Lock()
+
+    def record(self, symbol: str, xt_price: float = None, dex_price: float = None,
+               spread: float = None, volume: float = None, ts: float = None):
+        """Записує поточні дані символу (сканер / моніторинг)"""
+        try:
+            ts = ts if ts is not None else time.time()
+            with self.lock:
+                series = self.series.get(symbol)
+                if series is None:
+                    series = SymbolSeries(self.max_points, self.resolution_sec)
+                    self.series[symbol] = series
+                series.record(ts, xt_price, dex_price, spread, volume)
+        except Exception as e:
+            logging.error(f"❌ Помилка запису історії цін {symbol}: {e}")
+
+    def get_window(self, symbol: str, minutes: float) -> Optional[Dict[str, List[float]]]:
+        """Дані символу за останні minutes хвилин"""
+        with self.lock:
+            series = self.series.get(symbol)
+            if series is None or series.size == 0:
+                return None
+            return series.window(minutes * 60)
+
+    def get_closes(self, symbol: str, minutes: float) -> List[float]:
+        """Ціни закриття XT за період (без пропусків)"""
+        data = self.get_window(symbol, minutes)
+        if not data:
+            return []
+        return [p for p in data['close'] if not math.isnan(p)]
+
+    def coverage_pct(self, symbol: str, minutes: float) -> float:
+        """Відсоток заповнених бакетів у вікні"""
+        closes = self.get_closes(symbol, minutes)
+        expected = max(1, int(minutes * 60 / self.resolution_sec))
+        return min(100.0, len(closes) / expected * 100)
+
+    def get_range_volatility(self, symbol: str, minutes: float) -> Optional[Dict]:
+        """Волатильність як (max high - min low) / close за вікно"""
+        data = self.get_window(symbol, minutes)
+        if not data:
+            return None
+        highs = [p for p in data['high'] if not math.isnan(p)]
+        lows = [p for p in data['low'] if not math.isnan(p)]
+        closes = [p for p in data['close'] if not math.isnan(p)]
+        if not closes:
+            return None
+        expected = max(1, int(minutes * 60 / self.resolution_sec))
+        high, low, last = max(highs), min(lows), closes[-1]
+        return {
+            'high': high,
+            'low': low,
+            'last': last,
+            'volatility_pct': (high - low) / last * 100 if last else 0.0,
+            'coverage_pct': min(100.0, len(closes) / expected * 100)
+        }
+
+    def get_dynamics(self, symbol: str, minutes: int) -> Optional[DynamicsAnalysis]:
+        """Аналіз динаміки ціни за timeframe хвилин"""
+        data = self.get_window(symbol, minutes)
+        if not data:
+            return None
+        closes = [p for p in data['close'] if not math.isnan(p)]
+        if len(closes) < 2:
+            return None
+
+        highs = [p for p in data['high'] if not math.isnan(p)]
+        lows = [p for p in data['low'] if not math.isnan(p)]
+        first, last = closes[0], closes[-1]
+        price_change_pct = (last - first) / first * 100 if first else 0.0
+        low, high = min(lows), max(highs)
+        volatility_pct = (high - low) / last * 100 if last else 0.0
+
+        # Моментум: зміна другої половини вікна проти першої
+        half = len(closes) // 2
+        first_half_change = (closes[half] - closes[0]) / closes[0] * 100 if closes[0] else 0.0
+        second_half_change = (closes[-1] - closes[half]) / closes[half] * 100 if closes[half] else 0.0
+        momentum_score = max(-100.0, min(100.0, (second_half_change - first_half_change) * 10))
+
+        if price_change_pct > 0.2:
+            trend_direction = "bullish"
+        elif price_change_pct < -0.2:
+            trend_direction = "bearish"
+        else:
+            trend_direction = "neutral"
+
+        expected = max(1, int(minutes * 60 / self.resolution_sec))
+        quality_score = min(100.0, len(closes) / expected * 100)
+
+        return DynamicsAnalysis(
+            symbol=symbol,
+            timeframe_minutes=minutes,
+            price_change_pct=price_change_pct,
+            volatility_pct=volatility_pct,
+            trend_direction=trend_direction,
+            momentum_score=momentum_score,
+            support_resistance={'support': low, 'resistance': high},
+            quality_score=quality_score,
+            price_levels=closes
+        )
+
+    def get_multi_timeframe_analysis(self, symbol: str, timeframes=(15, 60)) -> Dict[str, Optional[DynamicsAnalysis]]:
+        """Аналіз для кількох таймфреймів: {'15m': ..., '1h': ...}"""
+        result = {}
+        for minutes in timeframes:
+            label = f"{minutes // 60}h" if minutes % 60 == 0 else f"{minutes}m"
+            result[label] = self.get_dynamics(symbol, minutes)
+        return result
+
+    def has_history(self, symbol: str, minutes: float) -> bool:
+        """Чи достатньо точок у вікні (PRICE_HISTORY_MIN_COVERAGE_PCT)"""
+        return self.coverage_pct(symbol, minutes) >= PRICE_HISTORY_MIN_COVERAGE_PCT
+
+    def remove(self, symbol: str):
+        with self.lock:
+            self.series.pop(symbol, None)
+
+
+# Глобальне сховище історії цін
+price_history = PriceHistoryStore()
@@ -0,0 +1,236 @@
+"""
+🔬 Семплюючий профайлер на вимогу (без перезапуску бота)
+Раз на PROFILER_INTERVAL_MS знімає стеки всіх потоків через sys._current_frames(),
+агрегує collapsed stacks (формат flamegraph.pl / speedscope) та top-N гарячих функцій.
+Керується з Telegram (/profile, /stacks) та з main.py (/api/admin/profile, /api/admin/stacks).
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from config import PROFILER_DIR, PROFILER_INTERVAL_MS, PROFILER_MAX_SECONDS, PROFILER_TOP_N
+
+_run_lock = threading.Lock()  # Одночасно тільки один прогін профайлера
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _stack_labels(frame) -> List[str]:
+    """Стек від кореня до поточної функції"""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return labels
+
+
+class SamplingProfiler:
+    """Один прогін: sample() в циклі до закінчення часу, далі результати"""
+
+    def __init__(self, interval_ms: float = PROFILER_INTERVAL_MS):
+        self.interval = interval_ms / 1000.0
+        self.collapsed: Dict[str, int] = {}  # "потік;f1;f2" -> кількість семплів
+        self.self_counts: Dict[str, int] = {}  # функція на вершині стеку
+        self.total_counts: Dict[str, int] = {}  # функція будь-де в стеку (раз на семпл)
+        self.last_stack: Dict[int, Tuple[str, ...]] = {}  # потік -> останній стек
+        self.unchanged: Dict[int, int] = {}  # потік -> семплів поспіль з тим самим стеком
+        self.samples = 0  # Тіки семплювання
+        self.thread_samples = 0  # Стеки потоків за всі тіки (база для %)
+        self.started_at = None
+        self.elapsed = 0.0
+
+    def sample(self, skip_ident: int = None):
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == skip_ident:
+                continue
+            stack = tuple(_stack_labels(frame))
+            if not stack:
+                continue
+            thread_name = names.get(ident, f"thread-{ident}")
+            # Воркери ThreadPoolExecutor мають імена з номером - групуємо за префіксом
+            thread_group = thread_name.rsplit('_', 1)[0] if thread_name.rsplit('_', 1)[-1].isdigit() else thread_name
+            key = ';'.join((thread_group,) + stack)
+            self.thread_samples += 1
+            self.collapsed[key] = self.collapsed.get(key, 0) + 1
+            self.self_counts[stack[-1]] = self.self_counts.get(stack[-1], 0) + 1
+            for label in set(stack):
+                self.total_counts[label] = self.total_counts.get(label, 0) + 1
+
+            if self.last_stack.get(ident) == stack:
+                self.unchanged[ident] = self.unchanged.get(ident, 0) + 1
+            else:
+                self.unchanged[ident] = 0
+                self.last_stack[ident] = stack
+        self.samples += 1
+
+    def run(self, duration_sec: float):
+        me = threading.get_ident()
+        self.started_at = time.time()
+        started = time.perf_counter()
+        deadline = started + duration_sec
+        next_tick = started
+        while time.perf_counter() < deadline:
+            self.sample(skip_ident=me)
+            next_tick += self.interval
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_tick = time.perf_counter()  # Не встигаємо - без накопичення боргу
+        self.elapsed = time.perf_counter() - started
+
+    def top(self, counts: Dict[str, int], n: int = PROFILER_TOP_N) -> List[Dict]:
+        ranked = sorted(counts.items(), key=lambda item: item[1], reverse=True)[:n]
+        return [{'function': label, 'samples': count,
+                 'pct': round(count / self.thread_samples * 100, 2) if self.thread_samples else 0.0}
+                for label, count in ranked]
+
+    def stuck_threads(self, min_unchanged_sec: float = 5.0) -> List[Dict]:
+        """Потоки що весь час стоять в одному стеку (lock, мережевий виклик без таймауту)"""
+        names = {t.ident: t.name for t in threading.enumerate()}
+        threshold = max(1, int(min_unchanged_sec / self.interval))
+        stuck = []
+        for ident, count in self.unchanged.items():
+            if count >= threshold:
+                stack = self.last_stack.get(ident, ())
+                stuck.append({'thread': names.get(ident, str(ident)),
+                              'seconds': round(count * self.interval, 1),
+                              'at': stack[-1] if stack else '?'})
+        return sorted(stuck, key=lambda item: item['seconds'], reverse=True)
+
+    def collapsed_text(self) -> str:
+        return ''.join(f"{stack} {count}\n" for stack, count in sorted(self.collapsed.items()))
+
+    def summary(self) -> Dict:
+        return {
+            'started_at': self.started_at,
+            'duration_sec': round(self.elapsed, 2),
+            'samples': self.samples,
+            'interval_ms': self.interval * 1000,
+            'threads': len(self.last_stack),
+            'top_self': self.top(self.self_counts),
+            'top_total': self.top(self.total_counts),
+            'stuck_threads': self.stuck_threads()
+        }
+
+
+def _output_path(prefix: str, ext: str) -> str:
+    os.makedirs(PROFILER_DIR, exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    return os.path.join(PROFILER_DIR, f"{prefix}_{stamp}.{ext}")
+
+
+def run_profile(duration_sec: float, interval_ms: float = PROFILER_INTERVAL_MS) -> Optional[Dict]:
+    """
+    Блокуючий прогін на duration_sec (обмежено PROFILER_MAX_SECONDS).
+    Зберігає .collapsed (flamegraph) та .json (top-N) у PROFILER_DIR.
+    Повертає підсумок з шляхами файлів або None якщо профайлер вже працює.
+    """
+    if not _run_lock.acquire(blocking=False):
+        return None
+    try:
+        duration_sec = max(1.0, min(float(duration_sec), PROFILER_MAX_SECONDS))
+        logging.warning(f"🔬 Профайлер: старт на {duration_sec:.0f}с (інтервал {interval_ms}мс)")
+        profiler = SamplingProfiler(interval_ms)
+        profiler.run(duration_sec)
+
+        result = profiler.summary()
+        collapsed_path = _output_path('profile', 'collapsed')
+        with open(collapsed_path, 'w') as f:
+            f.write(profiler.collapsed_text())
+        summary_path = collapsed_path[:-len('collapsed')] + 'json'
+        result['collapsed_file'] = collapsed_path
+        result['summary_file'] = summary_path
+        with open(summary_path, 'w') as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+
+        logging.warning(f"🔬 Профайлер: {profiler.samples} семплів -> {collapsed_path}")
+        return result
+    except Exception as e:
+        logging.error(f"❌ Помилка профайлера: {e}")
+        raise
+    finally:
+        _run_lock.release()
+
+
+def is_running() -> bool:
+    return _run_lock.locked()
+
+
+def dump_thread_stacks(save: bool = True) -> Tuple[str, Optional[str]]:
+    """Повні стеки всіх потоків (як faulthandler, але з іменами потоків); повертає (текст, файл)"""
+    threads = {t.ident: t for t in threading.enumerate()}
+    frames = sys._current_frames()
+    names = {ident: threads[ident].name if ident in threads else f"thread-{ident}" for ident in frames}
+    parts = [f"🧵 Потоків: {len(frames)} | {datetime.now().isoformat(timespec='seconds')}\n"]
+    for ident in sorted(frames, key=names.get):
+        frame = frames[ident]
+        thread = threads.get(ident)
+        name = names[ident]
+        daemon = ' daemon' if thread is not None and thread.daemon else ''
+        parts.append(f"\n--- {name} ({ident}{daemon}) ---\n")
+        parts.append(''.join(traceback.format_stack(frame)))
+    text = ''.join(parts)
+
+    path = None
+    if save:
+        path = _output_path('stacks', 'txt')
+        with open(path, 'w') as f:
+            f.write(text)
+    return text, path
+
+
+def format_profile_summary(result: Dict, top_n: int = 10) -> str:
+    """Короткий підсумок для Telegram (Markdown)"""
+    lines = [f"🔬 *Профіль* {result['duration_sec']:.0f}с, {result['samples']} семплів, {result['threads']} потоків",
+             "", "🔥 *Top self* (% стеків усіх потоків):"]
+    for item in result['top_self'][:top_n]:
+        lines.append(f"• {item['pct']:.1f}% `{item['function']}`")
+    lines.append("")
+    lines.append("📚 *Top total*:")
+    for item in result['top_total'][:top_n]:
+        lines.append(f"• {item['pct']:.1f}% `{item['function']}`")
+    if result['stuck_threads']:
+        lines.append("")
+        lines.append("🧊 *Завислі потоки:*")
+        for item in result['stuck_threads'][:top_n]:
+            lines.append(f"• `{item['thread']}` {item['seconds']}с у `{item['at']}`")
+    lines.append("")
+    lines.append(f"📁 `{result['collapsed_file']}`")
+    return '\n'.join(lines)
+
+
+def format_stacks_summary(text: str, limit: int = 15) -> str:
+    """Перелік потоків з поточною функцією (для Telegram; повний дамп - файлом)"""
+    lines = []
+    current = None
+    last_location = '?'
+    tops = []
+    for line in text.splitlines():
+        if line.startswith('--- '):
+            if current:
+                tops.append((current, last_location))
+            current = line.strip('- ').split(' (')[0]
+            last_location = '?'
+        elif line.strip().startswith('File '):
+            last_location = line.strip().replace('File ', '')
+    if current:
+        tops.append((current, last_location))
+    lines.append(f"🧵 *Потоків:* {len(tops)}")
+    for name, location in tops[:limit]:
+        lines.append(f"• `{name}`: {location}")
+    if len(tops) > limit:
+        lines.append(f"... та ще {len(tops) - limit}")
+    return '\n'.join(lines)
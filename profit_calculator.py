@@ -218,6 +218,18 @@ class ProfitCalculator:
             logger.error(f"Помилка розрахунку тейк-профіту: {e}")
             return entry_price * 1.025 if position_side.upper() == 'LONG' else entry_price * 0.975
     
+    def simulate_futures_fill(self, price: float, side: str, is_entry: bool,
+                              notional_usdt: float, slippage_level: str = 'medium') -> Dict[str, float]:
+        """
+        Симуляція ринкового виконання на XT futures (для backtest/replay)
+        Ціна зсувається проти нас на slippage, комісія - taker fee від обсягу
+        """
+        slippage_rate = float(self.slippage_rates.get(slippage_level, self.slippage_rates['medium']))
+        is_buy = (side.upper() == 'LONG') == is_entry  # LONG вхід/SHORT вихід = купівля
+        fill_price = price * (1 + slippage_rate) if is_buy else price * (1 - slippage_rate)
+        fee = notional_usdt * float(self.xt_taker_fee)
+        return {'fill_price': fill_price, 'fee': fee, 'slippage_rate': slippage_rate}
+
     def calculate_position_size(self, account_balance: float, risk_percent: float = 2.0, leverage: int = 10) -> float:
         """Розрахунок розміру позиції на основі ризик-менеджменту"""
         try:
@@ -0,0 +1,295 @@
+"""
+🧩 Шардований скан: універс символів ділиться між SCAN_SHARDS процесами (окремий GIL на ядро)
+Процес шарда виконує мережеву частину symbol_worker (observe_symbol: тикер XT, пошук DEX пари,
+JSON DexScreener) з власними HTTP пулами та часткою rate-limit і стрімить спостереження
+координатору через Pipe. Координатор (процес бота) - єдиний власник позицій, балансу та
+ордерів: повний symbol_worker запускається лише для спредів у робочому діапазоні та
+символів з відкритими позиціями, решта тільки оновлює індикатори та історію спредів.
+SCAN_SHARDS <= 1 - як раніше, все в одному процесі.
+"""
+
+import logging
+import multiprocessing
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.connection import wait
+from typing import Callable, Dict, List, Optional
+
+from config import (
+    SCAN_SHARDS, SCAN_SHARD_PARTITION, SCAN_SHARD_THREADS, SCAN_SHARD_START_TIMEOUT_SEC,
+    SCAN_SYMBOL_DEADLINE_SEC, SCAN_WATCHDOG_GRACE_SEC
+)
+from deadline import DeadlineExceeded, deadline_scope
+from log_pipeline import sampled
+from metrics import metrics
+from models import MarketQuote
+from symbol_registry import symbol_registry
+from xt_client import get_xt_price, is_xt_futures_tradeable
+
+SHARD_OBSERVATIONS = metrics.counter(
+    'arb_scan_shard_observations_total', 'Спостереження від процесів шардів', ('shard', 'result'))
+SHARD_RESTARTS = metrics.counter('arb_scan_shard_restarts_total', 'Перезапуски процесів шардів', ('shard',))
+
+
+def observe_symbol(xt, symbol: str, timer=None) -> Optional[MarketQuote]:
+    """
+    Етапи 1-2 symbol_worker: ціна XT та метрики DEX (мережа і розбір JSON, без стану позицій).
+    None - XT ціни немає; dex_price None - немає якісної DEX пари
+    """
+    from dex_client import get_advanced_token_analysis
+    symbol_info = symbol_registry.get(symbol)
+
+    # 1) ТІЛЬКИ XT БІРЖА - отримуємо ціну з XT (як просив користувач)
+    try:
+        xt_price = get_xt_price(xt, symbol)
+        observed_at = time.time()  # 🧭 Момент спостереження ціни (wall-clock - однаковий у всіх процесах)
+        if not xt_price or not is_xt_futures_tradeable(symbol):
+            logging.debug(f"[{symbol}] ❌ Неможливо торгувати на XT futures")
+            return None
+        logging.debug(f"[{symbol}] ✅ XT ціна: ${xt_price:.6f}")
+        if timer:
+            timer.mark('xt_price')
+    except Exception as e:
+        logging.debug(f"[{symbol}] ⚠️ XT ціна недоступна: {e}")
+        return None
+
+    observation = MarketQuote(symbol, xt_price, observed_at)
+
+    # 2) ТІЛЬКИ ТОДІ DexScreener - отримуємо РОЗШИРЕНІ МЕТРИКИ
+    try:
+        # 🔬 РОЗШИРЕНИЙ АНАЛІЗ: ліквідність, FDV, market cap, транзакції, покупці/продавці
+        advanced_metrics = get_advanced_token_analysis(symbol)
+        if not advanced_metrics:
+            logging.debug(f"[{symbol}] ❌ Немає якісної пари на DexScreener")
+            return observation
+
+        # Отримуємо базові дані (backward compatibility)
+        token_info = {
+            'price_usd': advanced_metrics.get('price_usd', 0),
+            'liquidity': advanced_metrics.get('liquidity', 0),
+            'volume_24h': advanced_metrics.get('volume_24h', 0),
+            'dex_link': advanced_metrics.get('exact_pair_url') or symbol_info.dex_link
+        }
+
+        # Коротка інформація про токен (зменшено логування)
+        logging.info("📊 %s: $%.6f | Vol $%.0f", symbol, advanced_metrics.get('price_usd', 0),
+                     advanced_metrics.get('volume_1h', 0), extra=sampled(symbol))
+
+        dex_price = token_info['price_usd']
+
+        # ЖОРСТКІ ПЕРЕВІРКИ (як у топових арбітражних ботів)
+        if not dex_price or dex_price < 0.000001:  # мінімальна ціна $0.000001
+            raise Exception(f"Invalid DexScreener price: {dex_price}")
+        # DEX ціна за 1 токен -> за контракт XT (1000PEPE котирується за 1000 токенів)
+        observation.advanced_metrics = advanced_metrics
+        observation.token_info = token_info
+        observation.dex_price = symbol_info.to_contract_price(dex_price)
+        if timer:
+            timer.mark('dex_resolve')
+    except Exception as e:
+        # БЛОКУЄМО токени з поганими DexScreener цінами - як у друга з Bybit
+        logging.warning(f"[{symbol}] ❌ Пропускаємо через погану DexScreener ціну: {e}")
+    return observation
+
+
+def shard_of(symbol: str, shards: int) -> int:
+    """Стабільний шард символу (crc32 однаковий у всіх процесах, на відміну від hash())"""
+    return zlib.crc32(symbol.encode()) % shards
+
+
+def partition(symbols: List[str], shards: int, costs: Dict[str, float] = None,
+              mode: str = SCAN_SHARD_PARTITION) -> List[List[str]]:
+    """
+    'hash' - символ завжди в тому ж шарді (кеші DEX процесу залишаються теплими);
+    'balanced' - жадібний LPT за середнім часом скану символу (невідомі - медіана)
+    """
+    parts = [[] for _ in range(shards)]
+    if mode != 'balanced' or not costs:
+        for symbol in symbols:
+            parts[shard_of(symbol, shards)].append(symbol)
+        return parts
+    known = sorted(costs.values())
+    default_cost = known[len(known) // 2]
+    loads = [0.0] * shards
+    for symbol in sorted(symbols, key=lambda s: costs.get(s, default_cost), reverse=True):
+        target = loads.index(min(loads))
+        parts[target].append(symbol)
+        loads[target] += costs.get(symbol, default_cost)
+    return parts
+
+
+def _shard_main(shard_id: int, shards: int, conn, markets: Dict, observer: Callable):
+    """Процес шарда: власні клієнти XT/DEX, пул потоків, спостереження -> conn"""
+    from log_pipeline import setup_logging
+    setup_logging()
+    import xt_client
+    from dex_client import dex_client
+    from negative_cache import negative_cache
+
+    negative_cache.persist = False  # Файл негативного кешу пише тільки координатор
+    dex_client.rate_limit_share = shards  # Сумарна частота запитів до DEX API як в одному процесі
+    xt = xt_client.create_xt(account_name=f"Shard {shard_id}")
+    if getattr(xt, 'rateLimit', None):
+        xt.rateLimit *= shards  # Частка rate-limit XT: шарди разом не частіше одного процесу
+    xt_client.apply_xt_markets(markets, time.time())
+    symbol_registry.build(markets)
+    send_lock = threading.Lock()
+
+    def send(message):
+        with send_lock:
+            conn.send(message)
+
+    def scan_one(cycle: int, symbol: str):
+        started = time.perf_counter()
+        observation = None
+        try:
+            with deadline_scope(SCAN_SYMBOL_DEADLINE_SEC, symbol):
+                observation = observer(xt, symbol)
+        except DeadlineExceeded as e:
+            logging.warning(f"⏳ [{symbol}] Шард {shard_id}: сканування перервано: {e}")
+        except Exception as e:
+            logging.error(f"❌ [{symbol}] Шард {shard_id}: {e}")
+        # Символ без DEX пари потрапив у негативний кеш шарда - координатор переносить запис до себе
+        miss = negative_cache.entries.get(symbol_registry.get(symbol).dex_base)
+        send(('obs', cycle, symbol, observation, time.perf_counter() - started, miss))
+
+    logging.info(f"🧩 Шард {shard_id}/{shards} запущено: {len(markets)} ринків")
+    send(('ready', shard_id))
+    with ThreadPoolExecutor(max_workers=SCAN_SHARD_THREADS, thread_name_prefix=f'shard{shard_id}') as pool:
+        while True:
+            try:
+                command = conn.recv()
+            except (EOFError, OSError):
+                break
+            if command[0] == 'stop':
+                break
+            if command[0] == 'scan':
+                _, cycle, symbols, new_markets = command
+                if new_markets:
+                    markets.update(new_markets)
+                    xt_client.apply_xt_markets(markets, time.time())
+                    symbol_registry.build(new_markets)
+                for future in [pool.submit(scan_one, cycle, symbol) for symbol in symbols]:
+                    future.result()
+                send(('done', cycle))
+
+
+class ShardPool:
+    """Координатор: процеси шардів, розподіл символів по циклах, прийом спостережень"""
+
+    def __init__(self, shards: int = SCAN_SHARDS, observer: Callable = observe_symbol):
+        self.shards = shards
+        self.observer = observer
+        self.context = multiprocessing.get_context('spawn')  # Без fork процесу з потоками та сокетами
+        self.processes: List = [None] * shards
+        self.conns: List = [None] * shards
+        self.known: List[set] = [set() for _ in range(shards)]
+        self.costs: Dict[str, float] = {}  # Середній час скану символу (EWMA) для 'balanced'
+        self.markets: Dict = {}
+        self.cycle = 0
+        metrics.gauge('arb_scan_shards_alive', 'Живі процеси шардів сканування', lambda: self.alive())
+
+    def start(self, markets: Dict):
+        self.markets = markets
+        for shard_id in range(self.shards):
+            self._spawn(shard_id)
+        logging.info(f"🧩 Шардований скан: {self.shards} процесів, розподіл '{SCAN_SHARD_PARTITION}'")
+
+    def _spawn(self, shard_id: int):
+        parent_conn, child_conn = self.context.Pipe()
+        markets = dict(self.markets)
+        process = self.context.Process(target=_shard_main, name=f'scan-shard-{shard_id}', daemon=True,
+                                       args=(shard_id, self.shards, child_conn, markets, self.observer))
+        process.start()
+        child_conn.close()
+        try:
+            if parent_conn.poll(SCAN_SHARD_START_TIMEOUT_SEC):
+                parent_conn.recv()  # ('ready', shard_id)
+            else:
+                logging.error(f"❌ Шард {shard_id} не стартував за {SCAN_SHARD_START_TIMEOUT_SEC}с")
+        except (EOFError, OSError):
+            logging.error(f"❌ Шард {shard_id} завершився під час старту (код {process.exitcode})")
+        self.processes[shard_id] = process
+        self.conns[shard_id] = parent_conn
+        self.known[shard_id] = set(markets)
+
+    def alive(self) -> int:
+        return sum(1 for process in self.processes if process is not None and process.is_alive())
+
+    def _ensure_alive(self):
+        for shard_id, process in enumerate(self.processes):
+            if process is None or not process.is_alive():
+                logging.warning(f"🧩 Шард {shard_id} не працює - перезапускаємо")
+                SHARD_RESTARTS.inc(str(shard_id))
+                if self.conns[shard_id] is not None:
+                    self.conns[shard_id].close()
+                self._spawn(shard_id)
+
+    def scan(self, symbols: List[str], on_observation: Callable, stop_event: threading.Event = None) -> Dict:
+        """
+        Один цикл: символи діляться між шардами, спостереження передаються on_observation(symbol,
+        observation, miss) у міру надходження. Повертає статистику циклу
+        """
+        self._ensure_alive()
+        self.cycle += 1
+        cycle = self.cycle
+        started = time.perf_counter()
+        pending = {}
+        parts = partition(symbols, self.shards, self.costs)
+        for shard_id, shard_symbols in enumerate(parts):
+            new_markets = {s: self.markets[s] for s in shard_symbols if s not in self.known[shard_id] and s in self.markets}
+            try:
+                self.conns[shard_id].send(('scan', cycle, shard_symbols, new_markets))
+            except (OSError, ValueError) as e:
+                logging.error(f"❌ Шард {shard_id}: команда не відправлена: {e}")
+                continue
+            self.known[shard_id].update(new_markets)
+            pending[self.conns[shard_id]] = shard_id
+
+        # Кожен шард має вкластися в час своєї частки з дедлайном символу (потоки шарда паралельні)
+        waves = -(-max(map(len, parts), default=0) // max(SCAN_SHARD_THREADS, 1))
+        cycle_deadline = time.monotonic() + waves * (SCAN_SYMBOL_DEADLINE_SEC + SCAN_WATCHDOG_GRACE_SEC)
+        stats = {'observations': 0, 'candidates': 0, 'shards': len(pending)}
+        while pending and time.monotonic() < cycle_deadline:
+            if stop_event is not None and stop_event.is_set():
+                break
+            for conn in wait(list(pending), timeout=1.0):
+                shard_id = pending[conn]
+                try:
+                    message = conn.recv()
+                except (EOFError, OSError):
+                    logging.error(f"❌ Шард {shard_id} відключився посеред циклу")
+                    pending.pop(conn, None)
+                    continue
+                if message[0] == 'done' and message[1] == cycle:
+                    pending.pop(conn, None)
+                elif message[0] == 'obs' and message[1] == cycle:
+                    _, _, symbol, observation, elapsed, miss = message
+                    self.costs[symbol] = elapsed if symbol not in self.costs else 0.8 * self.costs[symbol] + 0.2 * elapsed
+                    SHARD_OBSERVATIONS.inc(str(shard_id), 'ok' if observation and observation.dex_price else 'empty')
+                    stats['observations'] += 1
+                    try:
+                        if on_observation(symbol, observation, miss):
+                            stats['candidates'] += 1
+                    except Exception as e:
+                        logging.error(f"❌ [{symbol}] Обробка спостереження шарда: {e}")
+        if pending:
+            logging.warning(f"🧟 Цикл {cycle}: шарди {sorted(pending.values())} не завершились вчасно")
+        stats['seconds'] = time.perf_counter() - started
+        return stats
+
+    def stop(self):
+        for shard_id, conn in enumerate(self.conns):
+            if conn is None:
+                continue
+            try:
+                conn.send(('stop',))
+            except (OSError, ValueError):
+                pass
+        for process in self.processes:
+            if process is not None:
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
@@ -3,7 +3,7 @@ import logging
 from typing import Optional, Dict, Any
 from dataclasses import dataclass
 
-@dataclass
+@dataclass(slots=True)
 class ArbitrageSignal:
     """Структура арбітражного сигналу"""
     asset: str = ""
@@ -4,11 +4,9 @@ from typing import Dict, Any, Optional, Tuple
 from dataclasses import dataclass, field
 
 from signal_parser import ArbitrageSignal
-# Simple fallback for price dynamics
-class DynamicsAnalysis:
-    def __init__(self):
-        self.trend = "neutral"
-        self.momentum = 0.0
+from deadline import check_deadline, request_timeout
+from symbol_registry import symbol_registry
+from price_history import price_history
 from config import (
     MIN_24H_VOLUME_USD, MIN_POOLED_LIQUIDITY_USD, MIN_SPREAD, MAX_SPREAD,
     MAX_SLIPPAGE_PERCENT, SLIPPAGE_PADDING, COOLDOWN_SEC,
@@ -16,7 +14,7 @@ from config import (
     MIN_BUY_RATIO_PERCENT, ORDER_AMOUNT, MIN_NET_PROFIT_PERCENT, ESTIMATED_TRADING_COSTS_PERCENT
 )
 
-@dataclass
+@dataclass(slots=True)
 class VerificationResult:
     """Результат верифікації арбітражного сигналу"""
     valid: bool = False
@@ -135,6 +133,9 @@ class SignalVerification:
             
             # 5. Перевіряємо spread та чистий прибуток
             if result.xt_price > 0 and result.dex_price > 0:
+                # Поточні ціни в історію - динаміка нижче читається з неї без запитів
+                price_history.record(result.xt_symbol, result.xt_price, result.dex_price)
+                
                 result.actual_spread = ((result.dex_price - result.xt_price) / result.xt_price) * 100
                 result.price_ratio = max(result.xt_price, result.dex_price) / min(result.xt_price, result.dex_price)
                 
@@ -212,7 +213,7 @@ class SignalVerification:
                 result.warnings.append(f"Buy/Sell співвідношення {buysell_result:.1f}% < мінімум {MIN_BUY_RATIO_PERCENT}%")
             
             # 11. Аналіз динаміки цін за 15 хв та 1 годину
-            price_dynamics_15min, price_dynamics_1hour = self._analyze_price_dynamics(signal.asset, result.dex_pair_address, result.dex_chain)
+            price_dynamics_15min, price_dynamics_1hour = self._analyze_price_dynamics(result.xt_symbol, result.dex_pair_address, result.dex_chain)
             result.price_dynamics_15min = price_dynamics_15min
             result.price_dynamics_1hour = price_dynamics_1hour
             
@@ -230,7 +231,7 @@ class SignalVerification:
                     result.errors.append(f"Глибина ринку незадовільна: {depth_validation['reason']}")
             
             # 13. 📈 НОВИЙ: Розширений аналіз динаміки цін з трекером та фільтрацією
-            price_dynamics_enhanced = self._collect_enhanced_price_dynamics(signal.asset)
+            price_dynamics_enhanced = self._collect_enhanced_price_dynamics(result.xt_symbol)
             result.price_dynamics_analysis = price_dynamics_enhanced if price_dynamics_enhanced else {}
             
             if price_dynamics_enhanced:
@@ -275,9 +276,10 @@ class SignalVerification:
         try:
             from xt_client import create_xt, get_xt_price, is_xt_futures_tradeable
             
-            # Формуємо symbol для XT.com
-            xt_symbol = f"{signal.asset}/USDT:USDT"
+            # Формуємо symbol для XT.com (реєстр знає контракти 1000PEPE для активу PEPE)
+            xt_symbol = symbol_registry.get(signal.asset).symbol
             
+            check_deadline('verify_xt_token')
             xt = create_xt()
             if not xt:
                 return {'found': False, 'error': 'XT клієнт недоступний'}
@@ -319,7 +321,8 @@ class SignalVerification:
                 'found': True,
                 'pair_address': best_pair.get('pair_address', ''),
                 'token_address': best_pair.get('token_address', ''),
-                'price': best_pair.get('price_usd', 0.0),
+                # Ціна в одиницях XT контракту - порівнюється з xt_price
+                'price': symbol_registry.get(signal.asset).to_contract_price(best_pair.get('price_usd', 0.0)),
                 'liquidity': best_pair.get('liquidity_usd', 0.0),
                 'volume_24h': best_pair.get('volume_24h', 0.0),
                 'chain': best_pair.get('chain', 'unknown'),
@@ -367,7 +370,7 @@ class SignalVerification:
             # 🚀 РЕАЛЬНА HONEYPOT ПЕРЕВІРКА через Honeypot.is API
             try:
                 honeypot_url = f"https://api.honeypot.is/v2/IsHoneypot?address={token_address}"
-                response = requests.get(honeypot_url, timeout=5)
+                response = requests.get(honeypot_url, timeout=request_timeout(5, 'honeypot'))
                 
                 if response.status_code == 200:
                     data = response.json()
@@ -495,8 +498,8 @@ class SignalVerification:
     
     def _check_orderbook_depth(self, symbol: str, pair_address: str, chain: str) -> float:
         """
-        Перевіряє глибину ордербуку через загальну ліквідність
-        Повертає загальну ліквідність у USD
+        Перевіряє глибину ордербуку через резерви пулу (constant product)
+        Повертає обсяг у USD, що виконується з допустимим price impact
         """
         try:
             from utils import get_shared_dex_client
@@ -513,12 +516,14 @@ class SignalVerification:
                 logging.warning(f"Не вдалося отримати дані пари для {symbol}")
                 return 0.0  # Fail-closed
             
-            # Використовуємо правильний ключ для ліквідності
-            liquidity_usd = pair_data.get('liquidity', 0.0)  # Використовуємо 'liquidity' як у _verify_dex_pair
+            # resolve_best_pair повертає 'liquidity_usd' ('liquidity' - формат get_dex_token_info)
+            liquidity_usd = pair_data.get('liquidity_usd', pair_data.get('liquidity', 0.0))
             
-            # Логіка: якщо загальна ліквідність достатня, то і глибина ордербуку буде достатньою
-            # Використовуємо 10% від загальної ліквідності як доступну глибину для торгівлі
-            available_depth = liquidity_usd * 0.1
+            # 🌊 Глибина = найбільший обсяг, що виконується в пулі (x*y=k) з impact ≤ DEX_MAX_PRICE_IMPACT_PCT
+            import dex_impact
+            quote_depth, fee = dex_impact.pool_depth(symbol, pair_data.get('price_usd', 0), liquidity_usd,
+                                                     pair_data.get('chain', chain), pair_data.get('dex_id'))
+            available_depth = dex_impact.max_size_for_impact(quote_depth, fee)
             
             logging.info(f"📊 Глибина ордербуку {symbol}: ${available_depth:,.0f} (з ліквідності ${liquidity_usd:,.0f})")
             return available_depth
@@ -573,21 +578,15 @@ class SignalVerification:
     
     def _analyze_price_dynamics(self, symbol: str, pair_address: str, chain: str) -> Tuple[float, float]:
         """
-        Аналізує динаміку цін за 15 хвилин та 1 годину
+        Аналізує динаміку цін за 15 хвилин та 1 годину з історії цін (price_history)
         Повертає кортеж (зміна_за_15хв_%, зміна_за_1год_%)
         """
         try:
-            from utils import get_shared_dex_client
+            dynamics_15min = price_history.get_dynamics(symbol, 15)
+            dynamics_1hour = price_history.get_dynamics(symbol, 60)
             
-            dex_client = get_shared_dex_client()
-            if not dex_client:
-                logging.warning(f"DEX клієнт недоступний для аналізу динаміки цін {symbol}")
-                return 0.0, 0.0  # Нейтральна динаміка
-            
-            # TODO: Реалізувати отримання історичних даних та розрахунок динаміки
-            # Поки що повертаємо нейтральні значення
-            price_change_15min = 0.0  # Зміна ціни за 15 хвилин у %
-            price_change_1hour = 0.0  # Зміна ціни за 1 годину у %
+            price_change_15min = dynamics_15min.price_change_pct if dynamics_15min else 0.0
+            price_change_1hour = dynamics_1hour.price_change_pct if dynamics_1hour else 0.0
             
             return price_change_15min, price_change_1hour
             
@@ -630,14 +629,14 @@ class SignalVerification:
     def _collect_enhanced_price_dynamics(self, symbol: str) -> Optional[Dict]:
         """
         📈 РОЗШИРЕНИЙ АНАЛІЗ ДИНАМІКИ ЦІН
-        Використовує price_tracker для отримання мульти-інтервального аналізу
+        Використовує price_history (сканер записує ціни кожен прохід) для мульти-інтервального аналізу
         """
         try:
-            # Збираємо поточні дані про ціну для трекера
-            price_tracker.collect_current_price_data(symbol)
+            if not symbol:
+                return None
             
-            # Отримуємо аналіз для кількох часових інтервалів
-            multi_analysis = price_tracker.get_multi_timeframe_analysis(symbol)
+            # Отримуємо аналіз для кількох часових інтервалів (15m, 1h)
+            multi_analysis = price_history.get_multi_timeframe_analysis(symbol)
             
             if multi_analysis:
                 # Конвертуємо DynamicsAnalysis об'єкти в словники для серіалізації
@@ -0,0 +1,308 @@
+"""
+🗄️ Запис історії спредів у колонкові memory-mapped файли
+Кожен скан додає запис (ts, symbol_id, xt_price, dex_price, spread, liquidity)
+у денний сегмент: одна бінарна колонка фіксованої ширини на поле.
+Читання - через np.memmap без завантаження всієї історії в RAM.
+"""
+
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from config import SPREAD_HISTORY_DIR, SPREAD_SEGMENT_INITIAL_ROWS, SPREAD_RECORDER_FLUSH_SEC
+
+SEGMENT_VERSION = 1
+
+# Колонки: (назва, struct формат, numpy dtype)
+COLUMNS = (
+    ('ts', '<d', '<f8'),
+    ('symbol_id', '<I', '<u4'),
+    ('xt_price', '<d', '<f8'),
+    ('dex_price', '<d', '<f8'),
+    ('spread', '<f', '<f4'),
+    ('liquidity', '<d', '<f8'),
+)
+SYMBOLS_FILE = "symbols.json"
+META_FILE = "meta.json"
+
+
+def _segment_day(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime('%Y-%m-%d')
+
+
+def _column_path(segment_dir: str, name: str) -> str:
+    return os.path.join(segment_dir, f"{name}.bin")
+
+
+class _Segment:
+    """Відкритий для запису денний сегмент"""
+
+    def __init__(self, base_dir: str, day: str):
+        self.day = day
+        self.dir = os.path.join(base_dir, day)
+        os.makedirs(self.dir, exist_ok=True)
+        self.rows = self._read_meta_rows()
+        self.capacity = 0
+        self.files = {}
+        self.maps = {}
+        ts_path = _column_path(self.dir, 'ts')
+        existing_rows = os.path.getsize(ts_path) // 8 if os.path.exists(ts_path) else 0
+        self._open(max(SPREAD_SEGMENT_INITIAL_ROWS, self.rows, existing_rows))
+        self.rows = self._recover_rows()
+
+    def _read_meta_rows(self) -> int:
+        try:
+            with open(os.path.join(self.dir, META_FILE), 'r') as f:
+                return int(json.load(f).get('rows', 0))
+        except (OSError, ValueError):
+            return 0
+
+    def _recover_rows(self) -> int:
+        """Після падіння дописані рядки могли не потрапити в meta - дочитуємо по ts"""
+        rows = self.rows
+        ts_map = self.maps['ts']
+        while rows < self.capacity and struct.unpack_from('<d', ts_map, rows * 8)[0] > 0:
+            rows += 1
+        return rows
+
+    def _open(self, capacity: int):
+        self.capacity = capacity
+        for name, fmt, _ in COLUMNS:
+            path = _column_path(self.dir, name)
+            size = capacity * struct.calcsize(fmt)
+            f = open(path, 'a+b')
+            if os.path.getsize(path) < size:
+                f.truncate(size)
+            self.files[name] = f
+            self.maps[name] = mmap.mmap(f.fileno(), size)
+
+    def _close_maps(self):
+        for name in list(self.maps):
+            self.maps[name].flush()
+            self.maps[name].close()
+            self.files[name].close()
+        self.maps = {}
+        self.files = {}
+
+    def append(self, values: tuple):
+        if self.rows >= self.capacity:
+            self._close_maps()
+            self._open(self.capacity * 2)
+        for (name, fmt, _), value in zip(COLUMNS, values):
+            struct.pack_into(fmt, self.maps[name], self.rows * struct.calcsize(fmt), value)
+        self.rows += 1
+
+    def flush(self):
+        for m in self.maps.values():
+            m.flush()
+        meta = {'version': SEGMENT_VERSION, 'day': self.day, 'rows': self.rows,
+                'columns': [[name, dtype] for name, _, dtype in COLUMNS], 'saved_at': time.time()}
+        tmp_path = os.path.join(self.dir, META_FILE + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(self.dir, META_FILE))
+
+    def close(self):
+        self.flush()
+        self._close_maps()
+
+
+class SpreadRecorder:
+    """Запис спредів у денні колонкові сегменти (потокобезпечно)"""
+
+    def __init__(self, base_dir: str = SPREAD_HISTORY_DIR):
+        self.base_dir = base_dir
+        self.lock = threading.Lock()
+        self.segment: Optional[_Segment] = None
+        self.symbol_ids: Dict[str, int] = {}
+        self.symbols: List[str] = []
+        self._flush_thread = None
+        self._stop_event = threading.Event()
+        self._symbols_loaded = False
+
+    def _load_symbols(self):
+        os.makedirs(self.base_dir, exist_ok=True)
+        try:
+            with open(os.path.join(self.base_dir, SYMBOLS_FILE), 'r') as f:
+                self.symbols = json.load(f).get('symbols', [])
+        except (OSError, ValueError):
+            self.symbols = []
+        self.symbol_ids = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self._symbols_loaded = True
+
+    def _save_symbols(self):
+        tmp_path = os.path.join(self.base_dir, SYMBOLS_FILE + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({'symbols': self.symbols}, f)
+        os.replace(tmp_path, os.path.join(self.base_dir, SYMBOLS_FILE))
+
+    def _symbol_id(self, symbol: str) -> int:
+        symbol_id = self.symbol_ids.get(symbol)
+        if symbol_id is None:
+            symbol_id = len(self.symbols)
+            self.symbols.append(symbol)
+            self.symbol_ids[symbol] = symbol_id
+            self._save_symbols()
+        return symbol_id
+
+    def record(self, symbol: str, xt_price: float, dex_price: float, spread: float,
+               liquidity: float = 0.0, ts: float = None):
+        """Додає один запис скану"""
+        try:
+            ts = ts if ts is not None else time.time()
+            with self.lock:
+                if not self._symbols_loaded:
+                    self._load_symbols()
+                day = _segment_day(ts)
+                if self.segment is None or self.segment.day != day:
+                    if self.segment is not None:
+                        self.segment.close()
+                        logging.info(f"🗄️ Сегмент спредів {self.segment.day} закрито: {self.segment.rows} записів")
+                    self.segment = _Segment(self.base_dir, day)
+                self.segment.append((
+                    float(ts), self._symbol_id(symbol), float(xt_price or 0.0),
+                    float(dex_price or 0.0), float(spread or 0.0), float(liquidity or 0.0)
+                ))
+        except Exception as e:
+            logging.error(f"❌ Помилка запису спреду {symbol}: {e}")
+
+    def flush(self):
+        with self.lock:
+            if self.segment is not None:
+                self.segment.flush()
+
+    def close(self):
+        self._stop_event.set()
+        with self.lock:
+            if self.segment is not None:
+                self.segment.close()
+                self.segment = None
+
+    def _flush_loop(self):
+        while not self._stop_event.wait(SPREAD_RECORDER_FLUSH_SEC):
+            try:
+                self.flush()
+            except Exception as e:
+                logging.error(f"❌ Помилка скидання сегменту спредів: {e}")
+
+    def start_flusher(self):
+        """Фоновий потік періодичного скидання на диск"""
+        if self._flush_thread and self._flush_thread.is_alive():
+            return self._flush_thread
+        self._stop_event.clear()
+        self._flush_thread = threading.Thread(target=self._flush_loop, name="spread-recorder-flush", daemon=True)
+        self._flush_thread.start()
+        logging.info(f"🗄️ Запис історії спредів у {self.base_dir}/ (flush кожні {SPREAD_RECORDER_FLUSH_SEC}с)")
+        return self._flush_thread
+
+
+# ------------------------------------------------------
+# 📖 ЧИТАННЯ (NumPy memmap, без копіювання)
+# ------------------------------------------------------
+def list_segments(base_dir: str = SPREAD_HISTORY_DIR) -> List[str]:
+    """Доступні дні (YYYY-MM-DD) у хронологічному порядку"""
+    if not os.path.isdir(base_dir):
+        return []
+    return sorted(d for d in os.listdir(base_dir) if os.path.exists(os.path.join(base_dir, d, META_FILE)))
+
+
+def load_symbol_names(base_dir: str = SPREAD_HISTORY_DIR) -> List[str]:
+    """Список символів: індекс = symbol_id"""
+    try:
+        with open(os.path.join(base_dir, SYMBOLS_FILE), 'r') as f:
+            return json.load(f).get('symbols', [])
+    except (OSError, ValueError):
+        return []
+
+
+def open_segment(day: str, base_dir: str = SPREAD_HISTORY_DIR) -> Optional[Dict]:
+    """Колонки сегменту як read-only np.memmap (зрізані до кількості записів)"""
+    import numpy as np
+
+    segment_dir = os.path.join(base_dir, day)
+    try:
+        with open(os.path.join(segment_dir, META_FILE), 'r') as f:
+            rows = int(json.load(f).get('rows', 0))
+    except (OSError, ValueError):
+        return None
+    if rows == 0:
+        return None
+
+    columns = {}
+    for name, _, dtype in COLUMNS:
+        columns[name] = np.memmap(_column_path(segment_dir, name), dtype=dtype, mode='r')[:rows]
+    return columns
+
+
+def iter_segments(start_day: str = None, end_day: str = None, base_dir: str = SPREAD_HISTORY_DIR):
+    """Ітерує (day, columns) у межах [start_day, end_day]"""
+    for day in list_segments(base_dir):
+        if start_day and day < start_day:
+            continue
+        if end_day and day > end_day:
+            continue
+        columns = open_segment(day, base_dir)
+        if columns is not None:
+            yield day, columns
+
+
+def load_symbol_history(symbol: str, start_day: str = None, end_day: str = None,
+                        base_dir: str = SPREAD_HISTORY_DIR) -> Optional[Dict]:
+    """Історія одного символу (копіюються лише відібрані рядки)"""
+    import numpy as np
+
+    names = load_symbol_names(base_dir)
+    if symbol not in names:
+        return None
+    symbol_id = names.index(symbol)
+
+    parts = {name: [] for name, _, _ in COLUMNS}
+    for _, columns in iter_segments(start_day, end_day, base_dir):
+        mask = columns['symbol_id'] == symbol_id
+        if not mask.any():
+            continue
+        for name in parts:
+            parts[name].append(columns[name][mask])
+
+    if not parts['ts']:
+        return None
+    return {name: np.concatenate(chunks) for name, chunks in parts.items()}
+
+
+def cross_symbol_summary(day: str, base_dir: str = SPREAD_HISTORY_DIR) -> List[Dict]:
+    """Статистика по всіх символах за день: кількість, середній/максимальний |спред|"""
+    import numpy as np
+
+    columns = open_segment(day, base_dir)
+    if columns is None:
+        return []
+    names = load_symbol_names(base_dir)
+    ids = columns['symbol_id']
+    abs_spread = np.abs(columns['spread'].astype(np.float64))
+    size = int(ids.max()) + 1
+
+    counts = np.bincount(ids, minlength=size)
+    sums = np.bincount(ids, weights=abs_spread, minlength=size)
+    maxima = np.zeros(size)
+    np.maximum.at(maxima, ids, abs_spread)
+
+    summary = []
+    for symbol_id in np.nonzero(counts)[0]:
+        summary.append({
+            'symbol': names[symbol_id] if symbol_id < len(names) else str(symbol_id),
+            'records': int(counts[symbol_id]),
+            'avg_abs_spread': float(sums[symbol_id] / counts[symbol_id]),
+            'max_abs_spread': float(maxima[symbol_id])
+        })
+    summary.sort(key=lambda item: item['max_abs_spread'], reverse=True)
+    return summary
+
+
+# Глобальний записувач (сканер)
+spread_recorder = SpreadRecorder()
@@ -0,0 +1,419 @@
+"""
+🌐 Спільний стан бота: позиції, найкращі можливості, кулдауни, чорний список, перемикачі символів
+Стан живе в namespace-ах стору (hash: ключ -> значення) і в локальному дзеркалі SharedMap -
+код бота працює з ним як зі звичайним dict, читання без мережі.
+MemoryStateStore - один вузол (як раніше, значення без серіалізації);
+RedisStateStore - кілька вузлів кластера сканерів (протокол RESP через socket, значення - JSON),
+плюс lease-и з TTL для вибору лідера і оренди діапазонів символів (cluster.py).
+"""
+
+import copy
+import json
+from abc import ABC, abstractmethod
+import logging
+import socket
+import threading
+import time
+from collections.abc import MutableMapping
+from typing import Callable, Dict, Iterable, Optional
+from urllib.parse import urlparse
+
+from config import STATE_BACKEND, STATE_REDIS_URL, STATE_KEY_PREFIX, STATE_REDIS_TIMEOUT_SEC
+from log_pipeline import sampled
+from metrics import metrics
+
+STORE_ERRORS = metrics.counter('arb_state_store_errors_total', 'Помилки запитів до спільного стору', ('op',))
+
+
+class StateStoreError(Exception):
+    """Стор недоступний або відповів помилкою"""
+
+
+class StateStore(ABC):
+    """Інтерфейс стору: hash namespace-и та lease-и (власник + TTL); неповний бекенд не створюється"""
+
+    shared = False  # True - стан бачать інші вузли
+
+    @abstractmethod
+    def hgetall(self, namespace: str) -> Dict:
+        """Весь namespace {ключ: значення}"""
+
+    def hset(self, namespace: str, key: str, value):
+        self.hset_many(namespace, {key: value})
+
+    @abstractmethod
+    def hset_many(self, namespace: str, mapping: Dict):
+        """Запис кількох ключів одним запитом"""
+
+    @abstractmethod
+    def hdel(self, namespace: str, *keys: str):
+        """Видалення ключів namespace"""
+
+    @abstractmethod
+    def delete(self, namespace: str):
+        """Видалення всього namespace"""
+
+    @abstractmethod
+    def replace(self, namespace: str, mapping: Dict):
+        """Атомарна заміна всього namespace"""
+
+    @abstractmethod
+    def acquire_lease(self, name: str, owner: str, ttl_sec: float) -> bool:
+        """Захопити вільний lease або продовжити власний; False - lease тримає інший власник"""
+
+    @abstractmethod
+    def release_lease(self, name: str, owner: str):
+        """Звільнити lease (тільки власник)"""
+
+    @abstractmethod
+    def lease_owner(self, name: str) -> Optional[str]:
+        """Поточний власник lease або None"""
+
+
+class MemoryStateStore(StateStore):
+    """Стор процесу: ті самі об'єкти що й у дзеркалі SharedMap, lease-и по monotonic часу"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hashes: Dict[str, Dict] = {}
+        self.leases: Dict[str, tuple] = {}  # name -> (owner, expires_at)
+
+    def hgetall(self, namespace: str) -> Dict:
+        with self.lock:
+            return dict(self.hashes.get(namespace, {}))
+
+    def hset_many(self, namespace: str, mapping: Dict):
+        with self.lock:
+            self.hashes.setdefault(namespace, {}).update(mapping)
+
+    def hdel(self, namespace: str, *keys: str):
+        with self.lock:
+            values = self.hashes.get(namespace, {})
+            for key in keys:
+                values.pop(key, None)
+
+    def delete(self, namespace: str):
+        with self.lock:
+            self.hashes.pop(namespace, None)
+
+    def replace(self, namespace: str, mapping: Dict):
+        with self.lock:
+            self.hashes[namespace] = dict(mapping)
+
+    def _live_owner(self, name: str) -> Optional[str]:
+        lease = self.leases.get(name)
+        if lease and lease[1] > time.monotonic():
+            return lease[0]
+        return None
+
+    def acquire_lease(self, name: str, owner: str, ttl_sec: float) -> bool:
+        with self.lock:
+            current = self._live_owner(name)
+            if current not in (None, owner):
+                return False
+            self.leases[name] = (owner, time.monotonic() + ttl_sec)
+            return True
+
+    def release_lease(self, name: str, owner: str):
+        with self.lock:
+            if self._live_owner(name) == owner:
+                del self.leases[name]
+
+    def lease_owner(self, name: str) -> Optional[str]:
+        with self.lock:
+            return self._live_owner(name)
+
+
+class RespConnection:
+    """Мінімальний клієнт протоколу Redis (RESP2): одне з'єднання, запити під lock, перепідключення"""
+
+    def __init__(self, url: str, timeout: float = STATE_REDIS_TIMEOUT_SEC):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or '127.0.0.1'
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.strip('/') or 0)
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.sock = None
+        self.reader = None
+
+    def _connect(self):
+        self.sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = self.sock.makefile('rb')
+        if self.password:
+            self._roundtrip([('AUTH', self.password)])
+        if self.db:
+            self._roundtrip([('SELECT', self.db)])
+
+    def close(self):
+        try:
+            if self.sock:
+                self.sock.close()
+        except OSError:
+            pass
+        self.sock = None
+        self.reader = None
+
+    @staticmethod
+    def _encode(args) -> bytes:
+        parts = [b'*%d\r\n' % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(b'$%d\r\n%s\r\n' % (len(data), data))
+        return b''.join(parts)
+
+    def _read_reply(self):
+        line = self.reader.readline()
+        if not line:
+            raise ConnectionError("Redis закрив з'єднання")
+        prefix, payload = line[:1], line[1:-2]
+        if prefix == b'+':
+            return payload.decode()
+        if prefix == b'-':
+            return StateStoreError(payload.decode())  # Повертається, а не кидається - решта відповідей пакета дочитується
+        if prefix == b':':
+            return int(payload)
+        if prefix == b'$':
+            length = int(payload)
+            if length < 0:
+                return None
+            data = self.reader.read(length + 2)
+            return data[:-2].decode()
+        if prefix == b'*':
+            count = int(payload)
+            return None if count < 0 else [self._read_reply() for _ in range(count)]
+        raise StateStoreError(f"Невідома відповідь RESP: {line[:20]!r}")
+
+    def _roundtrip(self, commands):
+        self.sock.sendall(b''.join(self._encode(command) for command in commands))
+        replies = [self._read_reply() for _ in commands]
+        for reply in replies:
+            if isinstance(reply, StateStoreError):
+                raise reply
+        return replies
+
+    def pipeline(self, commands):
+        """Кілька команд одним пакетом; відповіді в тому ж порядку. Обрив - одна повторна спроба"""
+        with self.lock:
+            for attempt in (1, 2):
+                try:
+                    if self.sock is None:
+                        self._connect()
+                    return self._roundtrip(commands)
+                except (OSError, ConnectionError) as e:
+                    self.close()
+                    if attempt == 2:
+                        raise StateStoreError(f"Redis {self.host}:{self.port} недоступний: {e}") from e
+
+    def execute(self, *args):
+        return self.pipeline([args])[0]
+
+
+# Lease: вільний або наш - (пере)встановлюємо з TTL; чужий - 0
+_ACQUIRE_SCRIPT = """
+local owner = redis.call('GET', KEYS[1])
+if owner == false or owner == ARGV[1] then
+    redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2])
+    return 1
+end
+return 0
+"""
+
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class RedisStateStore(StateStore):
+    """Namespace - Redis hash {prefix}:{namespace}, значення - JSON; lease - ключ {prefix}:lease:{name}"""
+
+    shared = True
+
+    def __init__(self, url: str = STATE_REDIS_URL, prefix: str = STATE_KEY_PREFIX):
+        self.conn = RespConnection(url)
+        self.prefix = prefix
+
+    def _key(self, namespace: str) -> str:
+        return f"{self.prefix}:{namespace}"
+
+    @staticmethod
+    def _dumps(value) -> str:
+        # numpy скаляри (рейтинги, спреди) - через .item(), решта невідомих типів - рядком
+        return json.dumps(value, default=lambda obj: obj.item() if hasattr(obj, 'item') else str(obj))
+
+    def hgetall(self, namespace: str) -> Dict:
+        flat = self.conn.execute('HGETALL', self._key(namespace)) or []
+        return {flat[i]: json.loads(flat[i + 1]) for i in range(0, len(flat), 2)}
+
+    def hset_many(self, namespace: str, mapping: Dict):
+        if not mapping:
+            return
+        args = ['HSET', self._key(namespace)]
+        for key, value in mapping.items():
+            args += [key, self._dumps(value)]
+        self.conn.execute(*args)
+
+    def hdel(self, namespace: str, *keys: str):
+        if keys:
+            self.conn.execute('HDEL', self._key(namespace), *keys)
+
+    def delete(self, namespace: str):
+        self.conn.execute('DEL', self._key(namespace))
+
+    def replace(self, namespace: str, mapping: Dict):
+        key = self._key(namespace)
+        commands = [('MULTI',), ('DEL', key)]
+        if mapping:
+            args = ['HSET', key]
+            for field, value in mapping.items():
+                args += [field, self._dumps(value)]
+            commands.append(tuple(args))
+        commands.append(('EXEC',))
+        self.conn.pipeline(commands)
+
+    def acquire_lease(self, name: str, owner: str, ttl_sec: float) -> bool:
+        return self.conn.execute('EVAL', _ACQUIRE_SCRIPT, 1, self._key(f"lease:{name}"), owner,
+                                 int(ttl_sec * 1000)) == 1
+
+    def release_lease(self, name: str, owner: str):
+        self.conn.execute('EVAL', _RELEASE_SCRIPT, 1, self._key(f"lease:{name}"), owner)
+
+    def lease_owner(self, name: str) -> Optional[str]:
+        return self.conn.execute('GET', self._key(f"lease:{name}"))
+
+
+def create_store(backend: str = STATE_BACKEND) -> StateStore:
+    if backend == 'redis':
+        logging.info(f"🌐 Спільний стан у Redis: {urlparse(STATE_REDIS_URL).hostname} (префікс '{STATE_KEY_PREFIX}')")
+        return RedisStateStore()
+    if backend != 'memory':
+        logging.warning(f"🌐 Невідомий STATE_BACKEND='{backend}', стан у пам'яті процесу")
+    return MemoryStateStore()
+
+
+class SharedMap(MutableMapping):
+    """
+    dict поверх namespace стору: читання - з локального дзеркала, запис - у дзеркало і стор.
+    owner - хто пише namespace (позиції і чорний список пише лише лідер; для інших вузлів запис
+    лишається локальним до наступного refresh). Вкладені зміни (position['status'] = ...)
+    потрапляють у стор через publish() власника. local_fields - поля записів, що не виходять
+    за межі процесу (об'єкти трейсу). model - клас записів (models.py) з компактним pack()/unpack()
+    """
+
+    def __init__(self, store: StateStore, namespace: str, lock=None, owner: Callable[[], bool] = None,
+                 local_fields: Iterable[str] = (), model=None):
+        self.store = store
+        self.namespace = namespace
+        self.lock = lock
+        self.owner = owner
+        self.local_fields = frozenset(local_fields)
+        self.model = model
+        self._local: Dict = {}
+
+    def _writable(self) -> bool:
+        return self.owner is None or self.owner()
+
+    def _shared_value(self, value):
+        if not self.store.shared:
+            return value  # Стор процесу тримає ті самі об'єкти
+        if self.model is not None and isinstance(value, self.model):
+            return value.pack()  # pack() моделі не містить local_fields
+        if self.local_fields and isinstance(value, dict):
+            return {k: v for k, v in value.items() if k not in self.local_fields}
+        return value
+
+    def _store_call(self, op: str, fn, *args):
+        if not self._writable():
+            return
+        try:
+            fn(self.namespace, *args)
+        except Exception as e:
+            STORE_ERRORS.inc(op)
+            logging.warning(f"🌐 Стор '{self.namespace}': {op} не виконано: {e}", extra=sampled(self.namespace))
+
+    def __getitem__(self, key):
+        return self._local[key]
+
+    def __setitem__(self, key, value):
+        self._local[key] = value
+        self._store_call('hset', self.store.hset, key, self._shared_value(value))
+
+    def __delitem__(self, key):
+        del self._local[key]
+        self._store_call('hdel', self.store.hdel, key)
+
+    def __iter__(self):
+        return iter(self._local)
+
+    def __len__(self):
+        return len(self._local)
+
+    def __contains__(self, key):
+        return key in self._local
+
+    def __repr__(self):
+        return f"SharedMap({self.namespace!r}, {self._local!r})"
+
+    def get(self, key, default=None):
+        return self._local.get(key, default)
+
+    def copy(self) -> Dict:
+        return self._local.copy()
+
+    def clear(self):
+        """Видаляє відомі дзеркалу ключі (не DEL namespace - записи інших вузлів після останньої синхронізації лишаються)"""
+        self.delete_many(list(self._local))
+
+    def delete_many(self, keys: Iterable):
+        """Пакетне видалення: один HDEL замість запиту на ключ"""
+        keys = [key for key in keys if key in self._local]
+        if not keys:
+            return
+        for key in keys:
+            self._local.pop(key, None)
+        self._store_call('hdel', self.store.hdel, *keys)
+
+    def update(self, *args, **kwargs):
+        """Пакетний запис: один запит до стору замість запиту на ключ"""
+        items = dict(*args, **kwargs)
+        self._local.update(items)
+        self._store_call('hset_many', self.store.hset_many,
+                         {key: self._shared_value(value) for key, value in items.items()})
+
+    def publish(self):
+        """Власник: повний знімок дзеркала (з вкладеними змінами) у стор"""
+        if self.lock is not None:
+            with self.lock:
+                snapshot = {key: copy.deepcopy(self._shared_value(value)) for key, value in self._local.items()}
+        else:
+            snapshot = {key: copy.deepcopy(self._shared_value(value)) for key, value in list(self._local.items())}
+        self._store_call('replace', self.store.replace, snapshot)
+
+    def refresh(self):
+        """Дзеркало := стан стору (local_fields наявних записів зберігаються)"""
+        remote = self.store.hgetall(self.namespace)
+        if self.model is not None:
+            remote = {key: self.model.unpack(value) if isinstance(value, list) else value
+                      for key, value in remote.items()}
+        if self.lock is not None:
+            with self.lock:
+                self._merge_remote(remote)
+        else:
+            self._merge_remote(remote)
+
+    def _merge_remote(self, remote: Dict):
+        if self.local_fields:
+            for key, value in remote.items():
+                old = self._local.get(key)
+                if isinstance(old, dict) and isinstance(value, dict):
+                    value.update({field: old[field] for field in self.local_fields if field in old})
+                elif old is not None and not isinstance(value, dict):
+                    for field in self.local_fields:
+                        if getattr(old, field, None) is not None:
+                            setattr(value, field, getattr(old, field))
+        self._local = remote
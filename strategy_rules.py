@@ -0,0 +1,206 @@
+"""
+🎯 Правила входу та виходу арбітражної стратегії XT vs DEX
+Чисті функції без мережевих запитів: ті самі фільтри реальності, рейтинг
+і правила закриття використовують symbol_worker, monitor_open_positions і backtest.
+"""
+
+from dataclasses import dataclass, asdict
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from config import (
+    MIN_SPREAD, MAX_SPREAD, CONVERGENCE_SPREAD_PCT, HALF_MOVE_PCT, HALF_MOVE_CLOSE,
+    CLOSE_ON_CONVERGENCE, TAKE_PROFIT_PCT, STOP_LOSS_PCT, ENABLE_TIME_STOP,
+    POSITION_MAX_AGE_SEC, MIN_HOLD_SEC, LEVERAGE, ORDER_AMOUNT, MAX_OPEN_POSITIONS,
+    MIN_POOLED_LIQUIDITY_USD, MIN_24H_VOLUME_USD
+)
+
+# Основні монети (ETH, BTC тощо) - очікувані діапазони цін
+MAJOR_TOKEN_PRICE_RANGES = {
+    'ETH': (2000, 6000),    # ETH очікується $2000-6000
+    'BTC': (30000, 100000), # BTC очікується $30k-100k
+    'BNB': (200, 1000),     # BNB очікується $200-1000
+    'SOL': (50, 500),       # SOL очікується $50-500
+    'ADA': (0.2, 3.0),      # ADA очікується $0.2-3.0
+}
+# Стейблкоїни та заблоковані токени
+BLACKLISTED_TOKENS = ['USDT', 'USDC', 'BUSD', 'DAI', 'TUSD', 'FDUSD', 'TON']
+
+
+@dataclass
+class StrategyParams:
+    """Параметри стратегії (за замовчуванням - з config.py)"""
+    min_spread: float = MIN_SPREAD
+    max_spread: float = MAX_SPREAD
+    max_spread_limit: float = 50.0  # Спред вище - фейк
+    max_negative_spread: float = -25.0  # Негативні спреди нижче - фейк
+    max_price_ratio: float = 2.5
+    min_liquidity_usd: float = MIN_POOLED_LIQUIDITY_USD
+    min_volume_24h_usd: float = MIN_24H_VOLUME_USD
+    convergence_spread_pct: float = CONVERGENCE_SPREAD_PCT
+    close_on_convergence: bool = CLOSE_ON_CONVERGENCE
+    half_move_pct: float = HALF_MOVE_PCT
+    half_move_close: bool = HALF_MOVE_CLOSE
+    take_profit_pct: float = TAKE_PROFIT_PCT
+    stop_loss_pct: float = STOP_LOSS_PCT
+    enable_time_stop: bool = ENABLE_TIME_STOP
+    position_max_age_sec: float = POSITION_MAX_AGE_SEC
+    min_hold_sec: float = MIN_HOLD_SEC
+    leverage: float = LEVERAGE
+    order_amount: float = ORDER_AMOUNT
+    max_open_positions: int = MAX_OPEN_POSITIONS
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+DEFAULT_PARAMS = StrategyParams()
+
+
+def clean_base_symbol(symbol: str) -> str:
+    """BTC/USDT:USDT -> BTC"""
+    return symbol.replace('/USDT:USDT', '')
+
+
+def is_blacklisted_token(symbol: str) -> bool:
+    """Стейблкоїн або заблокований токен - такий символ ніколи не пройде check_realistic_opportunity"""
+    clean_symbol = clean_base_symbol(symbol)
+    return any(token in clean_symbol for token in BLACKLISTED_TOKENS)
+
+
+def check_realistic_opportunity(symbol: str, spread_pct: float, xt_price: float, dex_price: float,
+                                liquidity: float, volume_24h: float,
+                                params: StrategyParams = DEFAULT_PARAMS) -> Tuple[bool, List[str]]:
+    """
+    🔥 Фільтри реальності - відсіюємо фейкові арбітражі
+    Повертає (is_realistic, причини відхилення)
+    """
+    reasons = []
+    clean_symbol = clean_base_symbol(symbol)
+
+    # 1. ЖОРСТКА перевірка фейкових спредів
+    if abs(spread_pct) > params.max_spread_limit:
+        reasons.append(f"ФЕЙК: Нереальний спред {spread_pct:.2f}% > {params.max_spread_limit}%")
+
+    # БЛОКУВАННЯ НЕГАТИВНИХ СПРЕДІВ (очевидні фейки)
+    if spread_pct < params.max_negative_spread:
+        reasons.append(f"ФЕЙК: Негативний спред {spread_pct:.2f}% заблоковано")
+
+    # 2. Співвідношення цін
+    price_ratio = max(xt_price, dex_price) / min(xt_price, dex_price)
+    if price_ratio > params.max_price_ratio:
+        reasons.append(f"ФЕЙК: Ціни відрізняються в {price_ratio:.2f} разів (макс. {params.max_price_ratio:.1f}x)")
+
+    # 3. АБСОЛЮТНА перевірка цін для топ-монет
+    if clean_symbol in MAJOR_TOKEN_PRICE_RANGES:
+        min_price, max_price = MAJOR_TOKEN_PRICE_RANGES[clean_symbol]
+        if not (min_price <= xt_price <= max_price) or not (min_price <= dex_price <= max_price):
+            reasons.append(f"ФЕЙК: Ціна поза межами для {clean_symbol}: XT=${xt_price:.2f}, Dex=${dex_price:.2f} (очікується ${min_price}-${max_price})")
+
+    # 4. Мінімальна ліквідність та обсяг
+    if liquidity < params.min_liquidity_usd:
+        reasons.append(f"ФЕЙК: Мала ліквідність ${liquidity:,.0f} < ${params.min_liquidity_usd:,}")
+    if volume_24h < params.min_volume_24h_usd:
+        reasons.append(f"ФЕЙК: Малий обсяг ${volume_24h:,.0f} < ${params.min_volume_24h_usd:,}")
+
+    # 5. Стейблкоїни або заблоковані токени
+    if is_blacklisted_token(clean_symbol):
+        reasons.append(f"ЗАБЛОКОВАНО: Токен {clean_symbol} в чорному списку")
+
+    # 6. Кратність цін (x10, x100 - помилка деномінації)
+    if xt_price > 0 and dex_price > 0:
+        ratio_check = xt_price / dex_price
+        if abs(ratio_check - round(ratio_check)) < 0.01 and round(ratio_check) >= 10:
+            reasons.append(f"ФЕЙК: Підозрюване кратне співвідношення цін {ratio_check:.1f}x")
+
+    return len(reasons) == 0, reasons
+
+
+def is_spread_in_entry_range(spread_pct: float, params: StrategyParams = DEFAULT_PARAMS) -> bool:
+    """MIN_SPREAD <= |спред| <= MAX_SPREAD"""
+    return params.min_spread <= abs(spread_pct) <= params.max_spread
+
+
+def entry_side(xt_price: float, dex_price: float) -> str:
+    """LONG якщо XT дешевше за DEX, інакше SHORT"""
+    return "LONG" if xt_price < dex_price else "SHORT"
+
+
+def opportunity_score(spread_pct: float, liquidity: float, volume_24h: float) -> float:
+    """Рейтинг можливості для пошуку найкращого сигналу"""
+    return abs(spread_pct) * 100 + (liquidity / 1000) + (volume_24h / 10000)
+
+
+def position_pnl_pct(side: str, entry_price: float, current_price: float, leverage: float = None) -> float:
+    """P&L% позиції (з левериджем якщо передано)"""
+    if entry_price <= 0 or current_price <= 0:
+        return 0.0
+    if side.upper() in ('LONG', 'BUY'):
+        pnl_pct = ((current_price - entry_price) / entry_price) * 100
+    else:
+        pnl_pct = ((entry_price - current_price) / entry_price) * 100
+    if leverage:
+        pnl_pct *= float(leverage)
+    return round(pnl_pct, 2)
+
+
+def evaluate_exit(position: Dict, now: float, current_price: Optional[float],
+                  current_spread_pct: Union[float, None, Callable[[], Optional[float]]],
+                  params: StrategyParams = DEFAULT_PARAMS) -> Optional[Tuple[str, str, float]]:
+    """
+    🚪 Правила закриття (monitor_open_positions і backtest викликають саме цю функцію):
+    таймер → мінімальне утримання → TP → SL → 50% руху спреду → конвергенція.
+    current_spread_pct - число або функція без аргументів: монітор рахує спред DEX запитом
+    лише коли до правил спреду дійшло (TP/SL не спрацювали).
+    Повертає (код, опис, pnl_pct) або None якщо позицію тримаємо.
+    """
+    side = str(position.get('side', 'LONG')).upper()
+    entry_price = float(position.get('avg_entry') or position.get('entry_price') or 0)
+    leverage = float(position.get('leverage', params.leverage))
+
+    # ⏰ 1. Таймер (найвища пріоритетність)
+    if params.enable_time_stop:
+        expires_at = position.get('expires_at') or (position.get('opened_at', now) + params.position_max_age_sec)
+        if expires_at > 0 and now >= expires_at:
+            pnl_pct = position_pnl_pct(side, entry_price, current_price or 0, leverage)
+            hours = (now - position.get('opened_at', now)) / 3600
+            return 'time_stop', f"Time Stop (час: {hours:.1f}год)", pnl_pct
+
+    # Мінімальний час утримання
+    entry_time = position.get('entry_time', position.get('opened_at', now))
+    if now - entry_time < params.min_hold_sec:
+        return None
+
+    if not current_price or not entry_price:
+        return None
+
+    pnl_pct = position_pnl_pct(side, entry_price, current_price, leverage)
+
+    # 1. Take profit (з левериджем)
+    if pnl_pct >= params.take_profit_pct:
+        return 'take_profit', f"TP +{pnl_pct:.1f}%", pnl_pct
+
+    # 1.1 Стоп-лосс
+    if pnl_pct <= -params.stop_loss_pct:
+        return 'stop_loss', f"SL {pnl_pct:.1f}%", pnl_pct
+
+    if not ((params.half_move_close and position.get('entry_spread_pct')) or params.close_on_convergence):
+        return None
+    if callable(current_spread_pct):
+        current_spread_pct = current_spread_pct()
+    if current_spread_pct is None:
+        return None
+    current_spread_abs = abs(current_spread_pct)
+
+    # 1.2 50% руху від початкового спреду
+    if params.half_move_close and position.get('entry_spread_pct'):
+        initial_spread_pct = abs(position['entry_spread_pct'])
+        half_target = initial_spread_pct * params.half_move_pct
+        spread_reduction = initial_spread_pct - current_spread_abs
+        if spread_reduction >= half_target:
+            return 'half_move', f"50% рух: {initial_spread_pct:.2f}%→{current_spread_abs:.2f}%", pnl_pct
+
+    # 2. Конвергенція цін
+    if params.close_on_convergence and current_spread_abs <= params.convergence_spread_pct:
+        return 'convergence', f"DEX конвергенція {current_spread_abs:.2f}% ≤ {params.convergence_spread_pct}%", pnl_pct
+
+    return None
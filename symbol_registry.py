@@ -0,0 +1,169 @@
+"""
+🗂️ Реєстр символів XT <-> DEX
+Будується один раз з метаданих ринків XT і token_addresses.json: кожен контракт отримує числовий ID,
+чисту базу, множник контракту (1000PEPE = ціна за 1000 токенів), канонічну DEX назву/токен і готові
+посилання. Гарячі шляхи роблять O(1) lookup замість replace('/USDT:USDT', '') та replace('1000', '').
+"""
+
+import json
+import logging
+import sys
+import threading
+from typing import Dict, Optional
+
+from config import DEX_SYMBOL_ALIASES
+
+TOKEN_ADDRESSES_FILE = 'token_addresses.json'
+
+# Префікси контрактів "за N токенів" (довші першими); після префікса має йти літера: 1INCH не множник
+MULTIPLIER_PREFIXES = (('1000000', 1000000), ('1M', 1000000), ('100000', 100000),
+                       ('10000', 10000), ('1000', 1000))
+
+# Назви мереж token_addresses.json -> сегмент URL DexScreener
+DEXSCREENER_CHAINS = {
+    'ethereum': 'ethereum', 'bsc': 'bsc', 'polygon': 'polygon', 'avalanche': 'avalanche',
+    'solana': 'solana', 'arbitrum': 'arbitrum', 'optimism': 'optimism', 'base': 'base'
+}
+
+
+def base_of(symbol: str) -> str:
+    """'1000PEPE/USDT:USDT' -> '1000PEPE' (також приймає 'PEPE/USDT' та 'pepe')"""
+    return symbol.split('/')[0].split(':')[0].upper()
+
+
+def split_multiplier(base: str):
+    """'1000PEPE' -> ('PEPE', 1000); 'BTC' -> ('BTC', 1)"""
+    for prefix, multiplier in MULTIPLIER_PREFIXES:
+        rest = base[len(prefix):]
+        if base.startswith(prefix) and rest[:1].isalpha():
+            return rest, multiplier
+    return base, 1
+
+
+class SymbolInfo:
+    """Незмінний запис реєстру для одного XT контракту"""
+
+    __slots__ = ('id', 'symbol', 'base', 'dex_base', 'multiplier', 'dex_token', 'dex_link', 'xt_link')
+
+    def __init__(self, id: int, symbol: str, base: str, dex_base: str, multiplier: int,
+                 dex_token: Optional[Dict], dex_link: str, xt_link: str):
+        self.id = id
+        self.symbol = symbol
+        self.base = base
+        self.dex_base = dex_base
+        self.multiplier = multiplier
+        self.dex_token = dex_token
+        self.dex_link = dex_link
+        self.xt_link = xt_link
+
+    def to_contract_price(self, dex_unit_price: Optional[float]) -> Optional[float]:
+        """Ціна 1 токена на DEX -> ціна в одиницях XT контракту (для 1000PEPE x1000)"""
+        if dex_unit_price is None:
+            return None
+        return dex_unit_price * self.multiplier
+
+    def to_unit_price(self, contract_price: Optional[float]) -> Optional[float]:
+        if contract_price is None:
+            return None
+        return contract_price / self.multiplier
+
+    def to_dict(self) -> Dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class SymbolRegistry:
+    """XT контракт / чиста база / DEX база -> SymbolInfo"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.by_name: Dict[str, SymbolInfo] = {}  # символ контракту, база і DEX база
+        self.by_id: Dict[int, SymbolInfo] = {}
+        self.listed = set()  # Контракти з метаданих ринків (решта - синтезовані для невідомих назв)
+        self.token_addresses: Optional[Dict[str, Dict]] = None
+
+    def _load_token_addresses(self) -> Dict[str, Dict]:
+        if self.token_addresses is None:
+            try:
+                with open(TOKEN_ADDRESSES_FILE, 'r', encoding='utf-8') as f:
+                    self.token_addresses = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError) as e:
+                logging.warning(f"🚨 Cannot load {TOKEN_ADDRESSES_FILE}: {e}")
+                self.token_addresses = {}
+        return self.token_addresses
+
+    def _make_info(self, symbol: str, base: str) -> SymbolInfo:
+        dex_base, multiplier = split_multiplier(base)
+        dex_base = DEX_SYMBOL_ALIASES.get(dex_base, DEX_SYMBOL_ALIASES.get(base, dex_base))
+        token_addresses = self._load_token_addresses()
+        dex_token = token_addresses.get(dex_base) or token_addresses.get(base)
+
+        if dex_token and dex_token.get('address') and dex_token.get('chain'):
+            chain = dex_token['chain'].lower()
+            dex_link = f"https://dexscreener.com/{DEXSCREENER_CHAINS.get(chain, chain)}/{dex_token['address']}"
+        else:
+            dex_link = f"https://dexscreener.com/search?q={dex_base}"
+
+        return SymbolInfo(
+            id=len(self.by_id) + 1,
+            symbol=sys.intern(symbol),
+            base=sys.intern(base),
+            dex_base=sys.intern(dex_base),
+            multiplier=multiplier,
+            dex_token=dex_token,
+            dex_link=dex_link,
+            xt_link=f"https://www.xt.com/en/trade/futures_{base}USDT"
+        )
+
+    def _register(self, symbol: str, base: str, listed: bool = False) -> SymbolInfo:
+        """
+        Під self.lock. Назва (база, DEX база) вказує на лістингований контракт замість синтезованого,
+        а точний збіг бази переважає збіг DEX бази (PEPE/USDT:USDT перед 1000PEPE/USDT:USDT для 'PEPE')
+        """
+        info = self.by_name.get(symbol)
+        if info is None or info.symbol != symbol or (listed and symbol not in self.listed):
+            info = self._make_info(symbol, base)
+            self.by_id[info.id] = info
+        if listed:
+            self.listed.add(info.symbol)
+        for name in (info.symbol, info.base, info.dex_base):
+            existing = self.by_name.get(name)
+            if (existing is None or existing.symbol not in self.listed
+                    or (name == info.base and existing.base != name and info.symbol in self.listed)):
+                self.by_name[name] = info
+        return info
+
+    def build(self, markets: Dict) -> int:
+        """Реєструє всі ринки (повторний виклик додає нові лістинги); повертає кількість контрактів"""
+        with self.lock:
+            for symbol, meta in markets.items():
+                base = (meta or {}).get('base') or base_of(symbol)
+                self._register(symbol, base.upper(), listed=True)
+            contracts = len(self.listed)
+            scaled = sum(1 for symbol in self.listed if self.by_name[symbol].multiplier > 1)
+        logging.info(f"🗂️ Реєстр символів: {contracts} контрактів, {scaled} з множником (1000x)")
+        return contracts
+
+    def get(self, name: str) -> SymbolInfo:
+        """
+        O(1) lookup за символом контракту, базою або DEX базою; невідомі назви реєструються на льоту.
+        Невідомий контракт ('PEPE/USDT:USDT') отримує власний запис з множником з його назви -
+        не запис іншого ринку з тією ж DEX базою (1000PEPE x1000)
+        """
+        info = self.by_name.get(name)
+        if info is not None:
+            return info
+        base = base_of(name)
+        if '/' not in name:
+            info = self.by_name.get(base)
+            if info is not None:
+                return info
+        with self.lock:
+            # Невідомий контракт (ринки ще не завантажені) або гола назва токена
+            symbol = name if '/' in name else f"{base}/USDT:USDT"
+            return self._register(symbol, base)
+
+    def dex_base(self, name: str) -> str:
+        return self.get(name).dex_base
+
+
+symbol_registry = SymbolRegistry()
@@ -5,21 +5,35 @@
 """
 
 import numpy as np
-import pandas as pd
 import logging
+import math
 from typing import Dict, List, Tuple, Optional
 from datetime import datetime, timedelta
 
+from indicator_engine import indicator_engine, ema_series
+from price_history import price_history
+
 logger = logging.getLogger(__name__)
 
-# Спробуємо імпортувати TA-Lib, якщо недоступний - використовуємо власні розрахунки
-try:
-    import talib
-    TALIB_AVAILABLE = True
-    logger.info("✅ TA-Lib доступний - використовуємо повний набір індикаторів")
-except ImportError:
-    TALIB_AVAILABLE = False
-    logger.warning("⚠️ TA-Lib недоступний - використовуємо базові індикатори")
+_UNSET = object()
+_talib_module = _UNSET
+
+
+def _talib():
+    """
+    TA-Lib імпортується при першому розрахунку, а не при import модуля (C-розширення
+    сповільнює старт веб-інтерфейсу); None - недоступний, використовуємо власні розрахунки
+    """
+    global _talib_module
+    if _talib_module is _UNSET:
+        try:
+            import talib
+            _talib_module = talib
+            logger.info("✅ TA-Lib доступний - використовуємо повний набір індикаторів")
+        except ImportError:
+            _talib_module = None
+            logger.warning("⚠️ TA-Lib недоступний - використовуємо базові індикатори")
+    return _talib_module
 
 class TechnicalIndicators:
     """Клас для розрахунку технічних індикаторів"""
@@ -43,8 +57,8 @@ class TechnicalIndicators:
     def calculate_rsi(self, prices: List[float], period: int = 14) -> float:
         """Розрахунок RSI (Relative Strength Index)"""
         try:
-            if TALIB_AVAILABLE and len(prices) >= period:
-                rsi_values = talib.RSI(np.array(prices), timeperiod=period)
+            if _talib() and len(prices) >= period:
+                rsi_values = _talib().RSI(np.array(prices), timeperiod=period)
                 return float(rsi_values[-1]) if not np.isnan(rsi_values[-1]) else 50.0
             else:
                 # Власний розрахунок RSI
@@ -75,8 +89,8 @@ class TechnicalIndicators:
     def calculate_macd(self, prices: List[float], fast: int = 12, slow: int = 26, signal: int = 9) -> Dict[str, float]:
         """Розрахунок MACD"""
         try:
-            if TALIB_AVAILABLE and len(prices) >= slow:
-                macd_line, signal_line, histogram = talib.MACD(
+            if _talib() and len(prices) >= slow:
+                macd_line, signal_line, histogram = _talib().MACD(
                     np.array(prices), 
                     fastperiod=fast, 
                     slowperiod=slow, 
@@ -99,22 +113,14 @@ class TechnicalIndicators:
         if len(prices) < slow:
             return {'macd': 0.0, 'signal': 0.0, 'histogram': 0.0}
         
-        prices_array = np.array(prices)
+        prices_array = np.array(prices, dtype=np.float64)
         
-        # EMA розрахунок
-        def ema(data, period):
-            alpha = 2.0 / (period + 1)
-            ema_values = np.zeros_like(data)
-            ema_values[0] = data[0]
-            for i in range(1, len(data)):
-                ema_values[i] = alpha * data[i] + (1 - alpha) * ema_values[i-1]
-            return ema_values
-        
-        ema_fast = ema(prices_array, fast)
-        ema_slow = ema(prices_array, slow)
+        # EMA розрахунок (векторизований, без Python-циклу)
+        ema_fast = ema_series(prices_array, fast)
+        ema_slow = ema_series(prices_array, slow)
         
         macd_line = ema_fast - ema_slow
-        signal_line = ema(macd_line, signal)
+        signal_line = ema_series(macd_line, signal)
         histogram = macd_line - signal_line
         
         return {
@@ -126,8 +132,8 @@ class TechnicalIndicators:
     def calculate_bollinger_bands(self, prices: List[float], period: int = 20, std_dev: float = 2.0) -> Dict[str, float]:
         """Розрахунок Bollinger Bands"""
         try:
-            if TALIB_AVAILABLE and len(prices) >= period:
-                upper, middle, lower = talib.BBANDS(
+            if _talib() and len(prices) >= period:
+                upper, middle, lower = _talib().BBANDS(
                     np.array(prices), 
                     timeperiod=period, 
                     nbdevup=std_dev, 
@@ -180,8 +186,8 @@ class TechnicalIndicators:
             
             for period in periods:
                 if len(prices) >= period:
-                    if TALIB_AVAILABLE:
-                        ma = talib.SMA(np.array(prices), timeperiod=period)
+                    if _talib():
+                        ma = _talib().SMA(np.array(prices), timeperiod=period)
                         ma_results[f'sma_{period}'] = float(ma[-1]) if not np.isnan(ma[-1]) else prices[-1]
                     else:
                         ma = np.mean(prices[-period:])
@@ -212,8 +218,8 @@ class TechnicalIndicators:
     def calculate_atr(self, highs: List[float], lows: List[float], closes: List[float], period: int = 14) -> float:
         """Розрахунок ATR (Average True Range)"""
         try:
-            if TALIB_AVAILABLE and len(highs) >= period:
-                atr = talib.ATR(
+            if _talib() and len(highs) >= period:
+                atr = _talib().ATR(
                     np.array(highs), 
                     np.array(lows), 
                     np.array(closes), 
@@ -247,23 +253,42 @@ class TechnicalIndicators:
     
     def analyze_symbol_full(self, symbol: str, price_data: Dict) -> Dict:
         """Повний технічний аналіз символу"""
-        cache_key = f"full_analysis_{symbol}_{hash(str(price_data))}"
+        prices = price_data.get('prices', [])
+        
+        # Ключ кешу з довжини та крайніх значень ряду (без str() всієї історії)
+        if prices:
+            cache_key = f"full_analysis_{symbol}_{len(prices)}_{prices[0]}_{prices[-1]}"
+        else:
+            cache_key = f"full_analysis_{symbol}_{price_data.get('current_price')}_{indicator_engine.samples(symbol)}"
         cached = self._get_cached_result(cache_key)
         if cached:
             return cached
         
         try:
             # Отримання даних
-            prices = price_data.get('prices', [])
             volumes = price_data.get('volumes', [])
             highs = price_data.get('highs', prices)
             lows = price_data.get('lows', prices)
             
+            # ⚡ Без історії - читаємо готовий стан інкрементального движка
+            if not prices:
+                streaming = self.analyze_symbol_streaming(symbol)
+                if streaming:
+                    return streaming
+            
+            if not prices:
+                # 📈 Реальна історія зі сканера замість синтетичного ряду
+                history = price_history.get_window(symbol, 120)
+                if history:
+                    valid = [i for i, p in enumerate(history['close']) if not math.isnan(p)]
+                    prices = [history['close'][i] for i in valid]
+                    highs = [history['high'][i] for i in valid]
+                    lows = [history['low'][i] for i in valid]
+                    volumes = []  # У history об'єм 24h, а не по свічці - VWAP не рахуємо
+            
             if not prices:
-                # Мок дані для тестування
-                current_price = price_data.get('current_price', 100.0)
-                prices = [current_price * (1 + (i-25)*0.001) for i in range(50)]
-                volumes = [1000000 + (i * 10000) for i in range(50)]
+                logger.warning(f"⚠️ Немає історії цін для {symbol} - нейтральний аналіз")
+                return self._neutral_analysis(symbol, price_data.get('current_price', 100.0))
             
             # Розрахунок всіх індикаторів
             analysis = {
@@ -289,23 +314,61 @@ class TechnicalIndicators:
         except Exception as e:
             logger.error(f"Помилка повного аналізу {symbol}: {e}")
             # Повертаємо базовий аналіз
-            current_price = price_data.get('current_price', 100.0)
-            return {
-                'symbol': symbol,
-                'timestamp': datetime.now().isoformat(),
-                'current_price': current_price,
-                'rsi': 50.0,
-                'macd': {'macd': 0.0, 'signal': 0.0, 'histogram': 0.0},
-                'bollinger': {
-                    'upper': current_price * 1.02,
-                    'middle': current_price,
-                    'lower': current_price * 0.98
-                },
-                'ma': {'sma_20': current_price, 'sma_50': current_price},
-                'vwap': current_price,
-                'atr': current_price * 0.02,
-                'signals': {'trend': 'neutral', 'strength': 'weak'}
-            }
+            return self._neutral_analysis(symbol, price_data.get('current_price', 100.0))
+    
+    def _neutral_analysis(self, symbol: str, current_price: float) -> Dict:
+        """Базовий нейтральний аналіз (немає даних або помилка)"""
+        return {
+            'symbol': symbol,
+            'timestamp': datetime.now().isoformat(),
+            'current_price': current_price,
+            'rsi': 50.0,
+            'macd': {'macd': 0.0, 'signal': 0.0, 'histogram': 0.0},
+            'bollinger': {
+                'upper': current_price * 1.02,
+                'middle': current_price,
+                'lower': current_price * 0.98
+            },
+            'ma': {'sma_20': current_price, 'sma_50': current_price},
+            'vwap': current_price,
+            'atr': current_price * 0.02,
+            'signals': {'trend': 'neutral', 'strength': 'weak'}
+        }
+    
+    def analyze_symbol_streaming(self, symbol: str) -> Optional[Dict]:
+        """Аналіз з інкрементального движка (O(1), без перерахунку історії)"""
+        snapshot = indicator_engine.get(symbol)
+        if not snapshot or snapshot['samples'] < 26:
+            return None
+        
+        current_price = snapshot['current_price']
+        rsi = snapshot['rsi']
+        macd = snapshot['macd']
+        bollinger = snapshot['bollinger']
+        
+        rsi_signal = 'overbought' if rsi > 70 else 'oversold' if rsi < 30 else 'neutral'
+        trend = 'bullish' if macd['histogram'] > 0 else 'bearish' if macd['histogram'] < 0 else 'neutral'
+        volatility = (bollinger['upper'] - bollinger['middle']) / 2.0 / bollinger['middle'] if bollinger['middle'] else 0.0
+        strength = 'strong' if volatility > 0.03 else 'medium' if volatility > 0.015 else 'weak'
+        
+        return {
+            'symbol': symbol,
+            'timestamp': datetime.now().isoformat(),
+            'current_price': current_price,
+            'rsi': rsi,
+            'macd': macd,
+            'bollinger': bollinger,
+            'ma': {'sma_20': bollinger['middle']},
+            'vwap': snapshot['vwap'],
+            'atr': snapshot['atr'],
+            'signals': {
+                'trend': trend,
+                'rsi_signal': rsi_signal,
+                'strength': strength,
+                'volatility': float(volatility)
+            },
+            'samples': snapshot['samples']
+        }
     
     def _generate_signals(self, prices: List[float], volumes: List[float]) -> Dict:
         """Генерація торгових сигналів"""
@@ -6,6 +6,8 @@ from datetime import datetime, timedelta
 from telegram import Update, ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.ext import Application, CommandHandler, CallbackQueryHandler, MessageHandler, filters, ContextTypes
 import bot, config, utils
+from metrics import format_status_summary
+from log_pipeline import get_log_level, set_log_level
 import json
 
 # Authorized users (додайте свої Telegram ID)
@@ -125,8 +127,11 @@ async def status(update: Update, context: ContextTypes.DEFAULT_TYPE):
 🎯 Леверидж: {config.LEVERAGE}x
 📚 Макс. позицій: {config.MAX_OPEN_POSITIONS}
 📖 Глибина стакану: {config.ORDER_BOOK_DEPTH}
+📝 Рівень логів: {get_log_level()}
 
 🔄 Інтервал сканування: {config.SCAN_INTERVAL}с
+
+{format_status_summary()}
 """
     await update.message.reply_text(status_text, parse_mode='Markdown')
 
@@ -620,6 +625,7 @@ async def settings_buttons_menu(update: Update, context: ContextTypes.DEFAULT_TY
 🎯 Леверидж: {config.LEVERAGE}x
 📚 Макс. позицій: {config.MAX_OPEN_POSITIONS}
 📖 Глибина стакану: {config.ORDER_BOOK_DEPTH}
+📝 Рівень логів: {get_log_level()}
 
 📈 **УСЕРЕДНЕННЯ:**
 🔄 Увімкнено: {"✅" if config.AVERAGING_ENABLED else "❌"}
@@ -644,6 +650,7 @@ async def settings_buttons_menu(update: Update, context: ContextTypes.DEFAULT_TY
             InlineKeyboardButton("🔄 Усереднення", callback_data="settings_averaging")
         ],
         [
+            InlineKeyboardButton("📝 Рівень логів", callback_data="settings_loglevel"),
             InlineKeyboardButton("🔄 Оновити", callback_data="settings_refresh")
         ]
     ]
@@ -744,6 +751,22 @@ async def handle_settings_buttons(update: Update, context: ContextTypes.DEFAULT_
 
 Виберіть параметр для налаштування:"""
         
+    elif query.data == "settings_loglevel":
+        keyboard = [
+            [InlineKeyboardButton("🐞 DEBUG", callback_data="set_loglevel_DEBUG"),
+             InlineKeyboardButton("ℹ️ INFO", callback_data="set_loglevel_INFO")],
+            [InlineKeyboardButton("⚠️ WARNING", callback_data="set_loglevel_WARNING"),
+             InlineKeyboardButton("❌ ERROR", callback_data="set_loglevel_ERROR")],
+            [InlineKeyboardButton("◀️ Назад", callback_data="settings_back")]
+        ]
+        text = f"""📝 **РІВЕНЬ ЛОГУВАННЯ** (поточний: {get_log_level()})
+
+DEBUG - всі рядки без проріджування (діагностика)
+INFO - повторювані per-symbol рядки не частіше разу на {config.LOG_SAMPLE_INTERVAL_SEC}с
+WARNING / ERROR - тільки проблеми
+
+Змінюється одразу, без перезапуску:"""
+
     elif query.data == "settings_refresh" or query.data == "settings_back":
         return await settings_buttons_menu_refresh(query)
         
@@ -791,6 +814,15 @@ async def handle_settings_buttons(update: Update, context: ContextTypes.DEFAULT_
         ]
         text = f"💵 **МАКСИМАЛЬНИЙ РОЗМІР ПОЗИЦІЇ** (поточний: ${config.MAX_POSITION_USDT_PER_SYMBOL})\n\nВиберіть максимальний розмір позиції на один символ:"
     
+    elif query.data.startswith("set_loglevel_"):
+        level = set_log_level(query.data.replace("set_loglevel_", ""))
+        # Дописуємо до runtime_config.json (save_config_to_file перезаписує файл цілком)
+        utils.save_config_to_file({**utils.load_config_from_file(), "LOG_LEVEL": level})
+        logging.warning(f"📝 Рівень логування змінено на {level}")
+        keyboard = [[InlineKeyboardButton("◀️ Назад до налаштувань", callback_data="settings_back")]]
+        await query.edit_message_text(f"✅ Рівень логування: {level}", reply_markup=InlineKeyboardMarkup(keyboard))
+        return
+
     # Обробка встановлення значень
     elif query.data.startswith("set_"):
         return await handle_setting_change(query)
@@ -868,6 +900,7 @@ async def settings_buttons_menu_refresh(query):
 🎯 Леверидж: {config.LEVERAGE}x
 📚 Макс. позицій: {config.MAX_OPEN_POSITIONS}
 📖 Глибина стакану: {config.ORDER_BOOK_DEPTH}
+📝 Рівень логів: {get_log_level()}
 
 Натисніть кнопку щоб змінити параметр:
 """
@@ -884,6 +917,9 @@ async def settings_buttons_menu_refresh(query):
         [
             InlineKeyboardButton("📖 Глибина стакану", callback_data="settings_depth"),
             InlineKeyboardButton("🔄 Оновити", callback_data="settings_refresh")
+        ],
+        [
+            InlineKeyboardButton("📝 Рівень логів", callback_data="settings_loglevel")
         ]
     ]
     
@@ -1104,6 +1140,55 @@ async def handle_cancel_command(update: Update, context: ContextTypes.DEFAULT_TY
         logging.error(f"Помилка обробки команди скасування: {e}")
         await update.message.reply_text("❌ Помилка обробки команди скасування")
 
+async def profile_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """🔬 /profile [секунд] - семплюючий профайлер усіх потоків, підсумок + flamegraph файл"""
+    if not is_authorized(update.effective_user.id):
+        return
+
+    import asyncio
+    import profiler
+
+    try:
+        seconds = float(context.args[0]) if context.args else config.PROFILER_DEFAULT_SECONDS
+    except ValueError:
+        await update.message.reply_text("❌ Використання: /profile [секунд]")
+        return
+    if profiler.is_running():
+        await update.message.reply_text("⏳ Профайлер вже працює, дочекайтесь результату")
+        return
+
+    seconds = max(1.0, min(seconds, config.PROFILER_MAX_SECONDS))
+    await update.message.reply_text(f"🔬 Профілюю {seconds:.0f}с...")
+    try:
+        # Блокуючий прогін - в окремому потоці щоб не зупиняти event loop Telegram
+        result = await asyncio.get_running_loop().run_in_executor(None, profiler.run_profile, seconds)
+        if result is None:
+            await update.message.reply_text("⏳ Профайлер вже працює, дочекайтесь результату")
+            return
+        await update.message.reply_text(profiler.format_profile_summary(result), parse_mode='Markdown')
+        with open(result['collapsed_file'], 'rb') as f:
+            await update.message.reply_document(f, filename=os.path.basename(result['collapsed_file']),
+                                                caption="🔥 flamegraph.pl / speedscope.app")
+    except Exception as e:
+        logging.error(f"❌ Помилка /profile: {e}")
+        await update.message.reply_text(f"❌ Помилка профайлера: {e}")
+
+async def stacks_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """🧵 /stacks - дамп стеків усіх потоків (завислі воркери)"""
+    if not is_authorized(update.effective_user.id):
+        return
+
+    import profiler
+
+    try:
+        text, path = profiler.dump_thread_stacks()
+        await update.message.reply_text(profiler.format_stacks_summary(text), parse_mode='Markdown')
+        with open(path, 'rb') as f:
+            await update.message.reply_document(f, filename=os.path.basename(path))
+    except Exception as e:
+        logging.error(f"❌ Помилка /stacks: {e}")
+        await update.message.reply_text(f"❌ Помилка дампу стеків: {e}")
+
 def setup_telegram_bot():
     """Setup Telegram bot"""
     if not config.TELEGRAM_BOT_TOKEN:
@@ -1124,6 +1209,8 @@ def setup_telegram_bot():
     application.add_handler(CommandHandler("set_leverage", set_leverage))
     application.add_handler(CommandHandler("set_positions", set_positions))
     application.add_handler(CommandHandler("set_depth", set_depth))
+    application.add_handler(CommandHandler("profile", profile_command))
+    application.add_handler(CommandHandler("stacks", stacks_command))
     
     # Дублікати команд видалено
     
@@ -1141,6 +1228,7 @@ def setup_telegram_bot():
 def run_telegram_bot():
     """Run Telegram bot"""
     import asyncio
+    bot.init_xt_accounts()  # Команди закриття/синхронізації працюють з акаунтами цього процесу
     try:
         # Create new event loop for this thread
         loop = asyncio.new_event_loop()
@@ -0,0 +1,382 @@
+"""
+📡 Приватний WebSocket потік XT futures (user data): ордери, позиції, баланс
+Кожен торговий акаунт тримає з'єднання з USER_STREAM_URL (listenKey з REST), а події оновлюють
+локальну книгу позицій і балансу. Поки потік здоровий, монітор позицій, закриття та Telegram
+читають книгу замість fetch_positions; REST звірка лишається рідкісною перевіркою безпеки
+(USER_STREAM_RECONCILE_SEC) і виконується одразу після кожного (пере)підключення.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from config import (USER_STREAM_ENABLED, USER_STREAM_URL, USER_STREAM_PING_SEC, USER_STREAM_STALE_SEC,
+                    USER_STREAM_RECONNECT_MAX_SEC, USER_STREAM_LISTEN_KEY_TTL_SEC, USER_STREAM_RECONCILE_SEC)
+from metrics import metrics, provider_call
+
+EVENTS = metrics.counter(
+    'arb_user_stream_events_total', 'Події приватного WebSocket потоку', ('account', 'topic'))
+RECONNECTS = metrics.counter(
+    'arb_user_stream_reconnects_total', 'Перепідключення приватного WebSocket потоку', ('account',))
+RECONCILE_DRIFT = metrics.counter(
+    'arb_user_stream_reconcile_drift_total', 'Розбіжності книги позицій з REST при звірці', ('account',))
+
+TOPICS = ('order', 'position', 'balance')
+
+# Стан ордера XT -> ccxt
+ORDER_STATUSES = {'NEW': 'open', 'PARTIALLY_FILLED': 'open', 'FILLED': 'closed', 'CANCELED': 'canceled',
+                  'REJECTED': 'rejected', 'EXPIRED': 'expired', 'PARTIALLY_CANCELED': 'canceled'}
+MAX_ORDERS_KEPT = 500
+
+
+def _float(value, default: float = 0.0) -> float:
+    try:
+        return float(value) if value not in (None, '') else default
+    except (TypeError, ValueError):
+        return default
+
+
+class PositionBook:
+    """Локальна книга одного акаунту: позиції у форматі ccxt fetch_positions, баланс USDT, останні ордери"""
+
+    def __init__(self, xt):
+        self.xt = xt
+        self.lock = threading.Lock()
+        self.positions: Dict[tuple, Dict] = {}  # (symbol, 'long'|'short') -> позиція
+        self.ws_updated: Dict[tuple, float] = {}  # (symbol, side) -> monotonic час останньої WS події (включно з закриттям)
+        self.balance: Optional[Dict] = None  # {'total', 'free', 'used'}
+        self.orders: Dict[str, Dict] = {}  # orderId -> ордер у форматі ccxt
+        self.order_updated = threading.Condition(self.lock)
+        self.synced = False  # Після першої REST звірки книга повна
+        self.updated_at = 0.0
+        self.symbols_by_id: Dict[str, str] = {}
+
+    def _symbol(self, market_id: str) -> str:
+        """'btc_usdt' -> 'BTC/USDT:USDT' (за id ринків клієнта)"""
+        symbol = self.symbols_by_id.get(market_id)
+        if symbol is None:
+            self.symbols_by_id = {m.get('id'): s for s, m in (self.xt.markets or {}).items()
+                                  if m.get('swap') or m.get('type') == 'swap'}
+            symbol = self.symbols_by_id.get(market_id) or market_id
+        return symbol
+
+    def apply_position(self, data: Dict):
+        symbol = self._symbol(data.get('symbol', ''))
+        side = (data.get('positionSide') or 'LONG').lower()
+        contracts = abs(_float(data.get('positionSize')))
+        key = (symbol, side)
+        with self.lock:
+            self.updated_at = time.time()
+            self.ws_updated[key] = time.monotonic()
+            if contracts <= 0:
+                self.positions.pop(key, None)
+                return
+            previous = self.positions.get(key) or {}
+            market = (self.xt.markets or {}).get(symbol) or {}
+            contract_size = _float(market.get('contractSize'), 1.0)
+            # WS подія зазвичай не містить mark; стара ціна з REST не переноситься - споживачі беруть тікер
+            mark_price = _float(data.get('markPrice')) or None
+            self.positions[key] = {
+                'symbol': symbol,
+                'side': side,
+                'contracts': contracts,
+                'contractSize': contract_size,
+                'entryPrice': _float(data.get('entryPrice')),
+                'markPrice': mark_price,
+                'notional': contracts * contract_size * (mark_price or _float(data.get('entryPrice'))),
+                'leverage': _float(data.get('leverage'), previous.get('leverage') or 1),
+                'collateral': _float(data.get('isolatedMargin'), previous.get('collateral') or 0),
+                'marginMode': 'isolated' if data.get('positionType') == 'ISOLATED' else 'cross',
+                'unrealizedPnl': previous.get('unrealizedPnl', 0.0),
+                'percentage': previous.get('percentage', 0.0),
+                'timestamp': int(self.updated_at * 1000),
+                'info': data
+            }
+
+    def apply_balance(self, data: Dict):
+        if (data.get('coin') or '').lower() != 'usdt':
+            return
+        total = _float(data.get('walletBalance'))
+        used = _float(data.get('isolatedMargin')) + _float(data.get('crossedMargin')) + _float(data.get('openOrderMarginFrozen'))
+        free = _float(data.get('availableBalance'), total - used)
+        with self.lock:
+            self.balance = {'total': total, 'free': free, 'used': used}
+            self.updated_at = time.time()
+
+    def apply_order(self, data: Dict) -> Dict:
+        order = {
+            'id': str(data.get('orderId')),
+            'symbol': self._symbol(data.get('symbol', '')),
+            'type': (data.get('orderType') or 'MARKET').lower(),
+            'side': (data.get('orderSide') or '').lower(),
+            'amount': _float(data.get('origQty')),
+            'filled': _float(data.get('executedQty')),
+            'average': _float(data.get('avgPrice')) or None,
+            'price': _float(data.get('price')) or None,
+            'status': ORDER_STATUSES.get(data.get('state'), 'open'),
+            'timestamp': data.get('createdTime'),
+            'info': data
+        }
+        with self.order_updated:
+            self.orders[order['id']] = order
+            while len(self.orders) > MAX_ORDERS_KEPT:
+                self.orders.pop(next(iter(self.orders)))
+            self.updated_at = time.time()
+            self.order_updated.notify_all()
+        return order
+
+    def wait_order(self, order_id: str, timeout: float) -> Optional[Dict]:
+        """Чекає фінального стану ордера з потоку (filled/canceled); None якщо подія не прийшла"""
+        deadline = time.monotonic() + timeout
+        with self.order_updated:
+            while True:
+                order = self.orders.get(str(order_id))
+                if order and order['status'] != 'open':
+                    return order
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self.order_updated.wait(remaining)
+
+    def replace(self, rest_positions: List[Dict], fetched_at: float = None) -> int:
+        """
+        REST знімок стає книгою; повертає кількість розбіжностей з тим що було в книзі.
+        fetched_at - monotonic час початку REST запиту: позиції, оновлені WS подіями після нього,
+        новіші за знімок і лишаються як є (включно з закритими)
+        """
+        snapshot = {}
+        for pos in rest_positions or []:
+            contracts = abs(_float(pos.get('contracts') or pos.get('size')))
+            if contracts > 0 and pos.get('symbol'):
+                snapshot[(pos['symbol'], (pos.get('side') or 'long').lower())] = dict(pos)
+        with self.lock:
+            if fetched_at is not None:
+                for key, updated in self.ws_updated.items():
+                    if updated < fetched_at:
+                        continue
+                    if key in self.positions:
+                        snapshot[key] = self.positions[key]
+                    else:
+                        snapshot.pop(key, None)
+                self.ws_updated = {key: updated for key, updated in self.ws_updated.items() if updated >= fetched_at}
+            drift = 0
+            if self.synced:
+                for key in set(snapshot) | set(self.positions):
+                    ours, theirs = self.positions.get(key), snapshot.get(key)
+                    if ours is None or theirs is None or \
+                            abs(_float(ours.get('contracts')) - abs(_float(theirs.get('contracts')))) > 1e-9:
+                        drift += 1
+            self.positions = snapshot
+            self.synced = True
+            self.updated_at = time.time()
+        return drift
+
+    def get_positions(self, symbols: List[str] = None) -> List[Dict]:
+        wanted = set(symbols or [])
+        with self.lock:
+            return [dict(pos) for (symbol, _), pos in self.positions.items() if not wanted or symbol in wanted]
+
+
+class UserDataStream:
+    """Потік одного акаунту: окремий asyncio цикл у фоновому потоці, перепідключення з backoff"""
+
+    def __init__(self, name: str, xt, url: str = USER_STREAM_URL):
+        self.name = name
+        self.xt = xt
+        self.url = url
+        self.book = PositionBook(xt)
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        self.connected = False
+        self.last_message_at = 0.0
+        self.connected_at = 0.0
+        self.reconnects = 0
+        self.last_error = ''
+        self.last_reconcile_at = 0.0
+
+    def start(self):
+        if self.thread and self.thread.is_alive():
+            return self.thread
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=lambda: asyncio.run(self._run()),
+                                       name=f"user-stream-{self.name}", daemon=True)
+        self.thread.start()
+        return self.thread
+
+    def stop(self):
+        self.stop_event.set()
+
+    def healthy(self) -> bool:
+        """Книга актуальна: з'єднання живе, були повідомлення (включно з pong) і пройшла REST звірка"""
+        return (self.connected and self.book.synced
+                and time.monotonic() - self.last_message_at < USER_STREAM_STALE_SEC)
+
+    def _listen_key(self) -> str:
+        """listenKey приватного потоку (симулятор видає свій)"""
+        if hasattr(self.xt, 'fetch_listen_key'):
+            return self.xt.fetch_listen_key()
+        with provider_call('xt', 'listen_key'):
+            response = self.xt.privateLinearGetFutureUserV1UserListenKey()
+        return response['result']
+
+    def reconcile(self) -> int:
+        """REST звірка книги (після підключення та раз на USER_STREAM_RECONCILE_SEC)"""
+        started = time.monotonic()
+        with provider_call('xt', 'fetch_positions'):
+            positions = self.xt.fetch_positions()
+        drift = self.book.replace(positions, fetched_at=started)
+        self.last_reconcile_at = time.time()
+        if drift:
+            RECONCILE_DRIFT.inc(self.name, amount=drift)
+            logging.warning(f"📡 {self.name}: звірка з REST знайшла {drift} розбіжностей у книзі позицій - виправлено")
+        return drift
+
+    async def _run(self):
+        try:
+            import aiohttp
+        except ImportError:
+            logging.warning(f"📡 {self.name}: aiohttp не встановлено - позиції через REST опитування")
+            return
+        backoff = 1.0
+        while not self.stop_event.is_set():
+            try:
+                await self._session(aiohttp)
+                backoff = 1.0
+            except Exception as e:
+                self.last_error = str(e)[:200]
+                logging.warning(f"📡 {self.name}: приватний потік розірвано: {e}")
+            self.connected = False
+            if self.stop_event.is_set():
+                break
+            self.reconnects += 1
+            RECONNECTS.inc(self.name)
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, USER_STREAM_RECONNECT_MAX_SEC)
+
+    async def _session(self, aiohttp):
+        loop = asyncio.get_running_loop()
+        listen_key = await loop.run_in_executor(None, self._listen_key)
+        async with aiohttp.ClientSession() as session:
+            async with session.ws_connect(self.url, heartbeat=None, autoping=True) as ws:
+                await ws.send_str(json.dumps({'method': 'SUBSCRIBE', 'id': uuid.uuid4().hex[:12],
+                                              'params': [f"{topic}@{listen_key}" for topic in TOPICS]}))
+                # Знімок після підписки: події між знімком і підпискою не губляться
+                await loop.run_in_executor(None, self.reconcile)
+                self.connected = True
+                self.connected_at = self.last_message_at = time.monotonic()
+                logging.info(f"📡 {self.name}: приватний потік підключено ({self.url}), "
+                             f"{len(self.book.positions)} позицій у книзі")
+                pinger = asyncio.create_task(self._ping(ws))
+                try:
+                    while not self.stop_event.is_set():
+                        if time.monotonic() - self.connected_at > USER_STREAM_LISTEN_KEY_TTL_SEC:
+                            logging.info(f"📡 {self.name}: оновлюємо listenKey")
+                            return
+                        try:
+                            msg = await ws.receive(timeout=USER_STREAM_PING_SEC)
+                        except asyncio.TimeoutError:
+                            continue
+                        if msg.type != aiohttp.WSMsgType.TEXT:
+                            if msg.type in (aiohttp.WSMsgType.CLOSE, aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                                raise ConnectionError(f"WebSocket закрито ({msg.type.name})")
+                            continue
+                        self.last_message_at = time.monotonic()
+                        if msg.data != 'pong':
+                            self._dispatch(msg.data)
+                finally:
+                    pinger.cancel()
+
+    async def _ping(self, ws):
+        while True:
+            await asyncio.sleep(USER_STREAM_PING_SEC)
+            await ws.send_str('ping')
+
+    def _dispatch(self, raw: str):
+        try:
+            message = json.loads(raw)
+        except ValueError:
+            return
+        topic, data = message.get('topic'), message.get('data')
+        if not isinstance(data, dict) or topic not in TOPICS:
+            return  # Відповідь на підписку тощо
+        EVENTS.inc(self.name, topic)
+        try:
+            if topic == 'position':
+                self.book.apply_position(data)
+            elif topic == 'balance':
+                self.book.apply_balance(data)
+            else:
+                order = self.book.apply_order(data)
+                if order['status'] == 'closed':
+                    logging.info(f"📡 {self.name}: ордер {order['id']} {order['symbol']} {order['side']} "
+                                 f"виконано {order['filled']} @ {order['average']}")
+        except Exception as e:
+            logging.error(f"❌ {self.name}: помилка обробки події {topic}: {e}")
+
+    def snapshot(self) -> Dict:
+        return {
+            'connected': self.connected,
+            'healthy': self.healthy(),
+            'positions': len(self.book.positions),
+            'reconnects': self.reconnects,
+            'last_message_age_sec': round(time.monotonic() - self.last_message_at, 1) if self.last_message_at else None,
+            'last_reconcile_at': self.last_reconcile_at,
+            'last_error': self.last_error
+        }
+
+
+_streams: Dict[str, UserDataStream] = {}
+_reconcile_thread: Optional[threading.Thread] = None
+_reconcile_stop = threading.Event()
+
+
+def start_user_streams(accounts: Dict) -> Dict[str, UserDataStream]:
+    """{назва: клієнт} -> запущені потоки; для симулятора - локальний stub сервер замість біржі"""
+    global _reconcile_thread
+    if not USER_STREAM_ENABLED:
+        return {}
+    url = USER_STREAM_URL
+    if any(getattr(client, 'is_simulator', False) for client in accounts.values()):
+        import user_stream_stub
+        url = user_stream_stub.start_for_simulator(accounts.values())
+    for name, client in accounts.items():
+        if name in _streams:
+            continue
+        stream = UserDataStream(name, client, url)
+        client.arb_user_stream = stream
+        _streams[name] = stream
+        stream.start()
+    if _reconcile_thread is None or not _reconcile_thread.is_alive():
+        _reconcile_thread = threading.Thread(target=_reconcile_loop, name='user-stream-reconcile', daemon=True)
+        _reconcile_thread.start()
+    return dict(_streams)
+
+
+def _reconcile_loop():
+    while not _reconcile_stop.wait(USER_STREAM_RECONCILE_SEC):
+        for stream in list(_streams.values()):
+            if not stream.connected:
+                continue  # REST опитування й так активне; знімок буде після перепідключення
+            try:
+                stream.reconcile()
+            except Exception as e:
+                logging.warning(f"📡 {stream.name}: помилка REST звірки: {e}")
+
+
+def stream_for(xt) -> Optional[UserDataStream]:
+    """Здоровий потік клієнта або None (тоді - REST)"""
+    stream = getattr(xt, 'arb_user_stream', None)
+    return stream if stream is not None and stream.healthy() else None
+
+
+def snapshot() -> Dict[str, Dict]:
+    return {name: stream.snapshot() for name, stream in _streams.items()}
+
+
+metrics.gauge('arb_user_stream_healthy', 'Приватний потік акаунту здоровий (книга замість REST)',
+              lambda: {(name,): int(stream.healthy()) for name, stream in _streams.items()},
+              ('account',))
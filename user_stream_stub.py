@@ -0,0 +1,133 @@
+"""
+🧪 Локальний stub приватного WebSocket XT futures (ws://127.0.0.1:<port>/ws/user)
+Протокол як у біржі: SUBSCRIBE {topic}@{listenKey}, текстовий ping -> pong, події
+{"topic", "event", "data"}. Події публікуються через publish() або автоматично з SimulatedXT
+(event_listeners), тож user_stream.py перевіряється без біржі: paper-trading, benchmark, ручні тести.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+from typing import Dict, Optional, Set
+
+from config import USER_STREAM_STUB_PORT
+
+
+class UserStreamStubServer:
+    """aiohttp WebSocket сервер у власному потоці з власним asyncio циклом"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = USER_STREAM_STUB_PORT):
+        self.host = host
+        self.port = port
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.thread: Optional[threading.Thread] = None
+        self.ready = threading.Event()
+        self.subscriptions: Dict[str, Set] = {}  # "{topic}@{listenKey}" -> WebSocket клієнти
+        self.published = 0
+        self.runner = None
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}/ws/user"
+
+    def start(self) -> str:
+        """Запускає сервер (port=0 - вільний порт) і повертає URL"""
+        if self.thread and self.thread.is_alive():
+            return self.url
+        self.thread = threading.Thread(target=self._serve, name='user-stream-stub', daemon=True)
+        self.thread.start()
+        if not self.ready.wait(10):
+            raise RuntimeError("user stream stub не стартував")
+        logging.info(f"🧪 Stub приватного WebSocket XT: {self.url}")
+        return self.url
+
+    def _serve(self):
+        from aiohttp import web
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        app = web.Application()
+        app.router.add_get('/ws/user', self._handle)
+        self.runner = web.AppRunner(app)
+        self.loop.run_until_complete(self.runner.setup())
+        site = web.TCPSite(self.runner, self.host, self.port)
+        self.loop.run_until_complete(site.start())
+        self.port = site._server.sockets[0].getsockname()[1]
+        self.ready.set()
+        self.loop.run_forever()
+
+    async def _handle(self, request):
+        from aiohttp import web, WSMsgType
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                if msg.data == 'ping':
+                    await ws.send_str('pong')
+                    continue
+                try:
+                    request_msg = json.loads(msg.data)
+                except ValueError:
+                    continue
+                method = str(request_msg.get('method', '')).upper()
+                for channel in request_msg.get('params') or []:
+                    if method == 'SUBSCRIBE':
+                        self.subscriptions.setdefault(channel, set()).add(ws)
+                    elif method == 'UNSUBSCRIBE':
+                        self.subscriptions.get(channel, set()).discard(ws)
+                await ws.send_str(json.dumps({'id': request_msg.get('id'), 'code': 0, 'msg': 'success'}))
+        finally:
+            for clients in self.subscriptions.values():
+                clients.discard(ws)
+        return ws
+
+    def publish(self, listen_key: str, topic: str, data: Dict):
+        """Потокобезпечна публікація події підписникам {topic}@{listenKey}"""
+        if self.loop is None:
+            return
+        message = json.dumps({'topic': topic, 'event': topic, 'data': data})
+        self.loop.call_soon_threadsafe(self._broadcast, f"{topic}@{listen_key}", message)
+
+    def _broadcast(self, channel: str, message: str):
+        for ws in list(self.subscriptions.get(channel, ())):
+            if not ws.closed:
+                self.published += 1
+                asyncio.ensure_future(ws.send_str(message))
+
+    def disconnect_all(self):
+        """Розриває всі з'єднання (перевірка перепідключення та REST звірки)"""
+        if self.loop is None:
+            return
+        clients = {ws for channel_clients in self.subscriptions.values() for ws in channel_clients}
+        for ws in clients:
+            asyncio.run_coroutine_threadsafe(ws.close(), self.loop)
+
+    def stop(self):
+        if self.loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result(timeout=5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+_server: Optional[UserStreamStubServer] = None
+_server_lock = threading.Lock()
+
+
+def get_server() -> UserStreamStubServer:
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = UserStreamStubServer()
+            _server.start()
+        return _server
+
+
+def start_for_simulator(clients) -> str:
+    """Підключає події симульованих акаунтів до stub сервера; повертає URL для UserDataStream"""
+    server = get_server()
+    for client in clients:
+        if server.publish not in client.event_listeners:
+            client.event_listeners.append(server.publish)
+    return server.url
@@ -1,25 +1,19 @@
 import logging
 import requests
-import matplotlib.pyplot as plt
-import threading
-import time
 import json
 from datetime import datetime
 from typing import Optional
 
+from log_pipeline import setup_logging
+from metrics import provider_call
+from deadline import request_timeout
+
 # 🔗 НОВА ІНТЕГРАЦІЯ: DEX Link Generator для прямих посилань на торгові пари
 # Simple fallback instead of dex_link_generator
 
-# Configure logging and HIDE sensitive HTTP requests with tokens
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-
-# CRITICAL SECURITY: Hide HTTP requests with tokens from urllib3, httpx, and telegram library
-logging.getLogger('urllib3').setLevel(logging.WARNING)
-logging.getLogger('httpx').setLevel(logging.WARNING) 
-logging.getLogger('telegram').setLevel(logging.WARNING)
-logging.getLogger('telegram.ext').setLevel(logging.WARNING)
-logging.getLogger('httpcore').setLevel(logging.WARNING)
-logging.getLogger('requests').setLevel(logging.WARNING)
+# Configure logging (черга + фоновий слухач) and HIDE sensitive HTTP requests with tokens
+# CRITICAL SECURITY: urllib3, httpx та telegram логують тільки WARNING+ (див. log_pipeline.QUIET_LOGGERS)
+setup_logging()
 
 def calculate_spread(dex_price, xt_price, fee=0.06):
     # повертає відсотковий spread (в %)
@@ -28,14 +22,6 @@ def calculate_spread(dex_price, xt_price, fee=0.06):
     except Exception:
         return 0.0
 
-# Простий plotting (в окремому треді) - відключено в Replit
-_plot_lock = threading.Lock()
-def plot_spread_live(spread_store):
-    # Matplotlib plotting відключено для уникнення GUI проблем у веб-середовищі
-    logging.info("Plotting thread started (GUI disabled for web environment)")
-    while True:
-        time.sleep(5)  # просто тримаємо тред живим
-
 def send_telegram(bot_token, chat_id, text):
     """Базова функція відправки в телеграм з детальною діагностикою"""
     if not bot_token:
@@ -45,19 +31,23 @@ def send_telegram(bot_token, chat_id, text):
         logging.warning(f"❌ TELEGRAM: Chat ID порожній, пропускаємо відправку")
         return False
     
-    url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
+    from config import TELEGRAM_API_URL
+    url = f"{TELEGRAM_API_URL}/bot{bot_token}/sendMessage"
     try:
         # Обмежуємо довжину повідомлення
         if len(text) > 4000:
             text = text[:4000] + "..."
         
         # Відправляємо запит з HTML форматом БЕЗ web page preview
-        response = requests.post(url, data={
-            "chat_id": chat_id, 
-            "text": text, 
-            "parse_mode": "HTML",
-            "disable_web_page_preview": True
-        }, timeout=10)
+        with provider_call('telegram', 'send_message') as call:
+            response = requests.post(url, data={
+                "chat_id": chat_id, 
+                "text": text, 
+                "parse_mode": "HTML",
+                "disable_web_page_preview": True
+            }, timeout=request_timeout(10, 'telegram'))
+            if response.status_code != 200:
+                call.outcome = f"http_{response.status_code}"
         
         if response.status_code == 200:
             result = response.json()
@@ -562,52 +552,17 @@ def get_proper_dexscreener_link(symbol: str) -> str:
     1. Direct contract address link: https://dexscreener.com/{chain}/{contract_address}
     2. Fallback to search only if no contract address available
     
+    Links are precomputed once per symbol by symbol_registry (token_addresses.json is read once).
+    
     Args:
         symbol: Trading pair symbol (e.g., 'BTC/USDT:USDT' or 'ETH')
     
     Returns:
         str: Proper DexScreener link
     """
-    import json  # Move import to top to fix LSP error
     try:
-        # Clean symbol to match token_addresses.json format
-        clean_symbol = symbol.replace('/USDT:USDT', '').replace('/USDT', '').upper()
-        
-        # Load token addresses mapping
-        try:
-            with open('token_addresses.json', 'r', encoding='utf-8') as f:
-                token_addresses = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError) as e:
-            logging.warning(f"🚨 Cannot load token_addresses.json: {e}")
-            token_addresses = {}
-        
-        # Try to get contract address from mapping
-        token_info = token_addresses.get(clean_symbol, {})
-        if token_info.get('address') and token_info.get('chain'):
-            contract_address = token_info['address']
-            chain = token_info['chain'].lower()
-            
-            # Map chain names to DexScreener format
-            chain_mapping = {
-                'ethereum': 'ethereum',
-                'bsc': 'bsc', 
-                'polygon': 'polygon',
-                'avalanche': 'avalanche',
-                'solana': 'solana',
-                'arbitrum': 'arbitrum',
-                'optimism': 'optimism'
-            }
-            
-            dexscreener_chain = chain_mapping.get(chain, chain)
-            direct_link = f"https://dexscreener.com/{dexscreener_chain}/{contract_address}"
-            logging.info(f"✅ Direct DexScreener link: {clean_symbol} → {direct_link}")
-            return direct_link
-        
-        # Fallback to search only if no contract address
-        search_link = f"https://dexscreener.com/search?q={clean_symbol}"
-        logging.info(f"⚠️ No contract address for {clean_symbol}, using search: {search_link}")
-        return search_link
-        
+        from symbol_registry import symbol_registry
+        return symbol_registry.get(symbol).dex_link
     except Exception as e:
         logging.error(f"❌ Error generating DexScreener link for {symbol}: {e}")
         # Safe fallback
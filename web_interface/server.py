@@ -232,11 +232,22 @@ async def get_dashboard_data():
 async def get_futures_symbols(api_key: str = Depends(verify_api_key)):
     """Отримати всі доступні фьючерсні пари через CCXT"""
     try:
-        xt = get_xt_client()
-        if not xt:
-            raise HTTPException(status_code=503, detail="XT.com клієнт недоступний")
+        # 💾 Спочатку кеш метаданих ринків бота - без повного load_markets
+        markets = None
+        source = "Market cache + XT.com"
+        try:
+            from market_cache import load_cached_markets
+            cached = load_cached_markets()
+            markets = cached['markets'] if cached else None
+        except Exception as e:
+            logger.warning(f"Кеш ринків недоступний: {e}")
         
-        markets = xt.load_markets()
+        if not markets:
+            xt = get_xt_client()
+            if not xt:
+                raise HTTPException(status_code=503, detail="XT.com клієнт недоступний")
+            markets = xt.load_markets()
+            source = "CCXT + XT.com"
         
         # Фільтрація futures пар
         futures_symbols = []
@@ -255,7 +266,7 @@ async def get_futures_symbols(api_key: str = Depends(verify_api_key)):
             "count": len(futures_symbols),
             "total_count": len(futures_symbols),
             "excluded_pairs": excluded,
-            "source": "CCXT + XT.com",
+            "source": source,
             "message": f"Знайдено {len(futures_symbols)} доступних фьючерсних пар через CCXT"
         }
         
@@ -4,10 +4,9 @@ WSGI entry point for production deployment with Gunicorn
 import logging
 import threading
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+from log_pipeline import setup_logging
+
+setup_logging()
 
 # Import Flask app
 from main import app, start_trading_bot
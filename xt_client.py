@@ -1,10 +1,19 @@
 import ccxt
 import logging
 import time
-from config import XT_API_KEY, XT_API_SECRET, XT_ACCOUNT_2_API_KEY, XT_ACCOUNT_2_API_SECRET, DRY_RUN, ALLOW_LIVE_TRADING
+import weakref
+from config import XT_API_KEY, XT_API_SECRET, XT_ACCOUNT_2_API_KEY, XT_ACCOUNT_2_API_SECRET, DRY_RUN, ALLOW_LIVE_TRADING, XT_SIMULATOR
+import market_cache
+from metrics import provider_call
+from deadline import check_deadline
+import execution_engine
+from user_stream import stream_for
+import order_book
 
 # Глобальна змінна для збереження ринків XT
 xt_markets = {}
+xt_markets_loaded_at = 0.0  # Час отримання ринків з біржі (з кешу - час збереження кешу)
+_xt_clients = weakref.WeakSet()  # Всі створені клієнти - отримують оновлені ринки без load_markets
 
 def create_xt(api_key=None, api_secret=None, account_name="Account 1"):
     """Створення XT клієнта для арбітражної торгівлі
@@ -14,6 +23,13 @@ def create_xt(api_key=None, api_secret=None, account_name="Account 1"):
         api_secret: API секрет (якщо None, використовує XT_API_SECRET з config)
         account_name: Назва акаунту для логування
     """
+    # 🧪 Симулятор замість біржі (paper-trading / навантажувальні тести)
+    if XT_SIMULATOR:
+        import xt_simulator
+        xt = xt_simulator.create_simulated_xt(account_name)
+        logging.info(f"🧪 XT {account_name}: СИМУЛЯТОР ({len(xt.markets)} ринків) замість реальної біржі")
+        return xt
+    
     # Використовуємо передані ключі або дефолтні з config
     key = api_key if api_key is not None else XT_API_KEY
     secret = api_secret if api_secret is not None else XT_API_SECRET
@@ -44,12 +60,52 @@ def create_xt(api_key=None, api_secret=None, account_name="Account 1"):
     except Exception as e:
         logging.warning(f"⚠️ {account_name}: Не вдалося налаштувати connection pool: {e}")
     
+    xt.arb_account_name = account_name  # Мітка акаунту для метрик виконання ордерів
+
+    # 💾 Новий клієнт одразу отримує вже відомі ринки (без повторного load_markets)
+    _xt_clients.add(xt)
+    if xt_markets:
+        try:
+            xt.set_markets(xt_markets)
+        except Exception as e:
+            logging.warning(f"⚠️ {account_name}: Не вдалося застосувати кеш ринків: {e}")
+    
     logging.info(f"✅ XT {account_name} клієнт створено успішно")
     return xt
 
-def load_xt_futures_markets(xt):
-    """🚀 Завантажує ВСІ futures ринки XT (swap + future для 700+)"""
-    global xt_markets
+def _apply_xt_markets(markets, loaded_at):
+    """Оновлює глобальні ринки та передає їх усім створеним клієнтам"""
+    global xt_markets, xt_markets_loaded_at
+    xt_markets = markets
+    xt_markets_loaded_at = loaded_at
+    execution_engine.invalidate_templates()  # contractSize/limits могли змінитись
+    for client in list(_xt_clients):
+        try:
+            client.set_markets(markets)
+        except Exception as e:
+            logging.warning(f"⚠️ Не вдалося оновити ринки клієнта XT: {e}")
+
+def apply_xt_markets(markets, loaded_at):
+    """Ринки від координатора без запиту до біржі (процеси шардів сканування)"""
+    _apply_xt_markets(markets, loaded_at)
+
+def load_xt_futures_markets(xt, use_cache=True):
+    """🚀 Завантажує ВСІ futures ринки XT (swap + future для 700+)
+    
+    Args:
+        use_cache: спочатку читати ринки з MARKET_CACHE_FILE (фонове оновлення - market_cache)
+    """
+    # 🧪 Ринки симулятора не змішуємо з дисковим кешем реальної біржі
+    simulated = getattr(xt, 'is_simulator', False)
+    
+    # 💾 ШВИДКИЙ СТАРТ: ринки з дискового кешу без запитів до біржі
+    if use_cache and not simulated:
+        cached = market_cache.load_cached_markets()
+        if cached:
+            _apply_xt_markets(cached['markets'], cached['saved_at'])
+            age_min = (time.time() - cached['saved_at']) / 60
+            logging.info(f"💾 XT ринки з кешу: {len(xt_markets)} пар (вік {age_min:.0f}хв)")
+            return dict(xt_markets)
     
     # 🚀 РОЗШИРЕНИЙ ПОШУК: завантажуємо ОБА типи futures
     # 1. Завантажуємо perpetual swaps
@@ -61,7 +117,6 @@ def load_xt_futures_markets(xt):
     # 3. Об'єднуємо всі ринки
     all_markets = {**swap_markets, **future_markets}
     
-    xt_markets = {}
     futures_markets = {}
     count = 0
     futures_count = 0
@@ -78,7 +133,6 @@ def load_xt_futures_markets(xt):
             # 🎯 КРИТИЧНО: ТІЛЬКИ FUTURES/SWAP (виключаємо SPOT)
             if market_type in ['swap', 'future']:
                 futures_markets[symbol] = meta
-                xt_markets[symbol] = meta
                 count += 1
                 futures_count += 1
                 
@@ -101,17 +155,27 @@ def load_xt_futures_markets(xt):
     else:
         logging.warning(f"⚠️ Очікувалося >=700 futures пар, отримано {futures_count}")
     
+    if futures_markets:
+        _apply_xt_markets(futures_markets, time.time())
+        if not simulated:
+            market_cache.save_markets_cache(futures_markets)
+    
     return futures_markets
 
 def fetch_xt_ticker(xt, symbol):
     """Отримання тікера з XT"""
-    return xt.fetch_ticker(symbol)
+    check_deadline('xt_fetch_ticker')  # ⏳ Не починаємо нових викликів після дедлайну сканування
+    with provider_call('xt', 'fetch_ticker'):
+        return xt.fetch_ticker(symbol)
 
 def get_all_xt_futures_pairs(client):
     """Отримати всі доступні futures торгові пари з XT.com"""
     try:
-        # Загружаємо всі ринки
-        markets = client.load_markets()
+        # 💾 Спочатку вже завантажені/кешовані ринки, load_markets тільки якщо їх немає
+        markets = xt_markets
+        if not markets:
+            cached = market_cache.load_cached_markets()
+            markets = cached['markets'] if cached else client.load_markets()
         
         # Фільтруємо тільки futures USDT пари
         futures_pairs = []
@@ -138,12 +202,15 @@ def get_all_xt_futures_pairs(client):
 
 def fetch_xt_order_book(xt, symbol, depth=10):
     """Отримання стакану з XT"""
-    return xt.fetch_order_book(symbol, depth)
+    check_deadline('xt_fetch_order_book')
+    with provider_call('xt', 'fetch_order_book'):
+        return xt.fetch_order_book(symbol, depth)
 
 def collect_market_depth_data(xt, symbol, depth_levels=20):
     """
     📊 ЗБІР ДАНИХ ПРО ГЛИБИНУ РИНКУ
     Отримує детальну інформацію про обсяги заявок на різних рівнях цін
+    (знімок стакану тіку з order_book - без окремого запиту якщо стакан вже отримано)
     
     Повертає:
     {
@@ -158,125 +225,27 @@ def collect_market_depth_data(xt, symbol, depth_levels=20):
     }
     """
     try:
-        orderbook = fetch_xt_order_book(xt, symbol, depth_levels)
-        if not orderbook or 'bids' not in orderbook or 'asks' not in orderbook:
+        book = order_book.get_book(xt, symbol, depth_levels)
+        if book is None:
             return None
-            
-        # Обробка bids (заявки на покупку)
-        processed_bids = []
-        total_bid_liquidity = 0
-        for price, volume in orderbook['bids'][:depth_levels]:
-            price_float = float(price)
-            volume_float = float(volume)
-            total_usd = price_float * volume_float
-            total_bid_liquidity += total_usd
-            
-            processed_bids.append({
-                'price': price_float,
-                'volume': volume_float,
-                'total_usd': total_usd
-            })
-        
-        # Обробка asks (заявки на продаж)
-        processed_asks = []
-        total_ask_liquidity = 0
-        for price, volume in orderbook['asks'][:depth_levels]:
-            price_float = float(price)
-            volume_float = float(volume)
-            total_usd = price_float * volume_float
-            total_ask_liquidity += total_usd
-            
-            processed_asks.append({
-                'price': price_float,
-                'volume': volume_float,
-                'total_usd': total_usd
-            })
-        
-        # Аналіз глибини по рівнях
-        bid_depth_analysis = _analyze_depth_levels(processed_bids, "bids")
-        ask_depth_analysis = _analyze_depth_levels(processed_asks, "asks")
-        
-        # Аналіз спредів між рівнями
-        spread_analysis = _analyze_level_spreads(processed_bids, processed_asks)
+        book = book.head(depth_levels)
         
         return {
             'symbol': symbol,
             'timestamp': time.time(),
-            'bids': processed_bids,
-            'asks': processed_asks,
-            'bid_depth_analysis': bid_depth_analysis,
-            'ask_depth_analysis': ask_depth_analysis,
-            'total_bid_liquidity': total_bid_liquidity,
-            'total_ask_liquidity': total_ask_liquidity,
-            'spread_analysis': spread_analysis
+            'bids': book.bids.levels(),
+            'asks': book.asks.levels(),
+            'bid_depth_analysis': book.bids.depth_analysis(),
+            'ask_depth_analysis': book.asks.depth_analysis(),
+            'total_bid_liquidity': book.bids.liquidity_usd(),
+            'total_ask_liquidity': book.asks.liquidity_usd(),
+            'spread_analysis': book.level_spread_analysis()
         }
         
     except Exception as e:
         logging.error(f"❌ Помилка збору даних глибини ринку {symbol}: {e}")
         return None
 
-def _analyze_depth_levels(levels, side_name):
-    """Аналізує розподіл ліквідності по рівнях"""
-    if not levels or len(levels) < 3:
-        return {"quality": "poor", "reason": "Недостатньо рівнів"}
-    
-    # Аналіз концентрації ліквідності
-    top3_liquidity = sum(level['total_usd'] for level in levels[:3])
-    total_liquidity = sum(level['total_usd'] for level in levels)
-    
-    concentration_pct = (top3_liquidity / total_liquidity * 100) if total_liquidity > 0 else 0
-    
-    # Аналіз розподілу обсягів
-    volumes = [level['volume'] for level in levels]
-    avg_volume = sum(volumes) / len(volumes) if volumes else 0
-    
-    # Визначення якості глибини
-    if concentration_pct > 80:
-        quality = "concentrated"  # Ліквідність сконцентрована в топ-3
-    elif concentration_pct > 60:
-        quality = "balanced"      # Збалансований розподіл
-    else:
-        quality = "distributed"   # Рівномірно розподілена
-    
-    return {
-        "quality": quality,
-        "levels_count": len(levels),
-        "top3_concentration_pct": concentration_pct,
-        "avg_volume_per_level": avg_volume,
-        "total_liquidity": total_liquidity
-    }
-
-def _analyze_level_spreads(bids, asks):
-    """Аналіз спредів між рівнями цін"""
-    spreads_analysis = {}
-    
-    # Спред між найкращими bid/ask
-    if bids and asks:
-        best_bid = bids[0]['price']
-        best_ask = asks[0]['price']
-        bid_ask_spread = ((best_ask - best_bid) / best_bid) * 100
-        spreads_analysis['bid_ask_spread_pct'] = bid_ask_spread
-    
-    # Спреди між рівнями в bids
-    if len(bids) >= 3:
-        bid_spreads = []
-        for i in range(len(bids) - 1):
-            spread = ((bids[i]['price'] - bids[i+1]['price']) / bids[i]['price']) * 100
-            bid_spreads.append(spread)
-        spreads_analysis['avg_bid_level_spread_pct'] = sum(bid_spreads) / len(bid_spreads)
-        spreads_analysis['max_bid_level_spread_pct'] = max(bid_spreads)
-    
-    # Спреди між рівнями в asks  
-    if len(asks) >= 3:
-        ask_spreads = []
-        for i in range(len(asks) - 1):
-            spread = ((asks[i+1]['price'] - asks[i]['price']) / asks[i]['price']) * 100
-            ask_spreads.append(spread)
-        spreads_analysis['avg_ask_level_spread_pct'] = sum(ask_spreads) / len(ask_spreads)
-        spreads_analysis['max_ask_level_spread_pct'] = max(ask_spreads)
-    
-    return spreads_analysis
-
 def analyze_xt_order_book_liquidity(xt, symbol, side, usd_amount, min_liquidity_ratio=2.0):
     """
     🔍 АНАЛІЗ СТАКАНУ XT - перевірка ліквідності перед входом
@@ -287,35 +256,27 @@ def analyze_xt_order_book_liquidity(xt, symbol, side, usd_amount, min_liquidity_
     Повертає: (can_trade, liquidity_info)
     """
     try:
-        orderbook = fetch_xt_order_book(xt, symbol, depth=10)
-        if not orderbook or 'bids' not in orderbook or 'asks' not in orderbook:
+        book = order_book.get_book(xt, symbol, depth=10)
+        if book is None:
             return False, "❌ Не вдалося отримати XT стакан"
         
         # Визначаємо сторону для аналізу
-        relevant_side = orderbook['asks'] if side == "LONG" else orderbook['bids'] 
+        relevant_side = book.side(side)
         side_name = "asks (продажі)" if side == "LONG" else "bids (покупки)"
         
-        if not relevant_side or len(relevant_side) < 3:
+        if len(relevant_side) < 3:
             return False, f"❌ Недостатньо XT ордерів в {side_name}: {len(relevant_side)}"
         
         # Аналізуємо перші 5 рівнів стакану
-        total_liquidity_usd = 0
         levels_analyzed = min(5, len(relevant_side))
-        
-        for i in range(levels_analyzed):
-            price = float(relevant_side[i][0])
-            quantity = float(relevant_side[i][1])
-            level_usd = price * quantity
-            total_liquidity_usd += level_usd
+        total_liquidity_usd = relevant_side.liquidity_usd(levels_analyzed)
         
         # Перевірка мінімальної ліквідності
         required_liquidity = usd_amount * min_liquidity_ratio
-        liquidity_ok = total_liquidity_usd >= required_liquidity
         
-        # Аналіз спреду між рівнями
-        best_price = float(relevant_side[0][0])
-        second_price = float(relevant_side[1][0]) if len(relevant_side) > 1 else best_price
-        spread_between_levels = abs(second_price - best_price) / best_price * 100
+        # Аналіз спреду між рівнями та VWAP виконання всього ордера
+        spread_between_levels = float(relevant_side.level_gaps_pct()[0])
+        fill = relevant_side.fill(usd_amount)
         
         # Детальна оцінка якості стакану
         quality_issues = []
@@ -329,7 +290,9 @@ def analyze_xt_order_book_liquidity(xt, symbol, side, usd_amount, min_liquidity_
         if quality_issues:
             return False, f"❌ XT проблеми стакану: {'; '.join(quality_issues)}"
         
-        return True, f"✅ XT стакан ОК: ліквідність ${total_liquidity_usd:.0f} ({total_liquidity_usd/usd_amount:.1f}x), спред {spread_between_levels:.2f}%"
+        return True, (f"✅ XT стакан ОК: ліквідність ${total_liquidity_usd:.0f} ({total_liquidity_usd/usd_amount:.1f}x), "
+                      f"спред {spread_between_levels:.2f}%, прослизання ${usd_amount:.0f}: {fill['slippage_pct']:.3f}% "
+                      f"({fill['levels_used']} рівнів)")
         
     except Exception as e:
         return False, f"❌ Помилка аналізу XT стакану: {str(e)}"
@@ -344,7 +307,14 @@ def get_xt_futures_balance(xt):
                 'used': 50.0
             }
         
-        balance = xt.fetch_balance({'type': 'swap'})
+        # 📡 Баланс з приватного WebSocket потоку (REST тільки якщо потік не здоровий)
+        stream = stream_for(xt)
+        if stream is not None and stream.book.balance:
+            return dict(stream.book.balance)
+        
+        check_deadline('xt_fetch_balance')
+        with provider_call('xt', 'fetch_balance'):
+            balance = xt.fetch_balance({'type': 'swap'})
         
         # 🔍 DEBUG: Логування сирої відповіді для діагностики
         logging.info(f"🔍 RAW XT BALANCE: {balance}")
@@ -392,6 +362,8 @@ def is_xt_futures_tradeable(symbol):
     """Перевіряє чи можна торгувати токен на XT futures (USDT, USD, USDC)"""
     try:
         if symbol not in xt_markets:
+            if xt_markets:
+                market_cache.request_refresh(symbol)  # Можливо новий лістинг - оновлюємо кеш
             return False
         
         market = xt_markets[symbol]
@@ -415,141 +387,106 @@ def is_xt_futures_tradeable(symbol):
         logging.error(f"Помилка перевірки XT futures для {symbol}: {e}")
         return False
 
-def xt_open_market_position(xt, symbol, side, usd_amount, leverage, xt_price_ref=None, dex_price_ref=None, spread_ref=None):
+def xt_open_market_position(xt, symbol, side, usd_amount, leverage, xt_price_ref=None, dex_price_ref=None, spread_ref=None,
+                            price_age_sec=None):
     """
     Створює ринковий ордер на XT futures через CCXT (аналогічно Gate.io).
     
     IMPORTANT: usd_amount це MARGIN (маржа яку ризикуємо), не notional value.
     Notional value = margin * leverage
+    
+    ⚡ Низьколатентний шлях (execution_engine): шаблон ордера з кешу, set_leverage тільки при зміні,
+    ціна тригерного тіку (xt_price_ref) якщо price_age_sec <= EXEC_PRICE_MAX_AGE_SEC, Telegram після повернення.
     """
     # 🔒 ПОДВІЙНИЙ ЗАХИСТ: DRY_RUN + ALLOW_LIVE_TRADING
     if DRY_RUN:
         logging.info("[XT DRY-RUN] create market %s %s %sUSDT @ lev %s", symbol, side, usd_amount, leverage)
         return {"id":"dry-xt-"+str(time.time()), "price": None}
     
-    # 🔍 DEBUG: Логування стану конфігурації  
-    logging.info(f"🔍 OPEN DEBUG: ALLOW_LIVE_TRADING={ALLOW_LIVE_TRADING}, DRY_RUN={DRY_RUN}")
-    
     if not ALLOW_LIVE_TRADING:
         logging.error("[XT SECURITY] 🚨 LIVE TRADING BLOCKED: ALLOW_LIVE_TRADING=False")
         raise Exception("Live trading not allowed - set ALLOW_LIVE_TRADING=true")
     
     # Ініціалізуємо змінні для exception handling
-    current_price = 0.0
     instant_price = 0.0
+    prepare_started = time.perf_counter()
+    account = execution_engine.account_label(xt)
     try:
-        # 📊 КРОК 1: Отримуємо market metadata для символу
-        logging.info(f"[XT {symbol}] 📊 КРОК 1: Отримання market metadata...")
+        # 📊 КРОК 1-3: Шаблон ордера (contractSize, limits, precision) - з кешу
         try:
-            market = xt.market(symbol)
-            logging.info(f"[XT {symbol}] ✅ Market metadata отримано: {market.get('id', 'N/A')}")
+            template = execution_engine.get_template(xt, symbol)
         except Exception as e:
-            error_msg = f"❌ Не вдалося отримати market metadata: {e}"
-            logging.error(f"[XT {symbol}] {error_msg}")
+            logging.error(f"[XT {symbol}] ❌ Не вдалося отримати market metadata: {e}")
             return None
         
-        # 🔍 КРОК 2: Отримуємо contractSize з market metadata
-        contract_size = market.get('contractSize', 1.0)
-        logging.info(f"[XT {symbol}] 📏 КРОК 2: contractSize = {contract_size}")
-        
-        # 📏 КРОК 3: Отримуємо limits та precision з market
-        exchange_min_size = float(market.get('limits', {}).get('amount', {}).get('min', 0.001))
-        amount_precision = market.get('precision', {}).get('amount', 6)
-        logging.info(f"[XT {symbol}] 📊 КРОК 3: Limits - min_amount={exchange_min_size}, precision={amount_precision}")
-        
         # ⚡ КРОК 4: Обмежуємо leverage до максимально дозволеного
-        max_leverage = market.get('limits', {}).get('leverage', {}).get('max', leverage)
-        if max_leverage is None:
-            max_leverage = leverage
-        clamped_leverage = min(leverage, max_leverage)
-        
+        clamped_leverage = template.clamp_leverage(leverage)
         if clamped_leverage != leverage:
-            logging.warning(f"[XT {symbol}] ⚠️ КРОК 4: Leverage обмежено з {leverage}x до {clamped_leverage}x (максимум для ринку)")
-        else:
-            logging.info(f"[XT {symbol}] ✅ КРОК 4: Leverage {clamped_leverage}x в межах дозволеного (max={max_leverage}x)")
+            logging.warning(f"[XT {symbol}] ⚠️ Leverage обмежено з {leverage}x до {clamped_leverage}x (максимум для ринку)")
         
-        # ⚙️ КРОК 5: Встановлюємо плече для futures контракту
+        # ⚙️ КРОК 5: Плече на біржі - REST виклик тільки якщо значення змінилось
         position_side = "LONG" if side == "LONG" else "SHORT"
-        try:
-            xt.set_leverage(clamped_leverage, symbol, {"positionSide": position_side})
-            logging.info(f"[XT {symbol}] ⚙️ КРОК 5: Встановлено леверидж {clamped_leverage}x ({position_side})")
-        except Exception as e:
-            logging.warning(f"[XT {symbol}] ⚠️ КРОК 5: Помилка встановлення левериджу: {e}")
-            pass
+        execution_engine.ensure_leverage(xt, symbol, clamped_leverage, position_side)
 
         # 💰 КРОК 6: Розрахунок margin та notional value
         margin_amount = usd_amount
         notional_value = margin_amount * clamped_leverage
-        logging.info(f"[XT {symbol}] 💰 КРОК 6: margin=${margin_amount:.2f}, leverage={clamped_leverage}x → notional=${notional_value:.2f}")
         
-        # 🎯 КРОК 7: Отримуємо миттєву ціну для розрахунку
-        logging.info(f"[XT {symbol}] 🎯 КРОК 7: Отримання миттєвої ціни...")
-        ticker = fetch_xt_ticker(xt, symbol)
-        if not ticker or 'last' not in ticker:
-            error_msg = f"❌ Не вдалося отримати свіжу ціну для ордера"
-            logging.error(f"[XT {symbol}] {error_msg}")
-            return None
-        
-        instant_price = float(ticker['last'])
-        logging.info(f"[XT {symbol}] ✅ КРОК 7: instant_price = ${instant_price:.6f}")
+        # 🎯 КРОК 7: Ціна тригерного тіку якщо свіжа, інакше миттєва ціна з біржі
+        instant_price = execution_engine.reuse_trigger_price(xt_price_ref, price_age_sec)
+        if instant_price is None:
+            ticker = fetch_xt_ticker(xt, symbol)
+            if not ticker or 'last' not in ticker:
+                logging.error(f"[XT {symbol}] ❌ Не вдалося отримати свіжу ціну для ордера")
+                return None
+            instant_price = float(ticker['last'])
         
         # 🧮 КРОК 8: ПРАВИЛЬНИЙ розрахунок contracts з contractSize
         # Формула: contracts = notional_value / (contract_size * price)
-        contracts = notional_value / (contract_size * instant_price)
-        logging.info(f"[XT {symbol}] 🧮 КРОК 8: Розрахунок contracts = {notional_value:.2f} / ({contract_size} * {instant_price:.6f}) = {contracts:.6f}")
+        contracts = template.contracts_for(notional_value, instant_price)
         
         # 🔧 КРОК 9: Застосування amount_to_precision для округлення
-        logging.info(f"[XT {symbol}] 🔧 КРОК 9: Застосування amount_to_precision...")
         try:
             final_contracts = float(xt.amount_to_precision(symbol, contracts))
-            logging.info(f"[XT {symbol}] ✅ КРОК 9: final_contracts (precision) = {final_contracts:.6f}")
         except Exception as e:
-            logging.warning(f"[XT {symbol}] ⚠️ КРОК 9: Помилка amount_to_precision: {e}, використовуємо fallback")
-            final_contracts = round(float(contracts), amount_precision)
-            logging.info(f"[XT {symbol}] ⚠️ КРОК 9: final_contracts (fallback) = {final_contracts:.6f}")
+            logging.warning(f"[XT {symbol}] ⚠️ Помилка amount_to_precision: {e}, використовуємо fallback")
+            final_contracts = round(float(contracts), template.amount_precision)
         
         # ✅ КРОК 10: КРИТИЧНА ПЕРЕВІРКА мінімального розміру ПЕРЕД створенням ордера
-        logging.info(f"[XT {symbol}] ✅ КРОК 10: Перевірка мінімального розміру...")
-        if final_contracts < exchange_min_size:
-            error_msg = f"❌ Розмір {final_contracts:.6f} менший за мінімум {exchange_min_size:.6f}"
-            logging.error(f"[XT {symbol}] {error_msg}")
-            logging.error(f"[XT {symbol}] ❌ ОРДЕР НЕ ВІДПРАВЛЕНО через малий розмір")
+        if final_contracts < template.min_amount:
+            logging.error(f"[XT {symbol}] ❌ Розмір {final_contracts:.6f} менший за мінімум {template.min_amount:.6f} - ОРДЕР НЕ ВІДПРАВЛЕНО")
             return None
-        else:
-            logging.info(f"[XT {symbol}] ✅ КРОК 10: Розмір OK - {final_contracts:.6f} >= {exchange_min_size:.6f}")
         
         # 📊 КРОК 11: Перерахунок фінальних значень
-        final_notional = final_contracts * contract_size * instant_price
+        final_notional = final_contracts * template.contract_size * instant_price
         final_margin = final_notional / clamped_leverage
-        logging.info(f"[XT {symbol}] 📊 КРОК 11: Фінальні значення:")
-        logging.info(f"[XT {symbol}]   - contracts: {final_contracts:.6f}")
-        logging.info(f"[XT {symbol}]   - notional: ${final_notional:.2f}")
-        logging.info(f"[XT {symbol}]   - margin: ${final_margin:.2f}")
 
         # 🎯 КРОК 12: СТВОРЕННЯ ОРДЕРА
-        logging.info(f"[XT {symbol}] 🎯 КРОК 12: Створення ордера на біржі...")
-        order = xt.create_order(
-            symbol, 
-            'market', 
-            'buy' if side == "LONG" else 'sell', 
-            final_contracts, 
-            None,
-            {'type': 'swap', 'settle': 'usdt'}
-        )
-        logging.info(f"[XT FUTURES] ✅ Відкрито {side} позицію {symbol}: {final_contracts:.6f} контрактів = ${final_notional:.2f} NOTIONAL (margin ${final_margin:.2f})")
+        execution_engine.PREPARE_SECONDS.observe(time.perf_counter() - prepare_started, account)
+        with provider_call('xt', 'create_order'):
+            order, ack_sec = execution_engine.submit_order(
+                xt, xt.create_order,
+                symbol, 
+                'market', 
+                'buy' if side == "LONG" else 'sell', 
+                final_contracts, 
+                None,
+                {'type': 'swap', 'settle': 'usdt'}
+            )
+        order_book.invalidate(symbol)  # Власний ордер з'їв рівні - наступна перевірка бере свіжий стакан
+        logging.info(f"[XT FUTURES] ✅ Відкрито {side} позицію {symbol}: {final_contracts:.6f} контрактів = ${final_notional:.2f} NOTIONAL "
+                     f"(margin ${final_margin:.2f}, {clamped_leverage}x) | submit->ack {ack_sec * 1000:.0f}мс")
         
-        # 📱 КРОК 13: Відправка Telegram сповіщення
-        logging.info(f"[XT {symbol}] 📱 КРОК 13: Відправка Telegram сповіщення...")
+        # 📱 КРОК 13: Telegram сповіщення після повернення (не тримає order_placement_lock)
         from utils import send_telegram_trade_notification
-        send_telegram_trade_notification(
+        execution_engine.notify_async(
+            send_telegram_trade_notification,
             symbol, side, final_margin, instant_price, 
             action="OPENED (XT)", 
             spread=spread_ref, 
             exchange_price=xt_price_ref or instant_price, 
             dex_price=dex_price_ref
         )
-        
-        logging.info(f"[XT {symbol}] ✅ УСПІХ: Ордер створено та сповіщення відправлено")
         return order
     except Exception as e:
         # ДЕТАЛЬНЕ TELEGRAM СПОВІЩЕННЯ ПРО ПОМИЛКУ СТВОРЕННЯ XT ОРДЕРА (як просий користувач)
@@ -565,132 +502,135 @@ def xt_open_market_position(xt, symbol, side, usd_amount, leverage, xt_price_ref
         from utils import send_telegram
         from config import TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID
         # ❌ ПОМИЛКИ НЕ ВІДПРАВЛЯЄМО В ГРУПУ - тільки в приватний бот
-        send_telegram(TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, error_msg)
+        execution_engine.notify_async(send_telegram, TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, error_msg)
         logging.error("XT Order create error: %s %s", type(e).__name__, e)
         return None
 
-def xt_close_position_market(xt, symbol, side, usd_amount):
+def _position_contracts(pos):
+    """Кількість контрактів позиції CCXT (contracts або size), завжди >= 0"""
+    return abs(float(pos.get('contracts', 0) or pos.get('size', 0) or 0))
+
+def find_live_position(positions, symbol, side):
+    """Відкрита позиція symbol/side зі списку fetch_positions (None якщо немає)"""
+    for pos in positions or []:
+        if (pos.get('symbol') == symbol and 
+            (pos.get('side') or '').upper() == side.upper() and 
+            _position_contracts(pos) > 0):
+            return pos
+    return None
+
+def xt_close_position_market(xt, symbol, side, usd_amount, live_position=None):
     """
     Закриття позиції на XT futures.
     
     IMPORTANT: usd_amount це NOTIONAL VALUE (загальна вартість позиції), не margin.
     Це position['size_usdt'] з нашої системи.
+    
+    live_position - позиція вже отримана з fetch_positions (аварійне закриття всіх позицій), тоді
+    запит позицій пропускається; інакше позиція береться з книги приватного WebSocket потоку (REST fallback). Ціна для розрахунків - markPrice позиції (тікер тільки як fallback);
+    функція повертається одразу після відправки reduce-only ордера, виконання підтверджується у фоні
+    (execution_engine.confirm_fill_async), там же рахується реальний P&L і відправляється Telegram.
     """
     # 🔒 ПОДВІЙНИЙ ЗАХИСТ: DRY_RUN + ALLOW_LIVE_TRADING
     if DRY_RUN:
         logging.info("[XT DRY-RUN] close %s side %s %sUSDT", symbol, side, usd_amount)
         return True
     
-    # 🔍 DEBUG: Логування стану конфігурації
-    logging.info(f"🔍 CLOSE DEBUG: ALLOW_LIVE_TRADING={ALLOW_LIVE_TRADING}, DRY_RUN={DRY_RUN}")
-    
     if not ALLOW_LIVE_TRADING:
         logging.error("[XT SECURITY] 🚨 LIVE TRADING BLOCKED: ALLOW_LIVE_TRADING=False")
         return False
     
     # Ініціалізуємо змінні для exception handling  
     instant_price = 0.0
-    actual_position = None
+    actual_position = live_position
+    account = execution_engine.account_label(xt)
     try:
-        # 🔧 КРИТИЧНО: Отримуємо СПРАВЖНІЙ розмір позиції з біржі!
-        try:
-            live_positions = xt.fetch_positions([symbol])
-            actual_position = None
-            
-            for pos in live_positions:
-                if (pos.get('symbol') == symbol and 
-                    pos.get('side', '').upper() == side.upper() and 
-                    abs(float(pos.get('contracts', 0) or pos.get('size', 0))) > 0):
-                    actual_position = pos
-                    break
-                    
-            if not actual_position:
-                logging.warning(f"[XT {symbol}] ℹ️ Позиція {side} не знайдена - можливо вже закрита")
-                return True  # Вважаємо успішним якщо позиція вже закрита
-                
+        # 🔧 КРИТИЧНО: СПРАВЖНІЙ розмір позиції з біржі - один запит позицій на акаунт
+        if actual_position is None:
+            try:
+                actual_position = find_live_position(xt_fetch_positions(xt, [symbol]), symbol, side)
+                if not actual_position:
+                    logging.warning(f"[XT {symbol}] ℹ️ {account}: позиція {side} не знайдена - можливо вже закрита")
+                    return True  # Вважаємо успішним якщо позиція вже закрита
+            except Exception as e:
+                logging.warning(f"[XT {symbol}] ⚠️ Помилка отримання live позиції: {e}, використовуємо fallback")
+                actual_position = None
+        
+        if actual_position:
             # Використовуємо ТОЧНИЙ розмір контрактів з біржі
-            exact_contracts = abs(float(actual_position.get('contracts', 0) or actual_position.get('size', 0)))
-            
-        except Exception as e:
-            logging.warning(f"[XT {symbol}] ⚠️ Помилка отримання live позиції: {e}, використовуємо fallback")
-            # FALLBACK: отримуємо свіжу ціну для розрахунків
-            fallback_ticker = fetch_xt_ticker(xt, symbol)
-            if fallback_ticker and 'last' in fallback_ticker:
-                fallback_price = float(fallback_ticker['last'])
-                exact_contracts = usd_amount / fallback_price
-            else:
-                logging.error(f"[XT {symbol}] ❌ Не вдалося отримати ціну для fallback розрахунку")
+            exact_contracts = _position_contracts(actual_position)
+            instant_price = float(actual_position.get('markPrice') or 0)
+        
+        if instant_price <= 0:
+            # FALLBACK: тікер потрібен тільки якщо біржа не дала markPrice (або позицію не отримано)
+            ticker = fetch_xt_ticker(xt, symbol)
+            if not ticker or 'last' not in ticker:
+                logging.error(f"[XT {symbol}] ❌ Не вдалося отримати ціну для закриття")
                 return False
+            instant_price = float(ticker['last'])
         
-        # 🎯 ОДНА ЦІНА ПІДТВЕРДЖЕННЯ: отримуємо миттєву ціну БЕЗПОСЕРЕДНЬО перед закриттям
-        ticker = fetch_xt_ticker(xt, symbol)
-        if not ticker or 'last' not in ticker:
-            logging.error(f"[XT {symbol}] ❌ Не вдалося отримати миттєву ціну для закриття")
-            return False
-        
-        instant_price = float(ticker['last'])  # МИТТЄВА ЦІНА для точного закриття
-        
-        # Застосовуємо точність біржі
+        # Застосовуємо точність біржі (шаблон ордера з кешу)
         try:
-            market = xt.market(symbol)
+            template = execution_engine.get_template(xt, symbol)
+            if not actual_position:
+                exact_contracts = template.contracts_for(usd_amount, instant_price)
             contracts_precise = xt.amount_to_precision(symbol, exact_contracts)
-            min_amount = market.get('limits', {}).get('amount', {}).get('min', 1)
             
-            if float(contracts_precise) < min_amount:
-                logging.warning(f"[XT {symbol}] ⚠️ Розмір {contracts_precise} < мінімум {min_amount}")
-                contracts_precise = str(min_amount)
+            if float(contracts_precise) < template.min_amount:
+                logging.warning(f"[XT {symbol}] ⚠️ Розмір {contracts_precise} < мінімум {template.min_amount}")
+                contracts_precise = str(template.min_amount)
                 
             contracts_final = float(contracts_precise)
+            contract_size = template.contract_size
             
         except Exception as e:
             logging.warning(f"[XT {symbol}] ⚠️ Помилка market precision: {e}, використовуємо fallback")
+            if not actual_position:
+                exact_contracts = usd_amount / instant_price
             contracts_final = max(1.0, round(exact_contracts))
-        
-        logging.info(f"[XT {symbol}] 🎯 INSTANT CLOSE: exact={exact_contracts:.6f}, final={contracts_final}, instant_price=${instant_price:.6f}")
-        
-        order = xt.create_order(
-            symbol, 
-            'market', 
-            'sell' if side == "LONG" else 'buy', 
-            contracts_final,  # Точний розмір з біржі
-            None, 
-            {'type': 'swap', 'settle': 'usdt', 'reduceOnly': True}
-        )
-        logging.info(f"[XT FUTURES] Закрито {side} позицію {symbol}: {contracts_final} контрактів (notional=${contracts_final * instant_price:.2f})")
-        
-        # 🔥 РОЗРАХУНОК РЕАЛЬНОГО P&L для Telegram сповіщення
-        notional_value = contracts_final * instant_price
-        
-        # 🔥 РОБАСТНИЙ P&L РОЗРАХУНОК (як порадив architect)
-        real_pnl_dollars = 0.0
-        try:
-            # Отримуємо entry_price з live позиції замість bot.active_positions (уникаємо циклічної залежності)
-            entry_price = None
-            if actual_position and 'entryPrice' in actual_position:
-                entry_price = float(actual_position['entryPrice'])
-            elif actual_position and 'info' in actual_position and 'avgEntryPrice' in actual_position['info']:
-                entry_price = float(actual_position['info']['avgEntryPrice'])
-            
+            contract_size = 1.0
+        
+        with provider_call('xt', 'close_order'):
+            order, ack_sec = execution_engine.submit_order(
+                xt, xt.create_order,
+                symbol, 
+                'market', 
+                'sell' if side == "LONG" else 'buy', 
+                contracts_final,  # Точний розмір з біржі
+                None, 
+                {'type': 'swap', 'settle': 'usdt', 'reduceOnly': True}
+            )
+        logging.info(f"[XT FUTURES] Закрито {side} позицію {symbol} ({account}): {contracts_final} контрактів "
+                     f"(notional≈${contracts_final * contract_size * instant_price:.2f}) | submit->ack {ack_sec * 1000:.0f}мс")
+        
+        # Отримуємо entry_price з live позиції замість bot.active_positions (уникаємо циклічної залежності)
+        entry_price = None
+        if actual_position and actual_position.get('entryPrice'):
+            entry_price = float(actual_position['entryPrice'])
+        elif actual_position and (actual_position.get('info') or {}).get('avgEntryPrice'):
+            entry_price = float(actual_position['info']['avgEntryPrice'])
+        
+        def on_confirmed(filled_order):
+            # 🔥 РОБАСТНИЙ P&L: ціна виконання з підтвердженого ордера (markPrice якщо не підтверджено)
+            exit_price = float((filled_order or {}).get('average') or (filled_order or {}).get('price') or instant_price)
+            filled = float((filled_order or {}).get('filled') or contracts_final)
+            notional_value = filled * contract_size * exit_price
+            real_pnl_dollars = 0.0
             if entry_price and entry_price > 0:
-                # SIDE-AWARE P&L розрахунок (як порадив architect)
-                if side.upper() == "LONG":
-                    pnl_usd = (instant_price - entry_price) * exact_contracts
-                else:  # SHORT
-                    pnl_usd = (entry_price - instant_price) * exact_contracts
-                
-                real_pnl_dollars = pnl_usd
-                pnl_pct = (pnl_usd / notional_value) * 100 if notional_value > 0 else 0
-                
-                logging.info(f"[XT {symbol}] 💰 P&L РОБАСТНИЙ: entry=${entry_price:.6f}, exit=${instant_price:.6f}, contracts={exact_contracts:.6f}, PnL=${real_pnl_dollars:.2f} ({pnl_pct:.2f}%)")
+                # SIDE-AWARE P&L розрахунок
+                direction = 1 if side.upper() == "LONG" else -1
+                real_pnl_dollars = (exit_price - entry_price) * filled * contract_size * direction
+                pnl_pct = (real_pnl_dollars / notional_value) * 100 if notional_value > 0 else 0
+                logging.info(f"[XT {symbol}] 💰 P&L ({account}): entry=${entry_price:.6f}, exit=${exit_price:.6f}, "
+                             f"contracts={filled:.6f}, PnL=${real_pnl_dollars:.2f} ({pnl_pct:.2f}%)")
             else:
                 logging.warning(f"[XT {symbol}] ⚠️ Не вдалося отримати entry_price з live позиції")
-        except Exception as e:
-            logging.warning(f"[XT {symbol}] ⚠️ Помилка робастного P&L розрахунку: {e}")
-        
-        # Відправляємо Telegram сповіщення з реальним P&L
-        from utils import send_telegram_trade_notification
-        send_telegram_trade_notification(symbol, side, notional_value, instant_price, action="CLOSED (XT)", profit=real_pnl_dollars)
+            
+            # Відправляємо Telegram сповіщення з реальним P&L
+            from utils import send_telegram_trade_notification
+            send_telegram_trade_notification(symbol, side, notional_value, exit_price, action="CLOSED (XT)", profit=real_pnl_dollars)
         
+        execution_engine.confirm_fill_async(xt, order, symbol, on_confirmed)
         return True
     except Exception as e:
         # ДЕТАЛЬНЕ TELEGRAM СПОВІЩЕННЯ ПРО ПОМИЛКУ ЗАКРИТТЯ XT ПОЗИЦІЇ (як просив користувач)
@@ -699,16 +639,49 @@ def xt_close_position_market(xt, symbol, side, usd_amount):
                    f"📊 Символ: **{symbol.replace('/USDT:USDT', '')}** ({side})\n"\
                    f"💰 Розмір: **${usd_amount:.2f}**\n"\
                    f"📉 Ціна: **${price_display}**\n"\
-                   f"🏪 Біржа: **XT.COM**\n"\
+                   f"🏪 Біржа: **XT.COM** ({account})\n"\
                    f"❌ **ПОМИЛКА**: `{str(e)[:100]}...`\n"\
                    f"⏰ Час: **{time.strftime('%H:%M:%S')}**"
         from utils import send_telegram
         from config import TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID
         # ❌ ПОМИЛКИ НЕ ВІДПРАВЛЯЄМО В ГРУПУ - тільки в приватний бот
-        send_telegram(TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, error_msg)
+        execution_engine.notify_async(send_telegram, TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, error_msg)
         logging.error("XT Close order error: %s %s", type(e).__name__, e)
         return False
 
+def xt_close_on_accounts(clients, symbol, side, usd_amount):
+    """
+    Закриття symbol/side одночасно на кількох акаунтах: {назва: клієнт} -> {назва: результат}.
+    Кожен акаунт робить свій fetch_positions + reduce-only ордер паралельно, тож закриття на акаунті
+    з позицією не чекає roundtrip іншого акаунту
+    """
+    return execution_engine.run_concurrently({
+        name: (xt_close_position_market, client, symbol, side, usd_amount) for name, client in clients.items()})
+
+def xt_close_all_positions(clients):
+    """
+    🚨 Аварійне закриття всього: один fetch_positions на акаунт (паралельно; книга WebSocket потоку якщо здоровий),
+    потім reduce-only ордери для всіх відкритих позицій на всіх акаунтах одночасно.
+    Повертає ({(назва, symbol, side): результат}, [назви акаунтів, позиції яких не отримано])
+    """
+    fetched = execution_engine.run_concurrently({name: (xt_fetch_positions, client) for name, client in clients.items()})
+    calls = {}
+    unreachable = []
+    for name, positions in fetched.items():
+        if positions is False:
+            logging.error(f"🚨 CLOSE ALL: {name}: не вдалося отримати позиції")
+            unreachable.append(name)
+            continue
+        for pos in positions or []:
+            if _position_contracts(pos) <= 0 or not pos.get('symbol'):
+                continue
+            side = (pos.get('side') or 'long').upper()
+            calls[(name, pos['symbol'], side)] = (
+                xt_close_position_market, clients[name], pos['symbol'], side, abs(float(pos.get('notional') or 0)), pos)
+    logging.warning(f"🚨 CLOSE ALL: {len(calls)} позицій на {len(clients)} акаунтах"
+                    f"{f' (недоступні: {unreachable})' if unreachable else ''}")
+    return execution_engine.run_concurrently(calls), unreachable
+
 def get_xt_price(xt, symbol):
     """Отримання поточної ціни з XT"""
     try:
@@ -720,6 +693,15 @@ def get_xt_price(xt, symbol):
         logging.debug(f"Помилка отримання XT ціни для {symbol}: {e}")
         return None
 
+def xt_fetch_positions(xt, symbols=None):
+    """Позиції у форматі ccxt: з книги приватного WebSocket потоку, REST fetch_positions якщо потік не здоровий"""
+    stream = stream_for(xt)
+    if stream is not None:
+        return stream.book.get_positions(symbols)
+    check_deadline('xt_fetch_positions')
+    with provider_call('xt', 'fetch_positions'):
+        return xt.fetch_positions(symbols) if symbols else xt.fetch_positions()
+
 def get_xt_open_positions(xt):
     """Отримання відкритих futures позицій XT"""
     try:
@@ -727,7 +709,7 @@ def get_xt_open_positions(xt):
             return []
         
         # XT.com може вимагати інші параметри
-        positions = xt.fetch_positions()
+        positions = xt_fetch_positions(xt)
         # Фільтруємо тільки відкриті позиції з розміром > 0
         open_positions = []
         
@@ -0,0 +1,665 @@
+"""
+🧪 Симулятор XT.com futures (paper-trading) - заміна ccxt.xt у процесі
+Реалізує ту частину ccxt API, яку використовує бот: load_markets, market, fetch_ticker(s),
+fetch_order_book, fetch_positions, fetch_balance, create_order / create_market_order,
+set_leverage, set_margin_mode, amount_to_precision, fetch_listen_key.
+Ринкові ордери проходять по синтетичному стакану (VWAP рівнів), ціни рухаються
+за сценарієм або випадковим блуканням, затримки та rate-limit - як у біржі.
+Вмикається XT_SIMULATOR=true: create_xt повертає SimulatedXT замість ccxt.xt.
+Події ордерів/позицій/балансу у форматі приватного WebSocket XT передаються слухачам
+(event_listeners) - user_stream_stub.py роздає їх по WebSocket як біржа.
+"""
+
+import json
+import logging
+import math
+import random
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional, Tuple
+
+import ccxt
+
+from config import (
+    XT_SIM_SYMBOLS, XT_SIM_PRICE_SCRIPT, XT_SIM_SEED, XT_SIM_BALANCE_USDT,
+    XT_SIM_LATENCY_MS, XT_SIM_LATENCY_JITTER_MS, XT_SIM_RATE_LIMIT_PER_SEC,
+    XT_SIM_RATE_LIMIT_MODE, XT_SIM_ERROR_RATE, XT_SIM_VOLATILITY_PCT, XT_SIM_SPREAD_BPS,
+    XT_SIM_BOOK_LEVELS, XT_SIM_LEVEL_STEP_BPS, XT_SIM_LEVEL_NOTIONAL_USD, XT_SIM_TAKER_FEE
+)
+
+MAINTENANCE_MARGIN_RATE = 0.005  # Позиція ліквідується коли збиток з'їдає маржу до цього рівня
+MAX_ORDERS_KEPT = 1000  # Скільки останніх ордерів тримати для fetch_order
+
+
+# ------------------------------------------------------
+# 📈 ТРАЄКТОРІЇ ЦІН
+# ------------------------------------------------------
+class RandomWalkPath:
+    """Геометричне випадкове блукання з кроком step_sec (відтворюване за seed)"""
+
+    def __init__(self, start_price: float, volatility_pct: float = XT_SIM_VOLATILITY_PCT,
+                 seed: int = None, step_sec: float = 1.0):
+        self.sigma = volatility_pct / 100 * math.sqrt(step_sec)
+        self.step_sec = step_sec
+        self.rng = random.Random(seed)
+        self.t = 0.0
+        self.price = start_price
+
+    def price_at(self, t: float) -> float:
+        # Генеруємо кроки ліниво до потрібного моменту (минуле не зберігається)
+        while self.t + self.step_sec <= t:
+            self.price *= math.exp(self.rng.gauss(0.0, self.sigma) - 0.5 * self.sigma ** 2)
+            self.t += self.step_sec
+        return self.price
+
+
+class ScriptedPath:
+    """Лінійна інтерполяція між точками [(сек, ціна), ...]; після останньої - тримає або повторює"""
+
+    def __init__(self, points: List[Tuple[float, float]], loop: bool = False):
+        if not points:
+            raise ValueError("Сценарій ціни порожній")
+        self.points = sorted((float(t), float(p)) for t, p in points)
+        self.loop = loop
+
+    def price_at(self, t: float) -> float:
+        points = self.points
+        duration = points[-1][0]
+        if self.loop and duration > 0:
+            t = t % duration
+        if t <= points[0][0]:
+            return points[0][1]
+        for (t0, p0), (t1, p1) in zip(points, points[1:]):
+            if t0 <= t <= t1:
+                if t1 == t0:
+                    return p1
+                return p0 + (p1 - p0) * (t - t0) / (t1 - t0)
+        return points[-1][1]
+
+
+class CallablePath:
+    """Довільна функція часу: fn(сек від старту) -> ціна"""
+
+    def __init__(self, fn: Callable[[float], float]):
+        self.fn = fn
+
+    def price_at(self, t: float) -> float:
+        return self.fn(t)
+
+
+def load_price_script(path: str) -> Dict[str, ScriptedPath]:
+    """JSON {symbol: [[сек, ціна], ...]} або {symbol: {"points": [...], "loop": true}}"""
+    with open(path, 'r') as f:
+        data = json.load(f)
+    paths = {}
+    for symbol, spec in data.items():
+        if isinstance(spec, dict):
+            paths[symbol] = ScriptedPath(spec.get('points', []), bool(spec.get('loop', False)))
+        else:
+            paths[symbol] = ScriptedPath(spec)
+    return paths
+
+
+# ------------------------------------------------------
+# 🏪 СПІЛЬНИЙ РИНОК (ціни та стакани однакові для всіх акаунтів)
+# ------------------------------------------------------
+def _contract_size_for(price: float) -> float:
+    """Розмір контракту щоб 1 контракт коштував $0.01-$0.1 (як у дрібних монет XT)"""
+    return 10.0 ** (math.floor(-math.log10(price)) - 1)
+
+
+def build_market(symbol: str, price: float, max_leverage: int = 50) -> Dict:
+    """Метадані ринку у форматі ccxt (linear USDT swap)"""
+    base = symbol.split('/')[0]
+    return {
+        'id': f"{base.lower()}_usdt",
+        'symbol': symbol,
+        'base': base,
+        'quote': 'USDT',
+        'settle': 'USDT',
+        'baseId': base.lower(),
+        'quoteId': 'usdt',
+        'settleId': 'usdt',
+        'type': 'swap',
+        'spot': False,
+        'margin': False,
+        'swap': True,
+        'future': False,
+        'option': False,
+        'contract': True,
+        'linear': True,
+        'inverse': False,
+        'active': True,
+        'contractSize': _contract_size_for(price),
+        'expiry': None,
+        'expiryDatetime': None,
+        'taker': XT_SIM_TAKER_FEE,
+        'maker': XT_SIM_TAKER_FEE / 3,
+        'precision': {'amount': 1.0, 'price': 10.0 ** (math.floor(math.log10(price)) - 5)},
+        'limits': {
+            'amount': {'min': 1.0, 'max': 1e9},
+            'price': {'min': None, 'max': None},
+            'cost': {'min': None, 'max': None},
+            'leverage': {'min': 1, 'max': max_leverage}
+        }
+    }
+
+
+class SimulatedMarket:
+    """Синтетичні futures ринки XT: траєкторії цін, стакани, денна статистика"""
+
+    def __init__(self, n_symbols: int = XT_SIM_SYMBOLS, seed: int = XT_SIM_SEED,
+                 paths: Dict = None, clock: Callable[[], float] = time.time, time_scale: float = 1.0):
+        self.clock = clock
+        self.time_scale = time_scale
+        self.start_time = clock()
+        self.lock = threading.Lock()
+        self.markets: Dict[str, Dict] = {}
+        self.paths: Dict = {}
+        self.volumes: Dict[str, float] = {}
+        self.day_stats: Dict[str, List[float]] = {}  # symbol -> [open, high, low]
+
+        rng = random.Random(seed)
+        for i in range(n_symbols):
+            symbol = f"SIM{i:04d}/USDT:USDT"
+            start_price = 10.0 ** rng.uniform(-4, 3)  # $0.0001 - $1000
+            self.add_symbol(symbol, RandomWalkPath(start_price, seed=rng.randrange(2 ** 31)),
+                            volume_24h=10.0 ** rng.uniform(4.5, 8))
+
+        for symbol, path in (paths or {}).items():
+            self.add_symbol(symbol, path)
+
+        logging.info(f"🧪 Симулятор XT: {len(self.markets)} ринків (seed={seed})")
+
+    def add_symbol(self, symbol: str, path, volume_24h: float = 5_000_000.0):
+        """Додає / замінює ринок з траєкторією ціни"""
+        price = path.price_at(0.0)
+        with self.lock:
+            self.markets[symbol] = build_market(symbol, price)
+            self.paths[symbol] = path
+            self.volumes[symbol] = volume_24h
+            self.day_stats[symbol] = [price, price, price]
+
+    def elapsed(self) -> float:
+        return (self.clock() - self.start_time) * self.time_scale
+
+    def mid_price(self, symbol: str) -> float:
+        """Поточна середня ціна символу (оновлює денні high/low)"""
+        with self.lock:
+            price = self.paths[symbol].price_at(self.elapsed())
+            stats = self.day_stats[symbol]
+            stats[1] = max(stats[1], price)
+            stats[2] = min(stats[2], price)
+            return price
+
+    def order_book(self, symbol: str, depth: int = XT_SIM_BOOK_LEVELS) -> Dict:
+        """Синтетичний стакан навколо mid: крок XT_SIM_LEVEL_STEP_BPS, обсяг росте з глибиною"""
+        mid = self.mid_price(symbol)
+        contract_value = self.markets[symbol]['contractSize'] * mid
+        half_spread = XT_SIM_SPREAD_BPS / 20000
+        step = XT_SIM_LEVEL_STEP_BPS / 10000
+        bids, asks = [], []
+        for level in range(min(depth, XT_SIM_BOOK_LEVELS)):
+            offset = half_spread + level * step
+            contracts = float(math.floor(XT_SIM_LEVEL_NOTIONAL_USD * (1.2 ** level) / contract_value) or 1)
+            bids.append([mid * (1 - offset), contracts])
+            asks.append([mid * (1 + offset), contracts])
+        now_ms = int(self.clock() * 1000)
+        return {'symbol': symbol, 'bids': bids, 'asks': asks, 'timestamp': now_ms,
+                'datetime': _iso(now_ms), 'nonce': None}
+
+    def ticker(self, symbol: str) -> Dict:
+        book = self.order_book(symbol, 1)
+        mid = (book['bids'][0][0] + book['asks'][0][0]) / 2
+        open_price, high, low = self.day_stats[symbol]
+        quote_volume = self.volumes[symbol]
+        return {
+            'symbol': symbol,
+            'timestamp': book['timestamp'],
+            'datetime': book['datetime'],
+            'last': mid,
+            'close': mid,
+            'bid': book['bids'][0][0],
+            'bidVolume': book['bids'][0][1],
+            'ask': book['asks'][0][0],
+            'askVolume': book['asks'][0][1],
+            'open': open_price,
+            'high': high,
+            'low': low,
+            'change': mid - open_price,
+            'percentage': (mid - open_price) / open_price * 100 if open_price else 0.0,
+            'quoteVolume': quote_volume,
+            'baseVolume': quote_volume / mid if mid else 0.0,
+            'info': {'simulated': True}
+        }
+
+    def walk_book(self, symbol: str, side: str, amount: float) -> Tuple[float, int]:
+        """Ринкове виконання amount контрактів по стакану: (середня ціна, рівнів з'їдено)"""
+        book = self.order_book(symbol)
+        levels = book['asks'] if side == 'buy' else book['bids']
+        remaining = amount
+        cost = 0.0
+        used = 0
+        for price, size in levels:
+            take = min(remaining, size)
+            cost += take * price
+            remaining -= take
+            used += 1
+            if remaining <= 0:
+                break
+        if remaining > 0:
+            # Глибше за стакан - добираємо за гіршою ціною ще на крок далі
+            worst = levels[-1][0] * (1 + XT_SIM_LEVEL_STEP_BPS / 10000 * (1 if side == 'buy' else -1))
+            cost += remaining * worst
+            used += 1
+        return cost / amount, used
+
+
+def _iso(ms: int) -> str:
+    return time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(ms / 1000)) + f".{ms % 1000:03d}Z"
+
+
+# ------------------------------------------------------
+# 👤 АКАУНТ (ccxt-сумісний клієнт)
+# ------------------------------------------------------
+class SimulatedXT:
+    """
+    Симульований акаунт XT futures з API як у ccxt.xt (hedge mode: окремі LONG/SHORT позиції).
+    Кожен виклик проходить через затримку, rate-limit та ін'єкцію мережевих помилок.
+    """
+
+    id = 'xt'
+    is_simulator = True
+
+    def __init__(self, market: SimulatedMarket, account_name: str = "Account 1",
+                 balance_usdt: float = XT_SIM_BALANCE_USDT, latency_ms: float = XT_SIM_LATENCY_MS,
+                 latency_jitter_ms: float = XT_SIM_LATENCY_JITTER_MS,
+                 rate_limit_per_sec: float = XT_SIM_RATE_LIMIT_PER_SEC,
+                 rate_limit_mode: str = XT_SIM_RATE_LIMIT_MODE, error_rate: float = XT_SIM_ERROR_RATE,
+                 taker_fee: float = XT_SIM_TAKER_FEE, default_leverage: int = 10):
+        self.sim = market
+        self.account_name = account_name
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.rate_limit_per_sec = rate_limit_per_sec
+        self.rate_limit_mode = rate_limit_mode
+        self.error_rate = error_rate
+        self.taker_fee = taker_fee
+        self.default_leverage = default_leverage
+        self.session = None  # Немає HTTP - create_xt пропускає налаштування пулу
+
+        self.lock = threading.Lock()
+        self.wallet_balance = balance_usdt
+        self.positions: Dict[Tuple[str, str], Dict] = {}  # (symbol, 'long'|'short') -> позиція
+        self.leverages: Dict[Tuple[str, str], int] = {}
+        self.margin_modes: Dict[str, str] = {}
+        self.orders: Dict[str, Dict] = {}
+        self.realized_pnl = 0.0
+        self.fees_paid = 0.0
+        self.listen_key = f"sim-{uuid.uuid4().hex[:16]}"
+        self.event_listeners: List[Callable[[str, str, Dict], None]] = []  # (listenKey, topic, data)
+
+        self.call_counts: Dict[str, int] = {}
+        self.rate_limited = 0
+        self._tokens = rate_limit_per_sec
+        self._tokens_at = time.monotonic()
+        self._rng = random.Random()
+
+    # ---------- інфраструктура виклику ----------
+    def _take_token(self) -> bool:
+        now = time.monotonic()
+        self._tokens = min(self.rate_limit_per_sec, self._tokens + (now - self._tokens_at) * self.rate_limit_per_sec)
+        self._tokens_at = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    def _call(self, method: str):
+        """Облік, rate-limit, затримка мережі та випадкові збої для кожного методу API"""
+        with self.lock:
+            self.call_counts[method] = self.call_counts.get(method, 0) + 1
+            if self.rate_limit_per_sec > 0:
+                while not self._take_token():
+                    if self.rate_limit_mode != 'throttle':
+                        self.rate_limited += 1
+                        raise ccxt.RateLimitExceeded(f"xt {method}: too many requests (simulator)")
+                    time.sleep(1.0 / self.rate_limit_per_sec)
+
+        delay = self.latency_ms + self._rng.uniform(0, self.latency_jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+        if self.error_rate and self._rng.random() < self.error_rate:
+            raise ccxt.NetworkError(f"xt {method}: simulated network error")
+
+    def _require_market(self, symbol: str) -> Dict:
+        market = self.sim.markets.get(symbol)
+        if market is None:
+            raise ccxt.BadSymbol(f"xt does not have market symbol {symbol}")
+        return market
+
+    # ---------- ринки ----------
+    @property
+    def markets(self) -> Dict[str, Dict]:
+        return self.sim.markets
+
+    @property
+    def symbols(self) -> List[str]:
+        return list(self.sim.markets)
+
+    def load_markets(self, reload: bool = False, params: Dict = None) -> Dict[str, Dict]:
+        self._call('load_markets')
+        return dict(self.sim.markets)
+
+    def set_markets(self, markets, currencies=None):
+        """Ринки симулятора фіксовані - зовнішні метадані ігноруємо"""
+        return self.sim.markets
+
+    def market(self, symbol: str) -> Dict:
+        return self._require_market(symbol)
+
+    def amount_to_precision(self, symbol: str, amount) -> str:
+        step = self._require_market(symbol)['precision']['amount']
+        return f"{math.floor(float(amount) / step + 1e-9) * step:g}"
+
+    def price_to_precision(self, symbol: str, price) -> str:
+        step = self._require_market(symbol)['precision']['price']
+        return f"{round(float(price) / step) * step:.12g}"
+
+    # ---------- ринкові дані ----------
+    def fetch_ticker(self, symbol: str, params: Dict = None) -> Dict:
+        self._call('fetch_ticker')
+        self._require_market(symbol)
+        return self.sim.ticker(symbol)
+
+    def fetch_tickers(self, symbols: List[str] = None, params: Dict = None) -> Dict[str, Dict]:
+        self._call('fetch_tickers')
+        return {s: self.sim.ticker(s) for s in (symbols or self.sim.markets) if s in self.sim.markets}
+
+    def fetch_order_book(self, symbol: str, limit: int = None, params: Dict = None) -> Dict:
+        self._call('fetch_order_book')
+        self._require_market(symbol)
+        return self.sim.order_book(symbol, limit or XT_SIM_BOOK_LEVELS)
+
+    # ---------- налаштування акаунту ----------
+    def set_leverage(self, leverage, symbol: str = None, params: Dict = None):
+        self._call('set_leverage')
+        market = self._require_market(symbol)
+        max_leverage = market['limits']['leverage']['max']
+        if not 1 <= float(leverage) <= max_leverage:
+            raise ccxt.BadRequest(f"xt leverage {leverage} out of range 1-{max_leverage}")
+        sides = [str((params or {}).get('positionSide', '')).lower()] if (params or {}).get('positionSide') else ['long', 'short']
+        with self.lock:
+            for side in sides:
+                self.leverages[(symbol, side)] = int(leverage)
+        return {'symbol': symbol, 'leverage': int(leverage), 'info': {}}
+
+    def set_margin_mode(self, margin_mode: str, symbol: str = None, params: Dict = None):
+        self._call('set_margin_mode')
+        self.margin_modes[symbol] = margin_mode
+        return {'symbol': symbol, 'marginMode': margin_mode, 'info': {}}
+
+    # ---------- ордери ----------
+    def create_market_order(self, symbol: str, side: str, amount, price=None, params: Dict = None) -> Dict:
+        return self.create_order(symbol, 'market', side, amount, price, params)
+
+    def create_order(self, symbol: str, type: str, side: str, amount, price=None, params: Dict = None) -> Dict:
+        self._call('create_order')
+        if type != 'market':
+            raise ccxt.NotSupported("xt simulator supports only market orders")
+        market = self._require_market(symbol)
+        params = params or {}
+        side = side.lower()
+        amount = float(amount)
+        if amount < market['limits']['amount']['min']:
+            raise ccxt.InvalidOrder(f"xt amount {amount} < min {market['limits']['amount']['min']}")
+
+        reduce_only = bool(params.get('reduceOnly'))
+        # Hedge mode: buy відкриває LONG / закриває SHORT, sell - навпаки
+        if params.get('positionSide'):
+            position_side = str(params['positionSide']).lower()
+        elif reduce_only:
+            position_side = 'short' if side == 'buy' else 'long'
+        else:
+            position_side = 'long' if side == 'buy' else 'short'
+
+        with self.lock:
+            key = (symbol, position_side)
+            position = self.positions.get(key)
+            if reduce_only:
+                if not position:
+                    raise ccxt.InvalidOrder(f"xt reduceOnly: no {position_side} position for {symbol}")
+                amount = min(amount, position['contracts'])
+
+            fill_price, levels = self.sim.walk_book(symbol, side, amount)
+            notional = amount * market['contractSize'] * fill_price
+            fee = notional * self.taker_fee
+
+            if reduce_only:
+                realized = self._reduce_position(key, amount, fill_price)
+            else:
+                leverage = self.leverages.get(key, self.default_leverage)
+                margin = notional / leverage
+                if self._free_balance() < margin + fee:
+                    raise ccxt.InsufficientFunds(
+                        f"xt insufficient balance: need {margin + fee:.2f} USDT, free {self._free_balance():.2f}")
+                self._increase_position(key, amount, fill_price, leverage, margin)
+                realized = 0.0
+
+            self.wallet_balance += realized - fee
+            self.fees_paid += fee
+            timestamp = int(self.sim.clock() * 1000)
+            order = {
+                'id': uuid.uuid4().hex[:16],
+                'clientOrderId': params.get('clientOrderId'),
+                'timestamp': timestamp,
+                'datetime': _iso(timestamp),
+                'symbol': symbol,
+                'type': 'market',
+                'side': side,
+                'reduceOnly': reduce_only,
+                'price': fill_price,
+                'average': fill_price,
+                'amount': amount,
+                'filled': amount,
+                'remaining': 0.0,
+                'cost': notional,
+                'status': 'closed',
+                'fee': {'cost': fee, 'currency': 'USDT'},
+                'trades': [],
+                'info': {'positionSide': position_side.upper(), 'levels': levels, 'realizedPnl': realized}
+            }
+            self.orders[order['id']] = order
+            if len(self.orders) > MAX_ORDERS_KEPT:
+                self.orders.pop(next(iter(self.orders)))
+            if self.event_listeners:
+                self._emit('order', self._raw_order(order, market['id'], position_side))
+                self._emit('position', self._raw_position(key))
+                self._emit('balance', self._raw_balance())
+        return order
+
+    def fetch_order(self, id: str, symbol: str = None, params: Dict = None) -> Dict:
+        self._call('fetch_order')
+        order = self.orders.get(id)
+        if order is None:
+            raise ccxt.OrderNotFound(f"xt order {id} not found")
+        return order
+
+    def _increase_position(self, key, amount: float, price: float, leverage: int, margin: float):
+        position = self.positions.get(key)
+        if position is None:
+            self.positions[key] = {'contracts': amount, 'entry_price': price, 'leverage': leverage,
+                                   'margin': margin, 'opened_at': self.sim.clock()}
+            return
+        total = position['contracts'] + amount
+        position['entry_price'] = (position['entry_price'] * position['contracts'] + price * amount) / total
+        position['contracts'] = total
+        position['margin'] += margin
+
+    def _reduce_position(self, key, amount: float, price: float) -> float:
+        """Зменшує позицію, повертає реалізований P&L"""
+        symbol, position_side = key
+        position = self.positions[key]
+        contract_size = self.sim.markets[symbol]['contractSize']
+        direction = 1 if position_side == 'long' else -1
+        realized = (price - position['entry_price']) * amount * contract_size * direction
+        fraction = amount / position['contracts']
+        position['margin'] -= position['margin'] * fraction
+        position['contracts'] -= amount
+        if position['contracts'] <= 1e-12:
+            del self.positions[key]
+        self.realized_pnl += realized
+        return realized
+
+    # ---------- позиції та баланс ----------
+    def _unrealized(self, key, position: Dict, mark_price: float) -> float:
+        symbol, position_side = key
+        direction = 1 if position_side == 'long' else -1
+        contract_size = self.sim.markets[symbol]['contractSize']
+        return (mark_price - position['entry_price']) * position['contracts'] * contract_size * direction
+
+    def _free_balance(self) -> float:
+        used = sum(p['margin'] for p in self.positions.values())
+        return self.wallet_balance - used
+
+    def _check_liquidations(self):
+        """Ізольована маржа: збиток >= маржа - підтримуюча маржа → позиція ліквідується за mark"""
+        for key, position in list(self.positions.items()):
+            mark = self.sim.mid_price(key[0])
+            unrealized = self._unrealized(key, position, mark)
+            notional = position['contracts'] * self.sim.markets[key[0]]['contractSize'] * mark
+            if unrealized <= -(position['margin'] - notional * MAINTENANCE_MARGIN_RATE):
+                self.wallet_balance -= position['margin']
+                self.realized_pnl -= position['margin']
+                del self.positions[key]
+                if self.event_listeners:
+                    self._emit('position', self._raw_position(key))
+                    self._emit('balance', self._raw_balance())
+                logging.warning(f"🧪 [{self.account_name}] Симулятор: ліквідація {key[0]} {key[1].upper()} @ {mark:.6f}")
+
+    def _position_dict(self, key, position: Dict) -> Dict:
+        symbol, position_side = key
+        contract_size = self.sim.markets[symbol]['contractSize']
+        mark = self.sim.mid_price(symbol)
+        unrealized = self._unrealized(key, position, mark)
+        notional = position['contracts'] * contract_size * mark
+        direction = 1 if position_side == 'long' else -1
+        timestamp = int(self.sim.clock() * 1000)
+        return {
+            'symbol': symbol,
+            'side': position_side,
+            'contracts': position['contracts'],
+            'contractSize': contract_size,
+            'entryPrice': position['entry_price'],
+            'markPrice': mark,
+            'notional': notional,
+            'leverage': position['leverage'],
+            'collateral': position['margin'],
+            'initialMargin': position['margin'],
+            'maintenanceMargin': notional * MAINTENANCE_MARGIN_RATE,
+            'unrealizedPnl': unrealized,
+            'percentage': unrealized / position['margin'] * 100 if position['margin'] else 0.0,
+            'liquidationPrice': position['entry_price'] * (1 - direction / position['leverage']),
+            'marginMode': self.margin_modes.get(symbol, 'isolated'),
+            'hedged': True,
+            'timestamp': timestamp,
+            'datetime': _iso(timestamp),
+            'info': {'avgEntryPrice': position['entry_price'], 'positionSide': position_side.upper(),
+                     'openedAt': position['opened_at']}
+        }
+
+    def fetch_positions(self, symbols: List[str] = None, params: Dict = None) -> List[Dict]:
+        self._call('fetch_positions')
+        # fetch_positions(['USDT'], {'settle': 'usdt'}) - фільтр по settle, не по символу
+        wanted = {s for s in (symbols or []) if s in self.sim.markets}
+        with self.lock:
+            self._check_liquidations()
+            return [self._position_dict(key, position) for key, position in self.positions.items()
+                    if not wanted or key[0] in wanted]
+
+    def fetch_balance(self, params: Dict = None) -> Dict:
+        self._call('fetch_balance')
+        with self.lock:
+            self._check_liquidations()
+            used = sum(p['margin'] for p in self.positions.values())
+            unrealized = sum(self._unrealized(key, p, self.sim.mid_price(key[0])) for key, p in self.positions.items())
+            total = self.wallet_balance + unrealized
+            usdt = {'free': total - used, 'used': used, 'total': total}
+        return {'USDT': usdt, 'free': {'USDT': usdt['free']}, 'used': {'USDT': used},
+                'total': {'USDT': total}, 'info': {'simulated': True}}
+
+    # ---------- приватний WebSocket потік ----------
+    def fetch_listen_key(self) -> str:
+        self._call('fetch_listen_key')
+        return self.listen_key
+
+    def _emit(self, topic: str, data: Dict):
+        for listener in list(self.event_listeners):
+            try:
+                listener(self.listen_key, topic, data)
+            except Exception as e:
+                logging.debug(f"🧪 [{self.account_name}] Слухач подій {topic}: {e}")
+
+    def _raw_order(self, order: Dict, market_id: str, position_side: str) -> Dict:
+        return {'symbol': market_id, 'orderId': order['id'], 'orderType': 'MARKET',
+                'orderSide': order['side'].upper(), 'positionSide': position_side.upper(),
+                'origQty': f"{order['amount']:g}", 'executedQty': f"{order['filled']:g}",
+                'avgPrice': str(order['average']), 'price': '0', 'state': 'FILLED',
+                'createdTime': order['timestamp']}
+
+    def _raw_position(self, key) -> Dict:
+        """Позиція як у топіку position (positionSize=0 - позицію закрито)"""
+        symbol, position_side = key
+        position = self.positions.get(key) or {}
+        return {'symbol': self.sim.markets[symbol]['id'], 'contractType': 'PERPETUAL',
+                'positionType': 'ISOLATED' if self.margin_modes.get(symbol, 'isolated') == 'isolated' else 'CROSSED',
+                'positionSide': position_side.upper(), 'positionSize': f"{position.get('contracts', 0):g}",
+                'entryPrice': str(position.get('entry_price', 0)), 'isolatedMargin': str(position.get('margin', 0)),
+                'leverage': position.get('leverage', self.default_leverage), 'realizedProfit': str(self.realized_pnl)}
+
+    def _raw_balance(self) -> Dict:
+        used = sum(p['margin'] for p in self.positions.values())
+        return {'coin': 'usdt', 'underlyingType': 1, 'walletBalance': str(self.wallet_balance),
+                'isolatedMargin': str(used), 'crossedMargin': '0', 'openOrderMarginFrozen': '0',
+                'availableBalance': str(self.wallet_balance - used)}
+
+    def stats(self) -> Dict:
+        """Лічильники для навантажувальних тестів"""
+        with self.lock:
+            return {
+                'account': self.account_name,
+                'calls': dict(self.call_counts),
+                'rate_limited': self.rate_limited,
+                'open_positions': len(self.positions),
+                'orders': len(self.orders),
+                'wallet_balance': self.wallet_balance,
+                'realized_pnl': self.realized_pnl,
+                'fees_paid': self.fees_paid
+            }
+
+
+# Спільний ринок для всіх симульованих акаунтів процесу
+_shared_market: Optional[SimulatedMarket] = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_market() -> SimulatedMarket:
+    """Ринок з config (XT_SIM_SYMBOLS + сценарій XT_SIM_PRICE_SCRIPT), створюється один раз"""
+    global _shared_market
+    with _shared_lock:
+        if _shared_market is None:
+            paths = {}
+            if XT_SIM_PRICE_SCRIPT:
+                try:
+                    paths = load_price_script(XT_SIM_PRICE_SCRIPT)
+                    logging.info(f"🧪 Сценарій цін {XT_SIM_PRICE_SCRIPT}: {len(paths)} символів")
+                except Exception as e:
+                    logging.error(f"❌ Помилка читання сценарію цін {XT_SIM_PRICE_SCRIPT}: {e}")
+            _shared_market = SimulatedMarket(paths=paths)
+        return _shared_market
+
+
+def create_simulated_xt(account_name: str = "Account 1", **kwargs) -> SimulatedXT:
+    """Новий симульований акаунт на спільному ринку"""
+    return SimulatedXT(get_shared_market(), account_name=account_name, **kwargs)